@@ -0,0 +1,244 @@
+"""
+Decision Orchestrator.
+
+Runs the LLM trading-decision providers concurrently instead of one after
+another, so a decision cycle takes as long as the slowest provider rather
+than the sum of all of them. Every provider gets a deadline (its own
+timeout, capped by the cycle budget); a provider that misses it is
+recorded as a timeout and the cycle moves on without it.
+
+Outcomes are handed to an optional callback as they arrive, so callers can
+act on a partial result (such as a quorum that the remaining providers
+can no longer overturn) before the slowest provider answers.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Outcome statuses
+STATUS_OK = 'ok'
+STATUS_ERROR = 'error'
+STATUS_TIMEOUT = 'timeout'
+
+# Decision reported for providers that failed or timed out
+ERROR_DECISION = 'ERROR'
+
+
+@dataclass
+class ProviderOutcome:
+    """Result of one provider in one decision cycle."""
+
+    name: str
+    decision: str
+    status: str
+    latency_s: float
+    error: Optional[str] = None
+
+
+@dataclass
+class CycleResult:
+    """Outcomes of every provider in one decision cycle."""
+
+    outcomes: Dict[str, ProviderOutcome] = field(default_factory=dict)
+    elapsed_s: float = 0.0
+
+    @property
+    def decisions(self) -> Dict[str, str]:
+        """Decision per provider (``ERROR`` for failures and timeouts)."""
+        return {name: outcome.decision for name, outcome in self.outcomes.items()}
+
+
+def majority_quorum(providers: int) -> int:
+    """Smallest strict majority of ``providers``."""
+    return providers // 2 + 1
+
+
+def validate_quorum(quorum: int, providers: int) -> int:
+    """Check that ``quorum`` is a strict majority of ``providers`` and reachable.
+
+    A smaller quorum could be reached by BUY and SELL in the same cycle, so
+    an early consensus could still be overturned.
+
+    Raises:
+        ValueError: Unless ``providers // 2 < quorum <= providers``
+    """
+    if not providers // 2 < quorum <= providers:
+        raise ValueError(
+            f"Quorum {quorum} must be a strict majority of the {providers} providers "
+            f"({majority_quorum(providers)}-{providers})")
+    return quorum
+
+
+def find_consensus(decisions: Dict[str, str], quorum: int) -> Optional[str]:
+    """BUY or SELL once ``quorum`` providers agree on it, else None.
+
+    ``quorum`` must be a strict majority (see ``validate_quorum``), so at
+    most one side can reach it.
+    """
+    buy_votes = sum(1 for d in decisions.values() if d == 'BUY')
+    sell_votes = sum(1 for d in decisions.values() if d == 'SELL')
+
+    if buy_votes >= quorum:
+        return 'BUY'
+    elif sell_votes >= quorum:
+        return 'SELL'
+    return None
+
+
+def early_consensus(
+    cycle: CycleResult,
+    providers: Iterable[str],
+    quorum: int
+) -> Optional[Tuple[str, List[str]]]:
+    """The consensus of a cycle that is still running, if already decided.
+
+    With a strict-majority ``quorum`` the providers still pending cannot
+    overturn it, so it can be published early.
+
+    Returns:
+        (consensus, names of the pending providers), or None if the cycle
+        is complete or no side has reached the quorum yet
+    """
+    pending = [name for name in providers if name not in cycle.outcomes]
+    if not pending:
+        return None
+    consensus = find_consensus(cycle.decisions, quorum)
+    if consensus is None:
+        return None
+    return consensus, pending
+
+
+def settle_partial(data: Dict) -> Optional[Dict]:
+    """Copy of a provisional (``partial``) snapshot marked final, else None.
+
+    A cycle that fails after publishing an early consensus must not leave
+    clients waiting for the pending models forever.
+    """
+    if not data.get('partial'):
+        return None
+    return {**data, 'partial': False, 'pending_models': []}
+
+
+class DecisionOrchestrator:
+    """
+    Fan-out of one decision request to several providers.
+
+    Providers are plain callables taking the keyword arguments passed to
+    ``run`` (such as ``LLMProvider.decide`` and a ``context``) and returning
+    a decision string. Calls run
+    on a thread pool; a call that times out cannot be cancelled, so until it
+    returns its provider is reported as timed out without being called
+    again, which bounds the number of threads a hung provider can hold.
+    """
+
+    def __init__(
+        self,
+        providers: Dict[str, Callable[..., str]],
+        provider_timeout_s: float = 20,
+        cycle_budget_s: float = 30,
+        provider_timeouts: Optional[Dict[str, float]] = None
+    ):
+        """
+        Initialize the orchestrator.
+
+        Args:
+            providers: Decision callable per provider name
+            provider_timeout_s: Default deadline of a provider call
+            cycle_budget_s: Deadline of the whole cycle
+            provider_timeouts: Per-provider deadline overrides
+        """
+        self.providers = dict(providers)
+        self.provider_timeout_s = provider_timeout_s
+        self.cycle_budget_s = cycle_budget_s
+        self.provider_timeouts = dict(provider_timeouts or {})
+        self._executor = ThreadPoolExecutor(
+            max_workers=len(self.providers), thread_name_prefix="llm-provider")
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
+
+    def _call(self, name: str, market_data: Dict, started: float) -> ProviderOutcome:
+        """Run one provider on a worker thread and time it."""
+        try:
+            decision = self.providers[name](**market_data)
+            return ProviderOutcome(name, decision, STATUS_OK, time.monotonic() - started)
+        except Exception as e:
+            return ProviderOutcome(
+                name, ERROR_DECISION, STATUS_ERROR, time.monotonic() - started, str(e))
+
+    def run(
+        self,
+        on_outcome: Optional[Callable[[ProviderOutcome, CycleResult], None]] = None,
+        **market_data
+    ) -> CycleResult:
+        """
+        Ask every provider for a decision concurrently.
+
+        Args:
+            on_outcome: Called on this thread with each outcome as it
+                arrives (successes, errors and timeouts alike) and the
+                result so far
+            **market_data: Keyword arguments passed to every provider
+
+        Returns:
+            CycleResult with one outcome per provider
+        """
+        started = time.monotonic()
+        cycle_deadline = started + self.cycle_budget_s
+        result = CycleResult()
+
+        def record(outcome: ProviderOutcome) -> None:
+            result.outcomes[outcome.name] = outcome
+            if on_outcome is not None:
+                on_outcome(outcome, result)
+
+        pending: Dict[Future, str] = {}
+        with self._lock:
+            for name in self.providers:
+                previous = self._in_flight.get(name)
+                if previous is not None and not previous.done():
+                    record(ProviderOutcome(
+                        name, ERROR_DECISION, STATUS_TIMEOUT, 0.0,
+                        "previous call still running"))
+                    continue
+                future = self._in_flight[name] = \
+                    self._executor.submit(self._call, name, market_data, started)
+                pending[future] = name
+
+        deadlines = {
+            name: min(started + self.provider_timeouts.get(name, self.provider_timeout_s),
+                      cycle_deadline)
+            for name in pending.values()
+        }
+        # Collect outcomes in the order they complete
+        while pending:
+            next_deadline = min(deadlines[name] for name in pending.values())
+            done, _ = wait(
+                pending, timeout=max(next_deadline - time.monotonic(), 0),
+                return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.pop(future)
+                record(future.result())
+            now = time.monotonic()
+            for future, name in list(pending.items()):
+                if now >= deadlines[name]:
+                    pending.pop(future)
+                    record(ProviderOutcome(
+                        name, ERROR_DECISION, STATUS_TIMEOUT, now - started,
+                        f"no decision within {deadlines[name] - started:.1f}s"))
+
+        # Report providers in their configured order
+        result.outcomes = {name: result.outcomes[name] for name in self.providers}
+        result.elapsed_s = time.monotonic() - started
+        for outcome in result.outcomes.values():
+            if outcome.status != STATUS_OK:
+                logging.warning(
+                    f"[orchestrator] {outcome.name} {outcome.status}: {outcome.error}")
+        return result
+
+    def close(self) -> None:
+        """Stop the worker threads (without waiting for hung calls)."""
+        self._executor.shutdown(wait=False)
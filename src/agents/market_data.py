@@ -3,16 +3,34 @@ Market Data Agent.
 
 This module handles fetching and processing market data from Etherscan.
 It includes caching and rate limiting to avoid API throttling.
+
+The ETH price, gas prices and Fear & Greed Index are fetched concurrently,
+each with a deadline, through one shared set of API clients. Concurrent
+callers that need fresh data share a single in-flight fetch.
 """
 
+import logging
+import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
 from dataclasses import dataclass
-from typing import Dict, Optional, Tuple
+from typing import Callable, Dict, Optional, TypeVar
 
+from src.cache import SingleFlight
 from src.tools.etherscan_api import EtherscanClient
 from src.tools.fear_greed_api import FearGreedClient
 from src.state import TradingState
 
+T = TypeVar('T')
+
+# Used when a source times out before any data was fetched
+DEFAULT_PRICE = (0.0, 0.0, 0.0, 0.0)
+DEFAULT_SENTIMENT = {
+    "fear_greed_value": "50",  # Neutral value
+    "fear_greed_sentiment": "neutral"
+}
+
 
 @dataclass
 class MarketData:
@@ -35,11 +53,30 @@ class MarketDataAgent:
     It includes caching to prevent excessive API calls.
     """
 
-    def __init__(self, state: Optional[TradingState] = None):
-        """Initialize the market data agent."""
+    def __init__(
+        self,
+        state: Optional[TradingState] = None,
+        source_timeout_s: Optional[float] = None
+    ):
+        """
+        Initialize the market data agent.
+
+        Args:
+            state: Trading state to update with every fetch
+            source_timeout_s: Deadline of each source in one fetch
+                (defaults to MARKET_DATA_SOURCE_TIMEOUT_S)
+        """
         self.etherscan = EtherscanClient()
         self.fear_greed = FearGreedClient()
         self.state = state
+        self.source_timeout_s = source_timeout_s if source_timeout_s is not None else \
+            float(os.getenv("MARKET_DATA_SOURCE_TIMEOUT_S", "8"))
+
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="market-data")
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._last: Optional[MarketData] = None
+        self._last_fetched = 0.0
 
     def update_market_data(self) -> MarketData:
         """
@@ -50,28 +87,84 @@ class MarketDataAgent:
         """
         return self.get_market_data()
 
-    def get_market_data(self) -> MarketData:
+    def get_market_data(self, max_age_s: float = 0) -> MarketData:
         """
         Get current market data including price, volume, and sentiment.
 
+        Args:
+            max_age_s: Return the last fetched data if it is at most this
+                old instead of fetching again
+
         Returns:
             MarketData object containing current market metrics
         """
-        # Get ETH price data from Etherscan
-        eth_price, eth_volume, eth_high, eth_low = self.etherscan.get_eth_price()
+        with self._lock:
+            if self._last is not None and time.monotonic() - self._last_fetched <= max_age_s:
+                return self._last
+        # Callers arriving while a fetch is running share its result
+        return self._flight.do('market_data', self._fetch_market_data)
 
-        # Get gas prices
-        gas_prices = self.etherscan.get_gas_prices()
+    def get_gas_prices(self) -> Optional[Dict[str, int]]:
+        """
+        Get current gas prices from the shared Etherscan client.
 
-        # Get market sentiment
-        sentiment = self.fear_greed.get_fear_greed_index()
+        Returns:
+            Dictionary with gas prices (low, standard, fast) or None on error
+        """
+        def fetch() -> Optional[Dict[str, int]]:
+            last = self._last_market_data()
+            return self._with_deadline(
+                self.etherscan.get_gas_prices, last.gas_prices if last else None, 'gas prices')
+
+        return self._flight.do('gas_prices', fetch)
+
+    def _last_market_data(self) -> Optional[MarketData]:
+        """The last fetched market data, if any."""
+        with self._lock:
+            return self._last
+
+    def _with_deadline(self, fetch: Callable[[], T], fallback: T, source: str) -> T:
+        """Run ``fetch`` on the pool; past the deadline, return ``fallback``."""
+        future = self._executor.submit(fetch)
+        return self._result(future, time.monotonic() + self.source_timeout_s, fallback, source)
+
+    def _result(self, future, deadline: float, fallback: T, source: str) -> T:
+        """Result of ``future`` if it succeeds by ``deadline``, else ``fallback``."""
+        try:
+            return future.result(timeout=max(deadline - time.monotonic(), 0))
+        except TimeoutError:
+            logging.warning(
+                f"[market data] {source} took over {self.source_timeout_s}s, using last known value")
+            return fallback
+        except Exception as e:
+            logging.error(f"[market data] {source} failed ({e}), using last known value")
+            return fallback
+
+    def _fetch_market_data(self) -> MarketData:
+        """Fetch all three sources concurrently and update the state."""
+        last = self._last_market_data()
+        deadline = time.monotonic() + self.source_timeout_s
+        price_future = self._executor.submit(self.etherscan.get_eth_price)
+        gas_future = self._executor.submit(self.etherscan.get_gas_prices)
+        sentiment_future = self._executor.submit(self.fear_greed.get_fear_greed_index)
+
+        # All three started together and share one deadline
+        eth_price, eth_volume, eth_high, eth_low = self._result(
+            price_future, deadline,
+            (last.eth_price, last.eth_volume_24h, last.eth_high_24h, last.eth_low_24h)
+            if last else DEFAULT_PRICE,
+            'ETH price')
+        gas_prices = self._result(gas_future, deadline, last.gas_prices if last else None, 'gas prices')
+        sentiment = self._result(
+            sentiment_future, deadline, last.market_sentiment if last else dict(DEFAULT_SENTIMENT),
+            'Fear & Greed Index')
 
         # Update state if available
         if self.state:
             self.state.update_market_data(
                 eth_price, eth_volume, eth_high, eth_low, gas_prices, sentiment)
 
-        return MarketData(
+        market_data = MarketData(
             eth_price=eth_price,
             eth_volume_24h=eth_volume,
             eth_high_24h=eth_high,
@@ -79,3 +172,7 @@ class MarketDataAgent:
             gas_prices=gas_prices,
             market_sentiment=sentiment
         )
+        with self._lock:
+            self._last = market_data
+            self._last_fetched = time.monotonic()
+        return market_data
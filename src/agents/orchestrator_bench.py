@@ -0,0 +1,93 @@
+"""
+Latency benchmark of the decision orchestrator with mock providers.
+
+Mock providers sleep for a set latency (and optionally fail) instead of
+calling a model, so the cycle time of the orchestrator can be compared with
+asking the same providers one after another:
+
+    python -m src.agents.orchestrator_bench
+    python -m src.agents.orchestrator_bench --latencies 0.8,1.2,1.5 --latencies 1,1,fail
+
+A latency of ``fail`` raises after a short delay, ``hang`` never answers
+within the deadline. Each scenario runs twice on the same orchestrator, so
+the second run shows a hung provider being skipped.
+"""
+
+import argparse
+import time
+from typing import Callable, Dict, List, Optional
+
+from src.agents.decision_orchestrator import DecisionOrchestrator
+
+DEFAULT_SCENARIOS = ['0.8,1.2,1.5', '0.3,0.3,2.0', '1.0,1.0,1.0', '0.5,fail,hang']
+# Delay before a failing mock provider raises
+FAIL_AFTER_S = 0.2
+
+
+def mock_provider(spec: str, timeout_s: float) -> Callable[..., str]:
+    """A provider that answers HOLD after ``spec`` seconds, or fails or hangs."""
+    if spec == 'fail':
+        def provider(**_) -> str:
+            time.sleep(FAIL_AFTER_S)
+            raise ConnectionError("mock upstream unavailable")
+    elif spec == 'hang':
+        def provider(**_) -> str:
+            time.sleep(timeout_s * 1.5)
+            return 'HOLD'
+    else:
+        latency = float(spec)
+
+        def provider(**_) -> str:
+            time.sleep(latency)
+            return 'HOLD'
+    return provider
+
+
+def sequential_s(providers: Dict[str, Callable[..., str]]) -> float:
+    """Seconds to ask the providers one after another (failures included)."""
+    started = time.perf_counter()
+    for provider in providers.values():
+        try:
+            provider()
+        except Exception:
+            pass
+    return time.perf_counter() - started
+
+
+def run_scenario(specs: List[str], timeout_s: float, budget_s: float, sequential: bool = True) -> None:
+    """Print sequential and concurrent cycle times for one set of mock providers."""
+    providers = {f"mock{i}": mock_provider(spec, timeout_s) for i, spec in enumerate(specs)}
+    print(f"Providers {','.join(specs)} (timeout {timeout_s}s, budget {budget_s}s)")
+    if sequential:
+        print(f"  sequential  {sequential_s(providers):6.2f}s")
+
+    orchestrator = DecisionOrchestrator(providers, provider_timeout_s=timeout_s, cycle_budget_s=budget_s)
+    try:
+        for attempt in (1, 2):
+            result = orchestrator.run()
+            outcomes = ', '.join(
+                f"{outcome.name} {outcome.status} {outcome.latency_s:.2f}s"
+                for outcome in result.outcomes.values())
+            print(f"  concurrent  {result.elapsed_s:6.2f}s  (run {attempt}: {outcomes})")
+    finally:
+        orchestrator.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--latencies', action='append', metavar='SPEC',
+                        help="comma-separated seconds/fail/hang per provider (repeatable)")
+    parser.add_argument('--timeout', type=float, default=2.0, help="provider deadline in seconds")
+    parser.add_argument('--budget', type=float, default=30.0, help="cycle budget in seconds")
+    parser.add_argument('--no-sequential', action='store_true', help="skip the sequential baseline")
+    args = parser.parse_args(argv)
+
+    for scenario in args.latencies or DEFAULT_SCENARIOS:
+        run_scenario(
+            [spec.strip() for spec in scenario.split(',')],
+            args.timeout, args.budget, sequential=not args.no_sequential)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
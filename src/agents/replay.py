@@ -0,0 +1,518 @@
+"""
+Accelerated market replay through the decision pipeline.
+
+Feeds recorded market ticks through the same stages as the app's
+``update_trading_data``, in the same order, under a virtual clock, as fast
+as the CPU allows:
+
+1. ``indicators``: indicator update and the shared ``MarketContext``
+2. ``decisions``: every provider through the ``DecisionOrchestrator``,
+   plus the consensus
+3. ``store``: the market tick and each decision (under a replay wallet,
+   since only wallet decisions are scored)
+4. ``scoring``: ``update_decision_accuracy`` at the tick's price, then
+   ``score_horizons``
+5. ``stats``: accuracy, model comparison and daily performance tables
+6. ``retention``: one bounded compaction pass, as in the scheduler
+
+The database clock is the tick's timestamp, so scoring windows, rollups and
+retention behave as they would have live. Providers are deterministic stubs
+(``StubProvider``) unless a ``module:Class`` provider is configured.
+
+Ticks come from the ``market_data`` table of a recorded database, a CSV
+file with the same column names, or a seeded random walk:
+
+    python -m src.agents.replay --source trading_data.db --providers gemini=momentum,groq=rsi,mistral=hold
+    python -m src.agents.replay --csv ticks.csv --json
+    python -m src.agents.replay --synthetic 5000
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import random
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from src.agents.decision_orchestrator import DecisionOrchestrator, find_consensus, majority_quorum, validate_quorum
+from src.database.db import TradingDatabase
+from src.database.encoding import MS_PER_HOUR, to_epoch_ms
+from src.database.horizons import HORIZONS
+from src.tools.indicators import IndicatorEngine
+from src.tools.llm_provider import LLMProvider, MarketContext, load_provider_class
+
+STAGES = ('indicators', 'decisions', 'store', 'scoring', 'stats', 'retention')
+
+# Wallet the replayed decisions are stored under
+REPLAY_WALLET = 'replay'
+
+DEFAULT_PROVIDERS = 'gemini=momentum,groq=rsi,mistral=contrarian'
+
+# Interval of the live loop's full updates
+TICK_INTERVAL_MS = 10 * 60 * 1000
+
+
+@dataclass
+class Tick:
+    """One recorded market data row."""
+
+    timestamp: int  # epoch ms
+    eth_price: float
+    eth_volume: float
+    eth_high: float
+    eth_low: float
+    gas_prices: Optional[Dict[str, float]]
+    fear_greed_value: str
+    fear_greed_sentiment: str
+
+
+class VirtualClock:
+    """Epoch-ms clock that only moves when set."""
+
+    def __init__(self, now: int = 0):
+        """Initialize the clock at ``now`` (epoch ms)."""
+        self.now = now
+
+    def __call__(self) -> int:
+        return self.now
+
+
+# Deterministic decision rules of the stub providers
+def _momentum(context: MarketContext) -> str:
+    indicators = context.indicators
+    if indicators['price_trend'] == 'up' and indicators['rsi'] < 70:
+        return 'BUY'
+    if indicators['price_trend'] == 'down' and indicators['rsi'] > 30:
+        return 'SELL'
+    return 'HOLD'
+
+
+def _rsi(context: MarketContext) -> str:
+    rsi = context.indicators['rsi']
+    if rsi < 30:
+        return 'BUY'
+    if rsi > 70:
+        return 'SELL'
+    return 'HOLD'
+
+
+def _contrarian(context: MarketContext) -> str:
+    decision = _momentum(context)
+    return {'BUY': 'SELL', 'SELL': 'BUY'}.get(decision, 'HOLD')
+
+
+def _hold(context: MarketContext) -> str:
+    return 'HOLD'
+
+
+STUB_STRATEGIES: Dict[str, Callable[[MarketContext], str]] = {
+    'momentum': _momentum,
+    'rsi': _rsi,
+    'contrarian': _contrarian,
+    'hold': _hold
+}
+
+
+class StubProvider(LLMProvider):
+    """Deterministic provider deciding from the indicators, without a model call."""
+
+    label = "Stub"
+
+    def __init__(self, strategy: str = 'hold', seed: Optional[int] = None):
+        """
+        Initialize a stub.
+
+        Args:
+            strategy: One of STUB_STRATEGIES, or ``random`` (seeded)
+            seed: Seed of the ``random`` strategy
+
+        Raises:
+            ValueError: If the strategy is unknown
+        """
+        super().__init__()
+        if strategy == 'random':
+            rng = random.Random(seed)
+            self._rule = lambda context: rng.choice(('BUY', 'SELL', 'HOLD'))
+        elif strategy in STUB_STRATEGIES:
+            self._rule = STUB_STRATEGIES[strategy]
+        else:
+            raise ValueError(f"Unknown stub strategy '{strategy}'")
+        self.strategy = strategy
+
+    def decide(self, context: MarketContext) -> str:
+        """Apply the strategy to the tick."""
+        return self._rule(context)
+
+
+def create_replay_providers(spec: str, seed: int = 0) -> Dict[str, LLMProvider]:
+    """
+    Build providers from ``name=strategy`` entries.
+
+    A strategy is a stub strategy name or a ``module:Class`` provider path.
+
+    Raises:
+        ValueError: If an entry is malformed or a strategy unknown
+    """
+    providers = {}
+    for i, entry in enumerate(e.strip() for e in spec.split(',') if e.strip()):
+        name, sep, strategy = entry.partition('=')
+        if not sep:
+            raise ValueError(f"Invalid provider entry '{entry}', expected name=strategy")
+        if ':' in strategy:
+            provider = load_provider_class(strategy)()
+        else:
+            provider = StubProvider(strategy, seed=seed + i)
+        provider.name = name
+        providers[name] = provider
+    return providers
+
+
+def _epoch_ms(value) -> int:
+    """Epoch ms from epoch ms/seconds or an ISO timestamp."""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return to_epoch_ms(datetime.fromisoformat(str(value)))
+    # Epoch seconds are ~1.7e9, epoch ms ~1.7e12
+    return int(number * 1000) if number < 1e11 else int(number)
+
+
+def _gas(row: Dict) -> Optional[Dict[str, float]]:
+    values = [row.get(f'gas_price_{level}') for level in ('low', 'standard', 'fast')]
+    if any(value in (None, '') for value in values):
+        return None
+    return dict(zip(('low', 'standard', 'fast'), (float(value) for value in values)))
+
+
+def tick_from_row(row: Dict) -> Tick:
+    """Build a tick from a ``market_data``-style dict (CSV or database row)."""
+    price = float(row['eth_price'])
+    high, low = row.get('eth_high_24h'), row.get('eth_low_24h')
+    return Tick(
+        timestamp=_epoch_ms(row['timestamp']),
+        eth_price=price,
+        eth_volume=float(row.get('eth_volume_24h') or 0),
+        eth_high=float(high) if high not in (None, '') else price,
+        eth_low=float(low) if low not in (None, '') else price,
+        gas_prices=_gas(row),
+        fear_greed_value=str(row.get('fear_greed_value') or '50'),
+        fear_greed_sentiment=row.get('fear_greed_sentiment') or 'neutral'
+    )
+
+
+def ticks_from_database(
+    db_path: str,
+    start: int = 0,
+    end: Optional[int] = None,
+    page_size: int = 5000
+) -> Iterator[Tick]:
+    """Raw ``market_data`` rows of a recorded database, oldest first."""
+    source = TradingDatabase(db_path, maintenance=False)
+    end = end if end is not None else 2 ** 62
+    try:
+        after = None
+        while True:
+            rows, after = source.get_market_data_page(start, end, after=after, limit=page_size)
+            for row in rows:
+                yield tick_from_row(row)
+            if after is None:
+                return
+    finally:
+        source.close()
+
+
+def ticks_from_csv(path: str) -> Iterator[Tick]:
+    """Rows of a CSV file with ``market_data`` column names, in file order."""
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            yield tick_from_row(row)
+
+
+def synthetic_ticks(
+    count: int,
+    seed: int = 0,
+    start: Optional[int] = None,
+    interval_ms: int = TICK_INTERVAL_MS,
+    price: float = 3000.0
+) -> Iterator[Tick]:
+    """Seeded random walk of ``count`` ticks, ``interval_ms`` apart."""
+    rng = random.Random(seed)
+    timestamp = start if start is not None else to_epoch_ms(datetime(2025, 1, 1))
+    gas = 12.0
+    fear_greed = 50
+    for _ in range(count):
+        price *= math.exp(rng.gauss(0, 0.004))
+        gas = min(max(gas * math.exp(rng.gauss(0, 0.05)), 0.5), 500.0)
+        fear_greed = min(max(fear_greed + rng.choice((-1, 0, 0, 1)), 0), 100)
+        yield Tick(
+            timestamp=timestamp,
+            eth_price=price,
+            eth_volume=price * 1e5,
+            eth_high=price * 1.05,
+            eth_low=price * 0.95,
+            gas_prices={'low': round(gas * 0.9, 3), 'standard': round(gas, 3), 'fast': round(gas * 1.2, 3)},
+            fear_greed_value=str(fear_greed),
+            fear_greed_sentiment='bullish' if fear_greed > 50 else 'bearish'
+        )
+        timestamp += interval_ms
+
+
+@dataclass
+class ReplayReport:
+    """Throughput, stage timings and resulting tables of a replay."""
+
+    ticks: int = 0
+    elapsed_s: float = 0.0
+    first_timestamp: Optional[int] = None
+    last_timestamp: Optional[int] = None
+    stage_s: Dict[str, List[float]] = field(default_factory=lambda: {stage: [] for stage in STAGES})
+    decisions: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    consensus: Dict[str, int] = field(default_factory=dict)
+    scored: int = 0
+    accuracy: Dict = field(default_factory=dict)
+    comparison: Dict = field(default_factory=dict)
+    horizons: Dict = field(default_factory=dict)
+    daily_performance: Dict = field(default_factory=dict)
+
+    @property
+    def ticks_per_s(self) -> float:
+        """Replay throughput."""
+        return self.ticks / self.elapsed_s if self.elapsed_s else 0.0
+
+    def stage_summary(self) -> Dict[str, Dict[str, float]]:
+        """Total, mean and p95 milliseconds per stage."""
+        summary = {}
+        for stage, values in self.stage_s.items():
+            if not values:
+                continue
+            ordered = sorted(values)
+            summary[stage] = {
+                'total_ms': round(sum(values) * 1000, 1),
+                'mean_ms': round(sum(values) / len(values) * 1000, 3),
+                'p95_ms': round(ordered[min(int(0.95 * len(ordered)), len(ordered) - 1)] * 1000, 3)
+            }
+        return summary
+
+    def to_dict(self) -> Dict:
+        """JSON-serializable report."""
+        span_h = (self.last_timestamp - self.first_timestamp) / MS_PER_HOUR if self.ticks else 0
+        return {
+            'ticks': self.ticks,
+            'elapsed_s': round(self.elapsed_s, 3),
+            'ticks_per_s': round(self.ticks_per_s, 1),
+            'virtual_hours': round(span_h, 1),
+            'stages': self.stage_summary(),
+            'decisions': self.decisions,
+            'consensus': self.consensus,
+            'scored': self.scored,
+            'accuracy': self.accuracy,
+            'comparison': self.comparison,
+            'horizons': self.horizons,
+            'daily_performance': self.daily_performance
+        }
+
+
+class ReplayEngine:
+    """Runs recorded ticks through the decision pipeline under a virtual clock."""
+
+    def __init__(
+        self,
+        providers: Dict[str, LLMProvider],
+        db_path: Optional[str] = None,
+        quorum: Optional[int] = None,
+        stats_every: int = 1,
+        retention_chunks: int = 50,
+        comparison_days: int = 7
+    ):
+        """
+        Initialize the engine.
+
+        Args:
+            providers: Provider per model name
+            db_path: Scratch database to write to (default: a new temp file)
+            quorum: Models that must agree for a consensus (default: a
+                strict majority)
+            stats_every: Compute the stats tables every this many ticks
+                (the app does it every tick)
+            retention_chunks: Compaction transactions per tick
+            comparison_days: Window of the model comparison table
+        """
+        self.providers = providers
+        self.quorum = validate_quorum(
+            majority_quorum(len(providers)) if quorum is None else quorum, len(providers))
+        self.stats_every = max(stats_every, 1)
+        self.retention_chunks = retention_chunks
+        self.comparison_days = comparison_days
+        self.clock = VirtualClock()
+        if db_path is None:
+            fd, db_path = tempfile.mkstemp(prefix='replay-', suffix='.db')
+            os.close(fd)
+        self.db_path = db_path
+        self.db = TradingDatabase(db_path, maintenance=False, clock=self.clock)
+        self.indicator_engine = IndicatorEngine(window=100)
+        self.orchestrator = DecisionOrchestrator(
+            {name: provider.decide for name, provider in providers.items()})
+
+    def close(self) -> None:
+        """Stop the orchestrator and close the database."""
+        self.orchestrator.close()
+        self.db.close()
+
+    def run(self, ticks: Iterable[Tick], limit: Optional[int] = None) -> ReplayReport:
+        """Replay ``ticks`` (oldest first) and return the report."""
+        report = ReplayReport(decisions={name: {} for name in self.providers})
+        timings = report.stage_s
+        db = self.db
+        started = time.perf_counter()
+
+        for tick in ticks:
+            if limit is not None and report.ticks >= limit:
+                break
+            self.clock.now = tick.timestamp
+            if report.first_timestamp is None:
+                report.first_timestamp = tick.timestamp
+            report.last_timestamp = tick.timestamp
+
+            t0 = time.perf_counter()
+            context = MarketContext(
+                eth_price=tick.eth_price,
+                eth_volume=tick.eth_volume,
+                eth_high=tick.eth_high,
+                eth_low=tick.eth_low,
+                gas_prices=tick.gas_prices,
+                fear_greed_value=tick.fear_greed_value,
+                fear_greed_sentiment=tick.fear_greed_sentiment,
+                indicators=self.indicator_engine.update(tick.eth_price)
+            )
+            t1 = time.perf_counter()
+            decisions = self.orchestrator.run(context=context).decisions
+            consensus = find_consensus(decisions, self.quorum)
+            t2 = time.perf_counter()
+            db.store_market_data(
+                eth_price=tick.eth_price,
+                eth_volume=tick.eth_volume,
+                eth_high=tick.eth_high,
+                eth_low=tick.eth_low,
+                gas_prices=tick.gas_prices,
+                market_sentiment={
+                    'fear_greed_value': tick.fear_greed_value,
+                    'fear_greed_sentiment': tick.fear_greed_sentiment
+                }
+            )
+            for name, decision in decisions.items():
+                db.store_ai_decision(name, decision, tick.eth_price, REPLAY_WALLET)
+            t3 = time.perf_counter()
+            report.scored += db.update_decision_accuracy(tick.eth_price)
+            db.score_horizons()
+            t4 = time.perf_counter()
+            if report.ticks % self.stats_every == 0:
+                db.get_accuracy_stats()
+                db.get_model_comparison(days=self.comparison_days)
+                db.get_performance_by_timeframe('day')
+            t5 = time.perf_counter()
+            db.run_retention(max_chunks=self.retention_chunks)
+            t6 = time.perf_counter()
+
+            for stage, seconds in zip(STAGES, (t1 - t0, t2 - t1, t3 - t2, t4 - t3, t5 - t4, t6 - t5)):
+                timings[stage].append(seconds)
+            for name, decision in decisions.items():
+                counts = report.decisions[name]
+                counts[decision] = counts.get(decision, 0) + 1
+            key = consensus or 'none'
+            report.consensus[key] = report.consensus.get(key, 0) + 1
+            report.ticks += 1
+
+        report.elapsed_s = time.perf_counter() - started
+        if report.ticks:
+            report.accuracy = db.get_accuracy_stats()
+            report.comparison = db.get_model_comparison(days=self.comparison_days)
+            report.horizons = {
+                label: db.get_model_comparison(days=self.comparison_days, horizon=label)
+                for label in HORIZONS
+            }
+            report.daily_performance = db.get_performance_by_timeframe('day')
+        return report
+
+
+def _format_report(report: ReplayReport) -> str:
+    data = report.to_dict()
+    lines = [
+        f"{data['ticks']} ticks ({data['virtual_hours']} virtual hours) in {data['elapsed_s']}s: "
+        f"{data['ticks_per_s']} ticks/s, {data['scored']} decisions scored",
+        "",
+        f"{'stage':12s} {'total ms':>10s} {'mean ms':>10s} {'p95 ms':>10s}"
+    ]
+    for stage, summary in data['stages'].items():
+        lines.append(f"{stage:12s} {summary['total_ms']:10.1f} {summary['mean_ms']:10.3f} {summary['p95_ms']:10.3f}")
+    lines += ["", f"{'model':12s} {'decisions':>10s} {'accuracy':>9s} {'avg P/L %':>10s}  decision mix"]
+    for name, counts in data['decisions'].items():
+        stats = data['accuracy'].get(name, {})
+        lines.append(
+            f"{name:12s} {stats.get('total_decisions', 0):10d} {stats.get('accuracy', 0):8.1f}% "
+            f"{stats.get('avg_profit', 0):10.2f}  {counts}")
+    for label, comparison in data['horizons'].items():
+        accuracy = ', '.join(f"{name} {stats['accuracy']:.1f}%" for name, stats in comparison.items())
+        lines.append(f"accuracy at {label:>3s}: {accuracy}")
+    lines.append(f"consensus: {data['consensus']}")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--source', help="recorded trading database to read market_data from")
+    source.add_argument('--csv', help="CSV file with market_data column names")
+    source.add_argument('--synthetic', type=int, metavar='N', help="replay N random-walk ticks")
+    parser.add_argument('--from', dest='start', help="first tick to replay (ISO time or epoch ms)")
+    parser.add_argument('--to', dest='end', help="last tick to replay (ISO time or epoch ms)")
+    parser.add_argument('--limit', type=int, help="stop after this many ticks")
+    parser.add_argument('--providers', default=DEFAULT_PROVIDERS,
+                        help="name=strategy entries; strategies: random, "
+                             + ", ".join(STUB_STRATEGIES) + ", or module:Class")
+    parser.add_argument('--quorum', type=int, default=int(os.getenv("LLM_QUORUM") or 0) or None,
+                        help="models that must agree (default: a strict majority)")
+    parser.add_argument('--stats-every', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--db', help="scratch database to write (default: a temp file)")
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        providers = create_replay_providers(args.providers, seed=args.seed)
+        start = _epoch_ms(args.start) if args.start else 0
+        end = _epoch_ms(args.end) if args.end else None
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.source:
+        ticks = ticks_from_database(args.source, start, end)
+    elif args.csv:
+        ticks = (t for t in ticks_from_csv(args.csv)
+                 if t.timestamp >= start and (end is None or t.timestamp <= end))
+    else:
+        ticks = synthetic_ticks(args.synthetic, seed=args.seed)
+
+    try:
+        engine = ReplayEngine(providers, db_path=args.db, quorum=args.quorum, stats_every=args.stats_every)
+    except ValueError as e:
+        parser.error(str(e))
+    try:
+        report = engine.run(ticks, limit=args.limit)
+    finally:
+        engine.close()
+        if args.db is None:
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(engine.db_path + suffix):
+                    os.remove(engine.db_path + suffix)
+
+    print(json.dumps(report.to_dict(), indent=2) if args.json else _format_report(report))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,182 @@
+"""Small concurrency-aware caching helpers.
+
+- ``SingleFlight`` coalesces concurrent calls for the same key, so an
+  expensive computation runs once while other callers wait for its result.
+- ``VersionedCache`` is a bounded per-key cache that is invalidated
+  explicitly. Each key has a version that ``invalidate`` bumps; a value is
+  only stored if its key was not invalidated while it was being computed,
+  so a slow computation can never cache a result that is already stale.
+  Versions are bounded too: keys without one share a floor version that is
+  at least that of any version dropped.
+- ``TTLCache`` is a bounded LRU cache whose entries also expire after a
+  fixed time to live.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Call:
+    """An in-flight computation shared by every caller of the same key."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Run at most one computation per key at a time."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Call ``fn`` unless a call for ``key`` is already running, then share its result.
+
+        Exceptions raised by the leading call are re-raised in every caller.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class VersionedCache:
+    """Bounded LRU cache with explicit per-key invalidation and singleflight fills."""
+
+    def __init__(self, max_entries: int = 1024):
+        """Initialize an empty cache holding at most ``max_entries`` keys."""
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        # Versions of recently invalidated keys (LRU, at most max_entries)
+        self._versions: "OrderedDict[Hashable, int]" = OrderedDict()
+        # Version of every other key; raised to each version dropped from
+        # _versions, so dropping one never lets a stale computation in
+        self._floor = 0
+        self._sequence = 0
+        self._flight = SingleFlight()
+        self.stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+    def _version(self, key: Hashable) -> int:
+        return self._versions.get(key, self._floor)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the cached value for ``key``, computing it at most once concurrently."""
+        with self._lock:
+            version = self._version(key)
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return entry[1]
+            self.stats['misses'] += 1
+
+        # Callers that saw the same version share one computation
+        value = self._flight.do((key, version), compute)
+
+        with self._lock:
+            if self._version(key) == version:
+                self._entries[key] = (version, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop ``key`` and reject values for it that are still being computed."""
+        with self._lock:
+            self._sequence += 1
+            self._versions[key] = self._sequence
+            self._versions.move_to_end(key)
+            while len(self._versions) > self.max_entries:
+                _, dropped = self._versions.popitem(last=False)
+                self._floor = max(self._floor, dropped)
+            self._entries.pop(key, None)
+            self.stats['invalidations'] += 1
+
+    def clear(self) -> None:
+        """Drop every entry and reject all in-flight computations."""
+        with self._lock:
+            self._sequence += 1
+            self._floor = self._sequence
+            self._versions.clear()
+            self._entries.clear()
+            self.stats['invalidations'] += 1
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire ``ttl_s`` seconds after being stored."""
+
+    def __init__(
+        self,
+        ttl_s: float,
+        max_entries: int = 1024,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """Initialize an empty cache.
+
+        Args:
+            ttl_s: Seconds an entry stays valid
+            max_entries: Entries kept; the least recently used is evicted
+            clock: Time source (seconds)
+        """
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0}
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the live value for ``key``, else ``default``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > self._clock():
+                    self._entries.move_to_end(key)
+                    self.stats['hits'] += 1
+                    return entry[1]
+                del self._entries[key]
+                self.stats['expired'] += 1
+            self.stats['misses'] += 1
+            return default
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store ``value`` for ``key``, evicting the least recently used entries."""
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl_s, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,186 +1,263 @@
 """Database module for storing trading data."""
 
+import os
 import sqlite3
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
 import logging
-import math
+
+import numpy as np
+
+from src.cache import VersionedCache
+from src.database.downsample import downsample_rows
+from src.database.horizons import horizon_ms, score_outcomes
+from src.database.encoding import (
+    DECISION_CODES, DEFAULT_MODELS, GAS_SCALE, MS_PER_DAY, MS_PER_HOUR, decode_decision,
+    decode_gas, encode_decision, encode_gas, format_timestamp, from_epoch_ms, now_ms
+)
+from src.database.maintenance import MaintenanceWorker
+from src.database.pool import ConnectionPool
+from src.database.rescore import (
+    PARTITIONS_PER_WORKER, apply_rescores, compute_rescores, partition_ranges, stage_rescores
+)
+from src.database.retention import TIERS, RetentionEngine, RetentionPolicy
+from src.database.rollups import rebuild_decision_rollups, unbacked_verdicts
+from src.database.schema import (
+    create_schema, migrate_compact_storage, migrate_decision_outcomes, migrate_retention_tiers,
+    migrate_scoring_versions
+)
+from src.database.scoring import score_rows, scoring_rules
+from src.database.write_behind import WriteBehindQueue
 
 
 class TradingDatabase:
     """SQLite database for storing trading data."""
 
-    def __init__(self, db_path: str = "trading_data.db"):
-        """Initialize database connection."""
+    def __init__(
+        self,
+        db_path: str = "trading_data.db",
+        pool_size: int = 8,
+        write_behind: bool = False,
+        write_batch_size: int = 500,
+        write_flush_ms: int = 200,
+        write_queue_size: int = 10000,
+        raw_retention_hours: float = 24,
+        five_min_retention_days: float = 28,
+        decision_retention_days: Optional[float] = None,
+        outcome_retention_days: Optional[float] = 90,
+        retention_chunk_size: int = 2000,
+        maintenance: bool = True,
+        maintenance_interval_s: float = 60,
+        maintenance_idle_s: float = 10,
+        maintenance_slice_ms: int = 250,
+        maintenance_vacuum_pages: int = 256,
+        maintenance_analyze_interval_s: float = 3600,
+        clock: Callable[[], int] = now_ms
+    ):
+        """Initialize database connection pool.
+
+        Args:
+            db_path: Path to the SQLite database file
+            pool_size: Maximum number of long-lived pooled connections
+            write_behind: Queue inserts and write them in batches from a
+                background thread instead of committing each one
+            write_batch_size: Rows per batch in write-behind mode
+            write_flush_ms: Maximum delay before a partial batch is written
+            write_queue_size: Pending rows allowed before inserts block
+            raw_retention_hours: Hours of raw ticks to keep
+            five_min_retention_days: Days of 5-minute candles to keep
+                (hourly candles are kept indefinitely)
+            decision_retention_days: Days of raw AI decisions to keep
+                (None keeps them indefinitely; rollups are always kept)
+            outcome_retention_days: Days of horizon outcomes to keep
+                (None keeps them indefinitely)
+            retention_chunk_size: Rows deleted per compaction transaction
+            maintenance: Run incremental vacuum/ANALYZE/optimize on a
+                background thread while the database is idle
+            maintenance_interval_s: How often maintenance checks for idleness
+            maintenance_idle_s: Quiet seconds required before it runs
+            maintenance_slice_ms: Time budget of one maintenance run
+            maintenance_vacuum_pages: Pages freed per incremental_vacuum step
+            maintenance_analyze_interval_s: Minimum seconds between ANALYZE runs
+            clock: Current time in epoch ms, used for row timestamps,
+                scoring and time windows (a virtual clock for replays)
+        """
         self.db_path = db_path
+        self._clock = clock
+        self._pool = ConnectionPool(db_path, max_size=pool_size)
+        self._model_lock = threading.Lock()
+        self._model_ids: Dict[str, int] = {}
+        self._model_names: Dict[int, str] = {}
+        self._wallet_stats_cache = VersionedCache()
         self._init_db()
-        self._optimize_db()  # Add optimization on init
-
-    def _init_db(self) -> None:
-        """Initialize database tables."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-
-            # Create market data table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS market_data (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp DATETIME NOT NULL,
-                    eth_price REAL NOT NULL,
-                    eth_volume_24h REAL NOT NULL,
-                    eth_high_24h REAL NOT NULL,
-                    eth_low_24h REAL NOT NULL,
-                    gas_price_low INTEGER,
-                    gas_price_standard INTEGER,
-                    gas_price_fast INTEGER,
-                    fear_greed_value TEXT,
-                    fear_greed_sentiment TEXT
-                )
-            """)
-
-            # Create AI decisions table - add wallet_address column
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS ai_decisions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp DATETIME NOT NULL,
-                    model TEXT NOT NULL,
-                    decision TEXT NOT NULL,
-                    eth_price REAL NOT NULL,
-                    was_correct BOOLEAN,
-                    profit_loss REAL,
-                    wallet_address TEXT,
-                    FOREIGN KEY (timestamp) REFERENCES market_data (timestamp)
-                )
-            """)
-
-            # Check if wallet_address column exists in ai_decisions, add it if not
-            try:
-                cursor.execute(
-                    "SELECT wallet_address FROM ai_decisions LIMIT 1")
-            except sqlite3.OperationalError:
-                # Column doesn't exist, add it
-                cursor.execute(
-                    "ALTER TABLE ai_decisions ADD COLUMN wallet_address TEXT")
-                logging.info(
-                    "Added wallet_address column to ai_decisions table")
+        self._migrate()
+        self._retention = RetentionEngine(self._pool, RetentionPolicy(
+            raw_hours=raw_retention_hours,
+            five_min_days=five_min_retention_days,
+            decision_days=decision_retention_days,
+            outcome_days=outcome_retention_days,
+            chunk_size=retention_chunk_size
+        ))
+
+        # VACUUM/ANALYZE never run here, so construction stays fast on
+        # large databases
+        self._maintenance: Optional[MaintenanceWorker] = None
+        if maintenance:
+            self._maintenance = MaintenanceWorker(
+                self._pool,
+                interval_s=maintenance_interval_s,
+                idle_s=maintenance_idle_s,
+                slice_ms=maintenance_slice_ms,
+                vacuum_pages=maintenance_vacuum_pages,
+                analyze_interval_s=maintenance_analyze_interval_s
+            )
 
-            # Create wallet actions table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS wallet_actions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp DATETIME NOT NULL,
-                    wallet_address TEXT NOT NULL,
-                    action TEXT NOT NULL,
-                    eth_balance REAL NOT NULL,
-                    usdc_balance REAL NOT NULL,
-                    eth_allocation REAL NOT NULL,
-                    eth_price REAL,
-                    network TEXT NOT NULL
-                )
-            """)
+        self._writer: Optional[WriteBehindQueue] = None
+        self._last_market_price: Optional[float] = None
+        if write_behind:
+            self._writer = WriteBehindQueue(
+                self._pool,
+                batch_size=write_batch_size,
+                flush_interval_ms=write_flush_ms,
+                max_queue=write_queue_size
+            )
 
-            # Create wallet connections table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS wallet_connections (
-                    wallet_address TEXT PRIMARY KEY,
-                    is_connected BOOLEAN NOT NULL,
-                    last_updated DATETIME NOT NULL
-                )
-            """)
+    def connection(self):
+        """Borrow a pooled connection (use as a context manager).
 
-            # Create daily_stats table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS daily_stats (
-                    date TEXT NOT NULL,
-                    model TEXT NOT NULL,
-                    total_trades INTEGER DEFAULT 0,
-                    correct_trades INTEGER DEFAULT 0,
-                    incorrect_trades INTEGER DEFAULT 0,
-                    buy_decisions INTEGER DEFAULT 0,
-                    sell_decisions INTEGER DEFAULT 0,
-                    hold_decisions INTEGER DEFAULT 0,
-                    avg_profit REAL DEFAULT 0.0,
-                    PRIMARY KEY (date, model)
-                )
-            """)
+        Commits on success and rolls back on error, like ``sqlite3.connect``.
+        Methods called inside the block join its transaction rather than
+        committing their own.
+        """
+        return self._pool.connection()
 
-            # Create index for daily_stats for faster queries by date
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_daily_stats_date 
-                ON daily_stats(date)
-            """)
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until all queued writes are committed (read-your-writes barrier).
 
-            # Create indices for better query performance
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_market_data_timestamp 
-                ON market_data(timestamp)
-            """)
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_ai_decisions_timestamp 
-                ON ai_decisions(timestamp)
-            """)
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_ai_decisions_model 
-                ON ai_decisions(model)
-            """)
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_ai_decisions_wallet_address 
-                ON ai_decisions(wallet_address)
-            """)
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_wallet_actions_wallet_address 
-                ON wallet_actions(wallet_address)
-            """)
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_wallet_actions_timestamp 
-                ON wallet_actions(timestamp)
-            """)
-
-            conn.commit()
+        A no-op returning True when write-behind mode is disabled.
+        """
+        if self._writer is None:
+            return True
+        return self._writer.flush(timeout)
+
+    def close(self) -> None:
+        """Drain pending writes and close all pooled connections."""
+        if self._maintenance is not None:
+            self._maintenance.close()
+        if self._writer is not None:
+            self._writer.close()
+        self._pool.close()
+
+    def _execute_write(self, sql: str, params: tuple) -> None:
+        """Run an INSERT now, or queue it when write-behind is enabled."""
+        if self._writer is not None:
+            self._writer.submit(sql, params)
+            return
+        with self._pool.connection() as conn:
+            conn.execute(sql, params)
 
-    def _optimize_db(self) -> None:
-        """Optimize database settings for better performance."""
-        with sqlite3.connect(self.db_path) as conn:
+    def _init_db(self) -> None:
+        """Create the schema on a new database file."""
+        with self._pool.connection() as conn:
             cursor = conn.cursor()
-
-            # Faster writes with reasonable safety
-            cursor.execute("PRAGMA synchronous=NORMAL")
-            # Store temp tables in memory
-            cursor.execute("PRAGMA temp_store=MEMORY")
-            # Use 2MB of memory for cache
-            cursor.execute("PRAGMA cache_size=-2000")
-
-            # Create pragma_stats table if it doesn't exist
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS pragma_stats (
-                    name TEXT PRIMARY KEY,
-                    value TEXT
-                )
-            """)
-
-            # Get last vacuum time
             cursor.execute(
-                "SELECT value FROM pragma_stats WHERE name='last_vacuum'")
-            last_vacuum = cursor.fetchone()
-
-            # Run VACUUM if:
-            # 1. Last vacuum was more than 24 hours ago
-            # 2. Or if last vacuum time is not recorded
-            should_vacuum = (
-                not last_vacuum or
-                (datetime.now() -
-                 datetime.fromisoformat(last_vacuum[0])).total_seconds() > 24 * 3600
-            )
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'market_data'")
+            if cursor.fetchone() is None:
+                create_schema(conn)
 
-            if should_vacuum:
-                cursor.execute("VACUUM")  # Compact the database file
-                # Record vacuum time
-                cursor.execute("""
-                    INSERT OR REPLACE INTO pragma_stats (name, value)
-                    VALUES ('last_vacuum', ?)
-                """, (datetime.now().isoformat(),))
+    def _migrate(self) -> None:
+        """Apply pending schema migrations, tracked in ``PRAGMA user_version``.
 
+        Each migration runs once, in order. Versions 1 (rollups) and 2
+        (query indexes) are folded into the compact storage rebuild, which
+        recreates both.
+        """
+        migrations = [
+            (3, migrate_compact_storage),
+            (4, migrate_retention_tiers),
+            (5, migrate_decision_outcomes),
+            (6, migrate_scoring_versions),
+        ]
+
+        with self._pool.connection() as conn:
+            cursor = conn.cursor()
+            version = cursor.execute("PRAGMA user_version").fetchone()[0]
+
+            if version < 3:
+                rows = sum(
+                    cursor.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                    for table in ('market_data', 'ai_decisions', 'wallet_actions'))
+                logging.warning(
+                    f"[db migrate] Converting {rows} rows to compact storage before the "
+                    f"database can be used; run `python -m src.database.maintenance "
+                    f"{self.db_path} --migrate` ahead of startup to avoid the wait")
+
+            for target, migration in migrations:
+                if version >= target:
+                    continue
+                logging.info(
+                    f"[db migrate] Applying schema migration {target}: {migration.__name__}")
+                migration(conn)
+                # PRAGMA does not accept bound parameters
+                cursor.execute(f"PRAGMA user_version = {target}")
+                conn.commit()
+
+        self._load_models()
+
+    def _load_models(self) -> None:
+        """Cache the model name <-> id lookup table."""
+        with self._pool.connection() as conn:
+            rows = conn.execute("SELECT id, name FROM models").fetchall()
+        self._model_ids = {name: model_id for model_id, name in rows}
+        self._model_names = {model_id: name for model_id, name in rows}
+
+    def _model_id(self, model: str) -> int:
+        """Return the id of a model name, registering new models on first use."""
+        model_id = self._model_ids.get(model)
+        if model_id is not None:
+            return model_id
+        with self._model_lock:
+            if model not in self._model_ids:
+                with self._pool.connection() as conn:
+                    conn.execute("INSERT OR IGNORE INTO models (name) VALUES (?)", (model,))
+                self._load_models()
+            return self._model_ids[model]
+
+    def _find_model_id(self, model: str) -> Optional[int]:
+        """Return the id of a known model name without registering it."""
+        if model not in self._model_ids:
+            self._load_models()
+        return self._model_ids.get(model)
+
+    def _model_name(self, model_id: int) -> str:
+        """Return the model name for a stored model id."""
+        name = self._model_names.get(model_id)
+        if name is None:
+            self._load_models()
+            name = self._model_names.get(model_id, str(model_id))
+        return name
+
+    def rebuild_rollups(self) -> int:
+        """Recompute decision rollups from the raw decisions table.
+
+        Returns:
+            Number of buckets left as they were because retention already
+            removed some of their raw rows
+        """
+        self.flush()
+        with self._pool.connection() as conn:
+            skipped = rebuild_decision_rollups(conn.cursor())
             conn.commit()
+        return skipped
+
+    def maintenance_stats(self) -> Dict[str, object]:
+        """Last-run stats of background maintenance and retention."""
+        return {
+            'maintenance': dict(self._maintenance.last_run) if self._maintenance else None,
+            'maintenance_counters': dict(self._maintenance.stats) if self._maintenance else None,
+            'retention': dict(self._retention.last_run)
+        }
 
     def store_market_data(
         self,
@@ -192,34 +269,32 @@ class TradingDatabase:
         market_sentiment: Dict[str, str]
     ) -> None:
         """Store market data in database."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO market_data (
-                    timestamp,
-                    eth_price,
-                    eth_volume_24h,
-                    eth_high_24h,
-                    eth_low_24h,
-                    gas_price_low,
-                    gas_price_standard,
-                    gas_price_fast,
-                    fear_greed_value,
-                    fear_greed_sentiment
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                datetime.now(),
+        self._last_market_price = eth_price
+        self._execute_write("""
+            INSERT INTO market_data (
+                timestamp,
                 eth_price,
-                eth_volume,
-                eth_high,
-                eth_low,
-                gas_prices['low'] if gas_prices else None,
-                gas_prices['standard'] if gas_prices else None,
-                gas_prices['fast'] if gas_prices else None,
-                market_sentiment['fear_greed_value'],
-                market_sentiment['fear_greed_sentiment']
-            ))
-            conn.commit()
+                eth_volume_24h,
+                eth_high_24h,
+                eth_low_24h,
+                gas_price_low,
+                gas_price_standard,
+                gas_price_fast,
+                fear_greed_value,
+                fear_greed_sentiment
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            self._clock(),
+            eth_price,
+            eth_volume,
+            eth_high,
+            eth_low,
+            encode_gas(gas_prices['low']) if gas_prices else None,
+            encode_gas(gas_prices['standard']) if gas_prices else None,
+            encode_gas(gas_prices['fast']) if gas_prices else None,
+            market_sentiment['fear_greed_value'],
+            market_sentiment['fear_greed_sentiment']
+        ))
 
     def store_ai_decision(
         self,
@@ -228,178 +303,214 @@ class TradingDatabase:
         eth_price: float,
         wallet_address: str
     ) -> None:
-        """Store AI trading decision in database."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO ai_decisions (
-                    timestamp,
-                    model,
-                    decision,
-                    eth_price,
-                    was_correct,
-                    profit_loss,
-                    wallet_address
-                ) VALUES (?, ?, ?, ?, NULL, NULL, ?)
-            """, (
-                datetime.now(),
+        """Store AI trading decision in database.
+
+        Raises:
+            ValueError: If the decision is not BUY, SELL, HOLD or ERROR
+        """
+        decision_code = encode_decision(decision)
+        self._execute_write("""
+            INSERT INTO ai_decisions (
+                timestamp,
                 model,
                 decision,
                 eth_price,
+                was_correct,
+                profit_loss,
                 wallet_address
-            ))
-            conn.commit()
-
-    def update_decision_accuracy(self, current_price: float, wallet_address: Optional[str] = None) -> None:
+            ) VALUES (?, ?, ?, ?, NULL, NULL, ?)
+        """, (
+            self._clock(),
+            self._model_id(model),
+            decision_code,
+            eth_price,
+            wallet_address
+        ))
+        self._wallet_stats_cache.invalidate(wallet_address)
+
+    def update_decision_accuracy(
+        self,
+        current_price: float,
+        wallet_address: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> int:
         """Update accuracy of previous decisions based on current price.
 
         If wallet_address is provided, only update decisions for that wallet.
         Otherwise, only update decisions that have a wallet_address (ignore global).
+        All pending decisions are scored in one vectorized pass unless
+        ``limit`` caps it to the most recent ones.
+
+        Returns:
+            Number of decisions scored
         """
-        with sqlite3.connect(self.db_path) as conn:
+        # Decisions may still be sitting in the write-behind queue
+        self.flush()
+
+        with self._pool.connection() as conn:
             cursor = conn.cursor()
 
-            # Get recent decisions that have not been evaluated yet
+            # Get decisions that have not been evaluated yet
             if wallet_address:
-                # If wallet address is provided, use a parameterized query
-                query = """
-                    SELECT 
-                        id,
-                        decision,
-                        eth_price,
-                        timestamp
-                    FROM ai_decisions
-                    WHERE was_correct IS NULL AND wallet_address = ?
-                    ORDER BY timestamp DESC
-                    LIMIT 200
-                """
-                cursor.execute(query, (wallet_address,))
+                where, params = "was_correct IS NULL AND wallet_address = ?", [wallet_address]
             else:
-                # If no wallet address, just get decisions with any wallet_address
-                query = """
-                    SELECT 
-                        id,
-                        decision,
-                        eth_price,
-                        timestamp
-                    FROM ai_decisions
-                    WHERE was_correct IS NULL AND wallet_address IS NOT NULL
-                    ORDER BY timestamp DESC
-                    LIMIT 200
-                """
-                cursor.execute(query)
+                where, params = "was_correct IS NULL AND wallet_address IS NOT NULL", []
+            # Ordering only matters when capping to the most recent decisions
+            limit_clause = ""
+            if limit is not None:
+                limit_clause = "ORDER BY timestamp DESC LIMIT ?"
+                params.append(limit)
 
+            cursor.execute(f"""
+                SELECT 
+                    id,
+                    decision,
+                    eth_price,
+                    timestamp,
+                    wallet_address
+                FROM ai_decisions
+                WHERE {where}
+                {limit_clause}
+            """, params)
             decisions = cursor.fetchall()
-            for decision_id, decision, decision_price, timestamp_str in decisions:
-                # Skip if price is the same (just added)
-                if decision_price == current_price:
-                    continue
+            if not decisions:
+                return 0
+            wallets = {row[0]: row[4] for row in decisions}
+
+            # Market volatility adjustment - the regime is shared by every
+            # decision in this pass, so fetch the recent prices only once
+            cursor.execute("""
+                SELECT eth_price FROM market_data
+                ORDER BY timestamp DESC LIMIT 24
+            """)
+            recent_prices = [row[0] for row in cursor.fetchall()]
 
-                # Calculate price change percentage
-                if decision_price > 0:
-                    price_change_pct = (
-                        (current_price - decision_price) / decision_price) * 100
-                else:
-                    # Handle zero price case
-                    price_change_pct = 0
+            now = self._clock()
+            rules = scoring_rules()
+            updates = score_rows(
+                [row[:4] for row in decisions], current_price, recent_prices, now=now, rules=rules)
 
-                # Convert timestamp string to datetime
-                decision_timestamp = datetime.fromisoformat(timestamp_str.replace(
-                    'Z', '+00:00')) if isinstance(timestamp_str, str) else timestamp_str
-                time_passed = datetime.now() - decision_timestamp
+            # Update decision accuracy in one batch; the scoring time and
+            # rules version let rescore_decisions reproduce the score
+            cursor.executemany("""
+                UPDATE ai_decisions
+                SET was_correct = ?, profit_loss = ?, scored_at = ?, scoring_version = ?
+                WHERE id = ? AND was_correct IS NULL
+            """, [(correct, profit, now, rules.version, id_) for correct, profit, id_ in updates])
 
-                # Use different thresholds based on time passed
-                # For recent decisions (< 1 hour), use tighter thresholds
-                # For older decisions, use looser thresholds
+            conn.commit()
 
-                hours_passed = time_passed.total_seconds() / 3600
+        # Scores change the cached stats of every wallet that was scored
+        for wallet in {wallets[update[2]] for update in updates}:
+            self._wallet_stats_cache.invalidate(wallet)
+        return len(updates)
 
-                # Improved threshold calculation - starts at 1.0%, caps at 3.0%
-                # Faster growth rate (0.15% per hour instead of 0.1%)
-                hold_threshold = min(1.0 + (hours_passed * 0.15), 3.0)
+    def score_horizons(self) -> Dict[str, int]:
+        """Score every decision at each fixed horizon whose end has passed.
 
-                # Market volatility adjustment - if market is volatile, require larger moves
-                # Get the volatility from recent price changes
-                cursor.execute("""
-                    SELECT eth_price FROM market_data
-                    ORDER BY timestamp DESC LIMIT 24
-                """)
-                recent_prices = [row[0] for row in cursor.fetchall()]
-
-                # Calculate volatility if we have enough data
-                if len(recent_prices) >= 2:
-                    # Calculate price changes for volatility
-                    price_changes = [
-                        abs(recent_prices[i] - recent_prices[i+1]
-                            ) / recent_prices[i+1] * 100
-                        if recent_prices[i+1] != 0 else 0
-                        for i in range(len(recent_prices)-1)
-                    ]
-                    avg_volatility = sum(price_changes) / len(price_changes)
-
-                    # Reduced volatility impact (from 30% to 25%)
-                    hold_threshold = max(hold_threshold, avg_volatility * 0.25)
-
-                    # Add trend detection for threshold adjustment
-                    if len(recent_prices) >= 6:  # Use last 6 prices for trend
-                        # Average of older 3 prices
-                        older_prices = sum(recent_prices[3:6]) / 3
-                        # Average of recent 3 prices
-                        newer_prices = sum(recent_prices[0:3]) / 3
-                        # Add safety check for zero division
-                        trend_change = (
-                            (newer_prices - older_prices) / older_prices * 100) if older_prices != 0 else 0
-
-                        # If we detect a strong trend (>2% movement), increase threshold
-                        if abs(trend_change) > 2.0:
-                            hold_threshold *= 1.25  # 25% increase in trending markets
-
-                # Determine if decision was correct
-                was_correct = False
-
-                if decision == 'BUY':
-                    # BUY is correct if price went up beyond threshold
-                    was_correct = price_change_pct > hold_threshold
-
-                elif decision == 'SELL':
-                    # SELL is correct if price went down beyond threshold
-                    was_correct = price_change_pct < -hold_threshold
-
-                elif decision == 'HOLD':
-                    # HOLD is correct if price stayed within threshold range
-                    was_correct = abs(price_change_pct) <= hold_threshold
-
-                # Update decision accuracy
-                cursor.execute("""
-                    UPDATE ai_decisions
-                    SET was_correct = ?, profit_loss = ?
-                    WHERE id = ?
-                """, (was_correct, price_change_pct, decision_id))
+        New decisions are picked up first, so this must run more often than
+        raw decisions expire (every cycle does). See ``src/database/horizons.py``.
 
+        Returns:
+            Counts of ingested, scored and dropped outcomes
+        """
+        self.flush()
+        with self._pool.connection() as conn:
+            stats = score_outcomes(conn.cursor())
             conn.commit()
+        return stats
+
+    def rescore_decisions(
+        self,
+        version: Optional[int] = None,
+        workers: Optional[int] = None,
+        partitions: Optional[int] = None,
+        allow_unbacked: bool = False
+    ) -> Dict[str, float]:
+        """Re-score every scored decision under a scoring rules version.
+
+        Time ranges of decisions are scored by a pool of worker processes on
+        read-only connections; the verdicts are applied in one transaction,
+        and the rollup triggers move each changed verdict between buckets.
+        See ``src/database/rescore.py``.
+
+        Decisions whose raw rows retention has deleted only survive in the
+        rollups and cannot be re-scored, so the statistics would mix rules
+        versions. Unless ``allow_unbacked`` is set, that is refused.
+
+        Args:
+            version: Scoring rules version (default: the current one)
+            workers: Worker processes (default: one per CPU)
+            partitions: Time ranges to split the decisions into (default:
+                ``PARTITIONS_PER_WORKER`` per worker)
+            allow_unbacked: Re-score anyway when rollups hold verdicts
+                without raw rows (they are reported as ``unbacked``)
+
+        Returns:
+            Counts, timings and throughput of the re-score
+
+        Raises:
+            ValueError: If the version is unknown, or rollups hold verdicts
+                without raw rows and ``allow_unbacked`` is not set
+        """
+        rules = scoring_rules(version)
+        workers = workers or os.cpu_count() or 1
+        self.flush()
+
+        started = time.perf_counter()
+        # Decisions scored while this runs already use the current rules
+        scored_before = self._clock()
+        with self._pool.connection() as conn:
+            cursor = conn.cursor()
+            unbacked = unbacked_verdicts(cursor)
+            if unbacked and not allow_unbacked:
+                raise ValueError(
+                    f"{unbacked:,} scored decisions in the rollups have no raw rows left "
+                    f"(deleted by retention) and would keep their old verdicts; "
+                    f"pass allow_unbacked=True (--allow-unbacked) to re-score the rest anyway")
+            ranges = partition_ranges(cursor, partitions or workers * PARTITIONS_PER_WORKER)
+            results = compute_rescores(self.db_path, ranges, rules.version, scored_before, workers)
+            rescored, changed = stage_rescores(cursor, results)
+            staged = time.perf_counter()
+            apply_rescores(cursor, rules.version, scored_before)
+            conn.commit()
+        applied = time.perf_counter()
+        self._wallet_stats_cache.clear()
+
+        return {
+            'version': rules.version,
+            'workers': workers,
+            'partitions': len(ranges),
+            'rescored': rescored,
+            'changed': changed,
+            'unbacked': unbacked,
+            'compute_s': round(staged - started, 3),
+            'merge_s': round(applied - staged, 3),
+            'decisions_per_s': round(rescored / (staged - started), 1) if rescored else 0.0
+        }
 
     def get_accuracy_stats(self) -> Dict[str, Dict[str, float]]:
-        """Get accuracy statistics for each AI model."""
-        with sqlite3.connect(self.db_path) as conn:
+        """Get accuracy statistics for each AI model (served from rollups)."""
+        with self._pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT 
                     model,
-                    COUNT(*) as total,
-                    SUM(CASE WHEN was_correct = 1 THEN 1 ELSE 0 END) as correct,
-                    COALESCE(AVG(CASE WHEN profit_loss IS NOT NULL THEN profit_loss ELSE 0 END), 0) as avg_profit,
-                    COALESCE(MIN(CASE WHEN profit_loss IS NOT NULL THEN profit_loss ELSE 0 END), 0) as max_loss,
-                    COALESCE(MAX(CASE WHEN profit_loss IS NOT NULL THEN profit_loss ELSE 0 END), 0) as max_profit
-                FROM ai_decisions
-                WHERE was_correct IS NOT NULL
-                AND decision != 'HOLD'
+                    SUM(scored) as total,
+                    SUM(correct) as correct,
+                    SUM(profit_sum) / SUM(scored) as avg_profit,
+                    MIN(profit_min) as max_loss,
+                    MAX(profit_max) as max_profit
+                FROM decision_rollups
+                WHERE scored > 0
+                AND decision != ?
                 GROUP BY model
-            """)
+            """, (DECISION_CODES['HOLD'],))
 
             stats = {}
             for model, total, correct, avg_profit, max_loss, max_profit in cursor.fetchall():
                 accuracy = (correct / total * 100) if total > 0 else 0
-                stats[model] = {
+                stats[self._model_name(model)] = {
                     'total_decisions': total,
                     'correct_decisions': correct,
                     'accuracy': round(accuracy, 1),
@@ -411,8 +522,11 @@ class TradingDatabase:
             return stats
 
     def get_recent_market_data(self, limit: int = 100) -> List[Tuple]:
-        """Get recent market data for charting."""
-        with sqlite3.connect(self.db_path) as conn:
+        """Get recent market data for charting.
+
+        Rows are decoded to ISO timestamps and gwei gas prices.
+        """
+        with self._pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT 
@@ -428,11 +542,322 @@ class TradingDatabase:
                 ORDER BY timestamp DESC
                 LIMIT ?
             """, (limit,))
-            return cursor.fetchall()
+            return self._decode_market_rows(cursor.fetchall())
+
+    def run_retention(self, max_chunks: Optional[int] = None) -> Dict[str, float]:
+        """Run one pass of tiered compaction and retention.
+
+        Args:
+            max_chunks: Cap on the number of short transactions used; the
+                next call picks up where this one stopped
+
+        Returns:
+            Counts of aggregated windows and deleted rows per table
+        """
+        stats = self._retention.run(max_chunks=max_chunks, now=self._clock())
+        if stats['ai_decisions']:
+            # Expired decisions drop out of every wallet's recent history
+            self._wallet_stats_cache.clear()
+        return stats
+
+    def market_tier(self, start: int, now: Optional[int] = None) -> str:
+        """Finest market data table that still holds data from ``start`` (epoch ms)."""
+        now = self._clock() if now is None else now
+        policy = self._retention.policy
+        if now - start <= policy.raw_hours * MS_PER_HOUR:
+            return 'market_data'
+        if now - start <= policy.five_min_days * MS_PER_DAY:
+            return 'market_data_5m'
+        return 'market_data_1h'
+
+    def get_market_history(
+        self,
+        hours: float,
+        now: Optional[int] = None,
+        points: Optional[int] = None,
+        method: str = 'lttb'
+    ) -> List[Tuple]:
+        """Get market data for the last ``hours``, read from the right tier.
+
+        Ranges within raw retention return raw ticks. Longer ranges return
+        5-minute candles, or hourly candles beyond the 5-minute retention,
+        with raw ticks filling in after the last compacted candle. Rows have
+        the same shape as ``get_recent_market_data``; candles report their
+        close price.
+
+        Args:
+            hours: How far back to read
+            now: End of the range (epoch ms); defaults to now
+            points: Downsample the price series to at most this many rows
+            method: Downsampling method, ``lttb`` or ``minmax``
+        """
+        now = self._clock() if now is None else now
+        start = int(now - hours * MS_PER_HOUR)
+        tier = self.market_tier(start, now)
+
+        with self._pool.connection() as conn:
+            cursor = conn.cursor()
+            rows = []
+            raw_start = start
+            if tier != 'market_data':
+                size = dict(TIERS)[tier]
+                # Candles are complete up to the watermark; newer ticks are raw
+                watermark = self._retention.watermark() or start
+                tier_end = max(watermark // size * size, start)
+                cursor.execute(f"""
+                    SELECT 
+                        timestamp,
+                        close,
+                        eth_volume_24h,
+                        gas_price_low,
+                        gas_price_standard,
+                        gas_price_fast,
+                        fear_greed_value,
+                        fear_greed_sentiment
+                    FROM {tier}
+                    WHERE timestamp >= ? AND timestamp < ?
+                    ORDER BY timestamp DESC
+                """, (start // size * size, tier_end))
+                rows = cursor.fetchall()
+                raw_start = tier_end
+
+            cursor.execute("""
+                SELECT 
+                    timestamp,
+                    eth_price,
+                    eth_volume_24h,
+                    gas_price_low,
+                    gas_price_standard,
+                    gas_price_fast,
+                    fear_greed_value,
+                    fear_greed_sentiment
+                FROM market_data
+                WHERE timestamp >= ?
+                ORDER BY timestamp DESC
+            """, (raw_start,))
+            rows = cursor.fetchall() + rows
+
+        if points is not None:
+            # Only the rows that are kept get decoded
+            rows = downsample_rows(rows[::-1], points, method)[::-1]
+        return self._decode_market_rows(rows)
+
+    @staticmethod
+    def _decode_market_rows(rows: List[Tuple]) -> List[Tuple]:
+        """Decode market rows to ISO timestamps and gwei gas prices."""
+        return [
+            (format_timestamp(ts), price, volume,
+             decode_gas(low), decode_gas(standard), decode_gas(fast), fg_value, fg_sentiment)
+            for ts, price, volume, low, standard, fast, fg_value, fg_sentiment in rows
+        ]
+
+    def get_market_data_page(
+        self,
+        start: int,
+        end: int,
+        after: Optional[Tuple[int, int]] = None,
+        limit: int = 500,
+        table: str = 'market_data'
+    ) -> Tuple[List[Dict], Optional[Tuple[int, int]]]:
+        """Get one page of market data in ``[start, end]`` (epoch ms), oldest first.
+
+        Pages are keyed on ``(timestamp, id)`` so every page is an index
+        range scan, however deep into the range it is.
+
+        Args:
+            start: First timestamp to include
+            end: Last timestamp to include
+            after: Key of the last row of the previous page
+            limit: Maximum rows per page
+            table: ``market_data`` for raw ticks, or a candle tier
+
+        Returns:
+            The rows, and the key to continue after (None on the last page)
+        """
+        if table == 'market_data':
+            columns = "timestamp, id, eth_price, eth_volume_24h, eth_high_24h, eth_low_24h"
+        elif table in dict(TIERS):
+            # Candles are keyed by their bucket timestamp (the rowid)
+            columns = "timestamp, rowid AS id, open, high, low, close, eth_volume_24h, samples"
+        else:
+            raise ValueError(f"Unknown market data table: {table}")
+
+        # A key just before ``start`` makes the first page the same query
+        after = after or (start, -1)
+        with self._pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            cursor.execute(f"""
+                SELECT 
+                    {columns},
+                    gas_price_low,
+                    gas_price_standard,
+                    gas_price_fast,
+                    fear_greed_value,
+                    fear_greed_sentiment
+                FROM {table}
+                WHERE timestamp <= ?
+                AND (timestamp, id) > (?, ?)
+                ORDER BY timestamp, id
+                LIMIT ?
+            """, (end, after[0], after[1], limit + 1))
+            rows = cursor.fetchall()
+
+        page = []
+        for row in rows[:limit]:
+            item = dict(row)
+            item['timestamp'] = format_timestamp(row['timestamp'])
+            for key in ('gas_price_low', 'gas_price_standard', 'gas_price_fast'):
+                item[key] = decode_gas(row[key])
+            del item['id']
+            page.append(item)
+        next_after = (rows[limit - 1]['timestamp'], rows[limit - 1]['id']) if len(rows) > limit else None
+        return page, next_after
+
+    def get_decisions_page(
+        self,
+        start: int,
+        end: int,
+        after: Optional[Tuple[int, int]] = None,
+        limit: int = 500,
+        wallet_address: Optional[str] = None,
+        model: Optional[str] = None
+    ) -> Tuple[List[Dict], Optional[Tuple[int, int]]]:
+        """Get one page of AI decisions in ``[start, end]`` (epoch ms), oldest first.
+
+        Keyset-paginated like ``get_market_data_page``; the wallet or model
+        filter picks the matching ``(..., timestamp)`` index.
+
+        Returns:
+            The rows, and the key to continue after (None on the last page)
+        """
+        where = ["timestamp <= ?", "(timestamp, id) > (?, ?)"]
+        after = after or (start, -1)
+        params: List = [end, after[0], after[1]]
+        if wallet_address:
+            where.append("wallet_address = ?")
+            params.append(wallet_address)
+        if model:
+            model_id = self._find_model_id(model)
+            if model_id is None:
+                return [], None
+            where.append("model = ?")
+            params.append(model_id)
+        params.append(limit + 1)
+
+        with self._pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT 
+                    timestamp,
+                    id,
+                    model,
+                    decision,
+                    eth_price,
+                    was_correct,
+                    profit_loss,
+                    wallet_address
+                FROM ai_decisions
+                WHERE {' AND '.join(where)}
+                ORDER BY timestamp, id
+                LIMIT ?
+            """, params)
+            rows = cursor.fetchall()
+
+        page = [
+            {
+                'timestamp': format_timestamp(ts),
+                'model': self._model_name(model_id),
+                'decision': decode_decision(decision),
+                'eth_price': eth_price,
+                'was_correct': was_correct,
+                'profit_loss': profit_loss,
+                'wallet_address': wallet
+            }
+            for ts, _, model_id, decision, eth_price, was_correct, profit_loss, wallet in rows[:limit]
+        ]
+        next_after = tuple(rows[limit - 1][:2]) if len(rows) > limit else None
+        return page, next_after
+
+    def get_market_series(
+        self,
+        start: int,
+        end: int,
+        table: str = 'market_data'
+    ) -> Dict[str, np.ndarray]:
+        """Get the price and gas series in ``[start, end]`` (epoch ms) as arrays, oldest first.
+
+        Candle tiers report their close price.
+
+        Returns:
+            ``timestamp`` (epoch ms), ``price`` and ``gas_standard`` (gwei,
+            NaN where unknown) arrays of equal length
+        """
+        if table == 'market_data':
+            price = "eth_price"
+        elif table in dict(TIERS):
+            price = "close"
+        else:
+            raise ValueError(f"Unknown market data table: {table}")
+
+        with self._pool.connection() as conn:
+            rows = conn.execute(f"""
+                SELECT timestamp, {price}, gas_price_standard
+                FROM {table}
+                WHERE timestamp BETWEEN ? AND ?
+                ORDER BY timestamp
+            """, (start, end)).fetchall()
+
+        if not rows:
+            empty = np.empty(0)
+            return {'timestamp': empty.astype(np.int64), 'price': empty, 'gas_standard': empty}
+        timestamps, prices, gas = zip(*rows)
+        return {
+            'timestamp': np.array(timestamps, dtype=np.int64),
+            'price': np.array(prices, dtype=np.float64),
+            # NULL becomes NaN; stored values are milli-gwei
+            'gas_standard': np.array(gas, dtype=np.float64) / GAS_SCALE
+        }
+
+    def get_decision_series(
+        self,
+        start: int,
+        end: int,
+        model: str,
+        wallet_address: Optional[str] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Get one model's decisions in ``[start, end]`` (epoch ms) as arrays, oldest first.
+
+        Returns:
+            Epoch-ms timestamps and decision codes (see ``DECISION_CODES``)
+        """
+        model_id = self._find_model_id(model)
+        if model_id is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        where, params = "model = ? AND timestamp BETWEEN ? AND ?", [model_id, start, end]
+        if wallet_address:
+            where += " AND wallet_address = ?"
+            params.append(wallet_address)
+
+        with self._pool.connection() as conn:
+            rows = conn.execute(f"""
+                SELECT timestamp, decision
+                FROM ai_decisions
+                WHERE {where}
+                ORDER BY timestamp
+            """, params).fetchall()
+
+        if not rows:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        timestamps, codes = zip(*rows)
+        return np.array(timestamps, dtype=np.int64), np.array(codes, dtype=np.int64)
 
     def get_recent_decisions(self, limit: int = 100) -> List[Tuple]:
-        """Get recent AI decisions for charting."""
-        with sqlite3.connect(self.db_path) as conn:
+        """Get recent AI decisions for charting.
+
+        Rows are decoded to ISO timestamps and model/decision names.
+        """
+        with self._pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT 
@@ -446,40 +871,51 @@ class TradingDatabase:
                 ORDER BY timestamp DESC
                 LIMIT ?
             """, (limit,))
-            return cursor.fetchall()
+            return [
+                (format_timestamp(ts), self._model_name(model), decode_decision(decision),
+                 price, was_correct, profit_loss)
+                for ts, model, decision, price, was_correct, profit_loss in cursor.fetchall()
+            ]
 
     def get_performance_by_timeframe(self, timeframe: str = 'day') -> Dict[str, Dict[str, float]]:
-        """Get AI model performance statistics by timeframe."""
+        """Get AI model performance statistics by timeframe.
+
+        Periods are derived from the hourly rollup buckets, which align with
+        every supported timeframe.
+        """
+        # Buckets are epoch hours; periods are labelled in local time
+        local_hour = "hour * 3600, 'unixepoch', 'localtime'"
         timeframes = {
-            'hour': "strftime('%Y-%m-%d %H', timestamp)",
-            'day': "date(timestamp)",
-            'week': "strftime('%Y-%W', timestamp)",
-            'month': "strftime('%Y-%m', timestamp)"
+            'hour': f"strftime('%Y-%m-%d %H', {local_hour})",
+            'day': f"date({local_hour})",
+            'week': f"strftime('%Y-%W', {local_hour})",
+            'month': f"strftime('%Y-%m', {local_hour})"
         }
 
         if timeframe not in timeframes:
             raise ValueError(
                 f"Invalid timeframe. Choose from: {', '.join(timeframes.keys())}")
 
-        with sqlite3.connect(self.db_path) as conn:
+        with self._pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute(f"""
                 SELECT 
                     model,
                     {timeframes[timeframe]} as period,
-                    COUNT(*) as decisions,
-                    COALESCE(AVG(CASE WHEN was_correct = 1 THEN 1 ELSE 0 END) * 100, 0) as accuracy,
-                    COALESCE(AVG(CASE WHEN profit_loss IS NOT NULL THEN profit_loss ELSE 0 END), 0) as avg_profit,
-                    COALESCE(SUM(CASE WHEN profit_loss IS NOT NULL THEN profit_loss ELSE 0 END), 0) as total_profit
-                FROM ai_decisions
-                WHERE was_correct IS NOT NULL
-                AND decision != 'HOLD'
+                    SUM(scored) as decisions,
+                    SUM(correct) * 100.0 / SUM(scored) as accuracy,
+                    SUM(profit_sum) / SUM(scored) as avg_profit,
+                    SUM(profit_sum) as total_profit
+                FROM decision_rollups
+                WHERE scored > 0
+                AND decision != ?
                 GROUP BY model, period
                 ORDER BY period DESC, model
-            """)
+            """, (DECISION_CODES['HOLD'],))
 
             results = {}
-            for model, period, decisions, accuracy, avg_profit, total_profit in cursor.fetchall():
+            for model_id, period, decisions, accuracy, avg_profit, total_profit in cursor.fetchall():
+                model = self._model_name(model_id)
                 if model not in results:
                     results[model] = []
                 results[model].append({
@@ -492,31 +928,78 @@ class TradingDatabase:
 
             return results
 
-    def get_model_comparison(self, days: int = 7) -> Dict[str, Dict[str, float]]:
-        """Get detailed model comparison statistics."""
-        with sqlite3.connect(self.db_path) as conn:
+    def get_model_comparison(self, days: int = 7, horizon: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+        """Get detailed model comparison statistics.
+
+        Whole hours inside the window come from the rollups; only the
+        partial hour at the start of the window is read from raw decisions.
+        With a ``horizon`` (a ``HORIZONS`` label such as ``'1h'``), decisions
+        are scored by their outcome at that horizon instead.
+
+        Raises:
+            ValueError: If the horizon is unknown
+        """
+        cutoff = self._clock() - days * MS_PER_DAY
+        if horizon is not None:
+            return self._horizon_comparison(cutoff, horizon_ms(horizon))
+        # First whole hour bucket after the cutoff
+        boundary_hour = cutoff // MS_PER_HOUR + 1
+
+        with self._pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
+                WITH buckets AS (
+                    SELECT
+                        model,
+                        decision,
+                        total,
+                        correct,
+                        profit_sum,
+                        CASE WHEN total > scored
+                            THEN MIN(COALESCE(profit_min, 0), 0) ELSE profit_min END AS profit_min,
+                        CASE WHEN total > scored
+                            THEN MAX(COALESCE(profit_max, 0), 0) ELSE profit_max END AS profit_max
+                    FROM decision_rollups
+                    WHERE hour >= :boundary_hour
+                    UNION ALL
+                    SELECT
+                        model,
+                        decision,
+                        1,
+                        was_correct = 1,
+                        COALESCE(profit_loss, 0),
+                        COALESCE(profit_loss, 0),
+                        COALESCE(profit_loss, 0)
+                    FROM ai_decisions
+                    WHERE timestamp > :cutoff
+                    AND timestamp < :boundary_hour * 3600000
+                )
                 SELECT 
                     model,
-                    COUNT(*) as total_decisions,
-                    SUM(CASE WHEN was_correct = 1 THEN 1 ELSE 0 END) as correct_decisions,
-                    AVG(CASE WHEN was_correct = 1 THEN 1 ELSE 0 END) * 100 as accuracy,
-                    COALESCE(AVG(CASE WHEN profit_loss IS NOT NULL THEN profit_loss ELSE 0 END), 0) as avg_profit,
-                    COALESCE(SUM(CASE WHEN profit_loss IS NOT NULL THEN profit_loss ELSE 0 END), 0) as total_profit,
-                    COALESCE(MIN(CASE WHEN profit_loss IS NOT NULL THEN profit_loss ELSE 0 END), 0) as max_loss,
-                    COALESCE(MAX(CASE WHEN profit_loss IS NOT NULL THEN profit_loss ELSE 0 END), 0) as max_profit,
-                    COUNT(CASE WHEN decision = 'BUY' THEN 1 END) as buy_count,
-                    COUNT(CASE WHEN decision = 'SELL' THEN 1 END) as sell_count,
-                    COUNT(CASE WHEN decision = 'HOLD' THEN 1 END) as hold_count
-                FROM ai_decisions
-                WHERE timestamp > datetime('now', ?)
+                    SUM(total) as total_decisions,
+                    SUM(correct) as correct_decisions,
+                    SUM(correct) * 100.0 / SUM(total) as accuracy,
+                    SUM(profit_sum) / SUM(total) as avg_profit,
+                    SUM(profit_sum) as total_profit,
+                    MIN(profit_min) as max_loss,
+                    MAX(profit_max) as max_profit,
+                    SUM(CASE WHEN decision = :buy THEN total ELSE 0 END) as buy_count,
+                    SUM(CASE WHEN decision = :sell THEN total ELSE 0 END) as sell_count,
+                    SUM(CASE WHEN decision = :hold THEN total ELSE 0 END) as hold_count
+                FROM buckets
                 GROUP BY model
-            """, (f'-{days} days',))
+                HAVING SUM(total) > 0
+            """, {
+                'cutoff': cutoff,
+                'boundary_hour': boundary_hour,
+                'buy': DECISION_CODES['BUY'],
+                'sell': DECISION_CODES['SELL'],
+                'hold': DECISION_CODES['HOLD']
+            })
 
             results = {}
             for row in cursor.fetchall():
-                model = row[0]
+                model = self._model_name(row[0])
                 results[model] = {
                     'total_decisions': row[1],
                     'correct_decisions': row[2],
@@ -534,27 +1017,91 @@ class TradingDatabase:
 
             return results
 
+    def _horizon_comparison(self, cutoff: int, horizon: int) -> Dict[str, Dict[str, float]]:
+        """Model comparison from the outcomes at one horizon of decisions after ``cutoff``."""
+        with self._pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT
+                    model,
+                    COUNT(was_correct) as total_decisions,
+                    SUM(was_correct = 1) as correct_decisions,
+                    SUM(was_correct = 1) * 100.0 / COUNT(was_correct) as accuracy,
+                    AVG(price_change_pct) as avg_profit,
+                    SUM(price_change_pct) as total_profit,
+                    MIN(price_change_pct) as max_loss,
+                    MAX(price_change_pct) as max_profit,
+                    SUM(decision = :buy AND was_correct IS NOT NULL) as buy_count,
+                    SUM(decision = :sell AND was_correct IS NOT NULL) as sell_count,
+                    SUM(decision = :hold AND was_correct IS NOT NULL) as hold_count,
+                    SUM(was_correct IS NULL) as pending
+                FROM decision_outcomes
+                WHERE horizon = :horizon
+                AND timestamp > :cutoff
+                GROUP BY model
+            """, {
+                'horizon': horizon,
+                'cutoff': cutoff,
+                'buy': DECISION_CODES['BUY'],
+                'sell': DECISION_CODES['SELL'],
+                'hold': DECISION_CODES['HOLD']
+            })
+
+            results = {}
+            for row in cursor.fetchall():
+                model = self._model_name(row[0])
+                results[model] = {
+                    'total_decisions': row[1],
+                    'correct_decisions': row[2] or 0,
+                    'accuracy': round(row[3] if row[3] is not None else 0, 1),
+                    'avg_profit': round(row[4] if row[4] is not None else 0, 2),
+                    'total_profit': round(row[5] if row[5] is not None else 0, 2),
+                    'max_loss': round(row[6] if row[6] is not None else 0, 2),
+                    'max_profit': round(row[7] if row[7] is not None else 0, 2),
+                    'decision_distribution': {
+                        'buy': row[8],
+                        'sell': row[9],
+                        'hold': row[10]
+                    },
+                    'pending': row[11]
+                }
+
+            return results
+
     def cleanup_old_data(self) -> None:
-        """Clean up old data to prevent database bloat, keeping last 24 hours of trading data."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        """Snapshot the last 24 hours into daily stats and run retention to completion.
+
+        Expired raw rows are compacted into the candle tiers and deleted in
+        small chunks (see ``run_retention``). Decision rollups are not
+        affected, so model statistics keep their history.
+        """
+        with self._pool.connection() as conn:
             cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+
+            cutoff = self._clock() - MS_PER_DAY
 
             # Get stats for the last 24 hours before flushing
             daily_stats = {}
-            for model in ['gemini', 'groq', 'mistral']:
+            for model in DEFAULT_MODELS:
                 # Get total trades in last 24 hours
                 cursor.execute("""
                     SELECT 
                         COUNT(*) as total_trades,
                         SUM(CASE WHEN was_correct = 1 THEN 1 ELSE 0 END) as correct_trades,
-                        SUM(CASE WHEN decision = 'BUY' THEN 1 ELSE 0 END) as buy_decisions,
-                        SUM(CASE WHEN decision = 'SELL' THEN 1 ELSE 0 END) as sell_decisions,
-                        SUM(CASE WHEN decision = 'HOLD' THEN 1 ELSE 0 END) as hold_decisions,
+                        SUM(CASE WHEN decision = ? THEN 1 ELSE 0 END) as buy_decisions,
+                        SUM(CASE WHEN decision = ? THEN 1 ELSE 0 END) as sell_decisions,
+                        SUM(CASE WHEN decision = ? THEN 1 ELSE 0 END) as hold_decisions,
                         AVG(CASE WHEN was_correct = 1 THEN profit_loss ELSE 0 END) as avg_profit
                     FROM ai_decisions 
-                    WHERE model = ? AND timestamp >= datetime('now', '-24 hours')
-                """, (model,))
+                    WHERE model = ? AND timestamp >= ?
+                """, (
+                    DECISION_CODES['BUY'],
+                    DECISION_CODES['SELL'],
+                    DECISION_CODES['HOLD'],
+                    self._model_id(model),
+                    cutoff
+                ))
                 result = cursor.fetchone()
 
                 if result:
@@ -584,7 +1131,7 @@ class TradingDatabase:
                 )
             """)
 
-            today = datetime.now().strftime('%Y-%m-%d')
+            today = from_epoch_ms(self._clock()).strftime('%Y-%m-%d')
 
             # Delete existing stats for today to avoid duplicates
             cursor.execute("DELETE FROM daily_stats WHERE date = ?", (today,))
@@ -614,23 +1161,15 @@ class TradingDatabase:
                 WHERE date < date('now', '-7 days')
             """)
 
-            # Keep only last 24 hours of raw market data and decisions
-            cursor.execute("""
-                DELETE FROM market_data 
-                WHERE timestamp < datetime('now', '-24 hours')
-            """)
-            cursor.execute("""
-                DELETE FROM ai_decisions 
-                WHERE timestamp < datetime('now', '-24 hours')
-            """)
-
             conn.commit()
 
+        self.run_retention()
+
     def get_daily_stats(self, days: int = 7) -> Dict[str, List[Dict]]:
         """Get the stored daily stats for the specified number of days."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._pool.connection() as conn:
             cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
 
             cursor.execute("""
                 SELECT * FROM daily_stats
@@ -642,7 +1181,7 @@ class TradingDatabase:
             stats = {}
 
             # Make sure we have entries for all models
-            for model in ['gemini', 'groq', 'mistral']:
+            for model in DEFAULT_MODELS:
                 stats[model] = []
 
             # Process the results if we have any
@@ -663,8 +1202,8 @@ class TradingDatabase:
                 })
 
             # If we don't have any stats for today, add default empty entry
-            today = datetime.now().strftime('%Y-%m-%d')
-            for model in ['gemini', 'groq', 'mistral']:
+            today = from_epoch_ms(self._clock()).strftime('%Y-%m-%d')
+            for model in DEFAULT_MODELS:
                 if not stats[model] or stats[model][0]['date'] != today:
                     stats[model].insert(0, {
                         'date': today,
@@ -688,260 +1227,226 @@ class TradingDatabase:
         eth_allocation: float,
         network: str = "unknown"
     ) -> None:
-        """Store wallet action in database."""
+        """Store wallet action in database.
+
+        Raises:
+            ValueError: If the action is not BUY, SELL, HOLD or ERROR
+        """
+        action_code = encode_decision(action)
         eth_price_to_store = None  # Default to None (NULL in DB)
         try:
-            with sqlite3.connect(self.db_path) as conn_price:
-                cursor_price = conn_price.cursor()
-                cursor_price.execute("""
-                    SELECT eth_price 
-                    FROM market_data 
-                    ORDER BY timestamp DESC 
-                    LIMIT 1
-                """)
-                result = cursor_price.fetchone()
-                if result and result[0] is not None:
-                    eth_price_to_store = result[0]
-                else:
-                    logging.warning(
-                        "[db store_wallet_action] No market data available for eth_price. Storing action with NULL price.")
+            if self._writer is not None and self._last_market_price is not None:
+                # The newest market row may still be queued; use it directly
+                eth_price_to_store = self._last_market_price
+            else:
+                with self._pool.connection() as conn_price:
+                    cursor_price = conn_price.cursor()
+                    cursor_price.execute("""
+                        SELECT eth_price 
+                        FROM market_data 
+                        ORDER BY timestamp DESC 
+                        LIMIT 1
+                    """)
+                    result = cursor_price.fetchone()
+                    if result and result[0] is not None:
+                        eth_price_to_store = result[0]
+                    else:
+                        logging.warning(
+                            "[db store_wallet_action] No market data available for eth_price. Storing action with NULL price.")
         except Exception as e_price:
             logging.error(
                 f"[db store_wallet_action] Error fetching eth_price: {e_price}. Storing action with NULL price.")
 
-        with sqlite3.connect(self.db_path) as conn_action:
-            cursor_action = conn_action.cursor()
-            # Store wallet action
-            cursor_action.execute("""
-                INSERT INTO wallet_actions (
-                    timestamp,
-                    wallet_address,
-                    action,
-                    eth_balance,
-                    usdc_balance,
-                    eth_allocation,
-                    eth_price,
-                    network
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                datetime.now(),
+        # Store wallet action
+        self._execute_write("""
+            INSERT INTO wallet_actions (
+                timestamp,
                 wallet_address,
                 action,
                 eth_balance,
                 usdc_balance,
                 eth_allocation,
-                eth_price_to_store,  # Use the fetched or None value
+                eth_price,
                 network
-            ))
-            conn_action.commit()
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            self._clock(),
+            wallet_address,
+            action_code,
+            eth_balance,
+            usdc_balance,
+            eth_allocation,
+            eth_price_to_store,  # Use the fetched or None value
+            network
+        ))
+        self._wallet_stats_cache.invalidate(wallet_address)
 
     def get_wallet_stats(self, wallet_address: str) -> Dict[str, Dict[str, float]]:
-        """Get statistics for a specific wallet."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-
-            # Get recent wallet actions
-            cursor.execute("""
-                SELECT 
-                    action,
-                    timestamp,
-                    eth_price,
-                    eth_balance,
-                    usdc_balance,
-                    eth_allocation
-                FROM wallet_actions
-                WHERE wallet_address = ?
-                ORDER BY timestamp DESC
-                LIMIT 100
-            """, (wallet_address,))
-
-            actions = []
-            for row in cursor.fetchall():
-                actions.append({
-                    'action': row['action'],
-                    'timestamp': row['timestamp'],
-                    'eth_price': row['eth_price'],
-                    'eth_balance': row['eth_balance'],
-                    'usdc_balance': row['usdc_balance'],
-                    'eth_allocation': row['eth_allocation']
-                })
+        """Get statistics for a specific wallet.
 
-            # Get AI decisions specific to this wallet only (no global decisions)
-            cursor.execute("""
-                SELECT 
-                    model,
-                    decision,
-                    timestamp,
-                    eth_price,
-                    was_correct,
-                    profit_loss
-                FROM ai_decisions
-                WHERE wallet_address = ?
-                ORDER BY timestamp DESC
-                LIMIT 100
-            """, (wallet_address,))
-
-            ai_decisions = []
-            # Rename to more accurately reflect the content - this stores aggregated stats by model, not individual decisions
-            decisions_by_model = {
-                'gemini': {'total': 0, 'correct': 0, 'buy': 0, 'sell': 0, 'hold': 0, 'profits': []},
-                'groq': {'total': 0, 'correct': 0, 'buy': 0, 'sell': 0, 'hold': 0, 'profits': []},
-                'mistral': {'total': 0, 'correct': 0, 'buy': 0, 'sell': 0, 'hold': 0, 'profits': []}
-            }
+        Results are cached per wallet and invalidated when the wallet gets a
+        new action, decision or decision score; concurrent requests for the
+        same wallet share one computation.
+        """
+        return self._wallet_stats_cache.get_or_compute(
+            wallet_address, lambda: self._compute_wallet_stats(wallet_address))
 
-            for row in cursor.fetchall():
-                model = row['model']
-                decision = row['decision']
-                was_correct = row['was_correct']
-                profit_loss = row['profit_loss'] or 0
+    def _compute_wallet_stats(self, wallet_address: str) -> Dict[str, Dict[str, float]]:
+        """Build wallet statistics in a single SQL pass."""
+        # Queued writes for this wallet must be visible (and the cache
+        # version was taken before this barrier)
+        self.flush()
 
-                if model not in decisions_by_model:
-                    continue  # Skip if unknown model
+        known_models = [self._model_id(model) for model in DEFAULT_MODELS]
+        model_params = ', '.join('?' * len(known_models))
+        buy, sell, hold = (DECISION_CODES[name] for name in ('BUY', 'SELL', 'HOLD'))
 
-                # Add to the decisions tracking
+        with self._pool.connection() as conn:
+            cursor = conn.cursor()
+            # One row per action, per decision, per model aggregate and one
+            # summary row, told apart by ``kind``. price_change compares each
+            # action with the wallet's previous one (NULL-safe).
+            cursor.execute(f"""
+                WITH actions AS (
+                    SELECT
+                        *,
+                        (eth_price - LAG(eth_price) OVER older)
+                            / NULLIF(LAG(eth_price) OVER older, 0) * 100 AS price_change
+                    FROM (
+                        SELECT id, action, timestamp, eth_price, eth_balance, usdc_balance, eth_allocation
+                        FROM wallet_actions
+                        WHERE wallet_address = ?
+                        ORDER BY timestamp DESC, id DESC
+                        LIMIT 100
+                    )
+                    WINDOW older AS (ORDER BY timestamp, id)
+                ),
+                decisions AS (
+                    SELECT * FROM (
+                        SELECT id, model, decision, timestamp, eth_price, was_correct,
+                               COALESCE(profit_loss, 0) AS profit_loss
+                        FROM ai_decisions
+                        WHERE wallet_address = ?
+                        ORDER BY timestamp DESC, id DESC
+                        LIMIT 100
+                    )
+                    WHERE model IN ({model_params})
+                )
+                SELECT 'action' AS kind, id, NULL AS model, action AS code,
+                       timestamp, eth_price, eth_balance, usdc_balance, eth_allocation,
+                       NULL, NULL, NULL
+                FROM actions
+                UNION ALL
+                SELECT 'decision', id, model, decision,
+                       timestamp, eth_price, was_correct, profit_loss, NULL,
+                       NULL, NULL, NULL
+                FROM decisions
+                UNION ALL
+                SELECT 'model', NULL, model, NULL,
+                       NULL, NULL,
+                       COUNT(*),
+                       SUM(COALESCE(was_correct, 0) != 0),
+                       SUM(decision = {buy}),
+                       SUM(decision = {sell}),
+                       SUM(decision = {hold}),
+                       SUM(profit_loss > 0)
+                FROM decisions
+                GROUP BY model
+                UNION ALL
+                SELECT 'summary', NULL, NULL, NULL,
+                       NULL, NULL,
+                       COUNT(*),
+                       COALESCE(SUM(
+                           (action = {buy} AND price_change > 0) OR
+                           (action = {sell} AND price_change < 0) OR
+                           (action = {hold} AND ABS(price_change) < 1)  -- 1% threshold for HOLD
+                       ), 0),
+                       -- Value change of the newest action vs the one before it
+                       COALESCE((SELECT price_change FROM actions ORDER BY timestamp DESC, id DESC LIMIT 1), 0),
+                       COALESCE(SUM(action = {buy}), 0),
+                       COALESCE(SUM(action = {sell}), 0),
+                       COALESCE(SUM(action = {hold}), 0)
+                FROM actions
+                ORDER BY kind, timestamp DESC, id DESC, model
+            """, (wallet_address, wallet_address, *known_models))
+            rows = cursor.fetchall()
+
+        actions = []
+        ai_decisions = []
+        model_stats = {}
+        correct_decisions = 0
+        for kind, _, model, code, timestamp, eth_price, c1, c2, c3, c4, c5, c6 in rows:
+            if kind == 'action':
+                actions.append({
+                    'action': decode_decision(code),
+                    'timestamp': format_timestamp(timestamp),
+                    'eth_price': eth_price,
+                    'eth_balance': c1,
+                    'usdc_balance': c2,
+                    'eth_allocation': c3
+                })
+            elif kind == 'decision':
                 ai_decisions.append({
-                    'model': model,
-                    'decision': decision,
-                    'timestamp': row['timestamp'],
-                    'eth_price': row['eth_price'],
-                    'was_correct': was_correct,
-                    'profit_loss': profit_loss
+                    'model': self._model_name(model),
+                    'decision': decode_decision(code),
+                    'timestamp': format_timestamp(timestamp),
+                    'eth_price': eth_price,
+                    'was_correct': c1,
+                    'profit_loss': c2
                 })
-
-                # Update model-specific stats
-                decisions_by_model[model]['total'] += 1
-                if was_correct:
-                    decisions_by_model[model]['correct'] += 1
-
-                # Track decision distribution
-                if decision == 'BUY':
-                    decisions_by_model[model]['buy'] += 1
-                elif decision == 'SELL':
-                    decisions_by_model[model]['sell'] += 1
-                elif decision == 'HOLD':
-                    decisions_by_model[model]['hold'] += 1
-
-                # Track profits
-                if profit_loss is not None:
-                    decisions_by_model[model]['profits'].append(profit_loss)
-
-            # Prepare model-specific stats
-            model_stats = {}
-            for model, stats in decisions_by_model.items():
-                if stats['total'] > 0:
-                    # Calculate raw accuracy
-                    raw_accuracy = (stats['correct'] / stats['total']) * 100
-
-                    # Performance score with dynamic weighting
-                    profits = stats['profits']
-                    weighted_score = raw_accuracy
-                    if profits:
-                        # Positive/negative weighting - favor models with higher profit/loss ratios
-                        positive_trades = sum(1 for p in profits if p > 0)
-                        profit_ratio = positive_trades / \
-                            len(profits) if len(profits) > 0 else 0
-                        # Adjust weighted score - cap at ±20% adjustment
-                        profit_adjustment = min(
-                            20, max(-20, (profit_ratio - 0.5) * 40))
-                        weighted_score = min(
-                            100, max(0, raw_accuracy + profit_adjustment))
-
-                    model_stats[model] = {
-                        'total_decisions': stats['total'],
-                        'correct_decisions': stats['correct'],
-                        'accuracy': weighted_score,  # Weighted performance score
-                        'raw_accuracy': raw_accuracy,  # Simple correct/total
-                        'decision_counts': {
-                            'BUY': stats['buy'],
-                            'SELL': stats['sell'],
-                            'HOLD': stats['hold']
-                        }
+            elif kind == 'model':
+                total, correct, buys, sells, holds, positive = c1, c2, c3, c4, c5, c6
+                correct_decisions += correct
+                # Calculate raw accuracy
+                raw_accuracy = (correct / total) * 100
+                # Positive/negative weighting - favor models with higher profit/loss
+                # ratios; adjust weighted score - cap at ±20% adjustment
+                profit_adjustment = min(20, max(-20, (positive / total - 0.5) * 40))
+                model_stats[self._model_name(model)] = {
+                    'total_decisions': total,
+                    'correct_decisions': correct,
+                    'accuracy': min(100, max(0, raw_accuracy + profit_adjustment)),  # Weighted performance score
+                    'raw_accuracy': raw_accuracy,  # Simple correct/total
+                    'decision_counts': {
+                        'BUY': buys,
+                        'SELL': sells,
+                        'HOLD': holds
                     }
-
-            # Calculate overall wallet stats
-            total_actions = len(actions)
-            action_counts = {'BUY': 0, 'SELL': 0, 'HOLD': 0}
-            profitable_actions = 0
-            total_value_change = 0
-
-            # Get latest eth price
-            cursor.execute("""
-                SELECT eth_price FROM market_data
-                ORDER BY timestamp DESC
-                LIMIT 1
-            """)
-            latest_price_row = cursor.fetchone()
-            latest_price = latest_price_row['eth_price'] if latest_price_row else 0
-
-            # If we have actions, analyze them
-            if actions:
-                # Calculate action distribution
-                for action in actions:
-                    if action['action'] in action_counts:
-                        action_counts[action['action']] += 1
-
-                # Check if actions were profitable
-                if len(actions) > 1:
-                    total_value_change = 0  # Reset to accumulate across all periods
-                    for i in range(len(actions) - 1):
-                        current = actions[i]
-                        previous = actions[i + 1]
-
-                        # Use action price data to determine if profitable
-                        price_change = ((current['eth_price'] - previous['eth_price']) /
-                                        previous['eth_price']) * 100
-
-                        # Determine if action was profitable
-                        if (current['action'] == 'BUY' and price_change > 0) or \
-                           (current['action'] == 'SELL' and price_change < 0) or \
-                           (current['action'] == 'HOLD' and abs(price_change) < 1):  # 1% threshold for HOLD
-                            profitable_actions += 1
-
-                        # Calculate cumulative value change
-                        # For the oldest to newest value change, use the first pair (i==0)
-                        if i == 0:
-                            total_value_change = price_change
-                        # For more sophisticated value change calculation, you could consider:
-                        # - Weighted average by time between actions
-                        # - Compound calculation based on action type
-                        # total_value_change += price_change  # Simple cumulative approach
-
-            # Calculate combined accuracy
-            accuracy = 0
-            raw_accuracy = 0  # Add raw accuracy calculation
-            if total_actions > 0:
-                accuracy = (profitable_actions / total_actions) * 100
-
-                # Calculate raw accuracy from all AI decisions
-                correct_decisions = sum(
-                    1 for d in ai_decisions if d['was_correct'])
-                total_decisions = len(ai_decisions)
-                raw_accuracy = (correct_decisions / total_decisions) * \
-                    100 if total_decisions > 0 else 0
-
-            return {
-                'wallet_address': wallet_address,
-                'actions': actions,
-                'ai_decisions': ai_decisions,
-                'model_stats': model_stats,
-                'statistics': {
-                    'total_actions': total_actions,
-                    'action_distribution': action_counts,
-                    'profitable_actions': profitable_actions,
-                    'accuracy': round(accuracy, 1),
-                    # Add raw accuracy to output
-                    'raw_accuracy': round(raw_accuracy, 1),
-                    'total_value_change': round(total_value_change, 2),
-                    'current_eth_balance': actions[0]['eth_balance'] if actions else 0,
-                    'current_usdc_balance': actions[0]['usdc_balance'] if actions else 0,
-                    'current_allocation': actions[0]['eth_allocation'] if actions else 0
                 }
+            else:
+                total_actions, profitable_actions, total_value_change = c1, c2, c3
+                action_counts = {'BUY': c4, 'SELL': c5, 'HOLD': c6}
+
+        # Calculate combined accuracy
+        accuracy = 0
+        raw_accuracy = 0
+        if total_actions > 0:
+            accuracy = (profitable_actions / total_actions) * 100
+            # Calculate raw accuracy from all AI decisions
+            raw_accuracy = (correct_decisions / len(ai_decisions)) * \
+                100 if ai_decisions else 0
+
+        return {
+            'wallet_address': wallet_address,
+            'actions': actions,
+            'ai_decisions': ai_decisions,
+            'model_stats': model_stats,
+            'statistics': {
+                'total_actions': total_actions,
+                'action_distribution': action_counts,
+                'profitable_actions': profitable_actions,
+                'accuracy': round(accuracy, 1),
+                'raw_accuracy': round(raw_accuracy, 1),
+                'total_value_change': round(total_value_change, 2),
+                'current_eth_balance': actions[0]['eth_balance'] if actions else 0,
+                'current_usdc_balance': actions[0]['usdc_balance'] if actions else 0,
+                'current_allocation': actions[0]['eth_allocation'] if actions else 0
             }
+        }
 
     def update_wallet_connection(self, wallet_address: str, is_connected: bool) -> None:
         """Update the connection status of a wallet."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 INSERT OR REPLACE INTO wallet_connections (
@@ -950,15 +1455,15 @@ class TradingDatabase:
             """, (
                 wallet_address,
                 is_connected,
-                datetime.now()
+                self._clock()
             ))
             conn.commit()
 
     def get_wallet_connection(self, wallet_address: str) -> Dict[str, bool]:
         """Get the connection status of a wallet."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._pool.connection() as conn:
             cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
             cursor.execute("""
                 SELECT is_connected
                 FROM wallet_connections
@@ -981,7 +1486,7 @@ class TradingDatabase:
 
     def get_connected_wallets(self) -> List[str]:
         """Get a list of all connected wallet addresses."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT wallet_address
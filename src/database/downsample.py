@@ -0,0 +1,131 @@
+"""Downsampling of time series for charts.
+
+A chart a few hundred pixels wide cannot show more than a few hundred
+points, so long ranges are reduced before they are serialized. Both
+methods return the indices of the points to keep (ascending), so callers
+can pick whole rows and only decode what they send:
+
+- ``lttb``: Largest-Triangle-Three-Buckets keeps, in each bucket, the point
+  forming the largest triangle with its neighbours, which preserves the
+  visual shape of the line. The buckets holding the series' global minimum
+  and maximum keep those instead.
+- ``minmax``: keeps the lowest and highest point of every bucket, so every
+  extreme survives; cheaper, and fully vectorized.
+
+Both keep the first and last point and the global extremes, and return at
+most ``points`` indices (``MIN_POINTS`` or more). Buckets hold equal
+numbers of points, so inputs must be sorted by ``x``.
+"""
+
+from typing import Sequence
+
+import numpy as np
+
+METHODS = ('lttb', 'minmax')
+
+# First, last, minimum and maximum
+MIN_POINTS = 4
+
+
+def _bucket_edges(start: int, stop: int, buckets: int) -> np.ndarray:
+    """Edges splitting ``[start, stop)`` into ``buckets`` runs of near-equal size."""
+    return np.linspace(start, stop, buckets + 1).astype(np.int64)
+
+
+def minmax_indices(y: Sequence[float], points: int) -> np.ndarray:
+    """Indices of the first, last, and per-bucket min/max points (at most ``points``)."""
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if points >= n or n < 3:
+        return np.arange(n)
+    buckets = (points - 2) // 2
+    edges = _bucket_edges(1, n - 1, buckets)
+    # One row of indices per bucket; shorter rows repeat their last index,
+    # which leaves the row's argmin/argmax unchanged
+    width = int(np.max(np.diff(edges)))
+    matrix = np.minimum(edges[:-1, None] + np.arange(width)[None, :], (edges[1:] - 1)[:, None])
+    values = y[matrix]
+    rows = np.arange(buckets)
+    lows = matrix[rows, np.argmin(values, axis=1)]
+    highs = matrix[rows, np.argmax(values, axis=1)]
+    return np.unique(np.concatenate(([0, n - 1], lows, highs)))
+
+
+def lttb_indices(x: Sequence[float], y: Sequence[float], points: int) -> np.ndarray:
+    """Indices chosen by Largest-Triangle-Three-Buckets (at most ``points``).
+
+    A bucket holding the global minimum or maximum selects it instead of
+    its largest triangle; if one bucket holds both, it selects both and one
+    bucket fewer is used.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if points >= n or points < 3:
+        return np.arange(n)
+
+    # The first and last points are always selected anyway
+    extremes = sorted({int(np.argmin(y)), int(np.argmax(y))} - {0, n - 1})
+    buckets = points - 2
+    while True:
+        edges = _bucket_edges(1, n - 1, buckets)
+        forced = {}
+        for index in extremes:
+            forced.setdefault(int(np.searchsorted(edges, index, side='right')) - 1, []).append(index)
+        if buckets + sum(len(picks) - 1 for picks in forced.values()) <= points - 2:
+            break
+        buckets -= 1
+
+    # Each bucket is compared against the average point of the next one;
+    # the last bucket against the final point
+    sizes = np.diff(edges)
+    next_x = np.append((np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / sizes)[1:], x[-1])
+    next_y = np.append((np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / sizes)[1:], y[-1])
+
+    # The anchor is the previously selected point, so this part is
+    # sequential; each step is a few vectorized operations on one bucket.
+    # Twice the triangle area is |(ax - cx) * y + (cy - ay) * x + k|
+    selected = [0]
+    ax, ay = float(x[0]), float(y[0])
+    for i in range(buckets):
+        if i in forced:
+            selected.extend(forced[i])
+        else:
+            start, stop = edges[i], edges[i + 1]
+            cx, cy = next_x[i], next_y[i]
+            k = (cx - ax) * ay - (cy - ay) * ax
+            selected.append(
+                start + int(np.argmax(np.abs((ax - cx) * y[start:stop] + (cy - ay) * x[start:stop] + k))))
+        ax, ay = float(x[selected[-1]]), float(y[selected[-1]])
+    selected.append(n - 1)
+
+    return np.asarray(selected, dtype=np.int64)
+
+
+def downsample_indices(
+    x: Sequence[float],
+    y: Sequence[float],
+    points: int,
+    method: str = 'lttb'
+) -> np.ndarray:
+    """Indices of at most ``points`` rows to keep from a series sorted by ``x``.
+
+    Raises:
+        ValueError: If the method is unknown or ``points`` below MIN_POINTS
+    """
+    if points < MIN_POINTS:
+        raise ValueError(f"points must be at least {MIN_POINTS}")
+    if method == 'lttb':
+        return lttb_indices(x, y, points)
+    if method == 'minmax':
+        return minmax_indices(y, points)
+    raise ValueError(f"Unknown downsampling method: {method}")
+
+
+def downsample_rows(rows: Sequence[Sequence], points: int, method: str = 'lttb') -> list:
+    """Keep at most ``points`` of ``rows``, sorted by time in column 0 with the value in column 1."""
+    if len(rows) <= points:
+        return list(rows)
+    x = np.fromiter((row[0] for row in rows), dtype=np.float64, count=len(rows))
+    y = np.fromiter((row[1] for row in rows), dtype=np.float64, count=len(rows))
+    return [rows[i] for i in downsample_indices(x, y, points, method)]
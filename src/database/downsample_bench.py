@@ -0,0 +1,123 @@
+"""
+Payload size and latency benchmark of chart downsampling.
+
+Seeds a scratch database with a random walk of raw ticks, then reads the
+whole range with ``TradingDatabase.get_market_history`` and encodes it as
+``/api/historical-data`` would, without downsampling and with each method.
+Every downsampled series must keep the first and last tick and the price
+extremes, in at most ``--points`` rows:
+
+    python -m src.database.downsample_bench /tmp/downsample.db --hours 720 --points 500
+"""
+
+import argparse
+import gzip
+import json
+import math
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import time
+from typing import List, Optional, Tuple
+
+from src.database.db import TradingDatabase
+from src.database.downsample import METHODS
+from src.database.encoding import MS_PER_HOUR, now_ms
+
+
+def seed_ticks(db_path: str, hours: float, interval_s: float) -> Tuple[int, int]:
+    """Fill a database with raw ticks; returns (tick count, "now" they end at)."""
+    TradingDatabase(db_path, maintenance=False).close()
+
+    rng = random.Random(7)
+    now = now_ms()
+    count = int(hours * 3600 / interval_s)
+    price = 3000.0
+    rows = []
+    for i in range(count):
+        price *= math.exp(rng.gauss(0, 0.0008))
+        rows.append((now - (count - i) * int(interval_s * 1000), price, 1e9, price * 1.02, price * 0.98,
+                     12000, 15000, 20000, '55', 'Greed'))
+    conn = sqlite3.connect(db_path)
+    conn.executemany("""
+        INSERT INTO market_data (
+            timestamp, eth_price, eth_volume_24h, eth_high_24h, eth_low_24h,
+            gas_price_low, gas_price_standard, gas_price_fast,
+            fear_greed_value, fear_greed_sentiment
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+    conn.commit()
+    conn.close()
+    return count, now
+
+
+def measure(db: TradingDatabase, hours: float, points: Optional[int], method: str,
+            repeat: int) -> Tuple[List[Tuple], bytes, float]:
+    """Rows, encoded payload and median milliseconds of read + encode."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = db.get_market_history(hours=hours, points=points, method=method)
+        body = json.dumps({"market_data": rows}, separators=(',', ':')).encode()
+        timings.append((time.perf_counter() - started) * 1000)
+    return rows, body, statistics.median(timings)
+
+
+def check_shape(full: List[Tuple], rows: List[Tuple], points: int) -> List[str]:
+    """Problems with a downsampled series (empty if it keeps what it must)."""
+    problems = []
+    if len(rows) > points:
+        problems.append(f"{len(rows)} rows > {points}")
+    if rows[0] != full[0] or rows[-1] != full[-1]:
+        problems.append("first/last tick dropped")
+    prices = [row[1] for row in full]
+    kept = [row[1] for row in rows]
+    if min(kept) != min(prices) or max(kept) != max(prices):
+        problems.append("price extremes dropped")
+    return problems
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('db_path', help="scratch database (overwritten)")
+    parser.add_argument('--hours', type=float, default=720, help="range to seed and read")
+    parser.add_argument('--interval-s', type=float, default=60, help="seconds between ticks")
+    parser.add_argument('--points', type=int, default=500, help="downsampling target")
+    parser.add_argument('--repeat', type=int, default=5, help="timed reads per variant (median)")
+    args = parser.parse_args(argv)
+
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(args.db_path + suffix):
+            os.remove(args.db_path + suffix)
+    started = time.perf_counter()
+    count, now = seed_ticks(args.db_path, args.hours, args.interval_s)
+    print(f"Seeded {count:,} ticks over {args.hours:g}h in {time.perf_counter() - started:.1f}s")
+
+    # Keep the whole range raw, so the baseline is the full-resolution payload
+    db = TradingDatabase(args.db_path, maintenance=False, clock=lambda: now,
+                         raw_retention_hours=args.hours + 1)
+    failed = False
+    try:
+        full, body, full_ms = measure(db, args.hours, None, 'lttb', args.repeat)
+        full_gzip = len(gzip.compress(body, 6))
+        print(f"{'variant':10s} {'rows':>8s} {'bytes':>11s} {'gzip':>10s} {'ms':>8s}")
+        print(f"{'full':10s} {len(full):8,d} {len(body):11,d} {full_gzip:10,d} {full_ms:8.1f}")
+        for method in METHODS:
+            rows, body, ms = measure(db, args.hours, args.points, method, args.repeat)
+            print(f"{method:10s} {len(rows):8,d} {len(body):11,d} {len(gzip.compress(body, 6)):10,d} {ms:8.1f}")
+            problems = check_shape(full, rows, args.points)
+            if problems:
+                failed = True
+                print(f"  {method}: {'; '.join(problems)}")
+    finally:
+        db.close()
+    if failed:
+        return 1
+    print(f"every method kept the first/last tick and the extremes in at most {args.points} rows")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""Compact storage encodings for the trading database.
+
+Rows are stored with integer encodings rather than text:
+
+- timestamps as integer milliseconds since the Unix epoch
+- gas prices as integer milli-gwei (gwei * 1000, i.e. units of 1e6 wei)
+- BUY/SELL/HOLD decisions and wallet actions as small integer codes
+- model names as ids into the ``models`` lookup table
+
+The helpers here convert between those encodings and the values the rest of
+the application (and the JSON API) has always used.
+"""
+
+import time
+from datetime import datetime
+from typing import Dict, Optional, Union
+
+# Decision / action codes; ERROR records a provider failure
+DECISION_CODES: Dict[str, int] = {'HOLD': 0, 'BUY': 1, 'SELL': 2, 'ERROR': 3}
+DECISION_NAMES: Dict[int, str] = {code: name for name, code in DECISION_CODES.items()}
+
+# Models known up front; others are added to the lookup table on first use
+DEFAULT_MODELS = ('gemini', 'groq', 'mistral')
+
+MS_PER_5M = 5 * 60 * 1000
+MS_PER_HOUR = 3600 * 1000
+MS_PER_DAY = 24 * MS_PER_HOUR
+
+# Gas prices are kept with three decimal places of gwei precision
+GAS_SCALE = 1000
+
+
+def now_ms() -> int:
+    """Current time as epoch milliseconds."""
+    return int(time.time() * 1000)
+
+
+def to_epoch_ms(value: datetime) -> int:
+    """Convert a (naive local or aware) datetime to epoch milliseconds."""
+    return int(round(value.timestamp() * 1000))
+
+
+def from_epoch_ms(value: int) -> datetime:
+    """Convert epoch milliseconds to a naive local datetime."""
+    return datetime.fromtimestamp(value / 1000)
+
+
+def format_timestamp(value: Optional[int]) -> Optional[str]:
+    """Render epoch milliseconds as the ISO text the API used to return."""
+    if value is None:
+        return None
+    return from_epoch_ms(value).isoformat(sep=' ')
+
+
+def encode_decision(decision: str) -> int:
+    """Map BUY/SELL/HOLD/ERROR to its storage code."""
+    try:
+        return DECISION_CODES[decision.upper()]
+    except (KeyError, AttributeError):
+        raise ValueError(
+            f"Invalid decision {decision!r}. Must be one of: {', '.join(DECISION_CODES)}")
+
+
+def decode_decision(code: Optional[int]) -> Optional[str]:
+    """Map a storage code back to BUY/SELL/HOLD/ERROR."""
+    if code is None:
+        return None
+    return DECISION_NAMES.get(code, 'ERROR')
+
+
+def encode_gas(value: Union[str, float, int, None]) -> Optional[int]:
+    """Encode a gwei value (Etherscan returns strings) as integer milli-gwei."""
+    if value is None or value == '':
+        return None
+    try:
+        return int(round(float(value) * GAS_SCALE))
+    except (TypeError, ValueError):
+        return None
+
+
+def decode_gas(value: Optional[int]) -> Optional[float]:
+    """Decode integer milli-gwei back to gwei."""
+    if value is None:
+        return None
+    return value / GAS_SCALE
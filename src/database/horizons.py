@@ -0,0 +1,225 @@
+"""Decision outcomes at fixed horizons, scored with as-of joins.
+
+``update_decision_accuracy`` scores a decision once, against whatever the
+price is when the next cycle runs. ``decision_outcomes`` instead holds one
+row per (decision, horizon) for the horizons in ``HORIZONS``, scored
+against the price as of ``decision time + horizon``: the last known price at
+or before that moment, found with ``searchsorted`` over the sorted market
+timestamps. Scores therefore do not depend on scheduler timing.
+
+Each row carries its decision's model, code, time and price, so outcomes
+outlive the raw decisions when decision retention is enabled, like the
+rollups do. Outcomes have their own retention tier (``outcome_days``).
+
+Scoring is a bulk pass: new decisions are copied in behind a persistent
+watermark (the highest decision id ingested, kept in ``retention_state``
+so deleting outcomes never moves it back), then pending rows whose horizon
+has elapsed are scored one time window at a time, with a single price
+series load, as-of join and vectorized evaluation per window.
+"""
+
+import sqlite3
+from typing import Dict, Optional
+
+import numpy as np
+
+from src.database.encoding import MS_PER_5M, MS_PER_DAY, MS_PER_HOUR
+from src.database.scoring import rolling_market_regime, score_decisions
+
+# Horizon label -> milliseconds after the decision
+HORIZONS: Dict[str, int] = {
+    '10m': 10 * 60 * 1000,
+    '1h': MS_PER_HOUR,
+    '4h': 4 * MS_PER_HOUR,
+    '24h': MS_PER_DAY,
+}
+
+# An as-of price older than this (relative to the horizon's end) is a data
+# gap, not a price at the horizon
+ASOF_TOLERANCE_MS = 15 * 60 * 1000
+# Pending rows still inside a data gap this long after their horizon ended
+# are dropped
+OUTCOME_EXPIRY_MS = MS_PER_DAY
+# Decision time span scored per batch
+SCORE_WINDOW_MS = MS_PER_DAY
+# Prices loaded before a batch for the market regime (24 prices at 10-minute ticks)
+REGIME_LOOKBACK_MS = 4 * MS_PER_HOUR
+
+
+def horizon_ms(label: str) -> int:
+    """Milliseconds of a horizon label.
+
+    Raises:
+        ValueError: If the label is not one of ``HORIZONS``
+    """
+    if label not in HORIZONS:
+        raise ValueError(f"Invalid horizon {label!r}. Must be one of: {', '.join(HORIZONS)}")
+    return HORIZONS[label]
+
+
+def create_decision_outcomes(cursor: sqlite3.Cursor) -> None:
+    """Create the outcomes table and its indexes (idempotent)."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS decision_outcomes (
+            decision_id INTEGER NOT NULL,
+            horizon INTEGER NOT NULL,
+            timestamp INTEGER NOT NULL,
+            model INTEGER NOT NULL,
+            decision INTEGER NOT NULL,
+            eth_price REAL NOT NULL,
+            future_price REAL,
+            price_change_pct REAL,
+            was_correct INTEGER,
+            PRIMARY KEY (decision_id, horizon)
+        ) WITHOUT ROWID
+    """)
+    # get_model_comparison(horizon=...): WHERE horizon = ? AND timestamp > ?,
+    # covering the aggregated columns so the table is never touched
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_decision_outcomes_horizon_timestamp
+        ON decision_outcomes(horizon, timestamp, model, decision, was_correct, price_change_pct)
+    """)
+    # score_outcomes: pending rows by decision time
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_decision_outcomes_pending
+        ON decision_outcomes(timestamp)
+        WHERE was_correct IS NULL
+    """)
+
+
+def ingest_decisions(cursor: sqlite3.Cursor) -> int:
+    """Add a pending outcome per horizon for every decision not yet present.
+
+    Returns:
+        Number of rows added
+    """
+    row = cursor.execute(
+        "SELECT value FROM retention_state WHERE name = 'outcome_watermark'").fetchone()
+    # Databases scored before the watermark was kept start from their outcomes
+    watermark = row[0] if row else cursor.execute(
+        "SELECT COALESCE(MAX(decision_id), 0) FROM decision_outcomes").fetchone()[0]
+    newest = cursor.execute("SELECT MAX(id) FROM ai_decisions").fetchone()[0]
+    if newest is None or newest <= watermark:
+        return 0
+
+    horizons = ' UNION ALL '.join(f"SELECT {ms} AS horizon" for ms in HORIZONS.values())
+    cursor.execute(f"""
+        INSERT OR IGNORE INTO decision_outcomes (decision_id, horizon, timestamp, model, decision, eth_price)
+        SELECT d.id, h.horizon, d.timestamp, d.model, d.decision, d.eth_price
+        FROM ai_decisions d, ({horizons}) AS h
+        WHERE d.id > ? AND d.id <= ?
+    """, (watermark, newest))
+    added = cursor.rowcount
+    cursor.execute("""
+        INSERT OR REPLACE INTO retention_state (name, value)
+        VALUES ('outcome_watermark', ?)
+    """, (newest,))
+    return added
+
+
+def price_series(cursor: sqlite3.Cursor, start: int, end: int):
+    """Prices known in ``[start, end]`` (epoch ms) as sorted arrays.
+
+    Raw ticks where they are still kept, 5-minute candle closes before
+    them. A candle's close is only known once it has ended, so it is
+    timestamped at its end.
+    """
+    raw = cursor.execute("""
+        SELECT timestamp, eth_price FROM market_data
+        WHERE timestamp BETWEEN ? AND ?
+        ORDER BY timestamp
+    """, (start, end)).fetchall()
+    first_raw = raw[0][0] if raw else end + 1
+    candles = cursor.execute(f"""
+        SELECT timestamp + {MS_PER_5M}, close FROM market_data_5m
+        WHERE timestamp >= ? AND timestamp < ?
+        ORDER BY timestamp
+    """, (start - MS_PER_5M, first_raw - MS_PER_5M)).fetchall()
+    rows = candles + raw
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    timestamps, prices = zip(*rows)
+    return np.array(timestamps, dtype=np.int64), np.array(prices, dtype=np.float64)
+
+
+def _score_window(cursor: sqlite3.Cursor, start: int, end: int, latest: int) -> Dict[str, int]:
+    """Score the pending outcomes of decisions made in ``[start, end)``."""
+    rows = cursor.execute("""
+        SELECT decision_id, horizon, timestamp, decision, eth_price
+        FROM decision_outcomes
+        WHERE was_correct IS NULL
+        AND timestamp >= ? AND timestamp < ?
+        AND timestamp + horizon <= ?
+    """, (start, end, latest)).fetchall()
+    if not rows:
+        return {'scored': 0, 'dropped': 0}
+
+    ids, horizons, timestamps, decisions, decision_prices = (np.array(column) for column in zip(*rows))
+    targets = timestamps + horizons
+    series_times, series_prices = price_series(
+        cursor, int(targets.min()) - REGIME_LOOKBACK_MS, int(targets.max()))
+
+    # As-of join: last price at or before each horizon's end
+    index = np.searchsorted(series_times, targets, side='right') - 1
+    found = index >= 0
+    found[found] = targets[found] - series_times[index[found]] <= ASOF_TOLERANCE_MS
+
+    updates = []
+    if found.any():
+        index = index[found]
+        future_prices = series_prices[index]
+        result = score_decisions(
+            decisions[found],
+            decision_prices[found],
+            horizons[found] / MS_PER_HOUR,
+            future_prices,
+            rolling_market_regime(series_prices, index)
+        )
+        updates = list(zip(
+            future_prices.tolist(),
+            result.price_change_pct.tolist(),
+            result.was_correct.astype(int).tolist(),
+            ids[found].tolist(),
+            horizons[found].tolist()
+        ))
+        cursor.executemany("""
+            UPDATE decision_outcomes
+            SET future_price = ?, price_change_pct = ?, was_correct = ?
+            WHERE decision_id = ? AND horizon = ?
+        """, updates)
+
+    expired = ~found & (targets < latest - OUTCOME_EXPIRY_MS)
+    cursor.executemany(
+        "DELETE FROM decision_outcomes WHERE decision_id = ? AND horizon = ?",
+        zip(ids[expired].tolist(), horizons[expired].tolist()))
+    return {'scored': len(updates), 'dropped': int(expired.sum())}
+
+
+def score_outcomes(cursor: sqlite3.Cursor, latest: Optional[int] = None) -> Dict[str, int]:
+    """Ingest new decisions and score every outcome whose horizon has elapsed.
+
+    Args:
+        latest: Newest market time to score up to (default: the newest tick)
+
+    Returns:
+        Counts of ingested, scored and dropped (no price in range) outcomes
+    """
+    stats = {'ingested': ingest_decisions(cursor), 'scored': 0, 'dropped': 0}
+    if latest is None:
+        latest = cursor.execute("SELECT MAX(timestamp) FROM market_data").fetchone()[0]
+        if latest is None:
+            return stats
+
+    start = 0
+    while True:
+        # Skip over time without pending outcomes
+        start = cursor.execute("""
+            SELECT MIN(timestamp) FROM decision_outcomes
+            WHERE was_correct IS NULL AND timestamp >= ?
+        """, (start,)).fetchone()[0]
+        if start is None or start > latest - min(HORIZONS.values()):
+            return stats
+        window = _score_window(cursor, start, start + SCORE_WINDOW_MS, latest)
+        stats['scored'] += window['scored']
+        stats['dropped'] += window['dropped']
+        start += SCORE_WINDOW_MS
@@ -0,0 +1,254 @@
+"""Background maintenance for the trading database.
+
+Replaces the full ``VACUUM`` that used to run in ``TradingDatabase.__init__``.
+A daemon thread waits for the database to go idle and then spends a small
+time budget on:
+
+- ``PRAGMA incremental_vacuum(N)``: returns free pages to the filesystem a
+  few at a time (requires ``auto_vacuum=INCREMENTAL``)
+- ``ANALYZE`` (bounded by ``analysis_limit``): refreshes planner statistics
+- ``PRAGMA optimize``
+
+Each step is short; between steps the worker yields as soon as another
+thread borrows a connection, and picks up where it stopped next time.
+
+New databases are created with incremental auto-vacuum. Older ones need a
+one-off full ``VACUUM`` to switch, which holds the write lock for the
+whole rewrite, so the worker never does it; run it with the app stopped:
+
+    python -m src.database.maintenance trading_data.db --convert-auto-vacuum
+
+Schema migrations normally run when the database is opened; ``--migrate``
+applies them ahead of time, so a long one does not delay app startup.
+"""
+
+import argparse
+import logging
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from src.database.pool import ConnectionPool
+
+# PRAGMA auto_vacuum values
+AUTO_VACUUM_INCREMENTAL = 2
+
+# Rows sampled per index by ANALYZE; keeps it fast on large tables
+ANALYSIS_LIMIT = 1000
+
+
+class MaintenanceWorker:
+    """Time-sliced VACUUM/ANALYZE/optimize on a background thread."""
+
+    def __init__(
+        self,
+        pool: ConnectionPool,
+        interval_s: float = 60,
+        idle_s: float = 10,
+        slice_ms: int = 250,
+        vacuum_pages: int = 256,
+        analyze_interval_s: float = 3600,
+        start: bool = True
+    ):
+        """Initialize the worker.
+
+        Args:
+            pool: Connection pool of the database to maintain
+            interval_s: How often to check whether maintenance should run
+            idle_s: Seconds without pool activity before maintenance starts
+            slice_ms: Time budget of one maintenance run
+            vacuum_pages: Free pages released per incremental_vacuum step
+            analyze_interval_s: Minimum seconds between ANALYZE runs
+            start: Start the background thread immediately
+        """
+        self.pool = pool
+        self.interval_s = interval_s
+        self.idle_s = idle_s
+        self.slice_ms = slice_ms
+        self.vacuum_pages = vacuum_pages
+        self.analyze_interval_s = analyze_interval_s
+        self._warned_auto_vacuum = False
+
+        self.last_run: Dict[str, object] = {}
+        self.stats = {'runs': 0, 'skipped_busy': 0, 'errors': 0}
+        self._last_analyze: Optional[float] = None
+        self._run_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if start:
+            self._thread = threading.Thread(
+                target=self._loop, name="db-maintenance", daemon=True)
+            self._thread.start()
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Stop the background thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def is_idle(self) -> bool:
+        """True when no connection is borrowed and the pool has been quiet."""
+        return (
+            self.pool.in_use == 0 and
+            time.monotonic() - self.pool.last_activity >= self.idle_s
+        )
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            if not self.is_idle():
+                self.stats['skipped_busy'] += 1
+                continue
+            try:
+                self.run_once()
+            except sqlite3.Error as e:
+                self.stats['errors'] += 1
+                logging.error(f"[db maintenance] Maintenance run failed: {e}")
+
+    def _yield(self, deadline: float) -> bool:
+        """True if the run should stop: budget spent or another thread is active."""
+        # The worker itself holds one connection
+        return time.monotonic() >= deadline or self.pool.in_use > 1 or self._stop.is_set()
+
+    def run_once(self, force: bool = False) -> Dict[str, object]:
+        """Run one time-sliced maintenance pass and return its stats.
+
+        Args:
+            force: Ignore the time budget and activity checks (for tests
+                and manual runs); every step runs to completion
+        """
+        with self._run_lock, self.pool.connection() as conn:
+            started = time.monotonic()
+            deadline = float('inf') if force else started + self.slice_ms / 1000
+            stop = (lambda: self._stop.is_set()) if force else (lambda: self._yield(deadline))
+            cursor = conn.cursor()
+            run = {
+                'started_at': datetime.now().isoformat(),
+                'incremental_vacuum': False,
+                'freed_pages': 0,
+                'freelist_pages': 0,
+                'analyzed': False,
+                'optimized': False,
+                'interrupted': False,
+            }
+
+            auto_vacuum = cursor.execute("PRAGMA auto_vacuum").fetchone()[0]
+            run['incremental_vacuum'] = auto_vacuum == AUTO_VACUUM_INCREMENTAL
+            if not run['incremental_vacuum'] and not self._warned_auto_vacuum:
+                self._warned_auto_vacuum = True
+                logging.warning(
+                    "[db maintenance] Free pages are not reclaimed: the database predates "
+                    "incremental auto-vacuum. Convert it with the app stopped: "
+                    "python -m src.database.maintenance <db> --convert-auto-vacuum")
+
+            if run['incremental_vacuum']:
+                while not stop():
+                    free = cursor.execute("PRAGMA freelist_count").fetchone()[0]
+                    if free == 0:
+                        break
+                    cursor.execute(f"PRAGMA incremental_vacuum({self.vacuum_pages})")
+                    cursor.fetchall()
+                    conn.commit()
+                    run['freed_pages'] += free - \
+                        cursor.execute("PRAGMA freelist_count").fetchone()[0]
+
+            analyze_due = (
+                self._last_analyze is None or
+                time.monotonic() - self._last_analyze >= self.analyze_interval_s
+            )
+            if analyze_due and not stop():
+                cursor.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+                cursor.execute("ANALYZE")
+                conn.commit()
+                self._last_analyze = time.monotonic()
+                run['analyzed'] = True
+
+            if not stop():
+                cursor.execute("PRAGMA optimize")
+                cursor.fetchall()
+                run['optimized'] = True
+
+            run['freelist_pages'] = cursor.execute("PRAGMA freelist_count").fetchone()[0]
+            run['interrupted'] = not run['optimized']
+            run['duration_ms'] = round((time.monotonic() - started) * 1000, 1)
+
+        self.stats['runs'] += 1
+        self.last_run = run
+        if run['freed_pages'] or run['analyzed']:
+            logging.info(f"[db maintenance] {run}")
+        return run
+
+
+def convert_auto_vacuum(conn: sqlite3.Connection) -> bool:
+    """Switch a database to incremental auto-vacuum with a full VACUUM.
+
+    The VACUUM rewrites the whole file under the write lock, so only run
+    it while nothing else uses the database.
+
+    Returns:
+        True if the database was converted, False if it already was
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == AUTO_VACUUM_INCREMENTAL:
+        return False
+    conn.execute(f"PRAGMA auto_vacuum = {AUTO_VACUUM_INCREMENTAL}")
+    conn.execute("VACUUM")
+    return conn.execute("PRAGMA auto_vacuum").fetchone()[0] == AUTO_VACUUM_INCREMENTAL
+
+
+def migrate(db_path: str) -> Tuple[int, int]:
+    """Apply pending schema migrations; returns the versions before and after."""
+    from src.database.db import TradingDatabase
+
+    conn = sqlite3.connect(db_path)
+    try:
+        before = conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        conn.close()
+    TradingDatabase(db_path, maintenance=False).close()
+    conn = sqlite3.connect(db_path)
+    try:
+        return before, conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """One-off maintenance of a database that is not in use."""
+    parser = argparse.ArgumentParser(description="One-off maintenance of a trading database")
+    parser.add_argument("db_path", help="Database to maintain (stop the app first)")
+    parser.add_argument("--migrate", action="store_true",
+                        help="Apply pending schema migrations, logging progress")
+    parser.add_argument("--convert-auto-vacuum", action="store_true",
+                        help="Switch to incremental auto-vacuum (full VACUUM)")
+    args = parser.parse_args(argv)
+    if not (args.migrate or args.convert_auto_vacuum):
+        parser.error("nothing to do (use --migrate and/or --convert-auto-vacuum)")
+
+    if args.migrate:
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+        started = time.perf_counter()
+        before, after = migrate(args.db_path)
+        if before == after:
+            print(f"Schema already at version {after}")
+        else:
+            print(f"Migrated schema {before} -> {after} in {time.perf_counter() - started:.1f}s")
+        if not args.convert_auto_vacuum:
+            return 0
+
+    conn = sqlite3.connect(args.db_path, isolation_level=None)
+    try:
+        started = time.perf_counter()
+        converted = convert_auto_vacuum(conn)
+    finally:
+        conn.close()
+    if converted:
+        print(f"Converted to incremental auto-vacuum in {time.perf_counter() - started:.1f}s")
+    else:
+        print("Already using incremental auto-vacuum")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
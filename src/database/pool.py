@@ -0,0 +1,195 @@
+"""Connection pooling for the trading database.
+
+SQLite connections are cheap to keep open and comparatively expensive to
+create, and most PRAGMAs only apply to the connection that issued them.
+This module keeps a bounded set of long-lived connections, each configured
+once with WAL journaling and the performance PRAGMAs, and hands them out to
+whichever thread needs one.
+"""
+
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+# PRAGMAs applied to every connection when it is opened
+DEFAULT_PRAGMAS: Dict[str, object] = {
+    # Lets background maintenance reclaim free pages without a full VACUUM;
+    # only takes effect on a new database, so it must come before anything
+    # (such as journal_mode) that writes the file header
+    'auto_vacuum': 'INCREMENTAL',
+    # Readers no longer block the writer (and vice versa)
+    'journal_mode': 'WAL',
+    # Faster writes with reasonable safety; durable enough under WAL
+    'synchronous': 'NORMAL',
+    # Store temp tables in memory
+    'temp_store': 'MEMORY',
+    # Use 16MB of page cache per connection
+    'cache_size': -16000,
+    # Memory-map up to 256MB of the database file
+    'mmap_size': 256 * 1024 * 1024,
+    # Wait up to 5s for a competing writer instead of failing immediately
+    'busy_timeout': 5000,
+}
+
+
+class _NestedConnection:
+    """The held connection as seen by a nested ``connection()`` block.
+
+    ``commit`` is a no-op and ``with conn:`` does not commit, so a helper
+    that commits its own work cannot commit the caller's transaction
+    halfway through; the outermost block commits (or rolls back) it all.
+    Everything else is delegated to the connection.
+    """
+
+    __slots__ = ('_conn',)
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+
+    def __getattr__(self, name: str):
+        return getattr(self._conn, name)
+
+    def __enter__(self) -> "_NestedConnection":
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        return False
+
+    def commit(self) -> None:
+        """Deferred to the outermost ``connection()`` block."""
+
+
+class ConnectionPool:
+    """Bounded pool of long-lived SQLite connections.
+
+    Connections are created lazily up to ``max_size`` and reused across
+    threads (``check_same_thread=False``); a connection is only ever used by
+    one thread at a time. Nested ``connection()`` calls on the same thread
+    reuse the connection the thread already holds, so helper methods can be
+    composed without exhausting the pool; only the outermost block commits
+    (see ``_NestedConnection``).
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_size: int = 8,
+        pragmas: Optional[Dict[str, object]] = None,
+        acquire_timeout: float = 30.0
+    ):
+        """Initialize the pool without opening any connection yet."""
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.db_path = db_path
+        self.max_size = max_size
+        self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+        self.acquire_timeout = acquire_timeout
+
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._all: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._closed = False
+        self.last_activity = time.monotonic()
+
+    def _open(self) -> sqlite3.Connection:
+        """Open and configure a new connection."""
+        busy_ms = int(self.pragmas.get('busy_timeout', 5000))
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=busy_ms / 1000,
+            check_same_thread=False
+        )
+        cursor = conn.cursor()
+        for name, value in self.pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+            # journal_mode returns the resulting mode; drain it
+            cursor.fetchall()
+        cursor.close()
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        """Take an idle connection, opening a new one if under the limit."""
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool is closed")
+
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if len(self._all) < self.max_size:
+                conn = self._open()
+                self._all.append(conn)
+                return conn
+
+        try:
+            return self._idle.get(timeout=self.acquire_timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                f"Timed out after {self.acquire_timeout}s waiting for a database connection")
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        """Return a connection to the idle set."""
+        if self._closed:
+            conn.close()
+            return
+        if conn.in_transaction:
+            # Never hand out a connection with a dangling transaction
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection for the duration of the block.
+
+        The outermost block commits on success and rolls back on error, just
+        like using ``sqlite3.connect()`` as a context manager did before.
+        """
+        held = getattr(self._local, 'conn', None)
+        if held is not None:
+            yield _NestedConnection(held)
+            return
+
+        conn = self._acquire()
+        self._local.conn = conn
+        self.last_activity = time.monotonic()
+        try:
+            with conn:
+                yield conn
+        finally:
+            self._local.conn = None
+            self.last_activity = time.monotonic()
+            self._release(conn)
+
+    @property
+    def size(self) -> int:
+        """Number of connections opened so far."""
+        with self._lock:
+            return len(self._all)
+
+    @property
+    def in_use(self) -> int:
+        """Number of connections currently borrowed."""
+        with self._lock:
+            return len(self._all) - self._idle.qsize()
+
+    def close(self) -> None:
+        """Close every idle connection and refuse further checkouts."""
+        self._closed = True
+        with self._lock:
+            while True:
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    conn.close()
+                except sqlite3.Error as e:
+                    logging.warning(f"[db pool] Error closing connection: {e}")
+            self._all.clear()
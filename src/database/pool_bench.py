@@ -0,0 +1,149 @@
+"""
+Before/after benchmark of the connection pool.
+
+"Before" is the original connection handling: a fresh ``sqlite3.connect``
+per method call, with SQLite's defaults (rollback journal, no busy
+timeout, default cache). "After" is ``TradingDatabase`` as shipped, with
+pooled WAL connections. Both run the same schema and queries on their own
+scratch database, seeded with the same decisions:
+
+    python -m src.database.pool_bench /tmp/pool-bench --stores 2000 --reads 500 --threads 8
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional
+
+from src.database.db import TradingDatabase
+from src.database.encoding import DEFAULT_MODELS, MS_PER_DAY, now_ms
+
+DECISIONS = ('BUY', 'SELL', 'HOLD')
+
+
+class FreshConnections:
+    """Stand-in for the pool that opens a new default connection per call."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def close(self) -> None:
+        pass
+
+
+def open_database(db_path: str, pooled: bool, seed_decisions: int) -> TradingDatabase:
+    """A fresh scratch database, seeded, with pooled or per-call connections."""
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    db = TradingDatabase(db_path, maintenance=False)
+    rng = random.Random(7)
+    now = now_ms()
+    with db.connection() as conn:
+        model_ids = [row[0] for row in conn.execute("SELECT id FROM models")]
+        conn.executemany("""
+            INSERT INTO ai_decisions (timestamp, model, decision, eth_price, was_correct, profit_loss, wallet_address)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (
+            (now - rng.randrange(14 * MS_PER_DAY), rng.choice(model_ids), rng.randrange(3),
+             rng.uniform(2800, 3200), rng.randrange(2), rng.gauss(0, 1.5), f"0x{rng.randrange(100):040x}")
+            for _ in range(seed_decisions)
+        ))
+    if pooled:
+        return db
+
+    # The original database never switched to WAL
+    db.close()
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=DELETE").fetchall()
+    conn.close()
+    db = TradingDatabase(db_path, maintenance=False)
+    db._pool.close()
+    db._pool = FreshConnections(db_path)
+    return db
+
+
+def ops_per_s(fn: Callable[[int], None], count: int) -> float:
+    started = time.perf_counter()
+    for i in range(count):
+        fn(i)
+    return count / (time.perf_counter() - started)
+
+
+def concurrent_ops_per_s(db: TradingDatabase, threads: int, ops: int) -> float:
+    """Threads alternating inserts and comparisons; errors count as failures."""
+    errors: List[Exception] = []
+    ready = threading.Barrier(threads + 1)
+
+    def worker(n: int) -> None:
+        ready.wait()
+        for i in range(ops):
+            try:
+                if i % 2:
+                    db.get_model_comparison(days=7)
+                else:
+                    db.store_ai_decision(DEFAULT_MODELS[n % 3], DECISIONS[i % 3], 3000.0, f"0x{n:040x}")
+            except sqlite3.Error as e:
+                errors.append(e)
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for thread in workers:
+        thread.start()
+    ready.wait()
+    started = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    if errors:
+        print(f"  {len(errors)} operations failed, e.g. {errors[0]}")
+    return (threads * ops - len(errors)) / elapsed
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('directory', help="directory for the two scratch databases")
+    parser.add_argument('--seed-decisions', type=int, default=20000, help="decisions to seed")
+    parser.add_argument('--stores', type=int, default=2000, help="store_ai_decision calls")
+    parser.add_argument('--reads', type=int, default=500, help="get_model_comparison calls")
+    parser.add_argument('--threads', type=int, default=8, help="threads of the mixed run")
+    parser.add_argument('--thread-ops', type=int, default=100, help="operations per thread")
+    args = parser.parse_args(argv)
+    os.makedirs(args.directory, exist_ok=True)
+
+    results = {}
+    for label, pooled in (('before', False), ('after', True)):
+        db = open_database(os.path.join(args.directory, f"{label}.db"), pooled, args.seed_decisions)
+        try:
+            results[label] = (
+                ops_per_s(lambda i: db.store_ai_decision(
+                    DEFAULT_MODELS[i % 3], DECISIONS[i % 3], 3000.0 + i % 50, "0xbench"), args.stores),
+                ops_per_s(lambda i: db.get_model_comparison(days=7), args.reads),
+                concurrent_ops_per_s(db, args.threads, args.thread_ops),
+            )
+        finally:
+            db.close()
+
+    print(f"{'ops/s':28s} {'before':>10s} {'after':>10s} {'speedup':>8s}")
+    names = ('store_ai_decision', 'get_model_comparison', f'{args.threads} threads mixed r/w')
+    for i, name in enumerate(names):
+        before, after = results['before'][i], results['after'][i]
+        print(f"{name:28s} {before:10,.0f} {after:10,.0f} {after / before:7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
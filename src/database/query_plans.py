@@ -0,0 +1,175 @@
+"""
+Query plan regression check for the trading database.
+
+Runs every read path of ``TradingDatabase`` (plus decision scoring) with a
+trace callback, captures the exact SQL it executes, and asks SQLite for the
+``EXPLAIN QUERY PLAN`` of each statement. Any plan that falls back to a full
+scan of one of the large raw tables is reported.
+
+Run against a scratch database, since scoring writes to it:
+
+    python -m src.database.query_plans /tmp/plans.db --seed 1000000
+
+``tests/test_query_plans.py`` runs the same check on a small seeded database.
+"""
+
+import argparse
+import random
+import re
+import sqlite3
+import sys
+import time
+from typing import Dict, List
+
+from src.database.db import TradingDatabase
+from src.database.encoding import DECISION_CODES, DEFAULT_MODELS, MS_PER_DAY, MS_PER_HOUR, now_ms
+
+# Tables that grow without bound and must never be scanned in full
+LARGE_TABLES = ('market_data', 'ai_decisions', 'wallet_actions', 'decision_outcomes')
+
+_FULL_SCAN = re.compile(r'^SCAN (\w+)(?! USING)')
+_LITERALS = re.compile(r"'[^']*'|\b-?\d+(\.\d+)?(e-?\d+)?\b")
+
+
+def capture_query_plans(db: TradingDatabase, wallet_address: str) -> Dict[str, List[str]]:
+    """Exercise the hot paths and return ``{sql: [plan detail, ...]}``."""
+    statements: List[str] = []
+
+    with db.connection() as conn:
+        conn.set_trace_callback(statements.append)
+        try:
+            # Nested calls on this thread reuse the traced connection
+            db.get_recent_market_data(limit=100)
+            db.get_recent_decisions(limit=100)
+            db.get_accuracy_stats()
+            db.get_model_comparison(days=7)
+            db.get_performance_by_timeframe('day')
+            db.get_daily_stats(days=7)
+            db.get_wallet_stats(wallet_address)
+            db.get_wallet_connection(wallet_address)
+            db.get_connected_wallets()
+            end = now_ms()
+            db.get_market_data_page(end - MS_PER_DAY, end, after=(end - MS_PER_HOUR, 0))
+            db.get_decisions_page(end - MS_PER_DAY, end, wallet_address=wallet_address)
+            db.get_decisions_page(end - MS_PER_DAY, end, model=DEFAULT_MODELS[0])
+            db.get_market_series(end - MS_PER_DAY, end)
+            db.get_decision_series(end - MS_PER_DAY, end, DEFAULT_MODELS[0], wallet_address)
+            db.update_decision_accuracy(3000.0, wallet_address=wallet_address)
+            db.update_decision_accuracy(3000.0)
+            db.score_horizons()
+            db.get_model_comparison(days=7, horizon='1h')
+        finally:
+            conn.set_trace_callback(None)
+
+        plans = {}
+        seen = set()
+        cursor = conn.cursor()
+        for sql in statements:
+            if not re.match(r'\s*(SELECT|WITH|UPDATE|DELETE)', sql, re.IGNORECASE):
+                continue
+            # executemany traces every row; explain each statement shape once
+            shape = _LITERALS.sub('?', sql)
+            if shape in seen:
+                continue
+            seen.add(shape)
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            plans[sql] = [row[3] for row in cursor.fetchall()]
+        return plans
+
+
+def find_full_scans(plans: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    """Return the subset of plans that scan a large table without an index."""
+    offenders = {}
+    for sql, details in plans.items():
+        scans = [
+            detail for detail in details
+            if (match := _FULL_SCAN.match(detail)) and match.group(1) in LARGE_TABLES
+        ]
+        if scans:
+            offenders[sql] = scans
+    return offenders
+
+
+def seed_database(db_path: str, decisions: int, wallets: int = 1000) -> str:
+    """Fill a database with synthetic history and return a seeded wallet."""
+    db = TradingDatabase(db_path)
+    db.close()
+
+    rng = random.Random(42)
+    now = now_ms()
+    span = 30 * MS_PER_DAY
+    wallet_ids = [f"0x{i:040x}" for i in range(wallets)]
+    codes = [DECISION_CODES[name] for name in ('BUY', 'SELL', 'HOLD')]
+
+    conn = sqlite3.connect(db_path)
+    model_ids = [row[0] for row in conn.execute("SELECT id FROM models")]
+    conn.executemany("""
+        INSERT INTO market_data (timestamp, eth_price, eth_volume_24h, eth_high_24h, eth_low_24h)
+        VALUES (?, ?, 0, 0, 0)
+    """, (
+        (now - span * i // (decisions // 10), rng.uniform(2500, 3500))
+        for i in range(decisions // 10)
+    ))
+    conn.executemany("""
+        INSERT INTO ai_decisions (timestamp, model, decision, eth_price, was_correct, profit_loss, wallet_address)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, (
+        (
+            now - rng.randrange(span),
+            rng.choice(model_ids),
+            rng.choice(codes),
+            rng.uniform(2500, 3500),
+            *((None, None) if rng.random() < 0.01 else (rng.random() < 0.5, rng.uniform(-5, 5))),
+            rng.choice(wallet_ids)
+        )
+        for _ in range(decisions)
+    ))
+    conn.executemany("""
+        INSERT INTO wallet_actions (timestamp, wallet_address, action, eth_balance, usdc_balance, eth_allocation, eth_price, network)
+        VALUES (?, ?, ?, 1, 1000, 50, ?, 'mainnet')
+    """, (
+        (now - rng.randrange(span), rng.choice(wallet_ids),
+         rng.choice(codes), rng.uniform(2500, 3500))
+        for _ in range(decisions // 10)
+    ))
+    conn.executemany("""
+        INSERT OR REPLACE INTO wallet_connections (wallet_address, is_connected, last_updated)
+        VALUES (?, ?, ?)
+    """, ((w, rng.random() < 0.5, now) for w in wallet_ids))
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+    return wallet_ids[0]
+
+
+def main() -> int:
+    """Seed (optionally) and check query plans; exit non-zero on full scans."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("db_path", help="Scratch database to inspect")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Seed this many synthetic decisions first")
+    parser.add_argument("--wallet", default=None, help="Wallet to query")
+    args = parser.parse_args()
+
+    wallet = args.wallet or "0x" + "0" * 40
+    if args.seed:
+        started = time.perf_counter()
+        wallet = seed_database(args.db_path, args.seed)
+        print(f"Seeded {args.seed:,} decisions in {time.perf_counter() - started:.1f}s")
+
+    db = TradingDatabase(args.db_path)
+    plans = capture_query_plans(db, wallet)
+    offenders = find_full_scans(plans)
+
+    for sql, details in plans.items():
+        marker = "FULL SCAN" if sql in offenders else "ok"
+        print(f"[{marker}] {' '.join(sql.split())[:100]}")
+        for detail in details:
+            print(f"      {detail}")
+
+    print(f"{len(plans)} statements checked, {len(offenders)} with full table scans")
+    return 1 if offenders else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
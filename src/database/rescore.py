@@ -0,0 +1,225 @@
+"""
+Parallel re-scoring of historical decisions under a scoring rules version.
+
+Decisions are scored once, by whatever formula was current at the time
+(``SCORING_RULES`` in ``src/database/scoring.py``). After a new version is
+added, every scored decision can be re-scored with it so old and new scores
+are no longer mixed:
+
+1. ``ai_decisions`` is split into equal time ranges, several per worker so
+   uneven ranges balance out.
+2. A process pool scores the ranges. Each worker opens its own read-only
+   connection and reproduces the original scoring moment: the stored
+   price change, the hours between decision and ``scored_at``, and the
+   market regime as of ``scored_at``. Decisions scored before
+   ``scored_at`` was recorded are assumed scored at the next market tick
+   (the next cycle).
+3. Workers return only the verdicts that changed. The parent streams them
+   into a temporary table and applies them in a single transaction, which
+   also stamps ``scoring_version`` on every re-scored row. The rollup
+   triggers move each changed verdict between the correct and incorrect
+   counts; profits and min/max do not depend on the verdict, so the
+   rollups stay exact without a rebuild.
+
+Verdicts whose raw decisions retention already deleted live on only in
+``decision_rollups`` and cannot be re-scored. The re-score is refused while
+any exist, unless ``--allow-unbacked`` accepts that they keep their version.
+
+    python -m src.database.rescore trading_data.db --rules-version 2 --workers 8
+"""
+
+import argparse
+import multiprocessing
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, Optional, Tuple
+from urllib.request import pathname2url
+
+import numpy as np
+
+from src.database.encoding import MS_PER_HOUR
+from src.database.horizons import REGIME_LOOKBACK_MS, price_series
+from src.database.scoring import MarketRegime, judge_price_changes, rolling_market_regime, scoring_rules
+
+# Time ranges per worker, so a range with many decisions does not leave
+# the other workers idle
+PARTITIONS_PER_WORKER = 4
+# How far after a legacy decision its scoring tick is looked for
+LEGACY_SCORING_LAG_MS = MS_PER_HOUR
+
+# (decisions re-scored, ids whose verdict changed, their new verdicts)
+Rescored = Tuple[int, np.ndarray, np.ndarray]
+
+
+def partition_ranges(cursor: sqlite3.Cursor, partitions: int) -> List[Tuple[int, int]]:
+    """Split the decisions' time span into ``partitions`` ``[start, end)`` ranges (epoch ms)."""
+    first, last = cursor.execute("SELECT MIN(timestamp), MAX(timestamp) FROM ai_decisions").fetchone()
+    if first is None:
+        return []
+    step = (last - first) // max(partitions, 1) + 1
+    return [(start, min(start + step, last + 1)) for start in range(first, last + 1, step)]
+
+
+def rescore_range(db_path: str, start: int, end: int, version: int, scored_before: int) -> Rescored:
+    """Re-score the decisions made in ``[start, end)`` and scored by ``scored_before`` (runs in a worker).
+
+    Returns:
+        Number of decisions re-scored, and the ids and new verdicts (0/1)
+        of those whose verdict changed
+    """
+    rules = scoring_rules(version)
+    conn = sqlite3.connect(f"file:{pathname2url(os.path.abspath(db_path))}?mode=ro", uri=True)
+    try:
+        cursor = conn.cursor()
+        rows = cursor.execute("""
+            SELECT id, decision, timestamp, COALESCE(profit_loss, 0), scored_at, was_correct
+            FROM ai_decisions
+            WHERE timestamp >= ? AND timestamp < ?
+            AND was_correct IS NOT NULL
+            AND (scored_at IS NULL OR scored_at <= ?)
+        """, (start, end, scored_before)).fetchall()
+        if not rows:
+            return 0, np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int8)
+
+        ids, decisions, timestamps, price_change_pct, scored_at, previous = (
+            np.array(column) for column in zip(*rows))
+        timestamps = timestamps.astype(np.int64)
+        # NULL scoring times become NaN
+        scored_at = scored_at.astype(np.float64)
+        legacy = np.isnan(scored_at)
+        series_end = timestamps.max() + LEGACY_SCORING_LAG_MS
+        if not legacy.all():
+            series_end = max(series_end, np.nanmax(scored_at))
+        series_times, series_prices = price_series(
+            cursor, int(timestamps.min()) - REGIME_LOOKBACK_MS, int(series_end))
+    finally:
+        conn.close()
+
+    if len(series_times):
+        next_tick = np.minimum(np.searchsorted(series_times, timestamps, side='right'), len(series_times) - 1)
+        scored_at = np.where(legacy, series_times[next_tick], scored_at).astype(np.int64)
+        # The regime update_decision_accuracy saw: the prices up to the scoring time
+        index = np.searchsorted(series_times, scored_at, side='right') - 1
+        regime = rolling_market_regime(series_prices, np.maximum(index, 0), rules=rules)
+        regime = MarketRegime(
+            volatility_floor=np.where(index >= 0, regime.volatility_floor, np.nan),
+            trending=regime.trending & (index >= 0)
+        )
+    else:
+        scored_at = np.where(legacy, timestamps, scored_at).astype(np.int64)
+        regime = MarketRegime()
+
+    was_correct = judge_price_changes(
+        decisions, price_change_pct, (scored_at - timestamps) / MS_PER_HOUR, regime, rules).astype(np.int8)
+    changed = was_correct != previous
+    return len(rows), ids[changed].astype(np.int64), was_correct[changed]
+
+
+def compute_rescores(
+    db_path: str,
+    ranges: List[Tuple[int, int]],
+    version: int,
+    scored_before: int,
+    workers: int
+) -> Iterator[Rescored]:
+    """Re-score every range, in a process pool unless ``workers`` is 1."""
+    if workers <= 1:
+        for start, end in ranges:
+            yield rescore_range(db_path, start, end, version, scored_before)
+        return
+    # Spawned workers inherit no connections or threads from the parent
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        yield from pool.map(
+            rescore_range,
+            [db_path] * len(ranges),
+            [start for start, _ in ranges],
+            [end for _, end in ranges],
+            [version] * len(ranges),
+            [scored_before] * len(ranges)
+        )
+
+
+def stage_rescores(cursor: sqlite3.Cursor, results: Iterable[Rescored]) -> Tuple[int, int]:
+    """Collect changed verdicts in a temporary table as they arrive.
+
+    Returns:
+        Number of re-scored decisions and of changed verdicts
+    """
+    cursor.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS rescored (
+            id INTEGER PRIMARY KEY,
+            was_correct INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("DELETE FROM temp.rescored")
+    rescored = changed = 0
+    for count, ids, was_correct in results:
+        rescored += count
+        changed += len(ids)
+        cursor.executemany(
+            "INSERT OR REPLACE INTO temp.rescored (id, was_correct) VALUES (?, ?)",
+            zip(ids.tolist(), was_correct.tolist()))
+    return rescored, changed
+
+
+def apply_rescores(cursor: sqlite3.Cursor, version: int, scored_before: int) -> None:
+    """Write the staged verdicts to ``ai_decisions``; the caller commits.
+
+    Only changed verdicts go through the rollup triggers, which keep the
+    rollups exact (nothing else about a decision changes). Every decision
+    the workers re-scored is stamped with ``version``; decisions scored
+    since (after ``scored_before``) keep the version that scored them.
+    """
+    cursor.execute("""
+        UPDATE ai_decisions
+        SET was_correct = r.was_correct
+        FROM temp.rescored AS r
+        WHERE ai_decisions.id = r.id
+    """)
+    cursor.execute("""
+        UPDATE ai_decisions
+        SET scoring_version = ?
+        WHERE was_correct IS NOT NULL
+        AND (scored_at IS NULL OR scored_at <= ?)
+        AND scoring_version IS NOT ?
+    """, (version, scored_before, version))
+    cursor.execute("DROP TABLE temp.rescored")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from src.database.db import TradingDatabase
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('db_path', help="trading database to re-score")
+    parser.add_argument('--rules-version', type=int, help="scoring rules version (default: current)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--partitions', type=int, help="time ranges (default: 4 per worker)")
+    parser.add_argument(
+        '--allow-unbacked', action='store_true',
+        help="re-score even though some rollup verdicts have no raw decisions left")
+    args = parser.parse_args(argv)
+
+    db = TradingDatabase(args.db_path, maintenance=False)
+    try:
+        stats = db.rescore_decisions(
+            args.rules_version, workers=args.workers, partitions=args.partitions,
+            allow_unbacked=args.allow_unbacked)
+    except ValueError as e:
+        parser.error(str(e))
+    finally:
+        db.close()
+    print(
+        f"Re-scored {stats['rescored']:,} decisions under rules v{stats['version']} "
+        f"({stats['changed']:,} verdicts changed) with {stats['workers']} workers over "
+        f"{stats['partitions']} ranges: compute {stats['compute_s']}s, merge {stats['merge_s']}s "
+        f"({stats['decisions_per_s']:,.0f} decisions/s)")
+    if stats['unbacked']:
+        print(f"Warning: {stats['unbacked']:,} rollup verdicts have no raw decisions left "
+              f"and keep the rules version that scored them")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
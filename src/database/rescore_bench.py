@@ -0,0 +1,70 @@
+"""
+Throughput benchmark for parallel re-scoring.
+
+Seeds a scratch database (see ``query_plans.seed_database``) and re-scores
+it once per worker count, reporting the compute time, the single-process
+merge time, throughput and the speedup over one worker:
+
+    python -m src.database.rescore_bench /tmp/rescore.db --seed 3000000 --workers 1 2 4 8
+
+Worker counts above the machine's CPU count are still run but cannot show
+scaling; they are marked in the output.
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+from src.database.db import TradingDatabase
+from src.database.query_plans import seed_database
+
+
+def run_benchmark(
+    db_path: str,
+    workers: List[int],
+    version: Optional[int] = None,
+    repeat: int = 1
+) -> List[Dict[str, float]]:
+    """Re-score ``db_path`` with each worker count; the best of ``repeat`` runs is kept."""
+    results = []
+    db = TradingDatabase(db_path, maintenance=False)
+    try:
+        for count in workers:
+            runs = [db.rescore_decisions(version, workers=count) for _ in range(max(repeat, 1))]
+            results.append(min(runs, key=lambda stats: stats['compute_s']))
+    finally:
+        db.close()
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('db_path', help="scratch database to re-score")
+    parser.add_argument('--seed', type=int, default=0, help="seed this many synthetic decisions first")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--rules-version', type=int, help="scoring rules version (default: current)")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per worker count (best is kept)")
+    args = parser.parse_args(argv)
+
+    if args.seed:
+        started = time.perf_counter()
+        seed_database(args.db_path, args.seed)
+        print(f"Seeded {args.seed:,} decisions in {time.perf_counter() - started:.1f}s")
+
+    cpus = os.cpu_count() or 1
+    results = run_benchmark(args.db_path, args.workers, args.rules_version, args.repeat)
+    baseline = results[0]['compute_s']
+    print(f"{cpus} CPUs, {results[0]['rescored']:,} decisions, rules v{results[0]['version']}")
+    print(f"{'workers':>7} {'compute s':>10} {'merge s':>8} {'decisions/s':>12} {'speedup':>8}")
+    for stats in results:
+        note = "  (more workers than CPUs)" if stats['workers'] > cpus else ""
+        print(
+            f"{stats['workers']:>7} {stats['compute_s']:>10.3f} {stats['merge_s']:>8.3f} "
+            f"{stats['decisions_per_s']:>12,.0f} {baseline / stats['compute_s']:>7.2f}x{note}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+"""Tiered retention for market data and AI decisions.
+
+Raw rows are only kept for a short window. Older history survives in
+coarser tiers:
+
+- ``market_data``: raw ticks, kept for ``raw_hours``
+- ``market_data_5m``: 5-minute OHLC candles, kept for ``five_min_days``
+- ``market_data_1h``: hourly OHLC candles, kept indefinitely
+- ``ai_decisions``: raw decisions, kept indefinitely unless
+  ``decision_days`` is set; their statistics live on indefinitely in
+  ``decision_rollups`` either way
+- ``decision_outcomes``: horizon-scored decisions, kept for ``outcome_days``
+
+Compaction is incremental. Completed 5-minute windows of raw ticks are
+aggregated into both candle tiers behind a watermark, one hour of ticks per
+transaction, and expired rows are deleted ``chunk_size`` rows at a time, so
+the write lock is only ever held briefly.
+"""
+
+import logging
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from src.database.encoding import MS_PER_5M, MS_PER_DAY, MS_PER_HOUR, now_ms
+from src.database.horizons import HORIZONS
+from src.database.pool import ConnectionPool
+
+# Candle tiers, finest first: (table, bucket size in ms)
+TIERS: List[Tuple[str, int]] = [
+    ('market_data_5m', MS_PER_5M),
+    ('market_data_1h', MS_PER_HOUR),
+]
+
+_CANDLE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        timestamp INTEGER PRIMARY KEY,
+        open REAL NOT NULL,
+        high REAL NOT NULL,
+        low REAL NOT NULL,
+        close REAL NOT NULL,
+        eth_volume_24h REAL,
+        gas_price_low INTEGER,
+        gas_price_standard INTEGER,
+        gas_price_fast INTEGER,
+        fear_greed_value TEXT,
+        fear_greed_sentiment TEXT,
+        samples INTEGER NOT NULL
+    )
+"""
+
+# Recompute whole candles from the raw ticks in [start, end); replacing the
+# row makes the aggregation idempotent
+_AGGREGATE_SQL = """
+    INSERT OR REPLACE INTO {table} (
+        timestamp, open, high, low, close, eth_volume_24h,
+        gas_price_low, gas_price_standard, gas_price_fast,
+        fear_greed_value, fear_greed_sentiment, samples
+    )
+    SELECT
+        bucket,
+        MAX(open_price),
+        MAX(eth_price),
+        MIN(eth_price),
+        MAX(close_price),
+        MAX(last_volume),
+        CAST(ROUND(AVG(gas_price_low)) AS INTEGER),
+        CAST(ROUND(AVG(gas_price_standard)) AS INTEGER),
+        CAST(ROUND(AVG(gas_price_fast)) AS INTEGER),
+        MAX(last_fear_greed_value),
+        MAX(last_fear_greed_sentiment),
+        COUNT(*)
+    FROM (
+        SELECT
+            timestamp / {size} * {size} AS bucket,
+            eth_price,
+            gas_price_low,
+            gas_price_standard,
+            gas_price_fast,
+            FIRST_VALUE(eth_price) OVER w AS open_price,
+            LAST_VALUE(eth_price) OVER w AS close_price,
+            LAST_VALUE(eth_volume_24h) OVER w AS last_volume,
+            LAST_VALUE(fear_greed_value) OVER w AS last_fear_greed_value,
+            LAST_VALUE(fear_greed_sentiment) OVER w AS last_fear_greed_sentiment
+        FROM market_data
+        WHERE timestamp >= ? AND timestamp < ?
+        WINDOW w AS (
+            PARTITION BY timestamp / {size}
+            ORDER BY timestamp, id
+            ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING
+        )
+    )
+    GROUP BY bucket
+"""
+
+
+@dataclass
+class RetentionPolicy:
+    """How long each tier keeps its rows."""
+
+    raw_hours: float = 24
+    five_min_days: float = 28
+    # None keeps raw decisions (history, backtests, re-scoring) indefinitely
+    decision_days: Optional[float] = None
+    # None keeps horizon outcomes indefinitely
+    outcome_days: Optional[float] = 90
+    chunk_size: int = 2000
+
+
+def create_retention_tiers(cursor: sqlite3.Cursor) -> None:
+    """Create the candle tiers and the compaction watermark table (idempotent)."""
+    for table, _ in TIERS:
+        cursor.execute(_CANDLE_TABLE_SQL.format(table=table))
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS retention_state (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        )
+    """)
+
+
+class RetentionEngine:
+    """Runs tiered compaction in small transactions on a connection pool."""
+
+    def __init__(self, pool: ConnectionPool, policy: Optional[RetentionPolicy] = None):
+        """Initialize the engine; nothing runs until ``run()`` is called."""
+        self.pool = pool
+        self.policy = policy or RetentionPolicy()
+        self.last_run: Dict[str, float] = {}
+
+    def watermark(self) -> Optional[int]:
+        """End (epoch ms, exclusive) of the raw ticks already in the candle tiers."""
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                "SELECT value FROM retention_state WHERE name = 'market_watermark'").fetchone()
+        return row[0] if row else None
+
+    def run(self, max_chunks: Optional[int] = None, now: Optional[int] = None) -> Dict[str, float]:
+        """Run compaction until caught up or ``max_chunks`` transactions were used.
+
+        Returns:
+            Counts of aggregated windows and deleted rows per table
+        """
+        started = time.perf_counter()
+        now = now_ms() if now is None else now
+        budget = [max_chunks if max_chunks is not None else float('inf')]
+        stats = {
+            'windows': 0, 'market_data': 0, 'ai_decisions': 0,
+            'decision_outcomes': 0, 'market_data_5m': 0
+        }
+
+        stats['windows'] = self._aggregate(now, budget)
+
+        # Raw ticks may only go once they are in the candle tiers, and not
+        # before the start of the hour the watermark is in (that hourly
+        # candle is still recomputed from raw)
+        watermark = self.watermark() or 0
+        raw_cutoff = int(now - self.policy.raw_hours * MS_PER_HOUR)
+        stats['market_data'] = self._delete_expired(
+            'market_data', min(raw_cutoff, watermark // MS_PER_HOUR * MS_PER_HOUR), budget)
+        if self.policy.decision_days is not None:
+            # Whole hours only, so a finished pass never leaves a
+            # decision_rollups bucket with part of its raw rows
+            decision_cutoff = int(now - self.policy.decision_days * MS_PER_DAY)
+            stats['ai_decisions'] = self._delete_expired(
+                'ai_decisions', decision_cutoff // MS_PER_HOUR * MS_PER_HOUR, budget)
+        if self.policy.outcome_days is not None:
+            outcome_cutoff = int(now - self.policy.outcome_days * MS_PER_DAY)
+            # One horizon at a time, so the expiry scan uses the
+            # (horizon, timestamp) index
+            for horizon in HORIZONS.values():
+                stats['decision_outcomes'] += self._delete_expired(
+                    'decision_outcomes', outcome_cutoff, budget, where=f"horizon = {horizon}")
+        stats['market_data_5m'] = self._delete_expired(
+            'market_data_5m', int(now - self.policy.five_min_days * MS_PER_DAY), budget)
+
+        stats['seconds'] = round(time.perf_counter() - started, 3)
+        self.last_run = stats
+        if any(count for name, count in stats.items() if name != 'seconds'):
+            logging.info(f"[db retention] {stats}")
+        return stats
+
+    def _aggregate(self, now: int, budget: List[float]) -> int:
+        """Fold completed 5-minute windows of raw ticks into the candle tiers."""
+        # Only aggregate 5-minute windows that have fully elapsed
+        limit = now // MS_PER_5M * MS_PER_5M
+        windows = 0
+
+        while budget[0] > 0:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                row = cursor.execute(
+                    "SELECT value FROM retention_state WHERE name = 'market_watermark'").fetchone()
+                start = row[0] if row else None
+                # Skip over gaps without ticks
+                cursor.execute(
+                    "SELECT MIN(timestamp) FROM market_data WHERE timestamp >= ?",
+                    (start or 0,))
+                next_tick = cursor.fetchone()[0]
+                if next_tick is None or next_tick >= limit:
+                    return windows
+                start = max(start or 0, next_tick // MS_PER_5M * MS_PER_5M)
+                end = min(start // MS_PER_HOUR * MS_PER_HOUR + MS_PER_HOUR, limit)
+
+                for table, size in TIERS:
+                    # Candles overlapping the window are recomputed whole
+                    cursor.execute(
+                        _AGGREGATE_SQL.format(table=table, size=size),
+                        (start // size * size, end))
+                cursor.execute("""
+                    INSERT OR REPLACE INTO retention_state (name, value)
+                    VALUES ('market_watermark', ?)
+                """, (end,))
+
+            windows += 1
+            budget[0] -= 1
+        return windows
+
+    def _delete_expired(self, table: str, cutoff: int, budget: List[float], where: str = '') -> int:
+        """Delete rows older than ``cutoff`` in ``chunk_size`` transactions.
+
+        ``where`` optionally narrows the rows (and the key lookup) further.
+        """
+        # Candle tiers are keyed by their bucket timestamp, outcomes by
+        # decision id within one horizon
+        if table in dict(TIERS):
+            key = 'timestamp'
+        elif table == 'decision_outcomes':
+            key = 'decision_id'
+        else:
+            key = 'id'
+        scope = f"{where} AND " if where else ''
+        deleted = 0
+        while budget[0] > 0:
+            with self.pool.connection() as conn:
+                # Cheap indexed read first, so an idle table does not take
+                # the write lock or use up the chunk budget
+                expired = conn.execute(
+                    f"SELECT 1 FROM {table} WHERE {scope}timestamp < ? LIMIT 1", (cutoff,)).fetchone()
+                if expired is None:
+                    break
+                cursor = conn.execute(f"""
+                    DELETE FROM {table}
+                    WHERE {scope}{key} IN (
+                        SELECT {key} FROM {table}
+                        WHERE {scope}timestamp < ?
+                        ORDER BY timestamp
+                        LIMIT ?
+                    )
+                """, (cutoff, self.policy.chunk_size))
+                rows = cursor.rowcount
+            budget[0] -= 1
+            deleted += rows
+            if rows < self.policy.chunk_size:
+                break
+        return deleted
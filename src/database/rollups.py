@@ -0,0 +1,167 @@
+"""Incrementally maintained rollups of AI decision statistics.
+
+``decision_rollups`` holds one row per (model id, hour, decision code), where
+``hour`` is the epoch-hour index (``timestamp_ms / 3600000``), with counts,
+correct counts and profit aggregates. SQLite triggers keep it current in
+the same transaction as every INSERT into ``ai_decisions`` and every
+scoring UPDATE, so stats queries merge a handful of hourly buckets instead
+of scanning the raw decisions table.
+
+Deleting raw decisions (retention cleanup) deliberately leaves the rollups
+untouched: they are the long-term history of model performance. Such
+buckets can no longer be rebuilt or re-scored from raw rows.
+"""
+
+import sqlite3
+
+# Hour bucket (epoch hours) of an epoch-millisecond timestamp
+HOUR_BUCKET_SQL = "({ts} / 3600000)"
+
+# Contribution of one decision row to its bucket
+_CONTRIBUTION_SQL = """
+    {row}.model,
+    {hour},
+    {row}.decision,
+    {total},
+    {sign} * ({row}.was_correct IS NOT NULL),
+    {sign} * COALESCE({row}.was_correct = 1, 0),
+    {sign} * (CASE WHEN {row}.was_correct IS NOT NULL THEN COALESCE({row}.profit_loss, 0) ELSE 0 END),
+    CASE WHEN {row}.was_correct IS NOT NULL THEN COALESCE({row}.profit_loss, 0) END,
+    CASE WHEN {row}.was_correct IS NOT NULL THEN COALESCE({row}.profit_loss, 0) END
+"""
+
+_UPSERT_SQL = """
+    INSERT INTO decision_rollups (
+        model, hour, decision, total, scored, correct,
+        profit_sum, profit_min, profit_max
+    ) VALUES ({values})
+    ON CONFLICT (model, hour, decision) DO UPDATE SET
+        total = total + excluded.total,
+        scored = scored + excluded.scored,
+        correct = correct + excluded.correct,
+        profit_sum = profit_sum + excluded.profit_sum,
+        profit_min = CASE
+            WHEN excluded.profit_min IS NULL THEN profit_min
+            WHEN profit_min IS NULL OR excluded.profit_min < profit_min THEN excluded.profit_min
+            ELSE profit_min END,
+        profit_max = CASE
+            WHEN excluded.profit_max IS NULL THEN profit_max
+            WHEN profit_max IS NULL OR excluded.profit_max > profit_max THEN excluded.profit_max
+            ELSE profit_max END;
+"""
+
+
+def _contribution(row: str, sign: int, total: int) -> str:
+    """SQL value list for a row's (signed) contribution to its bucket."""
+    return _CONTRIBUTION_SQL.format(
+        row=row,
+        hour=HOUR_BUCKET_SQL.format(ts=f"{row}.timestamp"),
+        total=total,
+        sign=sign
+    )
+
+
+def create_decision_rollups(cursor: sqlite3.Cursor) -> None:
+    """Create the rollup table and its maintenance triggers (idempotent)."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS decision_rollups (
+            model INTEGER NOT NULL,
+            hour INTEGER NOT NULL,
+            decision INTEGER NOT NULL,
+            total INTEGER NOT NULL DEFAULT 0,
+            scored INTEGER NOT NULL DEFAULT 0,
+            correct INTEGER NOT NULL DEFAULT 0,
+            profit_sum REAL NOT NULL DEFAULT 0,
+            profit_min REAL,
+            profit_max REAL,
+            PRIMARY KEY (model, hour, decision)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_decision_rollups_hour
+        ON decision_rollups(hour)
+    """)
+
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_ai_decisions_rollup_insert
+        AFTER INSERT ON ai_decisions
+        BEGIN
+            {_UPSERT_SQL.format(values=_contribution('NEW', 1, 1))}
+        END
+    """)
+
+    # Scoring moves a row from pending to scored: remove the old
+    # contribution and add the new one (min/max only ever widen)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_ai_decisions_rollup_score
+        AFTER UPDATE OF was_correct, profit_loss ON ai_decisions
+        BEGIN
+            {_UPSERT_SQL.format(values=_contribution('OLD', -1, 0))}
+            {_UPSERT_SQL.format(values=_contribution('NEW', 1, 0))}
+        END
+    """)
+
+
+# Per-bucket aggregates of the raw decisions still on disk
+_RAW_BUCKETS_SQL = f"""
+    SELECT
+        model,
+        {HOUR_BUCKET_SQL.format(ts='timestamp')} AS hour,
+        decision,
+        COUNT(*) AS total,
+        COUNT(was_correct) AS scored,
+        SUM(CASE WHEN was_correct = 1 THEN 1 ELSE 0 END) AS correct,
+        COALESCE(SUM(CASE WHEN was_correct IS NOT NULL THEN COALESCE(profit_loss, 0) END), 0) AS profit_sum,
+        MIN(CASE WHEN was_correct IS NOT NULL THEN COALESCE(profit_loss, 0) END) AS profit_min,
+        MAX(CASE WHEN was_correct IS NOT NULL THEN COALESCE(profit_loss, 0) END) AS profit_max
+    FROM ai_decisions
+    GROUP BY model, hour, decision
+"""
+
+
+def rebuild_decision_rollups(cursor: sqlite3.Cursor) -> int:
+    """Recompute the buckets whose raw decisions are all still on disk.
+
+    Needed after bulk changes that bypass the triggers, since min/max cannot
+    be retracted incrementally. A bucket counts as complete when its raw
+    rows number at least its ``total``; buckets that retention has removed
+    raw rows from keep their counts, as recomputing them would lose history.
+
+    Returns:
+        Number of buckets skipped because raw rows are missing
+    """
+    cursor.execute(f"""
+        INSERT INTO decision_rollups (
+            model, hour, decision, total, scored, correct,
+            profit_sum, profit_min, profit_max
+        )
+        SELECT * FROM ({_RAW_BUCKETS_SQL}) WHERE true
+        ON CONFLICT (model, hour, decision) DO UPDATE SET
+            total = excluded.total,
+            scored = excluded.scored,
+            correct = excluded.correct,
+            profit_sum = excluded.profit_sum,
+            profit_min = excluded.profit_min,
+            profit_max = excluded.profit_max
+        WHERE excluded.total >= decision_rollups.total
+    """)
+    return cursor.execute(f"""
+        SELECT COUNT(*)
+        FROM decision_rollups r
+        LEFT JOIN ({_RAW_BUCKETS_SQL}) raw USING (model, hour, decision)
+        WHERE r.total > COALESCE(raw.total, 0)
+    """).fetchone()[0]
+
+
+def unbacked_verdicts(cursor: sqlite3.Cursor) -> int:
+    """Scored decisions counted in the rollups whose raw rows were deleted.
+
+    Their verdicts can no longer be re-scored, so they stay under the
+    scoring rules version that produced them.
+    """
+    return cursor.execute(f"""
+        SELECT COALESCE(SUM(r.scored - COALESCE(raw.scored, 0)), 0)
+        FROM decision_rollups r
+        LEFT JOIN ({_RAW_BUCKETS_SQL}) raw USING (model, hour, decision)
+        WHERE r.scored > COALESCE(raw.scored, 0)
+    """).fetchone()[0]
@@ -0,0 +1,411 @@
+"""Schema definition and migrations for the trading database.
+
+The schema version is tracked in ``PRAGMA user_version``:
+
+- 0: original text-encoded schema (ISO timestamps, text decisions/models)
+- 1: + decision rollups
+- 2: + composite/partial indexes for the hot queries
+- 3: compact integer encodings (see ``src/database/encoding.py``)
+- 4: market data candle tiers (see ``src/database/retention.py``)
+- 5: per-horizon decision outcomes (see ``src/database/horizons.py``)
+- 6: scoring time and scoring rules version of each decision (see
+  ``src/database/rescore.py``)
+
+New databases are created directly at the latest version. Older databases
+are upgraded by ``migrate_compact_storage``, which rebuilds each table in
+small chunks, so the write lock is released between chunks and an
+interrupted migration resumes where it stopped. On a large database run it
+before starting the app, which otherwise waits for it:
+
+    python -m src.database.maintenance trading_data.db --migrate
+"""
+
+import logging
+import sqlite3
+import time
+from typing import Dict
+
+from src.database.encoding import DEFAULT_MODELS
+from src.database.horizons import create_decision_outcomes
+from src.database.retention import create_retention_tiers
+from src.database.rollups import create_decision_rollups, rebuild_decision_rollups
+
+SCHEMA_VERSION = 6
+
+# Rows copied per transaction when rebuilding tables
+MIGRATION_CHUNK_SIZE = 20000
+
+# Seconds between progress log lines of a long migration
+MIGRATION_PROGRESS_S = 5
+
+# Table definitions; ``{name}`` lets the migration build shadow copies
+TABLES: Dict[str, str] = {
+    'market_data': """
+        CREATE TABLE IF NOT EXISTS {name} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp INTEGER NOT NULL,
+            eth_price REAL NOT NULL,
+            eth_volume_24h REAL NOT NULL,
+            eth_high_24h REAL NOT NULL,
+            eth_low_24h REAL NOT NULL,
+            gas_price_low INTEGER,
+            gas_price_standard INTEGER,
+            gas_price_fast INTEGER,
+            fear_greed_value TEXT,
+            fear_greed_sentiment TEXT
+        )
+    """,
+    'ai_decisions': """
+        CREATE TABLE IF NOT EXISTS {name} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp INTEGER NOT NULL,
+            model INTEGER NOT NULL,
+            decision INTEGER NOT NULL,
+            eth_price REAL NOT NULL,
+            was_correct INTEGER,
+            profit_loss REAL,
+            wallet_address TEXT,
+            scored_at INTEGER,
+            scoring_version INTEGER
+        )
+    """,
+    'wallet_actions': """
+        CREATE TABLE IF NOT EXISTS {name} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp INTEGER NOT NULL,
+            wallet_address TEXT NOT NULL,
+            action INTEGER NOT NULL,
+            eth_balance REAL NOT NULL,
+            usdc_balance REAL NOT NULL,
+            eth_allocation REAL NOT NULL,
+            eth_price REAL,
+            network TEXT NOT NULL
+        )
+    """,
+    'wallet_connections': """
+        CREATE TABLE IF NOT EXISTS {name} (
+            wallet_address TEXT PRIMARY KEY,
+            is_connected INTEGER NOT NULL,
+            last_updated INTEGER NOT NULL
+        )
+    """,
+}
+
+# Legacy text -> compact conversions used when copying rows
+_LEGACY_TIMESTAMP = """
+    CASE WHEN typeof({col}) IN ('integer', 'real') THEN CAST({col} AS INTEGER)
+    ELSE COALESCE(CAST(ROUND((julianday({col}, 'utc') - 2440587.5) * 86400000) AS INTEGER), 0)
+    END
+"""
+_LEGACY_GAS = "CAST(ROUND({col} * 1000) AS INTEGER)"
+_LEGACY_DECISION = """
+    CASE UPPER({col}) WHEN 'HOLD' THEN 0 WHEN 'BUY' THEN 1 WHEN 'SELL' THEN 2 ELSE 3 END
+"""
+_LEGACY_MODEL = "(SELECT id FROM models WHERE name = {col})"
+
+# Column lists (target order) for each rebuilt table
+_COPY_COLUMNS = {
+    'market_data': [
+        ('id', 'id'),
+        ('timestamp', _LEGACY_TIMESTAMP.format(col='timestamp')),
+        ('eth_price', 'eth_price'),
+        ('eth_volume_24h', 'eth_volume_24h'),
+        ('eth_high_24h', 'eth_high_24h'),
+        ('eth_low_24h', 'eth_low_24h'),
+        ('gas_price_low', _LEGACY_GAS.format(col='gas_price_low')),
+        ('gas_price_standard', _LEGACY_GAS.format(col='gas_price_standard')),
+        ('gas_price_fast', _LEGACY_GAS.format(col='gas_price_fast')),
+        ('fear_greed_value', 'fear_greed_value'),
+        ('fear_greed_sentiment', 'fear_greed_sentiment'),
+    ],
+    'ai_decisions': [
+        ('id', 'id'),
+        ('timestamp', _LEGACY_TIMESTAMP.format(col='timestamp')),
+        ('model', _LEGACY_MODEL.format(col='model')),
+        ('decision', _LEGACY_DECISION.format(col='decision')),
+        ('eth_price', 'eth_price'),
+        ('was_correct', 'was_correct'),
+        ('profit_loss', 'profit_loss'),
+        ('wallet_address', 'wallet_address'),
+    ],
+    'wallet_actions': [
+        ('id', 'id'),
+        ('timestamp', _LEGACY_TIMESTAMP.format(col='timestamp')),
+        ('wallet_address', 'wallet_address'),
+        ('action', _LEGACY_DECISION.format(col='action')),
+        ('eth_balance', 'eth_balance'),
+        ('usdc_balance', 'usdc_balance'),
+        ('eth_allocation', 'eth_allocation'),
+        ('eth_price', 'eth_price'),
+        ('network', 'network'),
+    ],
+}
+
+
+def create_tables(cursor: sqlite3.Cursor) -> None:
+    """Create every table at the latest schema version (idempotent)."""
+    for name, ddl in TABLES.items():
+        cursor.execute(ddl.format(name=name))
+
+    # Model name lookup for the integer model codes
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS models (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )
+    """)
+    cursor.executemany(
+        "INSERT OR IGNORE INTO models (name) VALUES (?)",
+        [(model,) for model in DEFAULT_MODELS]
+    )
+
+    # Daily stats are small and keyed by local date/model name
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS daily_stats (
+            date TEXT NOT NULL,
+            model TEXT NOT NULL,
+            total_trades INTEGER DEFAULT 0,
+            correct_trades INTEGER DEFAULT 0,
+            incorrect_trades INTEGER DEFAULT 0,
+            buy_decisions INTEGER DEFAULT 0,
+            sell_decisions INTEGER DEFAULT 0,
+            hold_decisions INTEGER DEFAULT 0,
+            avg_profit REAL DEFAULT 0.0,
+            PRIMARY KEY (date, model)
+        )
+    """)
+
+
+def create_indexes(cursor: sqlite3.Cursor) -> None:
+    """Create the indexes shaped for the hot queries (idempotent).
+
+    See ``src/database/query_plans.py`` for the plan regression check.
+    """
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_daily_stats_date
+        ON daily_stats(date)
+    """)
+
+    # Range scans and ORDER BY timestamp DESC LIMIT n
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_market_data_timestamp
+        ON market_data(timestamp)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_ai_decisions_timestamp
+        ON ai_decisions(timestamp)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_wallet_actions_timestamp
+        ON wallet_actions(timestamp)
+    """)
+
+    # get_wallet_stats: WHERE wallet_address = ? ORDER BY timestamp DESC LIMIT 100
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_ai_decisions_wallet_timestamp
+        ON ai_decisions(wallet_address, timestamp)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_wallet_actions_wallet_timestamp
+        ON wallet_actions(wallet_address, timestamp)
+    """)
+
+    # update_decision_accuracy: only pending decisions, covering the
+    # columns the scorer reads so the table is never touched
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_ai_decisions_pending
+        ON ai_decisions(wallet_address, timestamp, decision, eth_price)
+        WHERE was_correct IS NULL
+    """)
+
+    # cleanup_old_data: WHERE model = ? AND timestamp >= ?
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_ai_decisions_model_timestamp
+        ON ai_decisions(model, timestamp)
+    """)
+
+    # get_connected_wallets: WHERE is_connected = 1 ORDER BY last_updated DESC
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_wallet_connections_connected
+        ON wallet_connections(last_updated)
+        WHERE is_connected = 1
+    """)
+
+
+def create_schema(conn: sqlite3.Connection) -> None:
+    """Create a brand-new database at the latest schema version."""
+    cursor = conn.cursor()
+    create_tables(cursor)
+    create_indexes(cursor)
+    create_decision_rollups(cursor)
+    create_retention_tiers(cursor)
+    create_decision_outcomes(cursor)
+    cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    conn.commit()
+
+
+def _table_exists(cursor: sqlite3.Cursor, name: str) -> bool:
+    cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,))
+    return cursor.fetchone() is not None
+
+
+def _copy_in_chunks(conn: sqlite3.Connection, table: str, chunk_size: int) -> int:
+    """Copy legacy rows into ``<table>_v3`` one committed chunk at a time.
+
+    Progress is the highest id already copied, so rerunning resumes.
+    """
+    cursor = conn.cursor()
+    shadow = f"{table}_v3"
+    targets = ', '.join(col for col, _ in _COPY_COLUMNS[table])
+    sources = ', '.join(expr for _, expr in _COPY_COLUMNS[table])
+
+    remaining = cursor.execute(f"""
+        SELECT COUNT(*) FROM {table}
+        WHERE id > (SELECT COALESCE(MAX(id), 0) FROM {shadow})
+    """).fetchone()[0]
+    started = last_report = time.monotonic()
+
+    copied = 0
+    while True:
+        last_id = cursor.execute(
+            f"SELECT COALESCE(MAX(id), 0) FROM {shadow}").fetchone()[0]
+        cursor.execute(f"""
+            INSERT INTO {shadow} ({targets})
+            SELECT {sources} FROM {table}
+            WHERE id > ?
+            ORDER BY id
+            LIMIT ?
+        """, (last_id, chunk_size))
+        rows = cursor.rowcount
+        conn.commit()
+        copied += rows
+        if rows < chunk_size:
+            return copied
+        if time.monotonic() - last_report >= MIGRATION_PROGRESS_S:
+            last_report = time.monotonic()
+            rate = copied / (last_report - started)
+            logging.info(
+                f"[db migrate] {table}: {copied}/{remaining} rows copied, "
+                f"~{max(remaining - copied, 0) / rate:.0f}s left")
+
+
+def is_compact(cursor: sqlite3.Cursor) -> bool:
+    """Whether ``ai_decisions`` already uses the integer encodings."""
+    types = {row[1]: row[2].upper() for row in cursor.execute("PRAGMA table_info(ai_decisions)")}
+    return types.get('model') == 'INTEGER'
+
+
+def migrate_compact_storage(conn: sqlite3.Connection, chunk_size: int = MIGRATION_CHUNK_SIZE) -> None:
+    """Upgrade a version 0-2 database to the compact integer schema.
+
+    Rows are copied into shadow tables in committed chunks; the final swap
+    (catching up rows written meanwhile, dropping the legacy tables,
+    renaming, and recreating indexes, rollups and triggers) happens in one
+    short transaction. The caller bumps ``user_version`` and commits.
+    A database that is already compact is left alone, since converting
+    its integers again would corrupt them.
+    """
+    cursor = conn.cursor()
+    if is_compact(cursor):
+        logging.info("[db migrate] ai_decisions is already compact; nothing to convert")
+        return
+
+    # Very old databases predate the wallet_address column
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(ai_decisions)")]
+    if 'wallet_address' not in columns:
+        cursor.execute("ALTER TABLE ai_decisions ADD COLUMN wallet_address TEXT")
+
+    create_tables(cursor)
+    cursor.execute("""
+        INSERT OR IGNORE INTO models (name)
+        SELECT DISTINCT model FROM ai_decisions WHERE model IS NOT NULL
+    """)
+    conn.commit()
+
+    for table in _COPY_COLUMNS:
+        cursor.execute(TABLES[table].format(name=f"{table}_v3"))
+        conn.commit()
+        copied = _copy_in_chunks(conn, table, chunk_size)
+        logging.info(f"[db migrate] Copied {copied} {table} rows to compact storage")
+
+    cursor.execute("BEGIN IMMEDIATE")
+
+    # Rows (and models) written by other processes since the chunked copy
+    cursor.execute("""
+        INSERT OR IGNORE INTO models (name)
+        SELECT DISTINCT model FROM ai_decisions WHERE model IS NOT NULL
+    """)
+    for table in _COPY_COLUMNS:
+        targets = ', '.join(col for col, _ in _COPY_COLUMNS[table])
+        sources = ', '.join(expr for _, expr in _COPY_COLUMNS[table])
+        cursor.execute(f"""
+            INSERT INTO {table}_v3 ({targets})
+            SELECT {sources} FROM {table}
+            WHERE id > (SELECT COALESCE(MAX(id), 0) FROM {table}_v3)
+        """)
+
+    # Dropping a legacy table also drops its indexes and triggers
+    for table in _COPY_COLUMNS:
+        cursor.execute(f"DROP TABLE {table}")
+        cursor.execute(f"ALTER TABLE {table}_v3 RENAME TO {table}")
+
+    # wallet_connections is tiny; convert it in place within the swap
+    cursor.execute(TABLES['wallet_connections'].format(name='wallet_connections_v3'))
+    cursor.execute(f"""
+        INSERT INTO wallet_connections_v3 (wallet_address, is_connected, last_updated)
+        SELECT wallet_address, is_connected, {_LEGACY_TIMESTAMP.format(col='last_updated')}
+        FROM wallet_connections
+    """)
+    cursor.execute("DROP TABLE wallet_connections")
+    cursor.execute("ALTER TABLE wallet_connections_v3 RENAME TO wallet_connections")
+
+    # Carry over rollup history (it outlives raw rows), else rebuild from raw
+    legacy_rollups = _table_exists(cursor, 'decision_rollups')
+    if legacy_rollups:
+        cursor.execute("ALTER TABLE decision_rollups RENAME TO decision_rollups_legacy")
+        cursor.execute("DROP INDEX IF EXISTS idx_decision_rollups_hour")
+    create_decision_rollups(cursor)
+    if legacy_rollups:
+        cursor.execute(f"""
+            INSERT INTO decision_rollups (
+                model, hour, decision, total, scored, correct,
+                profit_sum, profit_min, profit_max
+            )
+            SELECT
+                {_LEGACY_MODEL.format(col='model')} AS model_id,
+                CAST(ROUND((julianday(hour, 'utc') - 2440587.5) * 24) AS INTEGER) AS bucket,
+                {_LEGACY_DECISION.format(col='decision')} AS decision_code,
+                SUM(total), SUM(scored), SUM(correct), SUM(profit_sum),
+                MIN(profit_min), MAX(profit_max)
+            FROM decision_rollups_legacy
+            GROUP BY model_id, bucket, decision_code
+        """)
+        cursor.execute("DROP TABLE decision_rollups_legacy")
+    else:
+        rebuild_decision_rollups(cursor)
+
+    create_indexes(cursor)
+
+
+def migrate_retention_tiers(conn: sqlite3.Connection) -> None:
+    """Add the market data candle tiers; compaction backfills them."""
+    create_retention_tiers(conn.cursor())
+
+
+def migrate_decision_outcomes(conn: sqlite3.Connection) -> None:
+    """Add the per-horizon outcomes table; the next scoring pass backfills it."""
+    create_decision_outcomes(conn.cursor())
+
+
+def migrate_scoring_versions(conn: sqlite3.Connection) -> None:
+    """Record when and under which scoring rules each decision was scored.
+
+    Existing scores keep NULLs (scored before versioning); databases
+    rebuilt by ``migrate_compact_storage`` already has the columns.
+    """
+    cursor = conn.cursor()
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(ai_decisions)")]
+    for column in ('scored_at', 'scoring_version'):
+        if column not in columns:
+            cursor.execute(f"ALTER TABLE ai_decisions ADD COLUMN {column} INTEGER")
@@ -0,0 +1,250 @@
+"""Batched evaluation of AI trading decisions.
+
+Decides whether pending BUY/SELL/HOLD decisions were correct given the
+current ETH price. The market regime (volatility and trend of the most
+recent prices) is the same for every decision in a scoring pass, so it is
+computed once; the per-decision thresholds and outcomes are then evaluated
+as NumPy arrays.
+
+Horizon scoring (see ``src/database/horizons.py``) evaluates each decision
+against its own later price instead, so the prices and regimes passed to
+``score_decisions`` may also be arrays aligned with the decisions;
+``rolling_market_regime`` computes the regime as of any point in a price
+series.
+
+The thresholds are versioned (``SCORING_RULES``). Every score records the
+version that produced it, so changing the formula means adding a version,
+making it current and re-scoring history (``src/database/rescore.py``)
+rather than editing the numbers in place.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from src.database.encoding import DECISION_CODES, MS_PER_HOUR, now_ms
+
+
+@dataclass(frozen=True)
+class ScoringRules:
+    """One version of the accuracy formula's thresholds."""
+
+    version: int
+    # Threshold rules: starts at 1.0%, grows 0.15% per hour, caps at 3.0%
+    base_threshold_pct: float = 1.0
+    threshold_growth_per_hour: float = 0.15
+    max_threshold_pct: float = 3.0
+    # Share of the average recent price move used as a threshold floor
+    volatility_weight: float = 0.25
+    # Threshold multiplier in trending markets and the move that counts as a trend
+    trend_multiplier: float = 1.25
+    trend_threshold_pct: float = 2.0
+
+
+# Every formula ever used to score stored decisions; never edit a version
+SCORING_RULES: Dict[int, ScoringRules] = {
+    1: ScoringRules(version=1),
+}
+CURRENT_SCORING_VERSION = 1
+
+
+def scoring_rules(version: Optional[int] = None) -> ScoringRules:
+    """Rules of a scoring version (default: the current one).
+
+    Raises:
+        ValueError: If the version is unknown
+    """
+    version = CURRENT_SCORING_VERSION if version is None else version
+    if version not in SCORING_RULES:
+        raise ValueError(
+            f"Unknown scoring version {version}. Known: {', '.join(map(str, SCORING_RULES))}")
+    return SCORING_RULES[version]
+
+
+@dataclass
+class MarketRegime:
+    """Volatility floor and trend flag derived from recent prices.
+
+    Either scalars or arrays aligned with the decisions (NaN floor where
+    there were too few prices).
+    """
+
+    volatility_floor: Optional[Union[float, np.ndarray]] = None
+    trending: Union[bool, np.ndarray] = False
+
+
+@dataclass
+class ScoredDecisions:
+    """Outcome of a scoring pass, aligned with the input arrays."""
+
+    evaluated: np.ndarray
+    was_correct: np.ndarray
+    price_change_pct: np.ndarray
+
+
+def compute_market_regime(recent_prices: Sequence[float], rules: Optional[ScoringRules] = None) -> MarketRegime:
+    """Compute the market regime from recent prices (newest first)."""
+    rules = rules or scoring_rules()
+    regime = MarketRegime()
+    if len(recent_prices) < 2:
+        return regime
+
+    # Calculate price changes for volatility
+    price_changes = [
+        abs(recent_prices[i] - recent_prices[i+1]) / recent_prices[i+1] * 100
+        if recent_prices[i+1] != 0 else 0
+        for i in range(len(recent_prices)-1)
+    ]
+    avg_volatility = sum(price_changes) / len(price_changes)
+    regime.volatility_floor = avg_volatility * rules.volatility_weight
+
+    # Use last 6 prices for trend detection
+    if len(recent_prices) >= 6:
+        # Average of older 3 prices vs average of recent 3 prices
+        older_prices = sum(recent_prices[3:6]) / 3
+        newer_prices = sum(recent_prices[0:3]) / 3
+        trend_change = (
+            (newer_prices - older_prices) / older_prices * 100) if older_prices != 0 else 0
+        regime.trending = abs(trend_change) > rules.trend_threshold_pct
+
+    return regime
+
+
+def rolling_market_regime(
+    prices: Sequence[float],
+    index: Sequence[int],
+    window: int = 24,
+    rules: Optional[ScoringRules] = None
+) -> MarketRegime:
+    """Regime as of each ``index`` into ``prices`` (oldest first).
+
+    Same as ``compute_market_regime`` over the ``window`` prices ending at
+    each index, for all indexes at once.
+    """
+    rules = rules or scoring_rules()
+    prices = np.asarray(prices, dtype=np.float64)
+    index = np.asarray(index, dtype=np.int64)
+
+    # Percentage moves between consecutive prices, summed over the window
+    previous = prices[:-1]
+    changes = np.where(
+        previous != 0, np.abs(np.diff(prices)) / np.where(previous != 0, previous, 1) * 100, 0.0)
+    change_sums = np.concatenate([[0.0], np.cumsum(changes)])
+    count = np.minimum(index, window - 1)
+    volatility_floor = np.where(
+        count > 0,
+        (change_sums[index] - change_sums[index - count]) / np.maximum(count, 1) * rules.volatility_weight,
+        np.nan
+    )
+
+    # Average of the newest 3 prices vs the 3 before them
+    price_sums = np.concatenate([[0.0], np.cumsum(prices)])
+    newer = (price_sums[index + 1] - price_sums[np.maximum(index - 2, 0)]) / 3
+    older = (price_sums[np.maximum(index - 2, 0)] - price_sums[np.maximum(index - 5, 0)]) / 3
+    with np.errstate(divide='ignore', invalid='ignore'):
+        trend_change = np.where(older != 0, (newer - older) / older * 100, 0.0)
+    trending = (index >= 5) & (np.abs(trend_change) > rules.trend_threshold_pct)
+
+    return MarketRegime(volatility_floor=volatility_floor, trending=trending)
+
+
+def hours_since(timestamps: Sequence[int], now: int) -> np.ndarray:
+    """Hours elapsed between each epoch-ms timestamp and ``now`` (epoch ms)."""
+    elapsed_ms = now - np.asarray(timestamps, dtype=np.int64)
+    return elapsed_ms / MS_PER_HOUR
+
+
+def judge_price_changes(
+    decisions: Sequence[int],
+    price_change_pct: np.ndarray,
+    hours_passed: np.ndarray,
+    regime: MarketRegime,
+    rules: Optional[ScoringRules] = None
+) -> np.ndarray:
+    """Whether each decision was right about its price change (boolean array)."""
+    rules = rules or scoring_rules()
+    decisions = np.asarray(decisions, dtype=np.int64)
+    price_change_pct = np.asarray(price_change_pct, dtype=np.float64)
+    hours_passed = np.asarray(hours_passed, dtype=np.float64)
+
+    hold_threshold = np.minimum(
+        rules.base_threshold_pct + (hours_passed * rules.threshold_growth_per_hour),
+        rules.max_threshold_pct)
+    if regime.volatility_floor is not None:
+        floor = np.asarray(regime.volatility_floor, dtype=np.float64)
+        known = ~np.isnan(floor)
+        hold_threshold = np.where(known, np.fmax(hold_threshold, floor), hold_threshold)
+        hold_threshold = np.where(
+            known & np.asarray(regime.trending), hold_threshold * rules.trend_multiplier, hold_threshold)
+
+    was_correct = np.select(
+        [
+            decisions == DECISION_CODES['BUY'],
+            decisions == DECISION_CODES['SELL'],
+            decisions == DECISION_CODES['HOLD']
+        ],
+        [
+            price_change_pct > hold_threshold,
+            price_change_pct < -hold_threshold,
+            np.abs(price_change_pct) <= hold_threshold
+        ],
+        default=False
+    )
+    return was_correct.astype(bool)
+
+
+def score_decisions(
+    decisions: Sequence[int],
+    decision_prices: Sequence[float],
+    hours_passed: np.ndarray,
+    current_price: Union[float, np.ndarray],
+    regime: MarketRegime,
+    rules: Optional[ScoringRules] = None
+) -> ScoredDecisions:
+    """Evaluate decisions against the current price (or one price per decision).
+
+    A decision made at exactly the current price is skipped (it was most
+    likely just added) and reported as not evaluated.
+    """
+    prices = np.asarray(decision_prices, dtype=np.float64)
+
+    evaluated = prices != current_price
+
+    # Calculate price change percentage, treating non-positive prices as no change
+    safe_prices = np.where(prices > 0, prices, 1.0)
+    price_change_pct = np.where(
+        prices > 0, (current_price - safe_prices) / safe_prices * 100, 0.0)
+
+    return ScoredDecisions(
+        evaluated=evaluated,
+        was_correct=judge_price_changes(decisions, price_change_pct, hours_passed, regime, rules),
+        price_change_pct=price_change_pct
+    )
+
+
+def score_rows(rows: List[tuple], current_price: float, recent_prices: Sequence[float],
+               now: Optional[int] = None, rules: Optional[ScoringRules] = None) -> List[tuple]:
+    """Score ``(id, decision code, eth_price, epoch-ms timestamp)`` rows.
+
+    Returns:
+        ``(was_correct, profit_loss, id)`` tuples ready for ``executemany``
+    """
+    if not rows:
+        return []
+    rules = rules or scoring_rules()
+    ids, decisions, prices, timestamps = zip(*rows)
+    result = score_decisions(
+        decisions,
+        prices,
+        hours_since(timestamps, now or now_ms()),
+        current_price,
+        compute_market_regime(recent_prices, rules),
+        rules
+    )
+    mask = result.evaluated
+    return list(zip(
+        result.was_correct[mask].tolist(),
+        result.price_change_pct[mask].tolist(),
+        np.asarray(ids)[mask].tolist()
+    ))
@@ -0,0 +1,166 @@
+"""
+Throughput benchmark of pending-decision scoring.
+
+Seeds a scratch database with pending (unscored) decisions, then scores
+them with ``TradingDatabase.update_decision_accuracy`` and with the
+per-row loop it replaced (one market-data query and one UPDATE per
+decision), resetting the scores in between. Both must produce the same
+scores:
+
+    python -m src.database.scoring_bench /tmp/scoring.db --pending 100000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from typing import List, Optional, Tuple
+
+from src.database.db import TradingDatabase
+from src.database.encoding import DECISION_CODES, MS_PER_HOUR, now_ms
+
+CURRENT_PRICE = 3000.0
+
+
+def seed_pending(db_path: str, pending: int, wallets: int = 100) -> int:
+    """Fill a database with pending decisions; returns the "now" they were seeded at."""
+    db = TradingDatabase(db_path, maintenance=False)
+    db.close()
+
+    rng = random.Random(7)
+    now = now_ms()
+    conn = sqlite3.connect(db_path)
+    model_ids = [row[0] for row in conn.execute("SELECT id FROM models")]
+    conn.executemany("""
+        INSERT INTO market_data (timestamp, eth_price, eth_volume_24h, eth_high_24h, eth_low_24h)
+        VALUES (?, ?, 0, 0, 0)
+    """, ((now - i * 5 * 60 * 1000, rng.uniform(2950, 3050)) for i in range(48)))
+    conn.executemany("""
+        INSERT INTO ai_decisions (timestamp, model, decision, eth_price, wallet_address)
+        VALUES (?, ?, ?, ?, ?)
+    """, (
+        (now - rng.randrange(48 * MS_PER_HOUR), rng.choice(model_ids),
+         rng.choice(list(DECISION_CODES.values())[:3]), rng.uniform(2800, 3200),
+         f"0x{rng.randrange(wallets):040x}")
+        for _ in range(pending)
+    ))
+    conn.commit()
+    conn.close()
+    return now
+
+
+def reset_scores(db_path: str) -> None:
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        UPDATE ai_decisions SET was_correct = NULL, profit_loss = NULL,
+            scored_at = NULL, scoring_version = NULL
+        WHERE was_correct IS NOT NULL
+    """)
+    conn.commit()
+    conn.close()
+
+
+def read_scores(db_path: str) -> List[Tuple]:
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(
+            "SELECT id, was_correct, profit_loss FROM ai_decisions ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+
+def per_row_scoring(db_path: str, current_price: float, now: int) -> int:
+    """The replaced loop: regime query and UPDATE per decision, uncapped."""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT id, decision, eth_price, timestamp FROM ai_decisions
+        WHERE was_correct IS NULL AND wallet_address IS NOT NULL
+        ORDER BY timestamp DESC
+    """)
+    scored = 0
+    for decision_id, decision, decision_price, timestamp in cursor.fetchall():
+        if decision_price == current_price:
+            continue
+        price_change_pct = ((current_price - decision_price) / decision_price) * 100 if decision_price > 0 else 0
+        hours_passed = (now - timestamp) / MS_PER_HOUR
+        hold_threshold = min(1.0 + (hours_passed * 0.15), 3.0)
+
+        cursor.execute("SELECT eth_price FROM market_data ORDER BY timestamp DESC LIMIT 24")
+        recent_prices = [row[0] for row in cursor.fetchall()]
+        if len(recent_prices) >= 2:
+            price_changes = [
+                abs(recent_prices[i] - recent_prices[i+1]) / recent_prices[i+1] * 100
+                if recent_prices[i+1] != 0 else 0
+                for i in range(len(recent_prices)-1)
+            ]
+            hold_threshold = max(hold_threshold, sum(price_changes) / len(price_changes) * 0.25)
+            if len(recent_prices) >= 6:
+                older_prices = sum(recent_prices[3:6]) / 3
+                newer_prices = sum(recent_prices[0:3]) / 3
+                trend_change = (
+                    (newer_prices - older_prices) / older_prices * 100) if older_prices != 0 else 0
+                if abs(trend_change) > 2.0:
+                    hold_threshold *= 1.25
+
+        was_correct = False
+        if decision == DECISION_CODES['BUY']:
+            was_correct = price_change_pct > hold_threshold
+        elif decision == DECISION_CODES['SELL']:
+            was_correct = price_change_pct < -hold_threshold
+        elif decision == DECISION_CODES['HOLD']:
+            was_correct = abs(price_change_pct) <= hold_threshold
+
+        cursor.execute("""
+            UPDATE ai_decisions SET was_correct = ?, profit_loss = ? WHERE id = ?
+        """, (was_correct, price_change_pct, decision_id))
+        scored += 1
+    conn.commit()
+    conn.close()
+    return scored
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('db_path', help="scratch database (overwritten)")
+    parser.add_argument('--pending', type=int, default=100000, help="pending decisions to seed")
+    parser.add_argument('--skip-per-row', action='store_true', help="only time the vectorized pass")
+    args = parser.parse_args(argv)
+
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(args.db_path + suffix):
+            os.remove(args.db_path + suffix)
+    started = time.perf_counter()
+    now = seed_pending(args.db_path, args.pending)
+    print(f"Seeded {args.pending:,} pending decisions in {time.perf_counter() - started:.1f}s")
+
+    db = TradingDatabase(args.db_path, maintenance=False, clock=lambda: now)
+    try:
+        started = time.perf_counter()
+        scored = db.update_decision_accuracy(CURRENT_PRICE)
+        vectorized_s = time.perf_counter() - started
+    finally:
+        db.close()
+    print(f"vectorized  {scored:,} scored in {vectorized_s:.2f}s ({scored / vectorized_s:,.0f} decisions/s)")
+    if args.skip_per_row:
+        return 0
+
+    expected = read_scores(args.db_path)
+    reset_scores(args.db_path)
+    started = time.perf_counter()
+    scored = per_row_scoring(args.db_path, CURRENT_PRICE, now)
+    per_row_s = time.perf_counter() - started
+    print(f"per-row     {scored:,} scored in {per_row_s:.2f}s ({scored / per_row_s:,.0f} decisions/s)")
+    print(f"speedup     {per_row_s / vectorized_s:.1f}x")
+
+    if read_scores(args.db_path) != expected:
+        print("MISMATCH: the two passes scored differently")
+        return 1
+    print("scores identical")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+"""Write-behind batching for high-frequency inserts.
+
+Instead of committing every INSERT individually (one fsync each), callers
+enqueue statements on a bounded in-memory queue. A single writer thread
+drains the queue and applies the rows with ``executemany`` inside one
+transaction, either when ``batch_size`` rows are waiting or when
+``flush_interval_ms`` has elapsed since the first pending row.
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import List, Optional, Sequence, Tuple
+
+from src.database.pool import ConnectionPool
+
+# Sentinel placed on the queue to wake the writer without a row
+_WAKE = object()
+
+
+class WriteBehindQueue:
+    """Bounded queue of pending INSERTs drained by a background writer."""
+
+    def __init__(
+        self,
+        pool: ConnectionPool,
+        batch_size: int = 500,
+        flush_interval_ms: int = 200,
+        max_queue: int = 10000
+    ):
+        """Initialize the queue and start the writer thread."""
+        self.pool = pool
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+
+        # Submitted/written row counts give flush() a read-your-writes
+        # barrier: the queue is FIFO, so once the writer has written as many
+        # rows as had been submitted, every earlier row is on disk
+        self._seq_lock = threading.Lock()
+        self._submitted = 0
+        self._committed = 0
+        self._committed_cond = threading.Condition()
+        self._flush_requested = threading.Event()
+        self._stopping = False
+
+        self.stats = {'batches': 0, 'rows': 0, 'errors': 0}
+
+        self._thread = threading.Thread(
+            target=self._run, name="db-write-behind", daemon=True)
+        self._thread.start()
+
+    def submit(self, sql: str, params: Sequence) -> None:
+        """Enqueue one statement; blocks if the queue is full."""
+        if self._stopping:
+            raise RuntimeError("Write-behind queue is closed")
+        with self._seq_lock:
+            self._submitted += 1
+        self._queue.put((sql, tuple(params)))
+
+    @property
+    def pending(self) -> int:
+        """Number of rows submitted but not yet written."""
+        with self._seq_lock:
+            submitted = self._submitted
+        with self._committed_cond:
+            return submitted - self._committed
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every row submitted before this call is committed.
+
+        Returns:
+            True if the barrier was reached, False on timeout
+        """
+        with self._seq_lock:
+            target = self._submitted
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._committed_cond:
+            if self._committed >= target:
+                return True
+        self._flush_requested.set()
+        try:
+            self._queue.put_nowait(_WAKE)
+        except queue.Full:
+            pass  # The writer is busy draining anyway
+
+        with self._committed_cond:
+            while self._committed < target:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._committed_cond.wait(
+                    0.05 if remaining is None else min(remaining, 0.05))
+        return True
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        """Drain all pending rows and stop the writer thread."""
+        if self._stopping:
+            return
+        self.flush(timeout)
+        self._stopping = True
+        try:
+            self._queue.put(_WAKE, timeout=1)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        if self.pending:
+            logging.error(
+                f"[db write-behind] Closed with {self.pending} rows still unwritten")
+
+    def _collect(self) -> List[Tuple[str, tuple]]:
+        """Wait for the next batch of rows according to size/time limits."""
+        batch: List[Tuple[str, tuple]] = []
+        try:
+            item = self._queue.get(timeout=0.5)
+        except queue.Empty:
+            return batch
+        if item is not _WAKE:
+            batch.append(item)
+
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            if self._flush_requested.is_set() or self._stopping:
+                # Take whatever is already queued without waiting
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            else:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if item is not _WAKE:
+                batch.append(item)
+        return batch
+
+    def _write(self, batch: List[Tuple[str, tuple]]) -> None:
+        """Apply a batch in a single transaction, grouped per statement."""
+        grouped = {}
+        for sql, params in batch:
+            grouped.setdefault(sql, []).append(params)
+
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                for sql, rows in grouped.items():
+                    cursor.executemany(sql, rows)
+            self.stats['batches'] += 1
+            self.stats['rows'] += len(batch)
+        except Exception as e:
+            logging.warning(
+                f"[db write-behind] Batch of {len(batch)} rows failed ({e}); retrying row by row")
+            self._write_rows(batch)
+
+    def _write_rows(self, batch: List[Tuple[str, tuple]]) -> None:
+        """Fallback path: apply rows one at a time so one bad row is isolated."""
+        for sql, params in batch:
+            try:
+                with self.pool.connection() as conn:
+                    conn.execute(sql, params)
+                self.stats['rows'] += 1
+            except Exception as e:
+                self.stats['errors'] += 1
+                logging.error(
+                    f"[db write-behind] Dropping row that failed to write: {e}")
+
+    def _run(self) -> None:
+        """Writer thread main loop."""
+        while True:
+            batch = self._collect()
+            if batch:
+                self._write(batch)
+                with self._committed_cond:
+                    self._committed += len(batch)
+                    self._committed_cond.notify_all()
+
+            if self._queue.empty():
+                self._flush_requested.clear()
+                if self._stopping:
+                    return
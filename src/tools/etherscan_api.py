@@ -21,8 +21,10 @@ class EtherscanClient:
         if not api_key:
             raise ValueError("ETHERSCAN_API_KEY environment variable not set")
         self.api_key = api_key
-        self.base_url = "https://api.etherscan.io/api"
+        self.base_url = os.getenv("ETHERSCAN_BASE_URL", "https://api.etherscan.io/api")
         self.session = requests.Session()
+        # Seconds to wait for Etherscan before falling back to cached data
+        self.timeout = float(os.getenv("MARKET_DATA_HTTP_TIMEOUT_S", "5"))
 
         # Cache for API responses
         self._price_cache = {"timestamp": 0, "data": None}
@@ -55,7 +57,8 @@ class EtherscanClient:
                 "apikey": self.api_key
             }
 
-            response = self.session.get(self.base_url, params=params)
+            response = self.session.get(
+                self.base_url, params=params, timeout=self.timeout)
             response.raise_for_status()
             data = response.json()
 
@@ -118,7 +121,8 @@ class EtherscanClient:
                 "apikey": self.api_key
             }
 
-            response = self.session.get(self.base_url, params=params)
+            response = self.session.get(
+                self.base_url, params=params, timeout=self.timeout)
             response.raise_for_status()
             data = response.json()
 
@@ -5,6 +5,7 @@ This module provides a clean interface to the Alternative.me API,
 focusing on the Fear & Greed Index which indicates market sentiment.
 """
 
+import os
 import time
 from typing import Dict
 
@@ -16,8 +17,10 @@ class FearGreedClient:
 
     def __init__(self):
         """Initialize the Fear & Greed client."""
-        self.base_url = "https://api.alternative.me/fng/"
+        self.base_url = os.getenv("FEAR_GREED_BASE_URL", "https://api.alternative.me/fng/")
         self.session = requests.Session()
+        # Seconds to wait for the API before falling back to cached data
+        self.timeout = float(os.getenv("MARKET_DATA_HTTP_TIMEOUT_S", "5"))
         self._cache = {"timestamp": 0, "data": None}
         self.cache_duration = 12 * 3600  # Cache for 12 hours
 
@@ -35,7 +38,8 @@ class FearGreedClient:
             return self._cache["data"]
 
         try:
-            response = self.session.get(f"{self.base_url}?limit=1")
+            response = self.session.get(
+                f"{self.base_url}?limit=1", timeout=self.timeout)
             response.raise_for_status()
             data = response.json()
 
@@ -18,6 +18,8 @@ load_dotenv()
 GWEI_TO_ETH = 1e-9  # 1 Gwei = 10^-9 ETH
 GAS_UNITS_ETH_TRANSFER = 21000  # Standard ETH transfer gas limit
 HIGH_GAS_THRESHOLD_GWEI = 100  # Consider gas high if above 100 Gwei
+GAS_UNITS_SWAP = 150_000  # Gas used by one DEX swap
+SWAP_SLIPPAGE_BPS = 50  # Swap slippage of /api/swaps/price (0.5%), like the contract
 
 
 class GasPriceClient:
@@ -31,7 +33,7 @@ class GasPriceClient:
     def __init__(self):
         """Initialize the gas price client."""
         self.api_key = os.getenv("ETHERSCAN_API_KEY", "")
-        self.base_url = "https://api.etherscan.io/api"
+        self.base_url = os.getenv("ETHERSCAN_BASE_URL", "https://api.etherscan.io/api")
         self._last_prices: Optional[Dict[str, float]] = None
         self._last_costs: Optional[Dict[str, float]] = None
 
@@ -0,0 +1,184 @@
+"""
+Technical indicators for the LLM trading prompts.
+
+``compute_indicators`` is the batch NumPy implementation the model clients
+have always used: it recomputes everything from the full price history.
+``IndicatorEngine`` produces the same values incrementally, one price at a
+time, so they can be computed once per tick and shared by every client:
+
+- volatility: population standard deviation of the price changes in the
+  window, kept with a sliding Welford update (add the new change, remove
+  the one leaving the window)
+- momentum: mean of the last ``momentum_period`` changes
+- RSI: simple-mean RSI over the last ``rsi_period`` changes. This matches
+  the prompt's existing values; Wilder's smoothing would change them.
+
+Every update costs the same however long the window is.
+"""
+
+import math
+from collections import deque
+from typing import Deque, Dict, Sequence
+
+import numpy as np
+
+# Relative drop of the running M2 on removal past which it is recomputed
+CANCELLATION_RATIO = 1e-6
+
+# Returned until there are at least two prices
+DEFAULT_INDICATORS = {
+    'volatility': 0,
+    'momentum': 0,
+    'rsi': 50,
+    'price_trend': 'neutral',
+    'volatility_level': 'low'
+}
+
+
+def compute_indicators(prices: Sequence[float], rsi_period: int = 14, momentum_period: int = 5) -> Dict[str, float]:
+    """Calculate technical indicators from a full price history (oldest first)."""
+    if len(prices) < 2:
+        return dict(DEFAULT_INDICATORS)
+
+    prices = np.array(prices)
+
+    # Calculate price changes
+    price_changes = np.diff(prices)
+
+    # Calculate volatility (standard deviation of price changes)
+    volatility = np.std(price_changes)
+
+    # Calculate momentum (rate of price change)
+    momentum = np.mean(price_changes[-momentum_period:])
+
+    # Calculate RSI-like indicator (simplified)
+    rsi = 50  # Default neutral value
+    if len(prices) >= rsi_period:
+        gains = np.where(price_changes > 0, price_changes, 0)
+        losses = np.where(price_changes < 0, -price_changes, 0)
+        avg_gain = np.mean(gains[-rsi_period:])
+        avg_loss = np.mean(losses[-rsi_period:])
+        if avg_loss != 0:
+            rs = avg_gain / avg_loss
+            if rs != 0:
+                rsi = 100 - (100 / (1 + rs))
+
+    mean_abs_change = np.mean(np.abs(price_changes))
+    return {
+        'volatility': float(volatility),
+        'momentum': float(momentum),
+        'rsi': float(rsi),
+        'price_trend': 'up' if momentum > 0 else 'down',
+        'volatility_level': 'high' if mean_abs_change > 0 and volatility > mean_abs_change * 2 else 'low'
+    }
+
+
+class IndicatorEngine:
+    """Streaming version of ``compute_indicators`` over the last ``window`` prices."""
+
+    def __init__(self, window: int = 100, rsi_period: int = 14, momentum_period: int = 5):
+        """Initialize an empty engine keeping the last ``window`` prices."""
+        if window < 2:
+            raise ValueError("window must be at least 2")
+        self.window = window
+        self.rsi_period = rsi_period
+        self.momentum_period = momentum_period
+
+        self._last_price = None
+        self._prices = 0
+        # Changes between consecutive prices in the window (ring buffer)
+        self._changes: Deque[float] = deque(maxlen=window - 1)
+        # Welford state over the changes in the window
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._abs_sum = 0.0
+        # Sliding updates accumulate rounding error; resync exactly every
+        # ``window`` updates, which keeps the amortized cost constant
+        self._updates_since_resync = 0
+        self._current = dict(DEFAULT_INDICATORS)
+
+    @property
+    def current(self) -> Dict[str, float]:
+        """Indicators as of the last update."""
+        return dict(self._current)
+
+    def update(self, price: float) -> Dict[str, float]:
+        """Add the next price and return the updated indicators."""
+        if self._last_price is not None:
+            self._add_change(price - self._last_price)
+        self._last_price = price
+        self._prices = min(self._prices + 1, self.window)
+
+        if self._prices >= 2:
+            self._current = self._indicators()
+        return self.current
+
+    def _add_change(self, change: float) -> None:
+        changes = self._changes
+        resync = False
+        if len(changes) == changes.maxlen:
+            # Remove the change leaving the window
+            old = changes[0]
+            n = len(changes)
+            if n == 1:
+                self._mean = self._m2 = 0.0
+            else:
+                m2 = self._m2
+                mean = (n * self._mean - old) / (n - 1)
+                self._m2 -= (old - self._mean) * (old - mean)
+                self._mean = mean
+                # Removing an outlier cancels most of M2 and leaves mostly
+                # rounding error (e.g. a tiny variance instead of zero)
+                resync = self._m2 < m2 * CANCELLATION_RATIO
+            self._abs_sum -= abs(old)
+        changes.append(change)
+
+        n = len(changes)
+        delta = change - self._mean
+        self._mean += delta / n
+        self._m2 += delta * (change - self._mean)
+        self._abs_sum += abs(change)
+
+        self._updates_since_resync += 1
+        if resync or self._updates_since_resync >= changes.maxlen:
+            self._resync()
+
+    def _resync(self) -> None:
+        """Recompute the running sums exactly from the ring buffer."""
+        values = np.fromiter(self._changes, dtype=np.float64, count=len(self._changes))
+        self._mean = float(values.mean())
+        self._m2 = float(((values - self._mean) ** 2).sum())
+        self._abs_sum = float(np.abs(values).sum())
+        self._updates_since_resync = 0
+
+    def _tail(self, count: int) -> list:
+        """The last ``count`` changes (oldest first)."""
+        changes = self._changes
+        start = max(len(changes) - count, 0)
+        return [changes[i] for i in range(start, len(changes))]
+
+    def _indicators(self) -> Dict[str, float]:
+        n = len(self._changes)
+        volatility = math.sqrt(max(self._m2, 0.0) / n)
+
+        recent = self._tail(self.momentum_period)
+        momentum = sum(recent) / len(recent)
+
+        rsi = 50.0
+        if self._prices >= self.rsi_period:
+            period = self._tail(self.rsi_period)
+            avg_gain = sum(c for c in period if c > 0) / len(period)
+            avg_loss = sum(-c for c in period if c < 0) / len(period)
+            if avg_loss != 0:
+                rs = avg_gain / avg_loss
+                if rs != 0:
+                    rsi = 100 - (100 / (1 + rs))
+
+        mean_abs_change = self._abs_sum / n
+        return {
+            'volatility': volatility,
+            'momentum': momentum,
+            'rsi': rsi,
+            'price_trend': 'up' if momentum > 0 else 'down',
+            'volatility_level': 'high' if mean_abs_change > 0 and volatility > mean_abs_change * 2 else 'low'
+        }
@@ -0,0 +1,622 @@
+"""
+Shared pipeline of the LLM trading-decision providers.
+
+Every model gets the same market data, indicators and prompt; only the
+persona line and the API call differ:
+
+- ``MarketContext`` holds one tick's inputs and builds the shared prompt
+  body once, however many models are asked
+- ``LLMProvider`` turns a context into a decision (prompt, API call,
+  parsing, history); subclasses only implement ``complete``, which sends a
+  prompt and returns the model's text
+
+Providers are registered by name. ``create_providers`` builds them from a
+spec such as ``gemini,groq,mistral,local=my.module:LocalModel`` (the
+``LLM_PROVIDERS`` setting), so a new model is added without touching the
+app. Provider modules are imported on demand, so only the SDKs of the
+configured providers have to be installed.
+
+An optional ``DecisionCache`` lets a provider reuse its last decision for
+an equivalent market: ticks are reduced to a coarse fingerprint (price
+bucket, indicator buckets, gas tier, sentiment) and a fingerprint seen
+within the TTL is answered without calling the model.
+
+Without streaming, a complete answer is read as it always was
+(``parse_decision``: BUY anywhere wins, then SELL, else HOLD), once
+reasoning sections (``<think>...</think>``) are dropped. With streaming
+enabled (``LLM_STREAMING``) a ``DecisionScanner`` reads the answer
+incrementally, skips the same reasoning sections and closes the stream
+at the first standalone BUY/SELL/HOLD, so a reasoning model no longer
+has to finish (or be cut off by ``max_tokens``) before its decision is
+known. The two can disagree on answers such as "SELL, do not BUY":
+streaming takes the first word.
+"""
+
+import importlib
+import logging
+import math
+import os
+import re
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Hashable, Iterator, List, Optional, Tuple, Type, Union
+
+from src.cache import TTLCache
+from src.tools.indicators import IndicatorEngine, compute_indicators
+
+# Built-in providers: name -> "module:Class"
+PROVIDERS: Dict[str, Union[str, Type['LLMProvider']]] = {
+    'gemini': 'src.tools.gemini_api:GeminiClient',
+    'groq': 'src.tools.groq_api:GroqClient',
+    'mistral': 'src.tools.mistral_api:MistralClient'
+}
+DEFAULT_PROVIDERS = 'gemini,groq,mistral'
+
+# System message of the chat-completions style APIs
+SYSTEM_MESSAGE = "You are a trading assistant that analyzes Ethereum market data and provides trading recommendations."
+
+# Decision used when the model answer is missing or unclear
+DEFAULT_DECISION = "HOLD"
+
+# Standalone decision words, and reasoning sections that are not the answer
+DECISION_WORD = re.compile(r'\b(BUY|SELL|HOLD)\b')
+REASONING_OPEN = '<THINK>'
+REASONING_CLOSE = '</THINK>'
+# A whole reasoning section; an unclosed one runs to the end of the answer
+REASONING_SECTION = re.compile(r'<think>.*?(?:</think>|$)', re.IGNORECASE | re.DOTALL)
+
+PROMPT_INTRO = "You are {persona}, specializing in statistical analysis and portfolio optimization. Your goal is to provide optimal trading recommendations for ETH/USDC rebalancing based on comprehensive market analysis.\n\n"
+
+
+@dataclass
+class MarketContext:
+    """Inputs of one decision tick, shared by every provider."""
+
+    eth_price: float
+    eth_volume: float
+    eth_high: float
+    eth_low: float
+    gas_prices: Optional[Dict[str, int]]
+    fear_greed_value: str
+    fear_greed_sentiment: str
+    indicators: Dict[str, float]
+    # Prompt without the persona line, built once per tick
+    prompt: str = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.prompt = build_prompt_body(self)
+
+
+def build_prompt_body(context: MarketContext) -> str:
+    """Build the model-independent part of the trading prompt."""
+    eth_price = context.eth_price
+    eth_high = context.eth_high
+    eth_low = context.eth_low
+    gas_prices = context.gas_prices
+    indicators = context.indicators
+
+    prompt = f"""Current Market Data for Ethereum (ETH):
+- Price: ${eth_price:,.2f}
+- 24h Volume: ${context.eth_volume:,.2f}
+- 24h High: ${eth_high:,.2f}
+- 24h Low: ${eth_low:,.2f}
+- Market Sentiment: {context.fear_greed_value} ({context.fear_greed_sentiment})"""
+
+    if gas_prices:
+        prompt += f"""
+Gas Prices (Gwei):
+- Low: {gas_prices['low']}
+- Standard: {gas_prices['standard']}
+- Fast: {gas_prices['fast']}"""
+
+    prompt += f"""
+Technical Analysis:
+- Volatility: {indicators['volatility']:.2f} (Level: {indicators['volatility_level']})
+- Momentum: {indicators['momentum']:.2f} (Trend: {indicators['price_trend']})
+- RSI: {indicators['rsi']:.2f}
+- Price Range: ${eth_low:,.2f} - ${eth_high:,.2f} (${eth_high - eth_low:,.2f} spread)
+
+Portfolio Rebalancing Strategy:
+1. Target Allocation:
+   - ETH: 60-80% in bullish conditions
+   - USDC: 40-20% in bullish conditions
+   - Adjust based on market conditions and risk tolerance
+
+2. Rebalancing Triggers:
+   - Price movement beyond 5% threshold
+   - Significant change in market sentiment
+   - Volatility spikes
+   - Gas price optimization opportunities
+
+3. Risk Management:
+   - Maximum position size: 80% in single asset
+   - Minimum USDC reserve: 20% for opportunities
+   - Gas cost threshold: Only rebalance if potential profit > 2x gas cost
+   - Slippage tolerance: Max 0.5% for large trades
+
+4. Market Analysis:
+   - Use volatility to adjust position sizes
+   - Use momentum to predict short-term direction
+   - Use RSI to identify overbought/oversold conditions (RSI > 70 is overbought, RSI < 30 is oversold)
+   - Consider price range for support/resistance levels
+   - Factor in market sentiment for trend confirmation
+
+5. Execution Strategy:
+   - Split large trades into smaller chunks
+   - Use limit orders for better prices
+   - Consider gas price trends for timing
+   - Account for market impact in large trades
+
+6. Performance Metrics:
+   - Track profit/loss after fees
+   - Monitor risk-adjusted returns
+   - Measure portfolio rebalancing efficiency
+   - Evaluate market impact minimization
+
+7. Critical Evaluation for HOLD Decision:
+   - Always consider HOLD as a valid option
+   - HOLD is recommended when:
+     * Price remains within a 1% range of previous price
+     * No clear directional bias
+     * Gas prices are high relative to potential profit
+     * Current position is already optimal given market conditions
+     * Volatility is low and no significant market events expected
+
+8. Decision Making:
+   - BUY if and only if:
+     * Price below support level
+     * RSI is below 30 (oversold condition)
+     * Strong bullish momentum with indicators confirming uptrend
+     * Low gas prices relative to potential gain
+     * ETH allocation is significantly below target (under 50%)
+   - SELL if and only if:
+     * Price above established resistance
+     * RSI above 70 (overbought condition)
+     * Clear bearish momentum with confirming indicators
+     * High gas prices do not negate potential savings
+     * ETH allocation exceeds target range (over 85%)
+   - HOLD if:
+     * Price within normal range (within 1-2% of recent average)
+     * Current allocation within optimal target range
+     * Gas prices unfavorable relative to potential gain/loss
+     * No clear directional bias in technical indicators
+     * Market sentiment is neutral or contradictory signals present
+
+Respond with exactly one word - BUY, SELL, or HOLD - based on your comprehensive analysis of market conditions and portfolio optimization strategy. Remember that HOLD is often the optimal choice when conditions don't strongly favor buying or selling."""
+
+    return prompt
+
+
+def _bucket(value: float, step: float) -> int:
+    return int(math.floor(value / step))
+
+
+def _number(value: Any, default: float = 0.0) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def market_fingerprint(
+    context: MarketContext,
+    price_step_bps: float = 20,
+    rsi_step: float = 5,
+    fear_greed_step: int = 5
+) -> Tuple[Hashable, ...]:
+    """
+    Quantize a tick into a key that is equal for near-identical markets.
+
+    Price is bucketed on a log scale (``price_step_bps`` wide buckets),
+    momentum and volatility in the same relative steps, RSI in
+    ``rsi_step`` points, gas into power-of-two tiers of the standard price,
+    and the Fear & Greed value in ``fear_greed_step`` points.
+    """
+    step = price_step_bps / 10000
+    price = context.eth_price
+    indicators = context.indicators
+    if price > 0:
+        price_bucket = _bucket(math.log(price), math.log1p(step))
+        momentum_bucket = _bucket(indicators['momentum'] / price, step)
+        volatility_bucket = _bucket(indicators['volatility'] / price, step)
+    else:
+        price_bucket = momentum_bucket = volatility_bucket = 0
+
+    gas_tier = None
+    if context.gas_prices:
+        standard = _number(context.gas_prices.get('standard'))
+        gas_tier = _bucket(math.log2(standard), 1) if standard > 0 else 0
+
+    return (
+        price_bucket,
+        momentum_bucket,
+        volatility_bucket,
+        _bucket(indicators['rsi'], rsi_step),
+        indicators['price_trend'],
+        indicators['volatility_level'],
+        gas_tier,
+        _bucket(_number(context.fear_greed_value), fear_greed_step),
+        context.fear_greed_sentiment
+    )
+
+
+class DecisionCache:
+    """
+    Reuse a provider's decision while the market fingerprint is unchanged.
+
+    Entries are keyed on (provider name, fingerprint), expire after
+    ``ttl_s`` and are evicted least recently used; ``stats`` counts hits,
+    misses, expiries and evictions.
+    """
+
+    def __init__(
+        self,
+        ttl_s: float = 1800,
+        max_entries: int = 256,
+        price_step_bps: float = 20,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize an empty cache.
+
+        Args:
+            ttl_s: Seconds a decision may be reused
+            max_entries: Decisions kept across all providers
+            price_step_bps: Width of the price buckets in basis points
+            clock: Time source (seconds)
+        """
+        self.price_step_bps = price_step_bps
+        self._cache = TTLCache(ttl_s, max_entries, clock)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Counters of the underlying cache, plus its size."""
+        return {**self._cache.stats, 'entries': len(self._cache)}
+
+    def key(self, provider: str, context: MarketContext) -> Tuple[Hashable, ...]:
+        """Cache key of ``provider``'s decision for ``context``."""
+        return (provider, market_fingerprint(context, self.price_step_bps))
+
+    def get(self, key: Tuple[Hashable, ...]) -> Optional[str]:
+        """The cached decision for ``key``, else None."""
+        return self._cache.get(key)
+
+    def put(self, key: Tuple[Hashable, ...], decision: str) -> None:
+        """Remember ``decision`` for ``key``."""
+        self._cache.put(key, decision)
+
+
+def parse_decision(text: Optional[str]) -> str:
+    """Extract BUY, SELL or HOLD from a model answer (HOLD if unclear)."""
+    if not text:
+        return DEFAULT_DECISION
+    text = text.upper()
+    if "BUY" in text:
+        return "BUY"
+    if "SELL" in text:
+        return "SELL"
+    return DEFAULT_DECISION
+
+
+def _held_back(text: str, tag: str) -> int:
+    """Length of the tail of ``text`` that may continue in the next chunk.
+
+    That is a trailing partial word, or a trailing prefix of ``tag``.
+    """
+    word = len(text) - len(text.rstrip('ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_'))
+    for length in range(min(len(tag) - 1, len(text)), 0, -1):
+        if tag.startswith(text[-length:]):
+            return max(word, length)
+    return word
+
+
+class DecisionScanner:
+    """
+    Incremental reader of a model answer.
+
+    ``feed`` takes the answer chunk by chunk and returns the decision as
+    soon as a standalone BUY, SELL or HOLD appears outside a reasoning
+    section; words split across chunks are held back until complete.
+    ``finish`` ends the answer: without a standalone word it falls back to
+    ``parse_decision`` on the visible text. ``read_whole`` takes an
+    unstreamed answer and decides with ``parse_decision`` on its visible
+    text alone.
+    """
+
+    def __init__(self):
+        """Initialize a scanner for one answer."""
+        self.decision: Optional[str] = None
+        # Characters received, including reasoning
+        self.chars = 0
+        self._pending = ''
+        self._in_reasoning = False
+        self._visible: List[str] = []
+
+    @property
+    def answered(self) -> bool:
+        """Whether the model produced any answer text at all."""
+        return self.chars > 0
+
+    def feed(self, chunk: str) -> Optional[str]:
+        """Add the next chunk; returns the decision once it is known."""
+        if self.decision is None and chunk:
+            self.chars += len(chunk)
+            self._pending += chunk.upper()
+            self._scan(final=False)
+        return self.decision
+
+    def read_whole(self, text: str) -> str:
+        """Take a complete, unstreamed answer and return its decision."""
+        if self.decision is None:
+            self.chars += len(text)
+            self.decision = parse_decision(REASONING_SECTION.sub('', text))
+        return self.decision
+
+    def finish(self) -> str:
+        """End the answer and return the decision (HOLD if none)."""
+        if self.decision is None:
+            self._scan(final=True)
+        if self.decision is None:
+            self.decision = parse_decision(''.join(self._visible))
+        return self.decision
+
+    def _scan(self, final: bool) -> None:
+        while self._pending and self.decision is None:
+            if self._in_reasoning:
+                end = self._pending.find(REASONING_CLOSE)
+                if end < 0:
+                    # Discard the reasoning, minus a possible partial close tag
+                    keep = 0 if final else _held_back(self._pending, REASONING_CLOSE)
+                    self._pending = self._pending[len(self._pending) - keep:]
+                    return
+                self._pending = self._pending[end + len(REASONING_CLOSE):]
+                self._in_reasoning = False
+                continue
+
+            start = self._pending.find(REASONING_OPEN)
+            if start >= 0:
+                visible, rest = self._pending[:start], self._pending[start + len(REASONING_OPEN):]
+            else:
+                keep = 0 if final else _held_back(self._pending, REASONING_OPEN)
+                visible, rest = self._pending[:len(self._pending) - keep], self._pending[len(self._pending) - keep:]
+
+            self._visible.append(visible)
+            match = DECISION_WORD.search(visible)
+            if match:
+                self.decision = match.group(1)
+            self._pending = rest
+            if start < 0:
+                return
+            self._in_reasoning = True
+
+
+def chat_messages(prompt: str) -> List[Dict[str, str]]:
+    """Messages of a chat-completions request for ``prompt``."""
+    return [
+        {"role": "system", "content": SYSTEM_MESSAGE},
+        {"role": "user", "content": prompt}
+    ]
+
+
+class LLMProvider:
+    """
+    Base class of the trading-decision models.
+
+    Subclasses set ``label`` and ``persona`` and implement ``complete``;
+    everything else (prompt, parsing, history) is shared. API errors are
+    raised to the caller.
+    """
+
+    # Name used in messages, e.g. "Gemini"
+    label = "LLM"
+    # Who the model is told it is in the first line of the prompt
+    persona = "a highly advanced AI model"
+
+    def __init__(self):
+        """Initialize the shared state of a provider."""
+        # Registry name, set by create_providers
+        self.name = self.label.lower()
+        # Deadline of one API request; the orchestrator's deadline only
+        # stops waiting, this one also frees the worker thread
+        self.request_timeout_s = float(os.getenv("LLM_PROVIDER_TIMEOUT_S", "20"))
+        # Read answers incrementally and stop at the first decision word
+        self.streaming = os.getenv("LLM_STREAMING", "false").lower() in ("1", "true", "yes")
+        # Streamed requests stop early, so they can afford room for reasoning
+        self.stream_max_tokens = int(os.getenv("LLM_STREAM_MAX_TOKENS", "512"))
+        # Used when get_trading_decision is called without indicators
+        self.indicator_engine = IndicatorEngine(window=100)
+        self.max_history = 100  # Keep last 100 decisions
+        self.decision_history: Deque[Dict] = deque(maxlen=self.max_history)
+        # Optional decision reuse for unchanged markets (opt-in)
+        self.decision_cache: Optional[DecisionCache] = None
+
+    def complete(self, prompt: str) -> Optional[str]:
+        """Send ``prompt`` to the model and return its answer (None if empty)."""
+        raise NotImplementedError
+
+    def warn(self, message: str) -> None:
+        """Log a problem with this provider's answers."""
+        logging.warning(f"[{self.name}] {message}")
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        """Send ``prompt`` and yield the answer as it arrives.
+
+        The caller closes the generator once it has a decision, so
+        implementations release the connection in a ``finally`` block.
+        Providers without a streaming API yield the whole answer at once.
+        """
+        text = self.complete(prompt)
+        if text:
+            yield text
+
+    def read_decision(self, prompt: str) -> DecisionScanner:
+        """Ask the model and scan its answer, streaming if enabled."""
+        scanner = DecisionScanner()
+        if self.streaming:
+            chunks = self.stream(prompt)
+            try:
+                for chunk in chunks:
+                    if scanner.feed(chunk) is not None:
+                        break
+            finally:
+                chunks.close()
+        else:
+            scanner.read_whole(self.complete(prompt) or '')
+        scanner.finish()
+        return scanner
+
+    def calculate_technical_indicators(self, prices: list) -> Dict[str, float]:
+        """Calculate technical indicators for analysis."""
+        return compute_indicators(prices)
+
+    def build_prompt(self, context: MarketContext) -> str:
+        """Full prompt for this model: persona line plus the shared body."""
+        return PROMPT_INTRO.format(persona=self.persona) + context.prompt
+
+    def decide(self, context: MarketContext) -> str:
+        """
+        Get a trading decision for one tick.
+
+        Returns:
+            Trading decision: "BUY", "SELL", or "HOLD" (HOLD if the answer
+            is empty or unclear)
+
+        Raises:
+            Exception: Whatever the model API raised; ``DecisionOrchestrator``
+                records it as an error outcome rather than an answer
+        """
+        cache = self.decision_cache
+        key = cache.key(self.name, context) if cache is not None else None
+        decision = cache.get(key) if cache is not None else None
+        cached = decision is not None
+
+        if not cached:
+            scanner = self.read_decision(self.build_prompt(context))
+            decision = scanner.decision
+            # Only real answers are reused, not the fallback for an empty one
+            if cache is not None and scanner.answered:
+                cache.put(key, decision)
+
+        self.decision_history.append({
+            'timestamp': datetime.now(),
+            'price': context.eth_price,
+            'decision': decision,
+            'indicators': context.indicators,
+            'cached': cached
+        })
+        return decision
+
+    def get_trading_decision(
+        self,
+        eth_price: float,
+        eth_volume: float,
+        eth_high: float,
+        eth_low: float,
+        gas_prices: Optional[Dict[str, int]],
+        fear_greed_value: str,
+        fear_greed_sentiment: str,
+        indicators: Optional[Dict[str, float]] = None,
+    ) -> str:
+        """
+        Get trading decision from the model based on market data.
+
+        Args:
+            eth_price: Current ETH price
+            eth_volume: 24h trading volume
+            eth_high: 24h high price
+            eth_low: 24h low price
+            gas_prices: Dictionary of gas prices (low, standard, fast)
+            fear_greed_value: Current Fear & Greed Index value
+            fear_greed_sentiment: Current market sentiment (bullish/bearish)
+            indicators: Technical indicators for this tick; if omitted,
+                this provider tracks its own price history
+
+        Returns:
+            Trading decision: "BUY", "SELL", or "HOLD"
+
+        Raises:
+            Exception: Whatever the model API raised
+        """
+        if indicators is None:
+            indicators = self.indicator_engine.update(eth_price)
+        return self.decide(MarketContext(
+            eth_price, eth_volume, eth_high, eth_low, gas_prices,
+            fear_greed_value, fear_greed_sentiment, indicators))
+
+
+def register_provider(name: str, provider: Union[str, Type[LLMProvider]]) -> None:
+    """Register a provider class (or its ``"module:Class"`` path) under ``name``."""
+    PROVIDERS[name] = provider
+
+
+def load_provider_class(provider: Union[str, Type[LLMProvider]]) -> Type[LLMProvider]:
+    """Resolve a ``"module:Class"`` path, importing the module.
+
+    Raises:
+        ValueError: If the path is malformed or not an LLMProvider
+    """
+    if not isinstance(provider, str):
+        return provider
+    module_name, _, class_name = provider.partition(':')
+    if not module_name or not class_name:
+        raise ValueError(f"Invalid provider path '{provider}', expected 'module:Class'")
+    cls = getattr(importlib.import_module(module_name), class_name)
+    if not (isinstance(cls, type) and issubclass(cls, LLMProvider)):
+        raise ValueError(f"{provider} is not an LLMProvider")
+    return cls
+
+
+def parse_provider_spec(spec: str) -> Dict[str, Union[str, Type[LLMProvider]]]:
+    """
+    Parse a comma-separated provider list.
+
+    Entries are registered names (``gemini``) or ``name=module:Class`` for
+    providers outside the registry.
+
+    Raises:
+        ValueError: If a name is unknown or listed twice
+    """
+    providers = {}
+    for entry in spec.split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        name, _, path = entry.partition('=')
+        name = name.strip()
+        if name in providers:
+            raise ValueError(f"Provider '{name}' listed twice")
+        if path:
+            providers[name] = path.strip()
+        elif name in PROVIDERS:
+            providers[name] = PROVIDERS[name]
+        else:
+            raise ValueError(f"Unknown LLM provider '{name}'")
+    return providers
+
+
+def create_providers(
+    spec: Optional[str] = None,
+    decision_cache: Optional[DecisionCache] = None
+) -> Dict[str, LLMProvider]:
+    """
+    Instantiate the configured providers, in order.
+
+    Args:
+        spec: Provider list (see ``parse_provider_spec``); defaults to the
+            LLM_PROVIDERS environment variable, then all built-in providers
+        decision_cache: Cache shared by the providers, if any
+
+    Returns:
+        Provider instance per name
+    """
+    if spec is None:
+        spec = os.getenv("LLM_PROVIDERS") or DEFAULT_PROVIDERS
+    providers = {}
+    for name, path in parse_provider_spec(spec).items():
+        provider = load_provider_class(path)()
+        provider.name = name
+        provider.decision_cache = decision_cache
+        providers[name] = provider
+    return providers
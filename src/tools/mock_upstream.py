@@ -0,0 +1,549 @@
+"""
+Local stand-ins for the upstream APIs, for offline benchmarks and load tests.
+
+One HTTP server answers, in the response shapes our clients parse:
+
+- Etherscan ``/api`` (``stats/ethprice`` and ``gastracker/gasoracle``)
+- alternative.me Fear & Greed ``/fng/``
+- Mistral ``/v1/chat/completions``
+- Groq ``/openai/v1/chat/completions``
+- Gemini REST ``/v1beta/models/<model>:generateContent`` and
+  ``:streamGenerateContent``
+
+Chat completions stream as server-sent events when requested. Each
+upstream has a ``FaultProfile``: a latency distribution, an error rate
+(HTTP 500) and a rate-limit rate (HTTP 429, or Etherscan's ``NOTOK``
+body). Market data follows a seeded random walk, and ``GET /_mock/stats``
+returns request counters per upstream.
+
+Point the clients at it with the base-URL overrides printed on start:
+
+    python -m src.tools.mock_upstream --port 9000 \\
+        --profile mistral=lognormal:800:0.4,error=0.05 --profile groq=rate_limit=0.1
+
+``--cycles N`` instead runs N market data + decision cycles against an
+in-process server and prints their latency percentiles.
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+UPSTREAMS = ('etherscan', 'fear_greed', 'mistral', 'groq', 'gemini')
+
+DISTRIBUTIONS = ('fixed', 'uniform', 'normal', 'lognormal')
+
+# Reasoning prefix of the Groq model's answers (deepseek-r1 style)
+THINK = "<think>RSI is neutral and momentum is flat; should I buy or sell? Neither signal is strong.</think>\n\n"
+
+
+@dataclass
+class LatencyProfile:
+    """
+    Response latency distribution in milliseconds.
+
+    ``fixed``: always ``value``; ``uniform``: between ``value`` and
+    ``spread``; ``normal``: mean ``value``, standard deviation ``spread``;
+    ``lognormal``: median ``value``, log-space sigma ``spread``.
+    """
+
+    distribution: str = 'fixed'
+    value: float = 0.0
+    spread: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> 'LatencyProfile':
+        """
+        Parse ``"50"``, ``"uniform:20:80"``, ``"normal:100:20"`` or ``"lognormal:100:0.5"``.
+
+        Raises:
+            ValueError: If the spec is malformed
+        """
+        parts = spec.split(':')
+        if len(parts) == 1:
+            return cls('fixed', float(parts[0]))
+        if parts[0] not in DISTRIBUTIONS or len(parts) > 3:
+            raise ValueError(f"Invalid latency spec '{spec}'")
+        return cls(parts[0], float(parts[1]), float(parts[2]) if len(parts) == 3 else 0.0)
+
+    def sample_s(self, rng: random.Random) -> float:
+        """Draw one latency, in seconds."""
+        if self.distribution == 'uniform':
+            ms = rng.uniform(self.value, self.spread)
+        elif self.distribution == 'normal':
+            ms = rng.gauss(self.value, self.spread)
+        elif self.distribution == 'lognormal':
+            ms = self.value * math.exp(rng.gauss(0, self.spread))
+        else:
+            ms = self.value
+        return max(ms, 0.0) / 1000
+
+
+@dataclass
+class FaultProfile:
+    """Latency and injected failures of one upstream."""
+
+    latency: LatencyProfile = field(default_factory=LatencyProfile)
+    # Share of requests answered with HTTP 500
+    error_rate: float = 0.0
+    # Share of requests answered as rate limited
+    rate_limit_rate: float = 0.0
+    # Delay between streamed chunks, in seconds
+    chunk_delay_s: float = 0.01
+
+    def update(self, spec: str) -> None:
+        """
+        Apply a comma-separated spec, e.g. ``"lognormal:800:0.4,error=0.05,rate_limit=0.02"``.
+
+        A term without ``=`` is a latency spec.
+
+        Raises:
+            ValueError: If a term is malformed
+        """
+        for term in filter(None, (t.strip() for t in spec.split(','))):
+            key, sep, value = term.partition('=')
+            if not sep:
+                self.latency = LatencyProfile.parse(term)
+            elif key == 'latency':
+                self.latency = LatencyProfile.parse(value)
+            elif key == 'error':
+                self.error_rate = float(value)
+            elif key == 'rate_limit':
+                self.rate_limit_rate = float(value)
+            elif key == 'chunk_ms':
+                self.chunk_delay_s = float(value) / 1000
+            else:
+                raise ValueError(f"Unknown profile setting '{key}'")
+
+
+class MarketSimulator:
+    """Seeded random walk of the values the upstreams report."""
+
+    def __init__(self, seed: int = 0, price: float = 3000.0):
+        """Initialize the walk at ``price``."""
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.price = price
+        self.gas = 12.0
+        self.fear_greed = 50
+
+    def step(self) -> Tuple[float, float, int]:
+        """Advance the walk; returns (price, standard gas, Fear & Greed value)."""
+        with self._lock:
+            rng = self._rng
+            self.price *= math.exp(rng.gauss(0, 0.002))
+            self.gas = min(max(self.gas * math.exp(rng.gauss(0, 0.05)), 0.5), 500.0)
+            self.fear_greed = min(max(self.fear_greed + rng.choice((-1, 0, 0, 1)), 0), 100)
+            return self.price, self.gas, self.fear_greed
+
+    def decision(self) -> str:
+        """A model answer (a decision word with some filler)."""
+        with self._lock:
+            word = self._rng.choices(('BUY', 'SELL', 'HOLD'), weights=(1, 1, 3))[0]
+        return f"{word} - based on the current indicators."
+
+
+def _classification(value: int) -> str:
+    if value < 25:
+        return "Extreme Fear"
+    if value < 46:
+        return "Fear"
+    if value < 55:
+        return "Neutral"
+    if value < 75:
+        return "Greed"
+    return "Extreme Greed"
+
+
+class MockUpstreamServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the fault profiles and the simulated market."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int] = ('127.0.0.1', 0),
+        profiles: Optional[Dict[str, FaultProfile]] = None,
+        seed: int = 0
+    ):
+        """
+        Bind the server (port 0 picks a free port); call ``start`` to serve.
+
+        Args:
+            address: Host and port to listen on
+            profiles: Fault profile per upstream name (defaults: no faults)
+            seed: Seed of the market walk, latencies and injected faults
+        """
+        super().__init__(address, _Handler)
+        self.profiles = {name: FaultProfile() for name in UPSTREAMS}
+        self.profiles.update(profiles or {})
+        self.market = MarketSimulator(seed)
+        self._rng = random.Random(seed + 1)
+        self._rng_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.stats: Dict[str, Dict[str, int]] = {
+            name: {'requests': 0, 'error': 0, 'rate_limited': 0} for name in UPSTREAMS}
+
+    @property
+    def url(self) -> str:
+        """Base URL of the server."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self) -> Dict[str, str]:
+        """Base-URL overrides pointing every client at this server."""
+        return {
+            'ETHERSCAN_BASE_URL': f"{self.url}/api",
+            'FEAR_GREED_BASE_URL': f"{self.url}/fng/",
+            'MISTRAL_BASE_URL': f"{self.url}/v1",
+            'GROQ_BASE_URL': self.url,
+            'GEMINI_BASE_URL': self.url
+        }
+
+    def start(self) -> 'MockUpstreamServer':
+        """Serve on a daemon thread."""
+        threading.Thread(target=self.serve_forever, name="mock-upstream", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        self.shutdown()
+        self.server_close()
+
+    def fault(self, upstream: str) -> Tuple[float, Optional[str]]:
+        """Draw the latency and injected fault (``'error'``, ``'rate_limited'`` or None) of a request."""
+        profile = self.profiles[upstream]
+        with self._rng_lock:
+            delay = profile.latency.sample_s(self._rng)
+            roll = self._rng.random()
+        outcome = None
+        if roll < profile.error_rate:
+            outcome = 'error'
+        elif roll < profile.error_rate + profile.rate_limit_rate:
+            outcome = 'rate_limited'
+        with self._stats_lock:
+            counters = self.stats[upstream]
+            counters['requests'] += 1
+            if outcome:
+                counters[outcome] += 1
+        return delay, outcome
+
+
+_GEMINI_PATH = re.compile(r'^/v1beta/models/([^/:]+):(generateContent|streamGenerateContent)$')
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: MockUpstreamServer
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    # Responses
+
+    def _json(self, payload, status: int = 200, headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _events(self, events: Iterator[dict]) -> None:
+        """Send ``events`` as server-sent events, pausing between chunks."""
+        delay = self.server.profiles[self._upstream].chunk_delay_s
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+        try:
+            for event in events:
+                data = event if isinstance(event, str) else json.dumps(event)
+                self.wfile.write(f"data: {data}\n\n".encode('utf-8'))
+                self.wfile.flush()
+                time.sleep(delay)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading, e.g. once it had a decision
+            pass
+
+    def _fail(self, outcome: str) -> None:
+        if outcome == 'error':
+            self._json({'error': {'message': 'Injected upstream error'}}, status=500)
+        elif self._upstream == 'etherscan':
+            # Etherscan reports rate limiting in a 200 response
+            self._json({'status': '0', 'message': 'NOTOK', 'result': 'Max rate limit reached'})
+        else:
+            self._json({'error': {'message': 'Rate limit exceeded'}}, status=429, headers={'Retry-After': '1'})
+
+    def _request_json(self) -> dict:
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    # Routing
+
+    def _route(self, method: str) -> None:
+        url = urlparse(self.path)
+        path = url.path
+        if method == 'GET' and path == '/_mock/stats':
+            return self._json(self.server.stats)
+
+        if method == 'GET' and path == '/api':
+            upstream, handler = 'etherscan', self._etherscan
+        elif method == 'GET' and path.rstrip('/') == '/fng':
+            upstream, handler = 'fear_greed', self._fear_greed
+        elif method == 'POST' and path == '/v1/chat/completions':
+            upstream, handler = 'mistral', self._chat
+        elif method == 'POST' and path == '/openai/v1/chat/completions':
+            upstream, handler = 'groq', self._chat
+        elif method == 'POST' and _GEMINI_PATH.match(path):
+            upstream, handler = 'gemini', self._gemini
+        else:
+            return self._json({'error': {'message': f'No mock for {method} {path}'}}, status=404)
+
+        self._upstream = upstream
+        body = self._request_json() if method == 'POST' else {}
+        delay, outcome = self.server.fault(upstream)
+        time.sleep(delay)
+        if outcome:
+            return self._fail(outcome)
+        handler(url, body)
+
+    def do_GET(self):
+        self._route('GET')
+
+    def do_POST(self):
+        self._route('POST')
+
+    # Upstreams
+
+    def _etherscan(self, url, body) -> None:
+        query = parse_qs(url.query)
+        action = query.get('action', [''])[0]
+        price, gas, _ = self.server.market.step()
+        if action == 'ethprice':
+            result = {
+                'ethbtc': f"{price / 60000:.5f}",
+                'ethbtc_timestamp': str(int(time.time())),
+                'ethusd': f"{price:.2f}",
+                'ethusd_timestamp': str(int(time.time()))
+            }
+        elif action == 'gasoracle':
+            result = {
+                'LastBlock': '20000000',
+                'SafeGasPrice': f"{gas * 0.9:.3f}",
+                'ProposeGasPrice': f"{gas:.3f}",
+                'FastGasPrice': f"{gas * 1.2:.3f}",
+                'suggestBaseFee': f"{gas * 0.85:.3f}",
+                'gasUsedRatio': '0.45,0.52,0.61,0.38,0.50'
+            }
+        else:
+            return self._json({'status': '0', 'message': 'NOTOK', 'result': 'Error! Missing Or invalid Action name'})
+        self._json({'status': '1', 'message': 'OK', 'result': result})
+
+    def _fear_greed(self, url, body) -> None:
+        _, _, value = self.server.market.step()
+        self._json({
+            'name': 'Fear and Greed Index',
+            'data': [{
+                'value': str(value),
+                'value_classification': _classification(value),
+                'timestamp': str(int(time.time())),
+                'time_until_update': '3600'
+            }],
+            'metadata': {'error': None}
+        })
+
+    def _answer(self) -> str:
+        answer = self.server.market.decision()
+        return THINK + answer if self._upstream == 'groq' else answer
+
+    def _chat(self, url, body) -> None:
+        model = body.get('model', 'mock')
+        answer = self._answer()
+        created = int(time.time())
+        completion_id = f"chatcmpl-{random.getrandbits(32):08x}"
+
+        if not body.get('stream'):
+            return self._json({
+                'id': completion_id,
+                'object': 'chat.completion',
+                'created': created,
+                'model': model,
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': answer},
+                    'finish_reason': 'stop'
+                }],
+                'usage': {'prompt_tokens': 1000, 'completion_tokens': len(answer) // 4,
+                          'total_tokens': 1000 + len(answer) // 4}
+            })
+
+        def chunks():
+            for piece in _pieces(answer):
+                yield {
+                    'id': completion_id,
+                    'object': 'chat.completion.chunk',
+                    'created': created,
+                    'model': model,
+                    'choices': [{'index': 0, 'delta': {'content': piece}, 'finish_reason': None}]
+                }
+            yield {
+                'id': completion_id,
+                'object': 'chat.completion.chunk',
+                'created': created,
+                'model': model,
+                'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]
+            }
+            yield '[DONE]'
+        self._events(chunks())
+
+    def _gemini(self, url, body) -> None:
+        answer = self._answer()
+
+        def response(text: str, finished: bool) -> dict:
+            candidate = {'content': {'parts': [{'text': text}], 'role': 'model'}, 'index': 0}
+            if finished:
+                candidate['finishReason'] = 'STOP'
+            return {'candidates': [candidate]}
+
+        if _GEMINI_PATH.match(url.path).group(2) == 'generateContent':
+            return self._json(response(answer, True))
+        pieces = _pieces(answer)
+        self._events(response(piece, i == len(pieces) - 1) for i, piece in enumerate(pieces))
+
+
+def _pieces(text: str, size: int = 4) -> List[str]:
+    """Split ``text`` into token-sized pieces."""
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def run_cycles(server: MockUpstreamServer, cycles: int, providers: Optional[str] = None) -> Dict[str, List[float]]:
+    """
+    Run market data + decision cycles against ``server``.
+
+    Sets the base-URL overrides (and placeholder API keys) in the
+    environment, then builds the same components as the app.
+
+    Returns:
+        Seconds per cycle of each phase: ``market_data``, ``decisions``, ``total``
+    """
+    import os
+
+    os.environ.update(server.env())
+    for key in ('ETHERSCAN_API_KEY', 'GEMINI_API_KEY', 'GROQ_API_KEY', 'MISTRAL_API_KEY'):
+        os.environ.setdefault(key, 'mock')
+
+    from src.agents.decision_orchestrator import DecisionOrchestrator
+    from src.agents.market_data import MarketDataAgent
+    from src.tools.indicators import IndicatorEngine
+    from src.tools.llm_provider import MarketContext, create_providers
+
+    market_agent = MarketDataAgent()
+    llm_providers = create_providers(providers)
+    orchestrator = DecisionOrchestrator(
+        {name: provider.decide for name, provider in llm_providers.items()},
+        provider_timeout_s=float(os.getenv("LLM_PROVIDER_TIMEOUT_S", "20")),
+        cycle_budget_s=float(os.getenv("LLM_CYCLE_BUDGET_S", "30"))
+    )
+    indicator_engine = IndicatorEngine(window=100)
+
+    timings: Dict[str, List[float]] = {'market_data': [], 'decisions': [], 'total': []}
+    try:
+        for _ in range(cycles):
+            started = time.perf_counter()
+            # Bypass the clients' own short-lived caches, like a 10-minute cycle would
+            market_agent.etherscan._price_cache["timestamp"] = 0
+            market_agent.fear_greed._cache["timestamp"] = 0
+            market_data = market_agent.get_market_data()
+            fetched = time.perf_counter()
+            context = MarketContext(
+                eth_price=market_data.eth_price,
+                eth_volume=market_data.eth_volume_24h,
+                eth_high=market_data.eth_high_24h,
+                eth_low=market_data.eth_low_24h,
+                gas_prices=market_data.gas_prices,
+                fear_greed_value=market_data.market_sentiment.get('fear_greed_value', ''),
+                fear_greed_sentiment=market_data.market_sentiment.get('fear_greed_sentiment', ''),
+                indicators=indicator_engine.update(market_data.eth_price)
+            )
+            orchestrator.run(context=context)
+            finished = time.perf_counter()
+            timings['market_data'].append(fetched - started)
+            timings['decisions'].append(finished - fetched)
+            timings['total'].append(finished - started)
+    finally:
+        orchestrator.close()
+    return timings
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--profile', action='append', default=[], metavar='UPSTREAM=SPEC',
+                        help="fault profile, e.g. mistral=lognormal:800:0.4,error=0.05 "
+                             "(upstreams: all, " + ', '.join(UPSTREAMS) + ")")
+    parser.add_argument('--cycles', type=int, default=0,
+                        help="run this many pipeline cycles against the mock and report latencies")
+    parser.add_argument('--providers', default=None,
+                        help="LLM providers for --cycles (default: LLM_PROVIDERS)")
+    args = parser.parse_args(argv)
+
+    profiles = {name: FaultProfile() for name in UPSTREAMS}
+    for entry in args.profile:
+        upstream, _, spec = entry.partition('=')
+        targets = UPSTREAMS if upstream == 'all' else (upstream,)
+        if upstream != 'all' and upstream not in profiles:
+            parser.error(f"unknown upstream '{upstream}'")
+        try:
+            for name in targets:
+                profiles[name].update(spec)
+        except ValueError as e:
+            parser.error(str(e))
+
+    port = 0 if args.cycles else args.port
+    server = MockUpstreamServer((args.host, port), profiles, seed=args.seed).start()
+
+    if args.cycles:
+        try:
+            timings = run_cycles(server, args.cycles, args.providers)
+        finally:
+            server.stop()
+        for phase, values in timings.items():
+            print(f"{phase:12s} p50 {_percentile(values, 0.5) * 1000:8.1f}ms  "
+                  f"p95 {_percentile(values, 0.95) * 1000:8.1f}ms  "
+                  f"max {max(values) * 1000:8.1f}ms")
+        print(json.dumps(server.stats))
+        return 0
+
+    print(f"Mock upstreams listening on {server.url}; point the clients at it with:")
+    for key, value in server.env().items():
+        print(f"export {key}={value}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,5 +1,6 @@
 """Web application for the trading dashboard."""
 
+import atexit
 import os
 import threading
 import time
@@ -9,20 +10,26 @@ from datetime import datetime, timedelta
 from typing import Union
 from functools import lru_cache
 from collections import deque
-import sqlite3
 
 import requests
 from dotenv import load_dotenv
-from flask import Flask, jsonify, render_template, request, send_from_directory, session
+from flask import Flask, Response, jsonify, render_template, request, send_from_directory, session
 from flask_cors import CORS
 
+from src.agents.decision_orchestrator import (
+    DecisionOrchestrator, early_consensus, find_consensus, majority_quorum, settle_partial, validate_quorum
+)
 from src.agents.market_data import MarketDataAgent
 from src.database.db import TradingDatabase
+from src.database.downsample import MIN_POINTS
+from src.database.encoding import MS_PER_HOUR, now_ms
 from src.state import TradingState
-from src.tools.gemini_api import GeminiClient
-from src.tools.groq_api import GroqClient
-from src.tools.mistral_api import MistralClient
-from src.tools.etherscan_api import EtherscanClient
+from src.tools.gas_price_api import SWAP_SLIPPAGE_BPS
+from src.tools.indicators import IndicatorEngine
+from src.tools.llm_provider import DecisionCache, MarketContext, create_providers
+from src.web.pagination import decode_cursor, encode_cursor, parse_time
+from src.web.snapshot import SnapshotPublisher
+from src.web.stream import StreamFull, StreamHub
 
 # Load environment variables
 load_dotenv()
@@ -81,19 +88,58 @@ except ImportError:
 # Initialize components with memory-efficient settings
 state = TradingState()
 market_agent = MarketDataAgent(state)
-gemini_client = GeminiClient()
-groq_client = GroqClient()
-mistral_client = MistralClient()
-db = TradingDatabase()
+# Opt-in reuse of a model's decision while the market is unchanged
+decision_cache = DecisionCache(
+    ttl_s=float(os.getenv("LLM_DECISION_CACHE_TTL_S", "1800")),
+    max_entries=int(os.getenv("LLM_DECISION_CACHE_SIZE", "256")),
+    price_step_bps=float(os.getenv("LLM_DECISION_CACHE_PRICE_BPS", "20"))
+) if os.getenv("LLM_DECISION_CACHE", "false").lower() in ("1", "true", "yes") else None
+# Trading-decision models from the provider registry (LLM_PROVIDERS)
+llm_providers = create_providers(decision_cache=decision_cache)
+# Technical indicators, updated once per tick and shared by all models
+indicator_engine = IndicatorEngine(window=100)
+# Asks the models concurrently, each with its own deadline
+decision_orchestrator = DecisionOrchestrator(
+    {name: provider.decide for name, provider in llm_providers.items()},
+    provider_timeout_s=float(os.getenv("LLM_PROVIDER_TIMEOUT_S", "20")),
+    cycle_budget_s=float(os.getenv("LLM_CYCLE_BUDGET_S", "30"))
+)
+# Models that must agree on BUY/SELL for a consensus; a strict majority
+# (the default), so a provisional consensus can't be overturned
+LLM_QUORUM = validate_quorum(
+    int(os.getenv("LLM_QUORUM") or majority_quorum(len(llm_providers))), len(llm_providers))
+# Optional write-behind batching for the high-frequency insert endpoints
+db = TradingDatabase(
+    write_behind=os.getenv("DB_WRITE_BEHIND", "false").lower() in ("1", "true", "yes"),
+    write_batch_size=int(os.getenv("DB_WRITE_BATCH_SIZE", "500")),
+    write_flush_ms=int(os.getenv("DB_WRITE_FLUSH_MS", "200")),
+    raw_retention_hours=float(os.getenv("DB_RAW_RETENTION_HOURS", "24")),
+    five_min_retention_days=float(os.getenv("DB_5M_RETENTION_DAYS", "28")),
+    # 0 (the default) keeps raw decisions indefinitely
+    decision_retention_days=float(os.getenv("DB_DECISION_RETENTION_DAYS", "0")) or None,
+    outcome_retention_days=float(os.getenv("DB_OUTCOME_RETENTION_DAYS", "90")) or None,
+    retention_chunk_size=int(os.getenv("DB_RETENTION_CHUNK_SIZE", "2000")),
+    maintenance=os.getenv("DB_MAINTENANCE", "true").lower() in ("1", "true", "yes"),
+    maintenance_interval_s=float(os.getenv("DB_MAINTENANCE_INTERVAL_S", "60")),
+    maintenance_idle_s=float(os.getenv("DB_MAINTENANCE_IDLE_S", "10")),
+    maintenance_slice_ms=int(os.getenv("DB_MAINTENANCE_SLICE_MS", "250")),
+    maintenance_vacuum_pages=int(os.getenv("DB_MAINTENANCE_VACUUM_PAGES", "256")),
+    maintenance_analyze_interval_s=float(os.getenv("DB_MAINTENANCE_ANALYZE_INTERVAL_S", "3600"))
+)
+# Short compaction transactions per scheduler cycle, so retention never
+# holds the write lock long enough to stall request handlers
+RETENTION_CHUNKS_PER_CYCLE = int(os.getenv("DB_RETENTION_CHUNKS_PER_CYCLE", "50"))
+# Page size limits of /api/history
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "500"))
+HISTORY_MAX_PAGE_SIZE = int(os.getenv("HISTORY_MAX_PAGE_SIZE", "5000"))
+HISTORY_RESOLUTIONS = {'raw': 'market_data', '5m': 'market_data_5m', '1h': 'market_data_1h'}
+# Drain queued writes and close pooled connections on shutdown
+atexit.register(db.close)
 
 # Memory-efficient data structures
 recent_prices = deque(maxlen=100)
 recent_volumes = deque(maxlen=100)
-recent_decisions = {
-    'gemini': deque(maxlen=100),
-    'groq': deque(maxlen=100),
-    'mistral': deque(maxlen=100)
-}
+recent_decisions = {name: deque(maxlen=100) for name in llm_providers}
 
 # Latest trading data cache
 latest_trading_data = {
@@ -110,10 +156,10 @@ latest_trading_data = {
         'fear_greed_value': '0',
         'fear_greed_sentiment': 'neutral'
     },
-    'gemini_action': '',
-    'groq_action': '',
-    'mistral_action': '',
+    **{f'{name}_action': '' for name in llm_providers},
     'consensus': None,
+    'partial': False,
+    'pending_models': [],
     'model_stats': {
         'accuracy': {},
         'comparison': {},
@@ -123,6 +169,34 @@ latest_trading_data = {
 }
 trading_data_lock = threading.Lock()
 
+# Scheduler cycle: gas prices every cycle, full data every 5 cycles
+REFRESH_INTERVAL_S = 120
+# Pre-encoded /api/trading-data payload, republished after every refresh
+trading_snapshot = SnapshotPublisher(
+    refresh_interval_s=REFRESH_INTERVAL_S,
+    dumps=lambda data: app.json.dumps(data, separators=(',', ':'))
+)
+# Push stream of the same data for /api/stream subscribers
+stream_hub = StreamHub(
+    history_size=int(os.getenv("STREAM_HISTORY_SIZE", "256")),
+    snapshot_every=int(os.getenv("STREAM_SNAPSHOT_EVERY", "10")),
+    keepalive_s=float(os.getenv("STREAM_KEEPALIVE_S", "15")),
+    max_subscribers=int(os.getenv("STREAM_MAX_SUBSCRIBERS", "10000")),
+    dumps=lambda data: app.json.dumps(data, separators=(',', ':'))
+)
+
+
+def publish_trading_data() -> None:
+    """Publish latest_trading_data to pollers and stream subscribers.
+
+    Call with trading_data_lock held.
+    """
+    trading_snapshot.publish(latest_trading_data)
+    stream_hub.publish(latest_trading_data)
+
+
+publish_trading_data()
+
 # Add thread-safe cache invalidation timestamp
 
 
@@ -177,16 +251,50 @@ def invalidate_model_stats_cache() -> None:
     model_stats_cache_timestamp.invalidate_cache(calculate_model_stats)
 
 
-def check_llm_consensus(decisions: dict) -> Union[str, None]:
-    """Check if there's a consensus among LLMs."""
-    buy_votes = sum(1 for d in decisions.values() if d == 'BUY')
-    sell_votes = sum(1 for d in decisions.values() if d == 'SELL')
+def check_llm_consensus(decisions: dict, quorum: int = None) -> Union[str, None]:
+    """Check if there's a consensus among LLMs.
+
+    A consensus is reached once ``quorum`` (default LLM_QUORUM) models agree
+    on BUY or SELL, so it can be decided before every model has answered.
+    """
+    return find_consensus(decisions, LLM_QUORUM if quorum is None else quorum)
+
+
+def publish_provisional_decisions(market_data, cycle) -> bool:
+    """Publish the decisions received so far if they already reach a quorum.
 
-    if buy_votes >= 2:
-        return 'BUY'
-    elif sell_votes >= 2:
-        return 'SELL'
-    return None
+    The snapshot is flagged ``partial`` and lists the models still pending;
+    model stats are carried over from the last full update. Returns True if
+    it was published.
+    """
+    global latest_trading_data
+
+    early = early_consensus(cycle, decision_orchestrator.providers, LLM_QUORUM)
+    if early is None:
+        return False
+
+    consensus, pending = early
+    with trading_data_lock:
+        provisional = dict(latest_trading_data)
+        provisional.update({
+            'eth_price': market_data.eth_price,
+            'eth_volume_24h': market_data.eth_volume_24h,
+            'eth_high_24h': market_data.eth_high_24h,
+            'eth_low_24h': market_data.eth_low_24h,
+            'gas_prices': market_data.gas_prices,
+            'market_sentiment': market_data.market_sentiment,
+            'consensus': consensus,
+            'partial': True,
+            'pending_models': pending,
+            'timestamp': datetime.now().isoformat()
+        })
+        for name in decision_orchestrator.providers:
+            provisional[f'{name}_action'] = cycle.decisions.get(name, '')
+        latest_trading_data = deepcopy(provisional)
+        publish_trading_data()
+    logging.info(
+        f"Provisional consensus {consensus} published, waiting for: {', '.join(pending)}")
+    return True
 
 
 def update_trading_data():
@@ -201,66 +309,37 @@ def update_trading_data():
 
         # Get model decisions - these can be calculated without wallets,
         # but will only be stored for specific wallets
-        try:
-            print("Getting Gemini trading decision...")
-            gemini_action = gemini_client.get_trading_decision(
-                eth_price=market_data.eth_price,
-                eth_volume=market_data.eth_volume_24h,
-                eth_high=market_data.eth_high_24h,
-                eth_low=market_data.eth_low_24h,
-                gas_prices=market_data.gas_prices,
-                fear_greed_value=market_data.market_sentiment.get(
-                    'fear_greed_value', ''),
-                fear_greed_sentiment=market_data.market_sentiment.get(
-                    'fear_greed_sentiment', '')
-            )
-            print(f"Gemini decision: {gemini_action}")
-        except Exception as e:
-            print(f"Error getting Gemini trading decision: {str(e)}")
-            gemini_action = "ERROR"
+        print(f"Getting {', '.join(p.label for p in llm_providers.values())} trading decisions...")
+        provisional_published = False
 
-        try:
-            print("Getting Groq trading decision...")
-            groq_action = groq_client.get_trading_decision(
-                eth_price=market_data.eth_price,
-                eth_volume=market_data.eth_volume_24h,
-                eth_high=market_data.eth_high_24h,
-                eth_low=market_data.eth_low_24h,
-                gas_prices=market_data.gas_prices,
-                fear_greed_value=market_data.market_sentiment.get(
-                    'fear_greed_value', ''),
-                fear_greed_sentiment=market_data.market_sentiment.get(
-                    'fear_greed_sentiment', '')
-            )
-            print(f"Groq decision: {groq_action}")
-        except Exception as e:
-            print(f"Error getting Groq trading decision: {str(e)}")
-            groq_action = "ERROR"
+        def on_outcome(outcome, cycle):
+            # Publish as soon as a quorum agrees; the rest can't overturn it
+            nonlocal provisional_published
+            if not provisional_published:
+                provisional_published = publish_provisional_decisions(market_data, cycle)
 
-        try:
-            print("Getting Mistral trading decision...")
-            mistral_action = mistral_client.get_trading_decision(
-                eth_price=market_data.eth_price,
-                eth_volume=market_data.eth_volume_24h,
-                eth_high=market_data.eth_high_24h,
-                eth_low=market_data.eth_low_24h,
-                gas_prices=market_data.gas_prices,
-                fear_greed_value=market_data.market_sentiment.get(
-                    'fear_greed_value', ''),
-                fear_greed_sentiment=market_data.market_sentiment.get(
-                    'fear_greed_sentiment', '')
-            )
-            print(f"Mistral decision: {mistral_action}")
-        except Exception as e:
-            print(f"Error getting Mistral trading decision: {str(e)}")
-            mistral_action = "ERROR"
+        # Indicators and prompt are built once and shared by every model
+        context = MarketContext(
+            eth_price=market_data.eth_price,
+            eth_volume=market_data.eth_volume_24h,
+            eth_high=market_data.eth_high_24h,
+            eth_low=market_data.eth_low_24h,
+            gas_prices=market_data.gas_prices,
+            fear_greed_value=market_data.market_sentiment.get(
+                'fear_greed_value', ''),
+            fear_greed_sentiment=market_data.market_sentiment.get(
+                'fear_greed_sentiment', ''),
+            indicators=indicator_engine.update(market_data.eth_price)
+        )
+        cycle = decision_orchestrator.run(on_outcome=on_outcome, context=context)
+        for outcome in cycle.outcomes.values():
+            print(
+                f"{outcome.name.capitalize()} decision: {outcome.decision} "
+                f"({outcome.status}, {outcome.latency_s:.2f}s)")
+        print(f"Model decisions took {cycle.elapsed_s:.2f}s")
+        decisions = cycle.decisions
 
         # Check for consensus
-        decisions = {
-            'gemini': gemini_action,
-            'groq': groq_action,
-            'mistral': mistral_action
-        }
         consensus = check_llm_consensus(decisions)
 
         # Always store market data in database - this is not wallet dependent
@@ -282,6 +361,10 @@ def update_trading_data():
         print("Updating decision accuracy for wallet-specific decisions...")
         # Only updates wallet-specific decisions
         db.update_decision_accuracy(market_data.eth_price)
+        try:
+            db.score_horizons()
+        except Exception as e:
+            logging.error(f"Error scoring decision horizons: {str(e)}")
 
         # Invalidate cache after storing new data
         print("Invalidating stats cache...")
@@ -308,10 +391,10 @@ def update_trading_data():
             'eth_low_24h': market_data.eth_low_24h,
             'gas_prices': market_data.gas_prices,
             'market_sentiment': market_data.market_sentiment,
-            'gemini_action': gemini_action,
-            'groq_action': groq_action,
-            'mistral_action': mistral_action,
+            **{f'{name}_action': decision for name, decision in decisions.items()},
             'consensus': consensus,
+            'partial': False,
+            'pending_models': [],
             'model_stats': model_stats,
             'timestamp': timestamp.isoformat()
         }
@@ -325,13 +408,22 @@ def update_trading_data():
             latest_trading_data = deepcopy(data)
             logging.debug(
                 f"latest_trading_data updated, ETH price is now: ${latest_trading_data['eth_price']:.2f}")
+            publish_trading_data()
 
         logging.info(
             f"Trading data updated successfully at {timestamp.strftime('%Y-%m-%d %H:%M:%S')}")
         logging.info(
-            f"Model decisions: Gemini: {gemini_action}, Groq: {groq_action}, Mistral: {mistral_action}")
+            "Model decisions: " + ", ".join(
+                f"{llm_providers[name].label}: {decision}" for name, decision in decisions.items()))
 
     except Exception as e:
+        # A provisional snapshot of this cycle would otherwise stay partial
+        # and keep waiting for models forever
+        with trading_data_lock:
+            settled = settle_partial(latest_trading_data)
+            if settled is not None:
+                latest_trading_data = settled
+                publish_trading_data()
         print(f"Error in update_trading_data: {str(e)}")
         print(f"Error details: {type(e).__name__}: {e}")
         import traceback
@@ -350,10 +442,15 @@ def start_background_scheduler():
 
         while True:
             # Wait for 2 minutes
-            time.sleep(120)
+            time.sleep(REFRESH_INTERVAL_S)
 
             update_count += 1
 
+            try:
+                db.run_retention(max_chunks=RETENTION_CHUNKS_PER_CYCLE)
+            except Exception as e:
+                logging.error(f"Error running database retention: {str(e)}")
+
             # Full update every 10 minutes (5 cycles)
             if update_count >= 5:
                 update_trading_data()
@@ -361,17 +458,17 @@ def start_background_scheduler():
             else:
                 # Only update gas prices on intermediate cycles
                 try:
-                    # Update just gas prices for more real-time data
+                    # Update just gas prices for more real-time data, from
+                    # the agent's shared client and outside the lock
+                    gas_prices = market_agent.get_gas_prices()
                     with trading_data_lock:
-                        if latest_trading_data:
-                            # Get fresh gas prices
-                            gas_prices = EtherscanClient().get_gas_prices()
-                            if gas_prices:
-                                latest_trading_data['gas_prices'] = gas_prices
-                                logging.debug(
-                                    f"Updated gas prices: {gas_prices}")
-                                print(
-                                    f"DEBUG: Updated gas prices in latest_trading_data: {gas_prices}")
+                        if latest_trading_data and gas_prices:
+                            latest_trading_data['gas_prices'] = gas_prices
+                            publish_trading_data()
+                            logging.debug(
+                                f"Updated gas prices: {gas_prices}")
+                            print(
+                                f"DEBUG: Updated gas prices in latest_trading_data: {gas_prices}")
                 except Exception as e:
                     logging.error(f"Error updating gas prices: {str(e)}")
                     print(f"ERROR: Failed to update gas prices: {str(e)}")
@@ -405,7 +502,7 @@ def clear_storage() -> Union[str, dict]:
         today = datetime.now().strftime('%Y-%m-%d')
         logging.info(
             f"[clear-storage] Attempting to clear and reset daily_stats for date: {today} on DB: {db.db_path}")
-        with sqlite3.connect(db.db_path) as conn:
+        with db.connection() as conn:
             cursor = conn.cursor()
             logging.info(
                 f"[clear-storage] Deleting existing stats for {today}...")
@@ -415,7 +512,7 @@ def clear_storage() -> Union[str, dict]:
                 f"[clear-storage] Deleted {cursor.rowcount} rows for {today}.")
 
             # Insert fresh zero stats for each model
-            for model in ['gemini', 'groq', 'mistral']:
+            for model in llm_providers:
                 logging.info(
                     f"[clear-storage] Inserting zero stats for model {model} for {today}...")
                 cursor.execute("""
@@ -438,30 +535,37 @@ def clear_storage() -> Union[str, dict]:
 
 @app.route("/api/trading-data")
 def get_trading_data():
-    """Get current trading data and AI model decisions."""
-    try:
-        # Use the cached data instead of making API calls every time
-        with trading_data_lock:
-            if latest_trading_data:
-                print(
-                    f"DEBUG: Using cached trading data, ETH price: ${latest_trading_data.get('eth_price', 0):.2f}")
-                return jsonify(latest_trading_data)
-            else:
-                print("DEBUG: No cached trading data available, fetching new data")
-
-        # If no cached data available yet, get it now
-        update_trading_data()
-
-        with trading_data_lock:
-            print(
-                f"DEBUG: Returning freshly updated trading data, ETH price: ${latest_trading_data.get('eth_price', 0):.2f}")
-            return jsonify(latest_trading_data)
+    """Get current trading data and AI model decisions.
 
+    Serves the snapshot published by the scheduler: pre-encoded (and
+    gzipped) bytes, no lock held, 304 for a matching If-None-Match.
+    """
+    try:
+        return trading_snapshot.response(request)
     except Exception as e:
         print(f"Error in get_trading_data: {str(e)}")  # Add logging
         return jsonify({'error': str(e)}), 500
 
 
+@app.route("/api/stream")
+def stream_trading_data():
+    """Server-Sent Events stream of trading data.
+
+    Sends a ``snapshot`` event with the full data, then ``delta`` events
+    with only the changed fields (and a fresh snapshot every few events).
+    Reconnecting clients resume from their ``Last-Event-ID``.
+    """
+    try:
+        events = stream_hub.subscribe(request.headers.get('Last-Event-ID'))
+    except StreamFull as e:
+        return jsonify({"error": str(e)}), 503
+    return Response(events, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        # Stop reverse proxies from buffering the stream
+        'X-Accel-Buffering': 'no'
+    })
+
+
 @app.route("/api/historical-data")
 def get_historical_data() -> Union[dict, tuple[dict, int]]:
     """Get historical market data and AI decisions."""
@@ -469,10 +573,16 @@ def get_historical_data() -> Union[dict, tuple[dict, int]]:
         # Get parameters
         timeframe = request.args.get('timeframe', 'day')
         days = int(request.args.get('days', '7'))
-
-        # Get data
-        market_data = db.get_recent_market_data(
-            limit=24*days)  # Get more data points for charts
+        # Optional chart downsampling: at most `points` rows, extremes kept
+        points = request.args.get('points')
+        if points is not None:
+            points = int(points)
+            if points < MIN_POINTS:
+                raise ValueError(f"points must be at least {MIN_POINTS}")
+
+        # Get data (raw ticks or candles, depending on the range)
+        market_data = db.get_market_history(
+            hours=24*days, points=points, method=request.args.get('downsample', 'lttb'))
         decisions = db.get_recent_decisions(limit=24*days)
         performance = db.get_performance_by_timeframe(timeframe)
         comparison = db.get_model_comparison(days=days)
@@ -485,22 +595,36 @@ def get_historical_data() -> Union[dict, tuple[dict, int]]:
         }
 
         return jsonify(response)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
 @app.route("/api/model-stats")
 def get_model_stats() -> Union[dict, tuple[dict, int]]:
-    """Get detailed model performance statistics."""
+    """Get detailed model performance statistics.
+
+    ``horizon`` (10m|1h|4h|24h) scores the comparison by each decision's
+    outcome at that fixed horizon instead of its single rolling score.
+    """
     try:
         days = int(request.args.get('days', '7'))
         timeframe = request.args.get('timeframe', 'day')
+        horizon = request.args.get('horizon') or None
+
+        try:
+            comparison = db.get_model_comparison(days=days, horizon=horizon)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
         stats = {
             "accuracy": db.get_accuracy_stats(),
-            "comparison": db.get_model_comparison(days=days),
+            "comparison": comparison,
             "performance": db.get_performance_by_timeframe(timeframe)
         }
+        if horizon:
+            stats["horizon"] = horizon
 
         return jsonify(stats)
     except Exception as e:
@@ -518,6 +642,91 @@ def get_daily_stats() -> Union[dict, tuple[dict, int]]:
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/api/history")
+def get_history() -> Union[dict, tuple[dict, int]]:
+    """Get one page of market data or AI decisions in a time range, oldest first.
+
+    Query parameters (first page): ``series`` (market|decisions), ``from``
+    and ``to`` (epoch ms or ISO 8601; default the last 24 hours),
+    ``resolution`` (auto|raw|5m|1h, market only), ``wallet_address`` and
+    ``model`` (decisions only), ``limit``. Later pages only need the
+    ``cursor`` returned as ``next_cursor``; ``limit`` may still be given.
+    """
+    try:
+        token = request.args.get('cursor')
+        if token:
+            query = decode_cursor(token)
+        else:
+            end = parse_time(request.args.get('to'), now_ms())
+            query = {
+                'series': request.args.get('series', 'market'),
+                'from': parse_time(request.args.get('from'), end - 24 * MS_PER_HOUR),
+                'to': end,
+                'after': None,
+            }
+            if query['series'] == 'market':
+                resolution = request.args.get('resolution', 'auto')
+                if resolution == 'auto':
+                    query['table'] = db.market_tier(query['from'])
+                elif resolution in HISTORY_RESOLUTIONS:
+                    query['table'] = HISTORY_RESOLUTIONS[resolution]
+                else:
+                    raise ValueError(f"Unknown resolution: {resolution}")
+            elif query['series'] == 'decisions':
+                query['wallet_address'] = request.args.get('wallet_address')
+                query['model'] = request.args.get('model')
+            else:
+                raise ValueError(f"Unknown series: {query['series']}")
+
+        limit = int(request.args.get('limit', query.get('limit', HISTORY_PAGE_SIZE)))
+        if not 1 <= limit <= HISTORY_MAX_PAGE_SIZE:
+            raise ValueError(f"limit must be between 1 and {HISTORY_MAX_PAGE_SIZE}")
+        query['limit'] = limit
+
+        after = tuple(query['after']) if query.get('after') else None
+        if query.get('series') == 'market':
+            rows, next_after = db.get_market_data_page(
+                int(query['from']), int(query['to']), after=after, limit=limit,
+                table=query['table'])
+        elif query.get('series') == 'decisions':
+            rows, next_after = db.get_decisions_page(
+                int(query['from']), int(query['to']), after=after, limit=limit,
+                wallet_address=query.get('wallet_address'), model=query.get('model'))
+        else:
+            raise ValueError("Invalid cursor")
+
+        next_cursor = None
+        if next_after is not None:
+            next_cursor = encode_cursor(dict(query, after=list(next_after)))
+
+        return jsonify({
+            "series": query['series'],
+            "rows": rows,
+            "next_cursor": next_cursor
+        })
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/db-maintenance")
+def get_db_maintenance() -> Union[dict, tuple[dict, int]]:
+    """Get the last-run stats of background database maintenance."""
+    try:
+        return jsonify(db.maintenance_stats())
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/decision-cache")
+def get_decision_cache() -> Union[dict, tuple[dict, int]]:
+    """Get hit/miss counters of the LLM decision cache."""
+    if decision_cache is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **decision_cache.stats})
+
+
 @app.route("/api/set-wallet-action", methods=["POST"])
 def set_wallet_action() -> Union[dict, tuple[dict, int]]:
     """Set wallet action and store it in the database."""
@@ -574,6 +783,9 @@ def get_wallet_stats() -> Union[dict, tuple[dict, int]]:
         if not wallet_address:
             return jsonify({"error": "Wallet address is required"}), 400
 
+        # Make sure the wallet's just-posted actions/decisions are visible
+        db.flush(timeout=5)
+
         # Get wallet-specific stats from database
         stats = db.get_wallet_stats(wallet_address)
         return jsonify(stats)
@@ -684,6 +896,9 @@ def store_ai_decision() -> Union[dict, tuple[dict, int]]:
         )
 
         return jsonify({"status": "success", "message": "AI decision stored successfully"})
+    except ValueError as ve:
+        # Unknown decision value
+        return jsonify({"error": str(ve)}), 400
     except Exception as e:
         logging.error(f"Error storing AI decision: {str(e)}")
         return jsonify({"error": str(e)}), 500
@@ -715,10 +930,11 @@ def get_swap_quote():
             eth_price = float(latest_trading_data.get('eth_price', 0))
 
         if eth_price == 0:
-            # Fallback to live fetch if cache empty
-            eth_price = market_agent.get_market_data().eth_price
+            # Fallback to live fetch if cache empty; concurrent quotes share
+            # one fetch and reuse it for a short while
+            eth_price = market_agent.get_market_data(max_age_s=30).eth_price
 
-        SLIPPAGE_FACTOR = 0.995  # 0.5% slippage just like contract
+        SLIPPAGE_FACTOR = 1 - SWAP_SLIPPAGE_BPS / 10000  # 0.5% slippage just like contract
 
         if direction == 'eth-to-usdc':
             quote = amount * eth_price * SLIPPAGE_FACTOR
@@ -731,7 +947,7 @@ def get_swap_quote():
             "direction": direction,
             "amount": amount,
             "quote": quote,
-            "slippage_bps": 50
+            "slippage_bps": SWAP_SLIPPAGE_BPS
         })
     except Exception as e:
         logging.error(f"Error in get_swap_quote: {str(e)}")
@@ -0,0 +1,84 @@
+"""Opaque cursors and time parsing for the paginated history API.
+
+A cursor carries the whole query state of ``/api/history`` (series, time
+range, filters, resolution and the key of the last row served), so a client
+only has to pass ``?cursor=`` back to get the next page. Cursors are
+URL-safe base64 JSON; they are not signed, since they only ever select rows
+the caller could request directly. A decoded cursor is checked field by
+field, so an edited or truncated one is rejected as invalid rather than
+reaching the query.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Dict, Optional
+
+from src.database.encoding import to_epoch_ms
+
+# Series of /api/history and the string fields each one's cursor may carry
+CURSOR_SERIES = {
+    'market': ('table',),
+    'decisions': ('wallet_address', 'model'),
+}
+
+
+def encode_cursor(state: Dict) -> str:
+    """Encode query state as a URL-safe token."""
+    raw = json.dumps(state, separators=(',', ':'), sort_keys=True).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(token: str) -> Dict:
+    """Decode a token from ``encode_cursor``.
+
+    Raises:
+        ValueError: If the token is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        state = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(state, dict) or not _valid_state(state):
+        raise ValueError("Invalid cursor")
+    return state
+
+
+def _is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _valid_state(state: Dict) -> bool:
+    """Whether decoded state has the fields and types ``/api/history`` reads."""
+    fields = CURSOR_SERIES.get(state.get('series'))
+    if fields is None:
+        return False
+    if not (_is_int(state.get('from')) and _is_int(state.get('to'))):
+        return False
+    if 'limit' in state and not _is_int(state['limit']):
+        return False
+    after = state.get('after')
+    if after is not None and not (
+            isinstance(after, list) and len(after) == 2 and all(_is_int(key) for key in after)):
+        return False
+    if state['series'] == 'market' and not isinstance(state.get('table'), str):
+        return False
+    return all(state.get(name) is None or isinstance(state[name], str) for name in fields)
+
+
+def parse_time(value: Optional[str], default: int) -> int:
+    """Parse epoch milliseconds or an ISO 8601 timestamp into epoch ms.
+
+    Raises:
+        ValueError: If the value is neither
+    """
+    if value is None or value == '':
+        return default
+    if value.lstrip('-').isdigit():
+        return int(value)
+    try:
+        return to_epoch_ms(datetime.fromisoformat(value))
+    except ValueError:
+        raise ValueError(f"Invalid time: {value}")
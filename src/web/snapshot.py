@@ -0,0 +1,111 @@
+"""Pre-serialized, versioned snapshots of data that many clients poll.
+
+``/api/trading-data`` returns the same dict to every poller between two
+scheduler refreshes. Instead of re-encoding it per request, the scheduler
+publishes a ``Snapshot`` holding the encoded JSON, a gzip variant and an
+ETag; requests only pick the current snapshot (a single attribute read, no
+lock) and send its bytes, or a 304 when the client already has them.
+"""
+
+import gzip
+import json
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from flask import Request, Response
+
+# Compression level for the gzip variant; encoded once per refresh
+GZIP_LEVEL = 6
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Immutable encoded payload of one published version."""
+
+    version: int
+    etag: str
+    body: bytes
+    gzip_body: bytes
+    published_at: float
+
+
+class SnapshotPublisher:
+    """Holds the latest snapshot; publishing replaces it atomically."""
+
+    def __init__(
+        self,
+        refresh_interval_s: float,
+        dumps: Optional[Callable[[Any], str]] = None
+    ):
+        """Initialize an empty publisher.
+
+        Args:
+            refresh_interval_s: How often new data is published; responses
+                may be cached until the next expected refresh
+            dumps: JSON encoder (defaults to compact ``json.dumps``)
+        """
+        self.refresh_interval_s = refresh_interval_s
+        self._dumps = dumps or (lambda data: json.dumps(data, separators=(',', ':')))
+        # ETags stay unique across restarts, which reset the version
+        self._instance = uuid.uuid4().hex[:8]
+        self._lock = threading.Lock()
+        self._current: Optional[Snapshot] = None
+
+    def current(self) -> Optional[Snapshot]:
+        """The latest snapshot, or None before the first publish."""
+        return self._current
+
+    def publish(self, data: Any) -> Snapshot:
+        """Encode ``data`` and make it the current snapshot.
+
+        Publishing data identical to the current snapshot keeps its version,
+        so clients holding it keep getting 304s.
+        """
+        body = self._dumps(data).encode('utf-8')
+        with self._lock:
+            current = self._current
+            if current is not None and current.body == body:
+                return current
+            version = current.version + 1 if current is not None else 1
+            snapshot = Snapshot(
+                version=version,
+                etag=f"{self._instance}-{version}",
+                body=body,
+                gzip_body=gzip.compress(body, compresslevel=GZIP_LEVEL),
+                published_at=time.time()
+            )
+            self._current = snapshot
+        return snapshot
+
+    def max_age(self, snapshot: Snapshot) -> int:
+        """Seconds until the next refresh is expected."""
+        remaining = self.refresh_interval_s - (time.time() - snapshot.published_at)
+        return max(int(remaining), 0)
+
+    def response(self, request: Request) -> Response:
+        """Serve the current snapshot to ``request``, as a 304 if unchanged.
+
+        Must only be called after the first ``publish``.
+        """
+        snapshot = self._current
+        use_gzip = request.accept_encodings['gzip'] > 0
+        # Each encoding is a distinct representation with its own ETag
+        etag = f"{snapshot.etag}-gzip" if use_gzip else snapshot.etag
+
+        if request.if_none_match.contains(snapshot.etag) or \
+                request.if_none_match.contains(f"{snapshot.etag}-gzip"):
+            response = Response(status=304)
+        else:
+            response = Response(
+                snapshot.gzip_body if use_gzip else snapshot.body,
+                mimetype='application/json')
+            if use_gzip:
+                response.headers['Content-Encoding'] = 'gzip'
+
+        response.set_etag(etag)
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['Cache-Control'] = f"max-age={self.max_age(snapshot)}, must-revalidate"
+        return response
@@ -0,0 +1,163 @@
+"""In-process publish/subscribe hub for the ``/api/stream`` SSE endpoint.
+
+Every published state is diffed against the previous one and only the
+changed top-level fields go out as a ``delta`` event; every
+``snapshot_every`` events (and whenever a client cannot be caught up) a full
+``snapshot`` event is sent instead. Each event is encoded once, into a
+shared ring of the last ``history_size`` frames, and every subscriber only
+keeps the id of the last frame it sent. A subscriber's backlog is therefore
+bounded by the ring: a client that falls further behind, or resumes with an
+unknown ``Last-Event-ID``, is resynchronised with a snapshot.
+
+Event ids are ``<instance>-<n>``, so ids from before a restart never match.
+"""
+
+import json
+import logging
+import threading
+import uuid
+from collections import deque
+from copy import deepcopy
+from itertools import islice
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+# Comment frame sent when nothing happened for ``keepalive_s``; lets
+# proxies keep the connection open and the server notice dead clients
+KEEPALIVE_FRAME = b": keepalive\n\n"
+
+
+class StreamFull(Exception):
+    """Raised when the hub already has ``max_subscribers`` subscribers."""
+
+
+class StreamHub:
+    """Fan-out of state deltas to any number of SSE subscribers."""
+
+    def __init__(
+        self,
+        history_size: int = 256,
+        snapshot_every: int = 10,
+        keepalive_s: float = 15,
+        max_subscribers: int = 10000,
+        retry_ms: int = 5000,
+        dumps: Optional[Callable[[Any], str]] = None
+    ):
+        """Initialize an empty hub.
+
+        Args:
+            history_size: Frames kept for catching up and Last-Event-ID resume
+            snapshot_every: Send a full snapshot after this many deltas
+            keepalive_s: Idle seconds before a keepalive comment is sent
+            max_subscribers: Subscribers allowed at once
+            retry_ms: Reconnect delay suggested to clients
+            dumps: JSON encoder (defaults to compact ``json.dumps``)
+        """
+        self.snapshot_every = snapshot_every
+        self.keepalive_s = keepalive_s
+        self.max_subscribers = max_subscribers
+        self.retry_ms = retry_ms
+        self._dumps = dumps or (lambda data: json.dumps(data, separators=(',', ':')))
+        self._instance = uuid.uuid4().hex[:8]
+
+        self._cond = threading.Condition()
+        self._history: Deque[Tuple[int, bytes]] = deque(maxlen=history_size)
+        self._last_id = 0
+        self._state: Optional[Dict] = None
+        self._since_snapshot = 0
+        # Snapshot frame of the current state, encoded on first demand
+        self._resync: Optional[Tuple[int, bytes]] = None
+        self._closed = False
+        self.subscribers = 0
+        self.stats = {'events': 0, 'snapshots': 0, 'resyncs': 0, 'rejected': 0}
+
+    def _frame(self, event_id: int, event: str, data: Any) -> bytes:
+        payload = self._dumps(data)
+        return f"id: {self._instance}-{event_id}\nevent: {event}\ndata: {payload}\n\n".encode('utf-8')
+
+    def publish(self, state: Dict) -> Optional[int]:
+        """Publish the new full state; returns the event id, or None if nothing changed."""
+        with self._cond:
+            if self._state is None or self._since_snapshot + 1 >= self.snapshot_every:
+                event, data = 'snapshot', state
+            else:
+                data = {key: value for key, value in state.items() if self._state.get(key) != value}
+                if not data:
+                    return None
+                event = 'delta'
+
+            self._last_id += 1
+            self._history.append((self._last_id, self._frame(self._last_id, event, data)))
+            self._state = deepcopy(state)
+            self._resync = None
+            self._since_snapshot = 0 if event == 'snapshot' else self._since_snapshot + 1
+            self.stats['events'] += 1
+            if event == 'snapshot':
+                self.stats['snapshots'] += 1
+            self._cond.notify_all()
+            return self._last_id
+
+    def close(self) -> None:
+        """End every open stream."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _parse_id(self, last_event_id: Optional[str]) -> Optional[int]:
+        """The counter of an event id issued by this instance, else None."""
+        if not last_event_id:
+            return None
+        instance, _, counter = last_event_id.partition('-')
+        if instance != self._instance or not counter.isdigit():
+            return None
+        return int(counter)
+
+    def _since(self, cursor: Optional[int]) -> Tuple[List[bytes], Optional[int]]:
+        """Frames after ``cursor`` (call with the lock held)."""
+        if self._state is None or cursor == self._last_id:
+            return [], cursor
+        oldest = self._history[0][0]
+        if cursor is not None and oldest <= cursor + 1 <= self._last_id:
+            return [frame for _, frame in islice(self._history, cursor + 1 - oldest, None)], self._last_id
+
+        # Too far behind (or a new client): start over from the full state
+        if self._resync is None or self._resync[0] != self._last_id:
+            self._resync = (self._last_id, self._frame(self._last_id, 'snapshot', self._state))
+        if cursor is not None:
+            self.stats['resyncs'] += 1
+        return [self._resync[1]], self._last_id
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> Iterator[bytes]:
+        """Return a new subscriber's stream of SSE frames.
+
+        Raises:
+            StreamFull: If ``max_subscribers`` are already connected
+        """
+        with self._cond:
+            if self.subscribers >= self.max_subscribers:
+                self.stats['rejected'] += 1
+                raise StreamFull(f"{self.max_subscribers} stream subscribers already connected")
+        return self._stream(self._parse_id(last_event_id))
+
+    def _stream(self, cursor: Optional[int]) -> Iterator[bytes]:
+        # Counted once the stream is actually consumed, so the finally
+        # below always balances it
+        with self._cond:
+            self.subscribers += 1
+        try:
+            yield f"retry: {self.retry_ms}\n\n".encode('ascii')
+            while True:
+                with self._cond:
+                    if self._closed:
+                        return
+                    if self._state is None or cursor == self._last_id:
+                        self._cond.wait(self.keepalive_s)
+                    frames, cursor = self._since(cursor)
+                if frames:
+                    yield b"".join(frames)
+                else:
+                    yield KEEPALIVE_FRAME
+        finally:
+            # Also runs when the server closes the generator of a dropped client
+            with self._cond:
+                self.subscribers -= 1
+            logging.debug(f"[stream] Subscriber left, {self.subscribers} remaining")
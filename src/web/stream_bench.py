@@ -0,0 +1,210 @@
+"""
+Load test of the ``/api/stream`` hub with many simulated subscribers.
+
+Serves a ``StreamHub`` from a threaded werkzeug server the same way
+``/api/stream`` does, opens keep-open HTTP subscribers from an asyncio
+client in the same process and reports connect time, idle CPU, memory and
+how long each published delta takes to reach every subscriber. It then
+checks Last-Event-ID resume, the snapshot fallback for an unknown id and
+the rejection past ``max_subscribers``:
+
+    python -m src.web.stream_bench --subscribers 5000 --deltas 5
+
+The app itself is not imported, so the test runs without the API keys and
+optional packages the app needs.
+"""
+
+import argparse
+import asyncio
+import logging
+import resource
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from flask import Flask, Response, jsonify, request
+from werkzeug.serving import make_server
+
+from src.web.stream import StreamFull, StreamHub
+
+# Subscribers connecting at once; stays below werkzeug's listen backlog of 128
+CONNECT_CONCURRENCY = 100
+
+
+def create_app(hub: StreamHub) -> Flask:
+    """A Flask app serving ``hub`` like the ``/api/stream`` route."""
+    app = Flask(__name__)
+
+    @app.route("/api/stream")
+    def stream():
+        try:
+            events = hub.subscribe(request.headers.get('Last-Event-ID'))
+        except StreamFull as e:
+            return jsonify({"error": str(e)}), 503
+        return Response(events, mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+    return app
+
+
+def make_state(tick: int, wallets: int = 50) -> Dict:
+    """Trading-data-like state; ``tick`` changes a few fields only."""
+    return {
+        'eth_price': 3000 + tick,
+        'gas_prices': {'low': 10, 'average': 12 + tick % 3, 'high': 15},
+        'decisions': {'mistral': 'HOLD', 'groq': 'BUY' if tick % 2 else 'SELL', 'gemini': 'HOLD'},
+        'wallets': [{'address': f"0x{i:040x}", 'eth_balance': 1.0, 'usdc_balance': 1000.0}
+                    for i in range(wallets)],
+        'last_update': f"tick-{tick}",
+    }
+
+
+class Subscriber:
+    """One SSE client; records when each event id arrived."""
+
+    def __init__(self, arrivals: Dict[int, List[float]]):
+        self.arrivals = arrivals
+        self.events: List[Tuple[str, str]] = []
+        self.last_id: Optional[str] = None
+        self.first_frame = asyncio.get_running_loop().create_future()
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def connect(self, port: int, last_event_id: Optional[str] = None) -> int:
+        """Open the stream; returns the HTTP status and keeps reading in the background."""
+        reader, self._writer = await asyncio.open_connection('127.0.0.1', port)
+        resume = f"Last-Event-ID: {last_event_id}\r\n" if last_event_id else ""
+        # HTTP/1.0 keeps the body unchunked: SSE frames arrive as written
+        self._writer.write(f"GET /api/stream HTTP/1.0\r\nHost: localhost\r\n{resume}\r\n".encode('ascii'))
+        status = int((await reader.readline()).split()[1])
+        while (await reader.readline()).strip():
+            pass
+        if status == 200:
+            asyncio.get_running_loop().create_task(self._read(reader))
+        else:
+            self.close()
+        return status
+
+    async def _read(self, reader: asyncio.StreamReader) -> None:
+        event_id = None
+        while line := await reader.readline():
+            if line.startswith(b"id: "):
+                event_id = line[4:].strip().decode('ascii')
+            elif line.startswith(b"event: ") and event_id:
+                self.events.append((event_id, line[7:].strip().decode('ascii')))
+                self.last_id = event_id
+                self.arrivals[int(event_id.rpartition('-')[2])].append(time.perf_counter())
+                if not self.first_frame.done():
+                    self.first_frame.set_result(None)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+def rss_mb() -> float:
+    """Peak resident memory of this process (server and clients) in MB."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def wait_for(arrivals: Dict[int, List[float]], event_id: int, count: int, timeout_s: float) -> None:
+    deadline = time.perf_counter() + timeout_s
+    while len(arrivals[event_id]) < count:
+        if time.perf_counter() > deadline:
+            raise TimeoutError(f"{len(arrivals[event_id])}/{count} subscribers got event {event_id}")
+        await asyncio.sleep(0.01)
+
+
+async def run_load_test(port: int, hub: StreamHub, subscribers: int, deltas: int, idle_s: float) -> int:
+    """Drive the server on ``port``; returns the number of failed checks."""
+    loop = asyncio.get_running_loop()
+    arrivals: Dict[int, List[float]] = defaultdict(list)
+    failures = 0
+
+    tick = 0
+    first_id = hub.publish(make_state(tick))
+    gate = asyncio.Semaphore(CONNECT_CONCURRENCY)
+
+    async def join() -> Subscriber:
+        async with gate:
+            client = Subscriber(arrivals)
+            await client.connect(port)
+            await client.first_frame
+            return client
+
+    started = time.perf_counter()
+    clients = await asyncio.gather(*(join() for _ in range(subscribers)))
+    print(f"{subscribers:,} subscribers connected and got the snapshot in {time.perf_counter() - started:.1f}s")
+
+    cpu = time.process_time()
+    await asyncio.sleep(idle_s)
+    print(f"idle: {time.process_time() - cpu:.2f}s CPU over {idle_s:.0f}s, peak RSS {rss_mb():.0f}MB")
+
+    event_id = first_id
+    for _ in range(deltas):
+        tick += 1
+        published = time.perf_counter()
+        event_id = await loop.run_in_executor(None, hub.publish, make_state(tick))
+        publish_s = time.perf_counter() - published
+        await wait_for(arrivals, event_id, subscribers, timeout_s=60)
+        latencies = sorted(arrival - published for arrival in arrivals[event_id])
+        print(
+            f"delta {event_id}: publish {publish_s * 1000:.0f}ms, delivered to all in "
+            f"{latencies[-1] * 1000:.0f}ms (median {latencies[len(latencies) // 2] * 1000:.0f}ms)")
+
+    # Resume two events back: exactly the two missed deltas
+    last_id = clients[0].last_id
+    resume_from = f"{last_id.rpartition('-')[0]}-{event_id - 2}"
+    resumed = Subscriber(defaultdict(list))
+    await resumed.connect(port, resume_from)
+    await asyncio.sleep(0.5)
+    kinds = [kind for _, kind in resumed.events]
+    ok = kinds == ['delta', 'delta'] and resumed.last_id == last_id
+    failures += not ok
+    print(f"resume from {resume_from}: {kinds} {'ok' if ok else 'FAILED'}")
+
+    unknown = Subscriber(defaultdict(list))
+    await unknown.connect(port, 'ffffffff-1')
+    await asyncio.sleep(0.5)
+    kinds = [kind for _, kind in unknown.events]
+    ok = kinds == ['snapshot']
+    failures += not ok
+    print(f"resume from an unknown id: {kinds} {'ok' if ok else 'FAILED'}")
+
+    # The two resumed clients took the hub's last free slots
+    extra = Subscriber(defaultdict(list))
+    status = await extra.connect(port)
+    failures += status != 503
+    print(f"subscriber {subscribers + 3:,}: HTTP {status} {'ok' if status == 503 else 'FAILED'}")
+
+    for client in [*clients, resumed, unknown]:
+        client.close()
+    print(f"first event id {first_id}, hub stats {hub.stats}")
+    return failures
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--subscribers', type=int, default=5000)
+    parser.add_argument('--deltas', type=int, default=5, help="deltas published under load")
+    parser.add_argument('--idle', type=float, default=3.0, help="seconds of idle CPU measurement")
+    parser.add_argument('--port', type=int, default=0, help="port to serve on (default: any free port)")
+    args = parser.parse_args(argv)
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
+    # A keepalive inside the idle window would count as work
+    # Room for the load plus the two resume checks
+    hub = StreamHub(max_subscribers=args.subscribers + 2, keepalive_s=max(args.idle * 10, 60))
+    server = make_server('127.0.0.1', args.port, create_app(hub), threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        failures = asyncio.run(run_load_test(server.port, hub, args.subscribers, args.deltas, args.idle))
+    finally:
+        hub.close()
+        server.shutdown()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
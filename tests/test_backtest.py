@@ -0,0 +1,73 @@
+"""Backtests of a fixed price series against hand-computed portfolios."""
+
+import numpy as np
+import pytest
+
+from src.agents.backtest import backtest, decisions_to_signals
+from src.database.encoding import DECISION_CODES
+
+# ETH doubles, then halves back
+PRICES = [100.0, 200.0, 100.0]
+BUY, HOLD, SELL = 1, 0, -1
+
+
+def test_hold_drifts_with_the_price():
+    result = backtest(PRICES, [HOLD, HOLD, HOLD])
+    # 5,000 USDC + 50 ETH throughout
+    assert result.equity[0].tolist() == pytest.approx([10_000, 15_000, 10_000])
+    assert result.allocation[0].tolist() == pytest.approx([0.5, 2 / 3, 0.5])
+    assert result.trades[0] == 0
+    assert result.total_return[0] == pytest.approx(0)
+    assert result.max_drawdown[0] == pytest.approx(10_000 / 15_000 - 1)
+    assert result.buy_and_hold_return == pytest.approx(0)
+
+
+def test_buy_then_sell_without_costs():
+    result = backtest(PRICES, [BUY, HOLD, SELL], slippage_bps=0)
+    # 2,000 USDC + 80 ETH: 18,000 at the top, 10,000 back at 100
+    assert result.equity[0].tolist() == pytest.approx([10_000, 18_000, 10_000])
+    assert result.allocation[0].tolist() == pytest.approx([0.8, 16 / 18, 0.2])
+    assert result.trades[0] == 2
+    assert result.slippage_paid[0] == pytest.approx(0)
+
+
+def test_buy_then_sell_pays_slippage_and_gas():
+    # 20 gwei * 150,000 gas = 0.003 ETH = $0.30 per swap at $100
+    result = backtest(PRICES, [BUY, HOLD, SELL], gas_gwei=[20, 20, 20])
+    # BUY moves 30% of 10,000 at 0.5% slippage, then pays gas
+    first = 10_000 * (1 - 0.005 * 0.3) - 0.3
+    # The SELL moves 60% of the value (0.8 -> 0.2)
+    last = first * (1 - 0.005 * 0.6) - 0.3
+    assert result.equity[0].tolist() == pytest.approx([first, first * 1.8, last])
+    assert result.slippage_paid[0] == pytest.approx(10_000 * 0.0015 + first * 0.003)
+    assert result.gas_paid[0] == pytest.approx(0.6)
+    assert result.total_return[0] == pytest.approx(last / 10_000 - 1)
+    assert result.summary()['final_equity'] == round(last, 2)
+
+
+def test_rows_are_independent_strategies():
+    signals = np.array([[HOLD, HOLD, HOLD], [BUY, HOLD, SELL], [SELL, BUY, HOLD]])
+    together = backtest(PRICES, signals, gas_gwei=[20, 20, 20])
+    for i, row in enumerate(signals):
+        alone = backtest(PRICES, row, gas_gwei=[20, 20, 20])
+        assert together.equity[i].tolist() == pytest.approx(alone.equity[0].tolist())
+        assert together.trades[i] == alone.trades[0]
+
+
+def test_gas_can_ruin_a_portfolio():
+    result = backtest(PRICES, [BUY, SELL, BUY], gas_gwei=[1e6, 1e6, 1e6], capital=100)
+    assert result.equity[0].tolist() == [0.0, 0.0, 0.0]
+    assert result.total_return[0] == -1
+    assert result.trades[0] == 0
+
+
+def test_mismatched_lengths_are_rejected():
+    with pytest.raises(ValueError):
+        backtest(PRICES, [BUY, HOLD])
+
+
+def test_decisions_act_on_the_next_tick():
+    codes = [DECISION_CODES[name] for name in ('BUY', 'SELL', 'ERROR', 'SELL', 'BUY')]
+    signals = decisions_to_signals([0, 10, 20, 30], [0, 5, 12, 15, 40], codes)
+    # 5 -> tick 10; 12 and 15 -> tick 20, the last (SELL) wins; 40 is past the end
+    assert signals.tolist() == [BUY, SELL, SELL, HOLD]
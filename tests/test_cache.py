@@ -0,0 +1,59 @@
+"""VersionedCache invalidation and bounds."""
+
+import threading
+from contextlib import contextmanager
+
+from src.cache import VersionedCache
+
+
+@contextmanager
+def computing(cache, key):
+    """Keep a computation of ``key`` in flight for the duration of the block."""
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return 'stale'
+
+    worker = threading.Thread(target=cache.get_or_compute, args=(key, slow), daemon=True)
+    worker.start()
+    started.wait(5)
+    try:
+        yield
+    finally:
+        release.set()
+        worker.join(5)
+
+
+def test_versions_stay_bounded():
+    cache = VersionedCache(max_entries=8)
+    for wallet in range(1000):
+        cache.get_or_compute(wallet, lambda: 'stats')
+        cache.invalidate(wallet)
+    assert len(cache._versions) <= 8
+    assert len(cache._entries) <= 8
+
+
+def test_invalidation_rejects_an_in_flight_value():
+    cache = VersionedCache()
+    with computing(cache, 'wallet'):
+        cache.invalidate('wallet')
+    assert cache.get_or_compute('wallet', lambda: 'fresh') == 'fresh'
+
+
+def test_dropped_version_still_rejects_an_in_flight_value():
+    cache = VersionedCache(max_entries=2)
+    with computing(cache, 'wallet'):
+        cache.invalidate('wallet')
+        # Push the wallet's version out of the bounded version table
+        for other in range(10):
+            cache.invalidate(other)
+    assert cache.get_or_compute('wallet', lambda: 'fresh') == 'fresh'
+
+
+def test_clear_rejects_in_flight_values():
+    cache = VersionedCache()
+    with computing(cache, 'wallet'):
+        cache.clear()
+    assert cache.get_or_compute('wallet', lambda: 'fresh') == 'fresh'
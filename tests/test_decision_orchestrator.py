@@ -0,0 +1,159 @@
+"""Concurrent decision cycles, early quorum and provider failures."""
+
+import threading
+import time
+
+import pytest
+
+from src.agents.decision_orchestrator import (
+    ERROR_DECISION, STATUS_ERROR, STATUS_OK, STATUS_TIMEOUT, CycleResult, DecisionOrchestrator,
+    ProviderOutcome, early_consensus, find_consensus, majority_quorum, settle_partial, validate_quorum
+)
+
+
+def answers(decision, wait_for=None, timeout=5.0):
+    """Stub provider; with ``wait_for`` it answers only once the event is set."""
+    def provider(**_):
+        if wait_for is not None:
+            wait_for.wait(timeout)
+        return decision
+    return provider
+
+
+def fails(**_):
+    raise ConnectionError("upstream unavailable")
+
+
+class Watcher:
+    """``on_outcome`` callback recording when an early consensus appeared."""
+
+    def __init__(self, providers, quorum, on_early=None):
+        self.providers = list(providers)
+        self.quorum = quorum
+        self.on_early = on_early
+        self.early = None
+        self.seen = []
+
+    def __call__(self, outcome, cycle):
+        self.seen.append(outcome.name)
+        if self.early is None:
+            self.early = early_consensus(cycle, self.providers, self.quorum)
+            if self.early is not None:
+                self.answered_at_early = list(self.seen)
+                if self.on_early:
+                    self.on_early()
+
+
+@pytest.fixture
+def orchestrators():
+    created = []
+
+    def make(providers, **kwargs):
+        created.append(DecisionOrchestrator(providers, **kwargs))
+        return created[-1]
+
+    yield make
+    for orchestrator in created:
+        orchestrator.close()
+
+
+def test_quorum_is_reported_before_the_slow_provider_answers(orchestrators):
+    released = threading.Event()
+    orchestrator = orchestrators({
+        'gemini': answers('BUY'),
+        'groq': answers('BUY'),
+        'mistral': answers('SELL', wait_for=released),
+    })
+    # The slow provider only answers after the early consensus was seen
+    watcher = Watcher(orchestrator.providers, 2, on_early=released.set)
+    result = orchestrator.run(on_outcome=watcher)
+
+    assert watcher.early == ('BUY', ['mistral'])
+    assert sorted(watcher.answered_at_early) == ['gemini', 'groq']
+    # The late dissent cannot overturn a strict-majority quorum
+    assert result.decisions == {'gemini': 'BUY', 'groq': 'BUY', 'mistral': 'SELL'}
+    assert find_consensus(result.decisions, 2) == 'BUY'
+    assert watcher.seen[-1] == 'mistral'
+
+
+def test_quorum_never_reached(orchestrators):
+    orchestrator = orchestrators({
+        'gemini': answers('BUY'), 'groq': answers('SELL'), 'mistral': answers('HOLD')})
+    watcher = Watcher(orchestrator.providers, 2)
+    result = orchestrator.run(on_outcome=watcher)
+
+    assert watcher.early is None
+    assert len(watcher.seen) == 3
+    assert find_consensus(result.decisions, 2) is None
+
+
+def test_complete_cycle_is_not_early():
+    cycle = CycleResult(outcomes={
+        name: ProviderOutcome(name, 'SELL', STATUS_OK, 0.1) for name in ('a', 'b', 'c')})
+    assert early_consensus(cycle, ['a', 'b', 'c'], 2) is None
+    assert early_consensus(cycle, ['a', 'b', 'c', 'd'], 3) == ('SELL', ['d'])
+
+
+def test_failing_provider_is_recorded_as_an_error(orchestrators):
+    orchestrator = orchestrators({'gemini': fails, 'groq': answers('SELL'), 'mistral': answers('SELL')})
+    watcher = Watcher(orchestrator.providers, 2)
+    result = orchestrator.run(on_outcome=watcher)
+
+    outcome = result.outcomes['gemini']
+    assert (outcome.decision, outcome.status) == (ERROR_DECISION, STATUS_ERROR)
+    assert "upstream unavailable" in outcome.error
+    assert list(result.outcomes) == ['gemini', 'groq', 'mistral']
+    assert find_consensus(result.decisions, 2) == 'SELL'
+
+    # An error is an answer: without it the remaining two cannot agree
+    orchestrator = orchestrators({'gemini': fails, 'groq': answers('BUY'), 'mistral': answers('SELL')})
+    watcher = Watcher(orchestrator.providers, 2)
+    assert find_consensus(orchestrator.run(on_outcome=watcher).decisions, 2) is None
+    assert watcher.early is None
+
+
+def test_hung_provider_times_out_and_is_skipped_next_cycle(orchestrators):
+    released = threading.Event()
+    orchestrator = orchestrators(
+        {'gemini': answers('BUY'), 'groq': answers('BUY'), 'mistral': answers('HOLD', wait_for=released)},
+        provider_timeout_s=0.2, cycle_budget_s=1.0)
+    watcher = Watcher(orchestrator.providers, 2)
+    try:
+        started = time.monotonic()
+        result = orchestrator.run(on_outcome=watcher)
+        assert time.monotonic() - started < 1.0
+        assert result.outcomes['mistral'].status == STATUS_TIMEOUT
+        assert watcher.early == ('BUY', ['mistral'])
+
+        # Still running from the last cycle: reported without a new call
+        again = orchestrator.run()
+        assert again.outcomes['mistral'].error == "previous call still running"
+    finally:
+        released.set()
+
+
+@pytest.mark.parametrize('quorum, providers', [(2, 3), (3, 3), (3, 4), (4, 4), (1, 1), (3, 5)])
+def test_validate_quorum_accepts_strict_majorities(quorum, providers):
+    assert validate_quorum(quorum, providers) == quorum
+
+
+@pytest.mark.parametrize('quorum, providers', [(1, 3), (4, 3), (2, 4), (0, 1), (0, 0), (2, 5)])
+def test_validate_quorum_rejects_the_rest(quorum, providers):
+    with pytest.raises(ValueError):
+        validate_quorum(quorum, providers)
+
+
+def test_majority_quorum_is_valid():
+    for providers in range(1, 8):
+        assert validate_quorum(majority_quorum(providers), providers)
+
+
+def test_settle_partial_clears_a_provisional_snapshot():
+    provisional = {'consensus': 'BUY', 'partial': True, 'pending_models': ['mistral'], 'mistral_action': ''}
+    settled = settle_partial(provisional)
+    assert settled == {'consensus': 'BUY', 'partial': False, 'pending_models': [], 'mistral_action': ''}
+    # The published snapshot is replaced, not mutated
+    assert provisional['partial'] is True
+
+    assert settle_partial(settled) is None
+    assert settle_partial({'consensus': None}) is None
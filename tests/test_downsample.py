@@ -0,0 +1,108 @@
+"""Downsampled series keep their endpoints and extremes within the point budget."""
+
+import math
+import random
+
+import numpy as np
+import pytest
+
+from src.database.downsample import METHODS, MIN_POINTS, downsample_indices, downsample_rows
+
+
+def random_walk(n, seed):
+    rng = random.Random(seed)
+    price, ys = 3000.0, []
+    for _ in range(n):
+        price *= math.exp(rng.gauss(0, 0.002))
+        ys.append(price)
+    return list(range(0, n * 60_000, 60_000)), ys
+
+
+def assert_shape(x, y, indices, points):
+    y = np.asarray(y)
+    assert len(indices) <= points
+    assert indices[0] == 0 and indices[-1] == len(y) - 1
+    assert np.all(np.diff(indices) > 0)
+    kept = y[indices]
+    assert kept.min() == y.min() and kept.max() == y.max()
+
+
+@pytest.mark.parametrize('method', METHODS)
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('n, points', [(10, 4), (100, 5), (1000, 7), (1000, 100), (5000, 333), (20000, 500)])
+def test_random_walks(method, seed, n, points):
+    x, y = random_walk(n, seed)
+    indices = downsample_indices(x, y, points, method)
+    assert_shape(x, y, indices, points)
+    if method == 'lttb':
+        # The budget is used rather than wasted (one bucket fewer when a
+        # single bucket had to hold both extremes)
+        assert len(indices) >= points - 1
+
+
+@pytest.mark.parametrize('method', METHODS)
+@pytest.mark.parametrize('seed', range(20))
+def test_white_noise(method, seed):
+    # Plain LTTB often misses the global extremes of noise
+    rng = random.Random(seed)
+    n = rng.randrange(100, 3000)
+    y = [rng.random() for _ in range(n)]
+    for points in (4, 5, 9, 40):
+        assert_shape(range(n), y, downsample_indices(list(range(n)), y, points, method), points)
+
+
+@pytest.mark.parametrize('method', METHODS)
+def test_extremes_in_one_bucket(method):
+    # A spike and a crash next to each other, both inside one bucket
+    x, y = random_walk(1000, 1)
+    y[500], y[501] = 10_000.0, 1.0
+    for points in (4, 5, 6, 50):
+        indices = downsample_indices(x, y, points, method)
+        assert_shape(x, y, indices, points)
+        assert {500, 501} <= set(indices.tolist())
+
+
+@pytest.mark.parametrize('method', METHODS)
+def test_extremes_at_the_ends(method):
+    y = [float(i) for i in range(1000)]
+    indices = downsample_indices(list(range(1000)), y, 10, method)
+    assert_shape(range(1000), y, indices, 10)
+    y = [5.0] * 1000
+    assert_shape(range(1000), y, downsample_indices(list(range(1000)), y, 10, method), 10)
+
+
+@pytest.mark.parametrize('method', METHODS)
+def test_extremes_in_the_last_and_first_buckets(method):
+    x, y = random_walk(997, 3)
+    y[1], y[995] = 1.0, 10_000.0
+    assert_shape(x, y, downsample_indices(x, y, 8, method), 8)
+
+
+def test_lttb_selects_exactly_the_budget():
+    x, y = random_walk(5000, 2)
+    assert len(downsample_indices(x, y, 400, 'lttb')) == 400
+
+
+@pytest.mark.parametrize('method', METHODS)
+def test_short_series_are_returned_whole(method):
+    x, y = random_walk(50, 0)
+    assert downsample_indices(x, y, 50, method).tolist() == list(range(50))
+    assert downsample_indices(x, y, 80, method).tolist() == list(range(50))
+
+
+def test_invalid_arguments():
+    x, y = random_walk(100, 0)
+    with pytest.raises(ValueError):
+        downsample_indices(x, y, MIN_POINTS - 1)
+    with pytest.raises(ValueError):
+        downsample_indices(x, y, 10, method='average')
+
+
+def test_downsample_rows_keeps_whole_rows():
+    x, y = random_walk(2000, 4)
+    rows = [(ts, price, f"row {i}") for i, (ts, price) in enumerate(zip(x, y))]
+    kept = downsample_rows(rows, 100, 'minmax')
+    assert len(kept) <= 100
+    assert kept[0] is rows[0] and kept[-1] is rows[-1]
+    assert all(row is rows[int(row[2].split()[1])] for row in kept)
+    assert downsample_rows(rows[:10], 100) == rows[:10]
@@ -0,0 +1,132 @@
+"""Horizon outcomes: as-of tolerance, regime, expiry and the ingest watermark."""
+
+import pytest
+
+from src.database.db import TradingDatabase
+from src.database.encoding import DECISION_CODES, MS_PER_HOUR
+from src.database.horizons import ASOF_TOLERANCE_MS, HORIZONS, OUTCOME_EXPIRY_MS
+from src.database.scoring import rolling_market_regime, score_decisions
+
+T0 = 1_760_000_000_000
+MS_PER_10M = 10 * 60 * 1000
+
+
+@pytest.fixture
+def make_db(tmp_path):
+    opened = []
+
+    def make(name="trading.db"):
+        opened.append(TradingDatabase(str(tmp_path / name), maintenance=False, clock=lambda: T0))
+        return opened[-1]
+
+    yield make
+    for db in opened:
+        db.close()
+
+
+def add_ticks(db, ticks):
+    with db.connection() as conn:
+        conn.executemany("""
+            INSERT INTO market_data (timestamp, eth_price, eth_volume_24h, eth_high_24h, eth_low_24h)
+            VALUES (?, ?, 1e9, ?, ?)
+        """, [(ts, price, price, price) for ts, price in ticks])
+
+
+def outcome(db, horizon):
+    """``(future_price, was_correct)`` of the first decision's outcome, or None if dropped."""
+    with db.connection() as conn:
+        return conn.execute("""
+            SELECT future_price, was_correct FROM decision_outcomes
+            WHERE decision_id = 1 AND horizon = ?
+        """, (HORIZONS[horizon],)).fetchone()
+
+
+@pytest.mark.parametrize('offset, scored', [(0, True), (-1, False)])
+def test_asof_price_must_be_within_the_tolerance(make_db, offset, scored):
+    db = make_db()
+    db.store_ai_decision('gemini', 'BUY', 3000.0, '0xwallet')
+    edge = T0 + MS_PER_HOUR - ASOF_TOLERANCE_MS + offset
+    add_ticks(db, [(T0, 3000.0), (edge, 3100.0), (T0 + 2 * MS_PER_HOUR, 3200.0)])
+
+    stats = db.score_horizons()
+    assert stats['ingested'] == len(HORIZONS)
+    if scored:
+        assert outcome(db, '1h') == (3100.0, 1)
+    else:
+        # A gap, not a price: left pending rather than scored against 3000
+        assert outcome(db, '1h') == (None, None)
+        assert stats['dropped'] == 0
+
+
+def test_regime_is_taken_at_the_future_price(make_db):
+    db = make_db()
+    db.store_ai_decision('gemini', 'HOLD', 3000.0, '0xwallet')
+    # Swinging market up to the 1h horizon, flat for the rest of the day
+    ticks = [(T0 + i * MS_PER_10M, 3150.0 if i % 2 else 2850.0) for i in range(-24, 6)]
+    ticks += [(T0 + i * MS_PER_10M, 3060.0) for i in range(6, 24 * 6 + 1)]
+    add_ticks(db, ticks)
+
+    db.score_horizons()
+    # +2% is within the swinging market's noise: HOLD was right
+    assert outcome(db, '1h') == (3060.0, 1)
+
+    # Judged by the flat market at the end of the loaded series, it would not be
+    prices = [price for _, price in ticks]
+    hold = [DECISION_CODES['HOLD']]
+    at_horizon = score_decisions(hold, [3000.0], [1.0], 3060.0, rolling_market_regime(prices, [30]))
+    at_end = score_decisions(hold, [3000.0], [1.0], 3060.0, rolling_market_regime(prices, [len(prices) - 1]))
+    assert at_horizon.was_correct.tolist() == [True]
+    assert at_end.was_correct.tolist() == [False]
+
+
+def test_outcomes_in_a_gap_expire_after_a_day(make_db):
+    db = make_db()
+    db.store_ai_decision('gemini', 'SELL', 3000.0, '0xwallet')
+    target = T0 + MS_PER_HOUR
+    add_ticks(db, [(T0, 3000.0), (target + OUTCOME_EXPIRY_MS, 2900.0)])
+
+    stats = db.score_horizons()
+    assert stats['dropped'] == 0
+    assert outcome(db, '1h') == (None, None)
+
+    add_ticks(db, [(target + OUTCOME_EXPIRY_MS + 1, 2900.0)])
+    stats = db.score_horizons()
+    assert stats['dropped'] == 1
+    assert outcome(db, '1h') is None
+    # The 10m outcome found T0's price within the tolerance
+    assert outcome(db, '10m') == (3000.0, 0)
+
+
+def test_watermark_survives_deleted_outcomes_and_restarts(make_db):
+    db = make_db()
+    for _ in range(3):
+        db.store_ai_decision('gemini', 'BUY', 3000.0, '0xwallet')
+    assert db.score_horizons()['ingested'] == 3 * len(HORIZONS)
+
+    # Outcome retention deletes the rows; the decisions are still there
+    with db.connection() as conn:
+        conn.execute("DELETE FROM decision_outcomes")
+    db.close()
+
+    db = make_db()
+    assert db.score_horizons()['ingested'] == 0
+    db.store_ai_decision('groq', 'SELL', 3000.0, '0xwallet')
+    assert db.score_horizons()['ingested'] == len(HORIZONS)
+    with db.connection() as conn:
+        assert conn.execute(
+            "SELECT value FROM retention_state WHERE name = 'outcome_watermark'").fetchone() == (4,)
+        assert conn.execute("SELECT DISTINCT decision_id FROM decision_outcomes").fetchall() == [(4,)]
+
+
+def test_only_elapsed_horizons_are_scored(make_db):
+    db = make_db()
+    db.store_ai_decision('gemini', 'BUY', 3000.0, '0xwallet')
+    add_ticks(db, [(T0 + i * MS_PER_10M, 3000.0 + 10 * i) for i in range(7)])
+
+    stats = db.score_horizons()
+    assert stats['scored'] == 2
+    assert outcome(db, '10m') == (3010.0, 0)
+    # +0.33% is within the threshold, +2% beyond it
+    assert outcome(db, '1h') == (3060.0, 1)
+    assert outcome(db, '4h') == (None, None)
+    assert outcome(db, '24h') == (None, None)
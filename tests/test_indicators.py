@@ -0,0 +1,119 @@
+"""Parity of the indicator implementations with the original NumPy code."""
+
+import numpy as np
+import pytest
+
+from src.tools.indicators import IndicatorEngine, compute_indicators
+
+WINDOW = 100
+SEEDS = range(25)
+
+
+def legacy_indicators(prices):
+    """``calculate_technical_indicators`` as the model clients shipped it."""
+    if len(prices) < 2:
+        return {
+            'volatility': 0,
+            'momentum': 0,
+            'rsi': 50,
+            'price_trend': 'neutral',
+            'volatility_level': 'low'
+        }
+
+    prices = np.array(prices)
+    price_changes = np.diff(prices)
+    volatility = np.std(price_changes) if len(price_changes) > 0 else 0
+    momentum = np.mean(price_changes[-5:]) if len(price_changes) >= 5 else np.mean(price_changes)
+
+    rsi = 50
+    if len(prices) >= 14:
+        gains = np.where(price_changes > 0, price_changes, 0)
+        losses = np.where(price_changes < 0, -price_changes, 0)
+        avg_gain = np.mean(gains[-14:])
+        avg_loss = np.mean(losses[-14:])
+        if avg_loss != 0:
+            rs = avg_gain / avg_loss
+            if rs != 0:
+                rsi = 100 - (100 / (1 + rs))
+
+    price_trend = 'up' if momentum > 0 else 'down'
+    mean_abs_change = np.mean(np.abs(price_changes)) if len(price_changes) > 0 else 0
+    volatility_level = 'high' if mean_abs_change > 0 and volatility > mean_abs_change * 2 else 'low'
+    return {
+        'volatility': volatility,
+        'momentum': momentum,
+        'rsi': rsi,
+        'price_trend': price_trend,
+        'volatility_level': volatility_level
+    }
+
+
+def random_walk(rng, length):
+    return 2000 * np.exp(np.cumsum(rng.normal(0, 0.004, length)))
+
+
+def rounded_with_flat_runs(rng, length):
+    # Cent prices that often repeat, so changes are exactly zero
+    moves = rng.choice([-1, 0, 0, 0, 1], size=length) * rng.integers(1, 50, size=length) / 100
+    return np.round(1800 + np.cumsum(moves), 2)
+
+
+def spikes(rng, length):
+    # Rare huge outliers: removing one from the window cancels most of the variance
+    prices = random_walk(rng, length)
+    prices[rng.random(length) < 0.02] *= rng.choice([0.5, 2.0])
+    return prices
+
+
+def large_and_flat(rng, length):
+    # Tiny moves on a large price
+    return 1e6 + np.cumsum(rng.normal(0, 1e-3, length))
+
+
+def jump_then_calm(rng, length):
+    # One jump many orders of magnitude above the moves around it
+    prices = 2000 + np.cumsum(rng.normal(0, 1e-4, length))
+    prices[int(rng.integers(0, length)):] += 500
+    return prices
+
+
+STREAMS = [random_walk, rounded_with_flat_runs, spikes, large_and_flat, jump_then_calm]
+
+
+def assert_matches(actual, expected, scale):
+    tolerance = 1e-9 * max(scale, 1.0)
+    assert actual['volatility'] == pytest.approx(float(expected['volatility']), rel=1e-7, abs=tolerance)
+    assert actual['momentum'] == pytest.approx(float(expected['momentum']), rel=1e-7, abs=tolerance)
+    assert actual['rsi'] == pytest.approx(float(expected['rsi']), rel=1e-9, abs=1e-7)
+    assert actual['price_trend'] == expected['price_trend']
+    assert actual['volatility_level'] == expected['volatility_level']
+
+
+@pytest.mark.parametrize('stream', STREAMS)
+@pytest.mark.parametrize('seed', SEEDS)
+def test_engine_matches_legacy_on_every_tick(stream, seed):
+    rng = np.random.default_rng(seed)
+    prices = stream(rng, int(rng.integers(2, 4 * WINDOW)))
+    engine = IndicatorEngine(window=WINDOW)
+    history = []
+    for price in prices:
+        history = (history + [float(price)])[-WINDOW:]
+        actual = engine.update(float(price))
+        assert_matches(actual, legacy_indicators(history), np.abs(np.diff(history)).max(initial=0))
+
+
+@pytest.mark.parametrize('stream', STREAMS)
+@pytest.mark.parametrize('seed', SEEDS)
+def test_compute_indicators_matches_legacy(stream, seed):
+    rng = np.random.default_rng(seed)
+    prices = stream(rng, int(rng.integers(0, 2 * WINDOW))).tolist()
+    expected = legacy_indicators(prices)
+    actual = compute_indicators(prices)
+    assert actual == {key: value if isinstance(value, str) else float(value) for key, value in expected.items()}
+
+
+def test_short_histories_return_the_defaults():
+    engine = IndicatorEngine(window=WINDOW)
+    assert engine.current == legacy_indicators([])
+    assert engine.update(2000.0) == legacy_indicators([2000.0])
+    assert compute_indicators([]) == legacy_indicators([])
@@ -0,0 +1,182 @@
+"""Reading decisions from model answers, streamed and whole, and reusing them."""
+
+import math
+
+import pytest
+
+from src.tools.llm_provider import DecisionCache, DecisionScanner, LLMProvider, MarketContext
+
+
+def scan(chunks):
+    """Feed ``chunks`` until decided; returns (decision, chunks consumed)."""
+    scanner = DecisionScanner()
+    for consumed, chunk in enumerate(chunks, 1):
+        if scanner.feed(chunk) is not None:
+            return scanner.decision, consumed
+    return scanner.finish(), len(chunks)
+
+
+class ScriptedProvider(LLMProvider):
+    """Provider answering with fixed chunks, recording how many were read."""
+
+    label = "Scripted"
+
+    def __init__(self, chunks, streaming=True):
+        super().__init__()
+        self.chunks = chunks
+        self.streaming = streaming
+        self.sent = 0
+        self.closed = False
+
+    def complete(self, prompt):
+        return ''.join(self.chunks)
+
+    def stream(self, prompt):
+        try:
+            for chunk in self.chunks:
+                self.sent += 1
+                yield chunk
+        finally:
+            self.closed = True
+
+
+@pytest.mark.parametrize('chunks, expected', [
+    (["HOLD"], ('HOLD', 1)),
+    (["I would ", "sell ", "now. Not buy."], ('SELL', 2)),
+    (["BU", "Y"], ('BUY', 2)),
+    (["S", "E", "L", "L", " and more"], ('SELL', 5)),
+    # BUYING is not a decision word, however it is split
+    (["BUY", "ING pressure: SELL"], ('SELL', 2)),
+    (["HOLDS ", "up; ", "HOLD"], ('HOLD', 3)),
+])
+def test_words_split_across_chunks(chunks, expected):
+    assert scan(chunks) == expected
+
+
+@pytest.mark.parametrize('chunks, expected', [
+    (["<think>BUY now? No.</think>", "SELL"], ('SELL', 2)),
+    (["<thi", "nk>BUY", " BUY</th", "ink>\n", "HOLD"], ('HOLD', 5)),
+    (["<THINK>", "buy", "</THINK>", "buy"], ('BUY', 4)),
+    (["Plan: <think>SELL</think> then ", "<think>HOLD</think>", " BUY"], ('BUY', 3)),
+    # A tag prefix that turns out not to be a tag is visible text
+    (["<th", "at>SELL"], ('SELL', 2)),
+    # An unclosed reasoning section never decides
+    (["<think>BUY BUY BUY"], ('HOLD', 1)),
+])
+def test_reasoning_sections_are_skipped(chunks, expected):
+    assert scan(chunks) == expected
+
+
+def test_finish_falls_back_to_the_substring_rule():
+    # No standalone word: the visible text is read like an unstreamed answer
+    assert scan(["<think>SELL</think>", "Buying looks right"]) == ('BUY', 2)
+    assert scan(["overselling"]) == ('SELL', 1)
+    assert scan([""]) == ('HOLD', 1)
+    scanner = DecisionScanner()
+    assert scanner.finish() == 'HOLD'
+    assert not scanner.answered
+
+
+def test_streaming_stops_at_the_first_decision():
+    provider = ScriptedProvider(["<think>", "maybe BUY", "</think>", "SELL.", " because", " BUY"])
+    scanner = provider.read_decision("prompt")
+    assert scanner.decision == 'SELL'
+    assert provider.sent == 4
+    assert provider.closed
+    assert scanner.chars == len("<think>maybe BUY</think>SELL.")
+
+
+def test_trailing_word_waits_for_the_next_chunk():
+    # "SELL" at the end of a chunk may still become "SELLING"
+    provider = ScriptedProvider(["SELL", "ING into strength; HOLD.", " then BUY"])
+    assert provider.read_decision("prompt").decision == 'HOLD'
+    assert provider.sent == 2
+    assert provider.closed
+
+
+def test_unstreamed_answers_keep_the_baseline_rule():
+    # BUY anywhere wins over an earlier SELL, as before streaming existed
+    provider = ScriptedProvider(["SELL, do not ", "BUY"], streaming=False)
+    assert provider.read_decision("prompt").decision == 'BUY'
+    assert provider.sent == 0
+    assert ScriptedProvider(["SELL, do not ", "BUY"]).read_decision("prompt").decision == 'SELL'
+
+    # Reasoning is dropped before the rule applies
+    reasoning = ["<think>should I buy or sell?</think>\n\n", "HOLD"]
+    assert ScriptedProvider(reasoning, streaming=False).read_decision("prompt").decision == 'HOLD'
+    assert ScriptedProvider(["<think>buy", " and never finish"], streaming=False).read_decision("p").decision == 'HOLD'
+    assert ScriptedProvider(["Overselling"], streaming=False).read_decision("p").decision == 'SELL'
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def context(price, **indicators):
+    return MarketContext(
+        eth_price=price, eth_volume=1e9, eth_high=price * 1.01, eth_low=price * 0.99,
+        gas_prices={'low': 10, 'standard': 12, 'fast': 15}, fear_greed_value='55', fear_greed_sentiment='Greed',
+        indicators=dict({'volatility': 0.0, 'momentum': 0.0, 'rsi': 50.0, 'price_trend': 'up',
+                         'volatility_level': 'low'}, **indicators))
+
+
+def bucket_edge(step_bps, near=3000.0):
+    """The lower edge of the price bucket containing ``near``."""
+    width = math.log1p(step_bps / 10000)
+    return math.exp(math.floor(math.log(near) / width) * width)
+
+
+def test_prices_in_one_bucket_share_a_decision():
+    cache = DecisionCache(ttl_s=60, price_step_bps=20)
+    edge = bucket_edge(20)
+    cache.put(cache.key('gemini', context(edge * 1.0001)), 'BUY')
+
+    # 15 bps higher is still within the 20 bps bucket
+    assert cache.get(cache.key('gemini', context(edge * 1.0016))) == 'BUY'
+    # Each provider has its own entries
+    assert cache.get(cache.key('groq', context(edge * 1.0001))) is None
+    # So does a different market at the same price
+    assert cache.get(cache.key('gemini', context(edge * 1.0001, rsi=72.0))) is None
+    assert cache.stats == {'hits': 1, 'misses': 2, 'expired': 0, 'evictions': 0, 'entries': 1}
+
+
+def test_crossing_a_bucket_edge_misses():
+    cache = DecisionCache(ttl_s=60, price_step_bps=20)
+    edge = bucket_edge(20)
+    cache.put(cache.key('gemini', context(edge * 1.00001)), 'SELL')
+    # Under 1 bp lower, but in the bucket below
+    assert cache.get(cache.key('gemini', context(edge * 0.99999))) is None
+    # Wider buckets put both prices together
+    wide = DecisionCache(ttl_s=60, price_step_bps=10_000)
+    wide.put(wide.key('gemini', context(edge * 1.00001)), 'SELL')
+    assert wide.key('gemini', context(edge * 0.99999)) == wide.key('gemini', context(edge * 1.00001))
+
+
+def test_decisions_expire_after_the_ttl():
+    clock = Clock()
+    cache = DecisionCache(ttl_s=30, clock=clock)
+    key = cache.key('gemini', context(3000.0))
+    cache.put(key, 'HOLD')
+    clock.now = 29.9
+    assert cache.get(key) == 'HOLD'
+    clock.now = 30.0
+    assert cache.get(key) is None
+    assert cache.stats == {'hits': 1, 'misses': 1, 'expired': 1, 'evictions': 0, 'entries': 0}
+
+
+def test_entries_are_bounded_least_recently_used_first():
+    cache = DecisionCache(ttl_s=60, max_entries=3)
+    keys = [cache.key(name, context(3000.0)) for name in ('a', 'b', 'c', 'd')]
+    for key in keys[:3]:
+        cache.put(key, 'BUY')
+    # Reading "a" makes "b" the least recently used
+    assert cache.get(keys[0]) == 'BUY'
+    cache.put(keys[3], 'SELL')
+    assert cache.get(keys[1]) is None
+    assert [cache.get(key) for key in (keys[0], keys[2], keys[3])] == ['BUY', 'BUY', 'SELL']
+    assert cache.stats['evictions'] == 1
+    assert cache.stats['entries'] == 3
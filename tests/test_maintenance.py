@@ -0,0 +1,54 @@
+"""Auto-vacuum conversion stays out of the background worker."""
+
+import sqlite3
+
+import pytest
+
+from src.database.maintenance import AUTO_VACUUM_INCREMENTAL, MaintenanceWorker, convert_auto_vacuum, main
+from src.database.pool import ConnectionPool
+
+
+@pytest.fixture
+def legacy_db(tmp_path):
+    """A database created before incremental auto-vacuum was the default."""
+    db_path = str(tmp_path / 'legacy.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE market_data (id INTEGER PRIMARY KEY, eth_price REAL)")
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+def auto_vacuum(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_worker_leaves_a_legacy_database_alone(legacy_db):
+    pool = ConnectionPool(legacy_db)
+    worker = MaintenanceWorker(pool, start=False)
+    try:
+        run = worker.run_once(force=True)
+    finally:
+        worker.close()
+        pool.close()
+    assert run['incremental_vacuum'] is False
+    assert auto_vacuum(legacy_db) != AUTO_VACUUM_INCREMENTAL
+
+
+def test_convert_switches_once(legacy_db):
+    conn = sqlite3.connect(legacy_db, isolation_level=None)
+    try:
+        assert convert_auto_vacuum(conn) is True
+        assert convert_auto_vacuum(conn) is False
+    finally:
+        conn.close()
+    assert auto_vacuum(legacy_db) == AUTO_VACUUM_INCREMENTAL
+
+
+def test_cli_converts(legacy_db):
+    assert main([legacy_db, '--convert-auto-vacuum']) == 0
+    assert auto_vacuum(legacy_db) == AUTO_VACUUM_INCREMENTAL
@@ -0,0 +1,177 @@
+"""Market data fetches: per-source deadlines, failures and shared fetches."""
+
+import threading
+import time
+
+import pytest
+
+from src.agents.market_data import DEFAULT_PRICE, DEFAULT_SENTIMENT, MarketDataAgent
+
+PRICE = (3000.0, 1e9, 3100.0, 2900.0)
+GAS = {'low': 10, 'standard': 12, 'fast': 15}
+SENTIMENT = {'fear_greed_value': '70', 'fear_greed_sentiment': 'Greed'}
+
+
+class Source:
+    """Stub upstream: returns ``value``, optionally after a gate opens, or raises."""
+
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+        self.gate = None
+        self.error = None
+
+    def __call__(self):
+        self.calls += 1
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class StubEtherscan:
+    def __init__(self):
+        self.get_eth_price = Source(PRICE)
+        self.get_gas_prices = Source(GAS)
+
+
+class StubFearGreed:
+    def __init__(self):
+        self.get_fear_greed_index = Source(SENTIMENT)
+
+
+@pytest.fixture
+def make_agent(monkeypatch):
+    monkeypatch.setenv("ETHERSCAN_API_KEY", "test")
+    gates = []
+
+    def make(**kwargs):
+        agent = MarketDataAgent(**kwargs)
+        agent.etherscan = StubEtherscan()
+        agent.fear_greed = StubFearGreed()
+        return agent
+
+    def gate(source):
+        source.gate = threading.Event()
+        gates.append(source.gate)
+        return source.gate
+
+    make.gate = gate
+    yield make
+    # Let stuck stub calls finish so their pool threads exit
+    for event in gates:
+        event.set()
+
+
+def timed(fn):
+    started = time.monotonic()
+    result = fn()
+    return result, time.monotonic() - started
+
+
+def test_slow_source_falls_back_within_the_deadline(make_agent, monkeypatch):
+    monkeypatch.setenv("MARKET_DATA_SOURCE_TIMEOUT_S", "0.2")
+    agent = make_agent()
+    assert agent.source_timeout_s == 0.2
+    first = agent.get_market_data()
+    assert (first.eth_price, first.gas_prices, first.market_sentiment) == (PRICE[0], GAS, SENTIMENT)
+
+    # Gas hangs: the fetch returns at the deadline with the last gas prices
+    agent.etherscan.get_eth_price.value = (3050.0, 1e9, 3100.0, 2900.0)
+    make_agent.gate(agent.etherscan.get_gas_prices)
+    data, elapsed = timed(agent.get_market_data)
+    assert 0.15 <= elapsed < 1.0
+    assert data.eth_price == 3050.0
+    assert data.gas_prices == GAS
+
+
+def test_slow_sources_without_history_use_defaults(make_agent):
+    agent = make_agent(source_timeout_s=0.1)
+    for source in (agent.etherscan.get_eth_price, agent.etherscan.get_gas_prices,
+                   agent.fear_greed.get_fear_greed_index):
+        make_agent.gate(source)
+    data, elapsed = timed(agent.get_market_data)
+    # The three sources share one deadline rather than waiting in turn
+    assert elapsed < 0.3
+    assert (data.eth_price, data.eth_volume_24h, data.eth_high_24h, data.eth_low_24h) == DEFAULT_PRICE
+    assert data.gas_prices is None
+    assert data.market_sentiment == DEFAULT_SENTIMENT
+
+
+def test_failing_source_falls_back_and_is_logged(make_agent, caplog):
+    agent = make_agent(source_timeout_s=1)
+    agent.get_market_data()
+    agent.fear_greed.get_fear_greed_index.error = ValueError("bad JSON")
+    agent.etherscan.get_gas_prices.error = ConnectionError("reset by peer")
+
+    with caplog.at_level('ERROR'):
+        data = agent.get_market_data()
+        gas = agent.get_gas_prices()
+    assert data.market_sentiment == SENTIMENT
+    assert data.gas_prices == GAS
+    assert gas == GAS
+    messages = [record.getMessage() for record in caplog.records]
+    assert any("Fear & Greed Index failed (bad JSON)" in m for m in messages)
+    assert any("gas prices failed (reset by peer)" in m for m in messages)
+
+
+def test_get_gas_prices_falls_back_to_the_last_fetch(make_agent):
+    agent = make_agent(source_timeout_s=0.1)
+    make_agent.gate(agent.etherscan.get_gas_prices)
+    gas, elapsed = timed(agent.get_gas_prices)
+    assert gas is None
+    assert elapsed < 0.5
+
+    agent.etherscan.get_gas_prices.gate.set()
+    agent.get_market_data()
+    make_agent.gate(agent.etherscan.get_gas_prices)
+    assert agent.get_gas_prices() == GAS
+
+
+def run_concurrently(fn, callers):
+    ready = threading.Barrier(callers + 1)
+    results = [None] * callers
+
+    def call(i):
+        ready.wait()
+        results[i] = fn()
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+    return threads, results
+
+
+@pytest.mark.parametrize('method, source', [
+    ('get_market_data', 'get_eth_price'),
+    ('get_gas_prices', 'get_gas_prices'),
+])
+def test_concurrent_callers_share_one_fetch(make_agent, method, source):
+    agent = make_agent(source_timeout_s=5)
+    upstream = getattr(agent.etherscan, source)
+    gate = make_agent.gate(upstream)
+
+    threads, results = run_concurrently(getattr(agent, method), callers=8)
+    # Every caller is waiting on the one in-flight fetch
+    time.sleep(0.2)
+    gate.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert upstream.calls == 1
+    assert all(result is results[0] for result in results)
+
+    # The next call after the fetch finished fetches again
+    getattr(agent, method)()
+    assert upstream.calls == 2
+
+
+def test_recent_data_is_reused_without_a_fetch(make_agent):
+    agent = make_agent(source_timeout_s=1)
+    first = agent.get_market_data()
+    assert agent.get_market_data(max_age_s=60) is first
+    assert agent.etherscan.get_eth_price.calls == 1
+    assert agent.get_market_data() is not first
+    assert agent.etherscan.get_eth_price.calls == 2
@@ -0,0 +1,128 @@
+"""History cursors: round trips, tie-safe keyset pages and rejected tokens."""
+
+import base64
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from src.database.db import TradingDatabase
+from src.web.pagination import decode_cursor, encode_cursor, parse_time
+
+T0 = 1_760_000_000_000
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = TradingDatabase(str(tmp_path / "trading.db"), maintenance=False, clock=lambda: T0)
+    yield db
+    db.close()
+
+
+def market_query(**fields):
+    return dict({'series': 'market', 'from': T0, 'to': T0 + 1000, 'after': None,
+                 'table': 'market_data', 'limit': 3}, **fields)
+
+
+def token(state):
+    """A cursor for arbitrary JSON, as a client could forge it."""
+    return base64.urlsafe_b64encode(json.dumps(state).encode()).rstrip(b'=').decode()
+
+
+@pytest.mark.parametrize('state', [
+    market_query(),
+    market_query(after=[T0 + 5, 123]),
+    {'series': 'decisions', 'from': 0, 'to': T0, 'after': [T0, 7], 'limit': 500,
+     'wallet_address': '0xabc', 'model': None},
+])
+def test_cursor_round_trips(state):
+    encoded = encode_cursor(state)
+    assert encoded.isascii() and '=' not in encoded and '+' not in encoded and '/' not in encoded
+    assert decode_cursor(encoded) == state
+
+
+@pytest.mark.parametrize('encoded', [
+    '',
+    'not base64!',
+    encode_cursor(market_query())[:-4],
+    token([1, 2, 3]),
+    token(market_query(series='wallets')),
+    token(market_query(table=None)),
+    token(market_query(table=['market_data'])),
+    token(market_query(**{'from': '1760000000000'})),
+    token(market_query(to=None)),
+    token(market_query(after=[T0])),
+    token(market_query(after='T0,5')),
+    token(market_query(after=[T0, 'x'])),
+    token(market_query(after=[T0, True])),
+    token(market_query(limit=2.5)),
+    token({'series': 'decisions', 'from': 0, 'to': T0, 'model': 3}),
+    base64.urlsafe_b64encode(b'\xff\xfe').decode(),
+])
+def test_tampered_cursors_are_invalid(encoded):
+    # /api/history answers ValueError with a 400
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(encoded)
+
+
+def test_parse_time():
+    assert parse_time(None, 42) == 42
+    assert parse_time('', 42) == 42
+    assert parse_time(str(T0), 42) == T0
+    assert parse_time('-5', 42) == -5
+    iso = datetime.fromtimestamp(T0 / 1000, tz=timezone.utc).replace(tzinfo=None).isoformat()
+    assert parse_time(iso, 42) == T0
+    with pytest.raises(ValueError, match="Invalid time"):
+        parse_time('yesterday', 42)
+
+
+def pages(fetch, query):
+    """Follow cursors the way ``/api/history`` does; returns every page."""
+    result = []
+    while True:
+        after = tuple(query['after']) if query.get('after') else None
+        rows, next_after = fetch(query, after)
+        result.append(rows)
+        if next_after is None:
+            return result
+        query = decode_cursor(encode_cursor(dict(query, after=list(next_after))))
+
+
+def test_market_pages_with_tied_timestamps(db):
+    # Bursts of ticks sharing a timestamp, straddling page boundaries
+    timestamps = [T0] * 4 + [T0 + 10] * 5 + [T0 + 20] + [T0 + 30] * 3
+    with db.connection() as conn:
+        conn.executemany("""
+            INSERT INTO market_data (timestamp, eth_price, eth_volume_24h, eth_high_24h, eth_low_24h)
+            VALUES (?, ?, 0, 0, 0)
+        """, [(ts, float(i)) for i, ts in enumerate(timestamps)])
+
+    def fetch(query, after):
+        return db.get_market_data_page(query['from'], query['to'], after=after,
+                                       limit=query['limit'], table=query['table'])
+
+    result = pages(fetch, market_query(to=T0 + 30))
+    assert [len(page) for page in result] == [3, 3, 3, 3, 1]
+    assert [row['eth_price'] for page in result for row in page] == [float(i) for i in range(13)]
+
+    # The range bounds are inclusive, ties included
+    result = pages(fetch, market_query(**{'from': T0 + 10, 'to': T0 + 20, 'limit': 2}))
+    assert [row['eth_price'] for page in result for row in page] == [4.0, 5.0, 6.0, 7.0, 8.0, 9.0]
+
+
+def test_decision_pages_with_tied_timestamps(db):
+    for i in range(11):
+        db.store_ai_decision('gemini' if i % 3 else 'groq', 'BUY', float(i), '0xwallet' if i % 2 else None)
+
+    def fetch(query, after):
+        return db.get_decisions_page(query['from'], query['to'], after=after, limit=query['limit'],
+                                     wallet_address=query.get('wallet_address'), model=query.get('model'))
+
+    query = {'series': 'decisions', 'from': T0, 'to': T0, 'after': None, 'limit': 4}
+    result = pages(fetch, query)
+    assert [len(page) for page in result] == [4, 4, 3]
+    assert [row['eth_price'] for page in result for row in page] == [float(i) for i in range(11)]
+
+    result = pages(fetch, dict(query, wallet_address='0xwallet', model='gemini', limit=1))
+    assert [row['eth_price'] for page in result for row in page] == [1.0, 5.0, 7.0]
+    assert pages(fetch, dict(query, model='unknown')) == [[]]
@@ -0,0 +1,130 @@
+"""Pooled connections: nested blocks share one transaction, limits and shutdown."""
+
+import sqlite3
+import threading
+
+import pytest
+
+from src.database.db import TradingDatabase
+from src.database.pool import ConnectionPool
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), max_size=2, acquire_timeout=0.2)
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+    yield pool
+    pool.close()
+
+
+def committed(pool):
+    """Rows visible to an independent connection, i.e. committed ones."""
+    conn = sqlite3.connect(pool.db_path)
+    try:
+        return [row[0] for row in conn.execute("SELECT x FROM t ORDER BY x")]
+    finally:
+        conn.close()
+
+
+def test_inner_commit_waits_for_the_outer_block(pool):
+    with pool.connection() as outer:
+        outer.execute("INSERT INTO t VALUES (1)")
+        with pool.connection() as inner:
+            inner.execute("INSERT INTO t VALUES (2)")
+            inner.commit()
+        with pool.connection() as inner:
+            with inner:
+                inner.execute("INSERT INTO t VALUES (3)")
+        assert committed(pool) == []
+    assert committed(pool) == [1, 2, 3]
+
+
+def test_outer_error_rolls_back_inner_work(pool):
+    with pytest.raises(RuntimeError):
+        with pool.connection() as outer:
+            outer.execute("INSERT INTO t VALUES (1)")
+            with pool.connection() as inner:
+                inner.execute("INSERT INTO t VALUES (2)")
+                inner.commit()
+            raise RuntimeError("outer failed")
+    assert committed(pool) == []
+
+
+def test_inner_error_rolls_back_the_outer_block(pool):
+    with pytest.raises(RuntimeError):
+        with pool.connection() as outer:
+            outer.execute("INSERT INTO t VALUES (1)")
+            with pool.connection():
+                raise RuntimeError("inner failed")
+    assert committed(pool) == []
+
+
+def test_nesting_reuses_the_held_connection(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "one.db"), max_size=1, acquire_timeout=0.2)
+    try:
+        with pool.connection() as outer:
+            with pool.connection() as inner:
+                with pool.connection() as innermost:
+                    assert innermost.execute("SELECT 1").fetchone() == (1,)
+            assert inner._conn is outer
+            assert pool.size == 1 and pool.in_use == 1
+        assert pool.in_use == 0
+    finally:
+        pool.close()
+
+
+def test_update_decision_accuracy_joins_the_outer_transaction(tmp_path):
+    clock = [1_760_000_000_000]
+    db = TradingDatabase(str(tmp_path / "trading.db"), maintenance=False, clock=lambda: clock[0])
+    try:
+        db.store_ai_decision('gemini', 'BUY', 3000.0, '0xwallet')
+        clock[0] += 3_600_000
+        with pytest.raises(RuntimeError):
+            with db.connection():
+                assert db.update_decision_accuracy(3100.0, '0xwallet') == 1
+                raise RuntimeError("caller failed after scoring")
+        with db.connection() as conn:
+            assert conn.execute("SELECT was_correct FROM ai_decisions").fetchall() == [(None,)]
+
+        assert db.update_decision_accuracy(3100.0, '0xwallet') == 1
+        with db.connection() as conn:
+            assert conn.execute("SELECT was_correct FROM ai_decisions").fetchall() == [(1,)]
+    finally:
+        db.close()
+
+
+def test_release_rolls_back_a_dangling_transaction(pool):
+    conn = pool._acquire()
+    conn.execute("INSERT INTO t VALUES (1)")
+    pool._release(conn)
+    assert not conn.in_transaction
+    assert committed(pool) == []
+
+
+def test_exhausted_pool_times_out(pool):
+    held = threading.Event()
+    done = threading.Event()
+
+    def hold():
+        with pool.connection():
+            held.set()
+            done.wait(5)
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    try:
+        held.wait(5)
+        with pool.connection():
+            with pytest.raises(sqlite3.OperationalError, match="Timed out"):
+                pool._acquire()
+    finally:
+        done.set()
+        thread.join(5)
+
+
+def test_closed_pool_refuses_checkouts(pool):
+    pool.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        with pool.connection():
+            pass
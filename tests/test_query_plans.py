@@ -0,0 +1,33 @@
+"""Query plan regression check on a small seeded database."""
+
+import pytest
+
+from src.database.db import TradingDatabase
+from src.database.query_plans import capture_query_plans, find_full_scans, seed_database
+
+
+@pytest.fixture(scope='module')
+def seeded_db(tmp_path_factory):
+    db_path = str(tmp_path_factory.mktemp('plans') / 'plans.db')
+    wallet = seed_database(db_path, decisions=5000, wallets=50)
+    db = TradingDatabase(db_path, maintenance=False)
+    yield db, wallet
+    db.close()
+
+
+def test_hot_paths_never_scan_large_tables(seeded_db):
+    db, wallet = seeded_db
+    plans = capture_query_plans(db, wallet)
+    assert plans
+    offenders = find_full_scans(plans)
+    assert not offenders, "\n\n".join(
+        f"{' '.join(sql.split())}\n  {details}" for sql, details in offenders.items())
+
+
+def test_find_full_scans_flags_unindexed_scans():
+    plans = {
+        'SELECT * FROM ai_decisions': ['SCAN ai_decisions'],
+        'SELECT COUNT(*) FROM ai_decisions': ['SCAN ai_decisions USING COVERING INDEX idx_ai_decisions_timestamp'],
+        'SELECT * FROM models': ['SCAN models'],
+    }
+    assert list(find_full_scans(plans)) == ['SELECT * FROM ai_decisions']
@@ -0,0 +1,124 @@
+"""Market replay determinism and the database's virtual clock."""
+
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+from src.agents.replay import (
+    DEFAULT_PROVIDERS, TICK_INTERVAL_MS, ReplayEngine, StubProvider, _epoch_ms,
+    create_replay_providers, synthetic_ticks, tick_from_row
+)
+from src.database.encoding import MS_PER_DAY, MS_PER_HOUR, now_ms, to_epoch_ms
+from src.tools.indicators import IndicatorEngine
+from src.tools.llm_provider import MarketContext
+
+TICKS = 300
+PROVIDERS = DEFAULT_PROVIDERS + ',dice=random'
+
+# Wall-clock fields of the report
+TIMING_KEYS = ('elapsed_s', 'ticks_per_s', 'stages')
+
+
+def replay(path, seed, ticks=TICKS):
+    engine = ReplayEngine(create_replay_providers(PROVIDERS, seed=seed), db_path=str(path))
+    try:
+        return engine.run(synthetic_ticks(ticks, seed=seed))
+    finally:
+        engine.close()
+
+
+def without_timings(report):
+    return {key: value for key, value in report.to_dict().items() if key not in TIMING_KEYS}
+
+
+@pytest.fixture(scope='module')
+def replayed(tmp_path_factory):
+    path = tmp_path_factory.mktemp('replay') / 'replay.db'
+    return path, replay(path, seed=7)
+
+
+def test_seeded_replay_is_deterministic(replayed, tmp_path):
+    _, report = replayed
+    again = replay(tmp_path / 'again.db', seed=7)
+    assert without_timings(again) == without_timings(report)
+    assert without_timings(replay(tmp_path / 'other.db', seed=8)) != without_timings(report)
+
+
+def test_report_accounts_for_every_tick(replayed):
+    _, report = replayed
+    data = report.to_dict()
+    models = PROVIDERS.count('=')
+    assert data['ticks'] == TICKS
+    assert data['virtual_hours'] == round((TICKS - 1) * TICK_INTERVAL_MS / MS_PER_HOUR, 1)
+    assert all(sum(counts.values()) == TICKS for counts in data['decisions'].values())
+    assert sum(data['consensus'].values()) == TICKS
+    # Each tick scores the previous tick's decisions; the last ones stay pending
+    assert data['scored'] == (TICKS - 1) * models
+    assert all(len(values) == TICKS for values in report.stage_s.values())
+
+
+def test_scoring_uses_the_virtual_clock(replayed):
+    path, report = replayed
+    conn = sqlite3.connect(str(path))
+    try:
+        delays = conn.execute("""
+            SELECT DISTINCT scored_at - timestamp FROM ai_decisions WHERE scored_at IS NOT NULL
+        """).fetchall()
+        newest = conn.execute("SELECT MAX(timestamp), MAX(scored_at) FROM ai_decisions").fetchone()
+    finally:
+        conn.close()
+    assert delays == [(TICK_INTERVAL_MS,)]
+    assert newest == (report.last_timestamp, report.last_timestamp)
+    assert report.last_timestamp < now_ms() - 30 * MS_PER_DAY
+
+    # Horizon outcomes end on the virtual clock too: the last day is pending
+    pending = {name: stats['pending'] for name, stats in report.horizons['24h'].items()}
+    assert set(pending.values()) == {MS_PER_DAY // TICK_INTERVAL_MS}
+
+
+def test_retention_uses_the_virtual_clock(replayed):
+    path, report = replayed
+    conn = sqlite3.connect(str(path))
+    try:
+        raw = conn.execute("SELECT MIN(timestamp), COUNT(*) FROM market_data").fetchone()
+        hourly = conn.execute("SELECT COUNT(*) FROM market_data_1h").fetchone()[0]
+    finally:
+        conn.close()
+    # Only the last 24 virtual hours stay raw; older ticks became candles
+    assert raw[0] >= report.last_timestamp - 24 * MS_PER_HOUR
+    assert raw[1] == 24 * MS_PER_HOUR // TICK_INTERVAL_MS + 1
+    assert hourly > 0
+
+
+def test_random_stub_is_seeded():
+    engine = IndicatorEngine(window=100)
+    for price in (2990.0, 2995.0, 2993.0, 3000.0):
+        indicators = engine.update(price)
+    assert indicators['price_trend'] == 'up' and 30 < indicators['rsi'] < 70
+    context = MarketContext(
+        eth_price=3000.0, eth_volume=1e9, eth_high=3100.0, eth_low=2900.0,
+        gas_prices=None, fear_greed_value='50', fear_greed_sentiment='neutral',
+        indicators=indicators)
+    first, second = StubProvider('random', seed=3), StubProvider('random', seed=3)
+    assert [first.decide(context) for _ in range(20)] == [second.decide(context) for _ in range(20)]
+    assert StubProvider('momentum').decide(context) == 'BUY'
+    assert StubProvider('contrarian').decide(context) == 'SELL'
+    with pytest.raises(ValueError):
+        StubProvider('coin-flip')
+
+
+def test_provider_spec_errors():
+    with pytest.raises(ValueError):
+        create_replay_providers('gemini')
+    with pytest.raises(ValueError):
+        create_replay_providers('gemini=nope')
+
+
+def test_tick_timestamps_accept_seconds_ms_and_iso():
+    assert _epoch_ms(1_735_689_600) == 1_735_689_600_000
+    assert _epoch_ms('1735689600000') == 1_735_689_600_000
+    tick = tick_from_row({'timestamp': '2025-01-01T00:00:00', 'eth_price': '3000',
+                          'gas_price_low': '', 'gas_price_standard': 1, 'gas_price_fast': 2})
+    assert tick.timestamp == to_epoch_ms(datetime(2025, 1, 1))
+    assert (tick.eth_high, tick.eth_low, tick.gas_prices) == (3000.0, 3000.0, None)
@@ -0,0 +1,231 @@
+"""Parity of the rollup-backed stats with the original raw-table queries."""
+
+import random
+
+import pytest
+
+from src.database.db import TradingDatabase
+from src.database.encoding import DECISION_CODES, MS_PER_DAY, MS_PER_HOUR
+
+# Mid-hour, so every window starts with a partial hour
+START_MS = 1_750_000_000_000 + 17 * 60 * 1000
+MODELS = ('gemini', 'groq', 'mistral', 'newmodel')
+TIMEFRAMES = ('hour', 'day', 'week', 'month')
+WINDOWS_DAYS = (1, 2, 7, 30)
+
+_PERIODS = {
+    'hour': "strftime('%Y-%m-%d %H', timestamp / 1000, 'unixepoch', 'localtime')",
+    'day': "date(timestamp / 1000, 'unixepoch', 'localtime')",
+    'week': "strftime('%Y-%W', timestamp / 1000, 'unixepoch', 'localtime')",
+    'month': "strftime('%Y-%m', timestamp / 1000, 'unixepoch', 'localtime')",
+}
+
+
+def raw_accuracy_stats(conn):
+    """``get_accuracy_stats`` as it queried the raw table."""
+    rows = conn.execute("""
+        SELECT
+            m.name,
+            COUNT(*) as total,
+            SUM(CASE WHEN was_correct = 1 THEN 1 ELSE 0 END) as correct,
+            COALESCE(AVG(CASE WHEN profit_loss IS NOT NULL THEN profit_loss ELSE 0 END), 0) as avg_profit,
+            COALESCE(MIN(CASE WHEN profit_loss IS NOT NULL THEN profit_loss ELSE 0 END), 0) as max_loss,
+            COALESCE(MAX(CASE WHEN profit_loss IS NOT NULL THEN profit_loss ELSE 0 END), 0) as max_profit
+        FROM ai_decisions d JOIN models m ON m.id = d.model
+        WHERE was_correct IS NOT NULL
+        AND decision != ?
+        GROUP BY m.name
+    """, (DECISION_CODES['HOLD'],)).fetchall()
+    return {
+        model: {
+            'total_decisions': total,
+            'correct_decisions': correct,
+            'accuracy': round((correct / total * 100) if total > 0 else 0, 1),
+            'avg_profit': round(avg_profit, 2),
+            'max_loss': round(max_loss, 2),
+            'max_profit': round(max_profit, 2)
+        }
+        for model, total, correct, avg_profit, max_loss, max_profit in rows
+    }
+
+
+def raw_performance_by_timeframe(conn, timeframe):
+    """``get_performance_by_timeframe`` as it queried the raw table."""
+    results = {}
+    for model, period, decisions, accuracy, avg_profit, total_profit in conn.execute(f"""
+        SELECT
+            m.name,
+            {_PERIODS[timeframe]} as period,
+            COUNT(*) as decisions,
+            COALESCE(AVG(CASE WHEN was_correct = 1 THEN 1 ELSE 0 END) * 100, 0) as accuracy,
+            COALESCE(AVG(CASE WHEN profit_loss IS NOT NULL THEN profit_loss ELSE 0 END), 0) as avg_profit,
+            COALESCE(SUM(CASE WHEN profit_loss IS NOT NULL THEN profit_loss ELSE 0 END), 0) as total_profit
+        FROM ai_decisions d JOIN models m ON m.id = d.model
+        WHERE was_correct IS NOT NULL
+        AND decision != ?
+        GROUP BY m.name, period
+        ORDER BY period DESC, m.name
+    """, (DECISION_CODES['HOLD'],)):
+        results.setdefault(model, []).append({
+            'period': period,
+            'decisions': decisions,
+            'accuracy': round(accuracy, 1),
+            'avg_profit': round(avg_profit, 2),
+            'total_profit': round(total_profit, 2)
+        })
+    return results
+
+
+def raw_model_comparison(conn, cutoff):
+    """``get_model_comparison`` as it queried the raw table."""
+    results = {}
+    for row in conn.execute("""
+        SELECT
+            m.name,
+            COUNT(*) as total_decisions,
+            SUM(CASE WHEN was_correct = 1 THEN 1 ELSE 0 END) as correct_decisions,
+            AVG(CASE WHEN was_correct = 1 THEN 1 ELSE 0 END) * 100 as accuracy,
+            COALESCE(AVG(CASE WHEN profit_loss IS NOT NULL THEN profit_loss ELSE 0 END), 0) as avg_profit,
+            COALESCE(SUM(CASE WHEN profit_loss IS NOT NULL THEN profit_loss ELSE 0 END), 0) as total_profit,
+            COALESCE(MIN(CASE WHEN profit_loss IS NOT NULL THEN profit_loss ELSE 0 END), 0) as max_loss,
+            COALESCE(MAX(CASE WHEN profit_loss IS NOT NULL THEN profit_loss ELSE 0 END), 0) as max_profit,
+            COUNT(CASE WHEN decision = :buy THEN 1 END) as buy_count,
+            COUNT(CASE WHEN decision = :sell THEN 1 END) as sell_count,
+            COUNT(CASE WHEN decision = :hold THEN 1 END) as hold_count
+        FROM ai_decisions d JOIN models m ON m.id = d.model
+        WHERE timestamp > :cutoff
+        GROUP BY m.name
+    """, {'cutoff': cutoff, 'buy': DECISION_CODES['BUY'],
+          'sell': DECISION_CODES['SELL'], 'hold': DECISION_CODES['HOLD']}):
+        results[row[0]] = {
+            'total_decisions': row[1],
+            'correct_decisions': row[2],
+            'accuracy': round(row[3], 1),
+            'avg_profit': round(row[4], 2),
+            'total_profit': round(row[5], 2),
+            'max_loss': round(row[6], 2),
+            'max_profit': round(row[7], 2),
+            'decision_distribution': {'buy': row[8], 'sell': row[9], 'hold': row[10]}
+        }
+    return results
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def simulate(db, clock, rng, days):
+    """Decisions every few minutes, scored roughly hourly; some stay pending."""
+    price = 3000.0
+    end = clock.now + days * MS_PER_DAY
+    next_scoring = clock.now + MS_PER_HOUR
+    while clock.now < end:
+        clock.now += rng.randrange(60_000, 25 * 60_000)
+        if rng.random() < 0.1:
+            # Exactly on an hour boundary
+            clock.now += MS_PER_HOUR - clock.now % MS_PER_HOUR
+        price *= 1 + rng.gauss(0, 0.004)
+        for _ in range(rng.randrange(1, 4)):
+            # Decisions without a wallet are never scored
+            wallet = None if rng.random() < 0.05 else f"0x{rng.randrange(5):040x}"
+            decision = rng.choice(['BUY', 'SELL', 'HOLD', 'HOLD', 'ERROR'])
+            db.store_ai_decision(rng.choice(MODELS), decision, round(price, 2), wallet)
+        if clock.now >= next_scoring:
+            db.update_decision_accuracy(round(price * (1 + rng.gauss(0, 0.01)), 2))
+            next_scoring = clock.now + rng.randrange(30, 120) * 60_000
+    if clock.now % MS_PER_HOUR == 0:
+        clock.now += 60_000
+
+
+def assert_parity(db, clock):
+    with db.connection() as conn:
+        assert db.get_accuracy_stats() == raw_accuracy_stats(conn)
+        for timeframe in TIMEFRAMES:
+            assert db.get_performance_by_timeframe(timeframe) == raw_performance_by_timeframe(conn, timeframe), timeframe
+        for days in WINDOWS_DAYS:
+            expected = raw_model_comparison(conn, clock.now - days * MS_PER_DAY)
+            assert db.get_model_comparison(days=days) == expected, days
+
+
+@pytest.fixture
+def simulated(tmp_path):
+    clock = Clock(START_MS)
+    db = TradingDatabase(str(tmp_path / 'rollups.db'), maintenance=False, clock=clock)
+    yield db, clock
+    db.close()
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_stats_match_raw_queries_after_inserts_and_scoring(simulated, seed):
+    db, clock = simulated
+    simulate(db, clock, random.Random(seed), days=12)
+    # The newest decisions are still pending, and windows start mid-hour
+    assert clock.now % MS_PER_HOUR
+    with db.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM ai_decisions WHERE was_correct IS NULL").fetchone()[0]
+    assert_parity(db, clock)
+
+    # A one-day window that starts exactly on a decision
+    with db.connection() as conn:
+        edge = conn.execute("""
+            SELECT MAX(timestamp) FROM ai_decisions
+            WHERE timestamp < ? AND timestamp % 3600000 != 0
+        """, (clock.now - MS_PER_DAY,)).fetchone()[0]
+    clock.now = edge + MS_PER_DAY
+    assert_parity(db, clock)
+
+
+def test_rescoring_updates_keep_parity(simulated):
+    db, clock = simulated
+    simulate(db, clock, random.Random(5), days=3)
+    # A re-score flips verdicts; profits are fixed once a decision is scored
+    with db.connection() as conn:
+        conn.execute("""
+            UPDATE ai_decisions SET was_correct = NOT was_correct
+            WHERE was_correct IS NOT NULL AND id % 3 = 0
+        """)
+        conn.commit()
+    assert_parity(db, clock)
+
+
+def test_rebuild_matches_the_incremental_rollups(simulated):
+    db, clock = simulated
+    simulate(db, clock, random.Random(11), days=4)
+    with db.connection() as conn:
+        incremental = conn.execute("SELECT * FROM decision_rollups ORDER BY 1, 2, 3").fetchall()
+        conn.execute("DELETE FROM decision_rollups")
+        conn.commit()
+    assert db.rebuild_rollups() == 0
+    with db.connection() as conn:
+        rebuilt = conn.execute("SELECT * FROM decision_rollups ORDER BY 1, 2, 3").fetchall()
+    # Sums may differ in the last bit from being added in another order
+    assert [row[:6] + row[7:] for row in rebuilt] == [row[:6] + row[7:] for row in incremental]
+    assert [row[6] for row in rebuilt] == pytest.approx([row[6] for row in incremental], rel=1e-12)
+    assert_parity(db, clock)
+
+
+def test_rebuild_after_retention_keeps_history(simulated):
+    db, clock = simulated
+    simulate(db, clock, random.Random(17), days=6)
+    with db.connection() as conn:
+        history = raw_accuracy_stats(conn)
+        performance = {timeframe: raw_performance_by_timeframe(conn, timeframe) for timeframe in TIMEFRAMES}
+        # Retention-style delete that cuts an hour bucket in half
+        cutoff = clock.now - 3 * MS_PER_DAY - MS_PER_HOUR // 2
+        deleted = conn.execute("DELETE FROM ai_decisions WHERE timestamp < ?", (cutoff,)).rowcount
+        conn.commit()
+    assert deleted
+
+    assert db.rebuild_rollups() > 0
+    # All-time stats still include the deleted decisions; windows inside
+    # the retained range still match the raw table
+    assert db.get_accuracy_stats() == history
+    for timeframe in TIMEFRAMES:
+        assert db.get_performance_by_timeframe(timeframe) == performance[timeframe]
+    with db.connection() as conn:
+        for days in (1, 2):
+            assert db.get_model_comparison(days=days) == raw_model_comparison(conn, clock.now - days * MS_PER_DAY)
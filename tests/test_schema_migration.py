@@ -0,0 +1,283 @@
+"""Upgrading a baseline (user_version 0) database to the compact schema."""
+
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.database import maintenance, schema
+from src.database.db import TradingDatabase
+from src.database.encoding import DECISION_CODES, to_epoch_ms
+from src.database.schema import SCHEMA_VERSION, migrate_compact_storage
+
+# The original text-encoded schema, as the first release created it
+BASELINE_DDL = """
+    CREATE TABLE market_data (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp DATETIME NOT NULL,
+        eth_price REAL NOT NULL,
+        eth_volume_24h REAL NOT NULL,
+        eth_high_24h REAL NOT NULL,
+        eth_low_24h REAL NOT NULL,
+        gas_price_low INTEGER,
+        gas_price_standard INTEGER,
+        gas_price_fast INTEGER,
+        fear_greed_value TEXT,
+        fear_greed_sentiment TEXT
+    );
+    CREATE TABLE ai_decisions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp DATETIME NOT NULL,
+        model TEXT NOT NULL,
+        decision TEXT NOT NULL,
+        eth_price REAL NOT NULL,
+        was_correct BOOLEAN,
+        profit_loss REAL,
+        wallet_address TEXT,
+        FOREIGN KEY (timestamp) REFERENCES market_data (timestamp)
+    );
+    CREATE TABLE wallet_actions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp DATETIME NOT NULL,
+        wallet_address TEXT NOT NULL,
+        action TEXT NOT NULL,
+        eth_balance REAL NOT NULL,
+        usdc_balance REAL NOT NULL,
+        eth_allocation REAL NOT NULL,
+        eth_price REAL,
+        network TEXT NOT NULL
+    );
+    CREATE TABLE wallet_connections (
+        wallet_address TEXT PRIMARY KEY,
+        is_connected BOOLEAN NOT NULL,
+        last_updated DATETIME NOT NULL
+    );
+    CREATE TABLE daily_stats (
+        date TEXT NOT NULL,
+        model TEXT NOT NULL,
+        total_trades INTEGER DEFAULT 0,
+        correct_trades INTEGER DEFAULT 0,
+        incorrect_trades INTEGER DEFAULT 0,
+        buy_decisions INTEGER DEFAULT 0,
+        sell_decisions INTEGER DEFAULT 0,
+        hold_decisions INTEGER DEFAULT 0,
+        avg_profit REAL DEFAULT 0.0,
+        PRIMARY KEY (date, model)
+    );
+    CREATE INDEX idx_market_data_timestamp ON market_data(timestamp);
+    CREATE INDEX idx_ai_decisions_model ON ai_decisions(model);
+"""
+
+START = datetime(2025, 3, 30, 0, 45, 12, 345678)
+WALLET = "0x" + "ab" * 20
+
+# (timestamp text, gas low/standard/fast as the baseline stored them)
+MARKET_ROWS = [
+    (str(START), 12, 15, 20),                                  # datetime.now() text
+    (str(START + timedelta(hours=2)), 12.3456, 15.5, 20.0005),  # fractional gwei
+    ((START + timedelta(days=1)).isoformat(), '7.25', '8', None),  # ISO 'T' form, text gas
+    ('not a date', 1, 2, 3),
+]
+
+# (timestamp text, model, decision, was_correct, profit_loss)
+DECISION_ROWS = [
+    (str(START), 'gemini', 'BUY', 1, 2.5),
+    (str(START + timedelta(minutes=5)), 'groq', 'sell', 0, -1.25),
+    (str(START + timedelta(minutes=10)), 'mistral', 'Hold', None, None),
+    (str(START + timedelta(hours=1)), 'newmodel', 'BUY', None, None),
+    (str(START + timedelta(hours=2)), 'gemini', 'garbage', None, None),
+    ('', 'gemini', 'SELL', 1, 0.75),
+]
+
+
+def create_baseline(path, repeat=1):
+    conn = sqlite3.connect(path)
+    try:
+        conn.executescript(BASELINE_DDL)
+        for _ in range(repeat):
+            conn.executemany("""
+                INSERT INTO market_data (
+                    timestamp, eth_price, eth_volume_24h, eth_high_24h, eth_low_24h,
+                    gas_price_low, gas_price_standard, gas_price_fast,
+                    fear_greed_value, fear_greed_sentiment
+                ) VALUES (?, 3000.5, 1e9, 3100.0, 2900.0, ?, ?, ?, '55', 'Greed')
+            """, MARKET_ROWS)
+            conn.executemany("""
+                INSERT INTO ai_decisions (
+                    timestamp, model, decision, eth_price, was_correct, profit_loss, wallet_address
+                ) VALUES (?, ?, ?, 3000.0, ?, ?, ?)
+            """, [row + (WALLET,) for row in DECISION_ROWS])
+        conn.executemany("""
+            INSERT INTO wallet_actions (
+                timestamp, wallet_address, action, eth_balance, usdc_balance,
+                eth_allocation, eth_price, network
+            ) VALUES (?, ?, ?, 1.5, 2000.0, 69.2, 3000.0, 'base')
+        """, [(str(START), WALLET, 'BUY'), ('garbled', WALLET, 'sell')])
+        conn.execute(
+            "INSERT INTO wallet_connections VALUES (?, 1, ?)", (WALLET, str(START)))
+        conn.commit()
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == 0
+    finally:
+        conn.close()
+
+
+def dump(path):
+    """Every row of the migrated tables, for before/after comparisons."""
+    conn = sqlite3.connect(path)
+    try:
+        return {
+            table: conn.execute(f"SELECT * FROM {table} ORDER BY 1").fetchall()
+            for table in ('market_data', 'ai_decisions', 'wallet_actions',
+                          'wallet_connections', 'models', 'decision_rollups')
+        }
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def baseline(tmp_path):
+    path = str(tmp_path / 'baseline.db')
+    create_baseline(path)
+    return path
+
+
+def test_baseline_database_is_converted(baseline):
+    TradingDatabase(baseline, maintenance=False).close()
+
+    conn = sqlite3.connect(baseline)
+    try:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        models = dict(conn.execute("SELECT name, id FROM models"))
+        assert set(models) == {'gemini', 'groq', 'mistral', 'newmodel'}
+
+        market = conn.execute("""
+            SELECT timestamp, gas_price_low, gas_price_standard, gas_price_fast,
+                   eth_price, fear_greed_value
+            FROM market_data ORDER BY id
+        """).fetchall()
+        assert market == [
+            (to_epoch_ms(START), 12000, 15000, 20000, 3000.5, '55'),
+            (to_epoch_ms(START + timedelta(hours=2)), 12346, 15500, 20001, 3000.5, '55'),
+            (to_epoch_ms(START + timedelta(days=1)), 7250, 8000, None, 3000.5, '55'),
+            (0, 1000, 2000, 3000, 3000.5, '55'),
+        ]
+
+        decisions = conn.execute("""
+            SELECT timestamp, model, decision, was_correct, profit_loss, wallet_address
+            FROM ai_decisions ORDER BY id
+        """).fetchall()
+        assert decisions == [
+            (to_epoch_ms(START), models['gemini'], DECISION_CODES['BUY'], 1, 2.5, WALLET),
+            (to_epoch_ms(START + timedelta(minutes=5)), models['groq'], DECISION_CODES['SELL'], 0, -1.25, WALLET),
+            (to_epoch_ms(START + timedelta(minutes=10)), models['mistral'], DECISION_CODES['HOLD'], None, None, WALLET),
+            (to_epoch_ms(START + timedelta(hours=1)), models['newmodel'], DECISION_CODES['BUY'], None, None, WALLET),
+            (to_epoch_ms(START + timedelta(hours=2)), models['gemini'], DECISION_CODES['ERROR'], None, None, WALLET),
+            (0, models['gemini'], DECISION_CODES['SELL'], 1, 0.75, WALLET),
+        ]
+
+        actions = conn.execute("SELECT timestamp, action FROM wallet_actions ORDER BY id").fetchall()
+        assert actions == [(to_epoch_ms(START), DECISION_CODES['BUY']), (0, DECISION_CODES['SELL'])]
+        assert conn.execute("SELECT * FROM wallet_connections").fetchall() == [
+            (WALLET, 1, to_epoch_ms(START))]
+
+        # Every column is now stored with its compact type
+        assert conn.execute("""
+            SELECT COUNT(*) FROM ai_decisions
+            WHERE typeof(timestamp) != 'integer' OR typeof(model) != 'integer'
+            OR typeof(decision) != 'integer'
+        """).fetchone()[0] == 0
+        # Rollups were rebuilt from the converted rows
+        assert conn.execute("SELECT SUM(total) FROM decision_rollups").fetchone()[0] == len(DECISION_ROWS)
+    finally:
+        conn.close()
+
+
+def test_migrated_database_serves_the_api(baseline):
+    db = TradingDatabase(baseline, maintenance=False)
+    try:
+        recent = db.get_recent_decisions(limit=10)
+        stats = db.get_accuracy_stats()
+    finally:
+        db.close()
+    # Stored to the millisecond
+    assert recent[0] == ('2025-03-30 02:45:12.346000', 'gemini', 'ERROR', 3000.0, None, None)
+    assert recent[1][1:3] == ('newmodel', 'BUY')
+    assert stats['gemini']['total_decisions'] == 2
+    assert stats['groq']['correct_decisions'] == 0
+
+
+def test_reopening_and_rerunning_is_a_no_op(baseline):
+    TradingDatabase(baseline, maintenance=False).close()
+    migrated = dump(baseline)
+
+    TradingDatabase(baseline, maintenance=False).close()
+    assert dump(baseline) == migrated
+
+    # Calling the conversion again directly must not re-encode the integers
+    conn = sqlite3.connect(baseline)
+    try:
+        migrate_compact_storage(conn)
+        conn.commit()
+    finally:
+        conn.close()
+    assert dump(baseline) == migrated
+
+
+class FailingCommits(sqlite3.Connection):
+    """Connection whose commits start failing, like a process killed mid-migration."""
+
+    commits_left = 0
+
+    def commit(self):
+        if FailingCommits.commits_left == 0:
+            raise KeyboardInterrupt("killed")
+        FailingCommits.commits_left -= 1
+        super().commit()
+
+
+def test_interrupted_migration_resumes_without_duplicates(tmp_path):
+    expected_path = str(tmp_path / 'expected.db')
+    create_baseline(expected_path, repeat=25)
+    TradingDatabase(expected_path, maintenance=False).close()
+
+    path = str(tmp_path / 'interrupted.db')
+    create_baseline(path, repeat=25)
+    # Setup, the first shadow table, then a few market_data chunks
+    FailingCommits.commits_left = 5
+    conn = sqlite3.connect(path, factory=FailingCommits)
+    with pytest.raises(KeyboardInterrupt):
+        migrate_compact_storage(conn, chunk_size=7)
+    conn.close()
+
+    conn = sqlite3.connect(path)
+    try:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == 0
+        assert 0 < conn.execute("SELECT COUNT(*) FROM market_data_v3").fetchone()[0] < 100
+    finally:
+        conn.close()
+
+    TradingDatabase(path, maintenance=False).close()
+    assert dump(path) == dump(expected_path)
+
+
+def test_long_copies_log_their_progress(tmp_path, monkeypatch, caplog):
+    path = str(tmp_path / 'progress.db')
+    create_baseline(path, repeat=10)
+    monkeypatch.setattr(schema, 'MIGRATION_PROGRESS_S', 0)
+    conn = sqlite3.connect(path)
+    try:
+        with caplog.at_level('INFO'):
+            migrate_compact_storage(conn, chunk_size=7)
+    finally:
+        conn.close()
+    progress = [r.getMessage() for r in caplog.records if 'rows copied' in r.getMessage()]
+    assert progress[0].startswith("[db migrate] market_data: 7/40 rows copied")
+    assert any(line.startswith("[db migrate] ai_decisions: 56/60") for line in progress)
+
+
+def test_maintenance_cli_migrates_ahead_of_startup(baseline, capsys):
+    assert maintenance.main([baseline, '--migrate']) == 0
+    assert f"0 -> {SCHEMA_VERSION}" in capsys.readouterr().out
+
+    assert maintenance.main([baseline, '--migrate']) == 0
+    assert f"already at version {SCHEMA_VERSION}" in capsys.readouterr().out
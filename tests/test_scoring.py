@@ -0,0 +1,145 @@
+"""Parity of vectorized decision scoring with the original per-row loop."""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from src.database.encoding import DECISION_CODES, DECISION_NAMES, MS_PER_HOUR
+from src.database.scoring import score_rows
+
+NOW_MS = 1_760_000_000_000
+CURRENT_PRICE = 3000.0
+
+
+def to_datetime(epoch_ms):
+    return datetime(1970, 1, 1) + timedelta(milliseconds=epoch_ms)
+
+
+def legacy_score(rows, current_price, recent_prices, now):
+    """The scoring loop of ``update_decision_accuracy`` as it shipped.
+
+    ``rows`` are ``(id, decision, eth_price, timestamp)`` with text
+    decisions and datetimes; the UPDATE became a returned tuple.
+    """
+    updates = []
+    for decision_id, decision, decision_price, decision_timestamp in rows:
+        # Skip if price is the same (just added)
+        if decision_price == current_price:
+            continue
+
+        # Calculate price change percentage
+        if decision_price > 0:
+            price_change_pct = (
+                (current_price - decision_price) / decision_price) * 100
+        else:
+            # Handle zero price case
+            price_change_pct = 0
+
+        time_passed = now - decision_timestamp
+        hours_passed = time_passed.total_seconds() / 3600
+        hold_threshold = min(1.0 + (hours_passed * 0.15), 3.0)
+
+        if len(recent_prices) >= 2:
+            price_changes = [
+                abs(recent_prices[i] - recent_prices[i+1]
+                    ) / recent_prices[i+1] * 100
+                if recent_prices[i+1] != 0 else 0
+                for i in range(len(recent_prices)-1)
+            ]
+            avg_volatility = sum(price_changes) / len(price_changes)
+            hold_threshold = max(hold_threshold, avg_volatility * 0.25)
+
+            if len(recent_prices) >= 6:
+                older_prices = sum(recent_prices[3:6]) / 3
+                newer_prices = sum(recent_prices[0:3]) / 3
+                trend_change = (
+                    (newer_prices - older_prices) / older_prices * 100) if older_prices != 0 else 0
+                if abs(trend_change) > 2.0:
+                    hold_threshold *= 1.25
+
+        was_correct = False
+        if decision == 'BUY':
+            was_correct = price_change_pct > hold_threshold
+        elif decision == 'SELL':
+            was_correct = price_change_pct < -hold_threshold
+        elif decision == 'HOLD':
+            was_correct = abs(price_change_pct) <= hold_threshold
+
+        updates.append((was_correct, price_change_pct, decision_id))
+    return updates
+
+
+def walk(rng, length, step_pct, drift_pct=0.0):
+    """Newest-first prices of a random walk ending at CURRENT_PRICE."""
+    moves = 1 + (rng.normal(drift_pct, step_pct, length - 1)) / 100
+    prices = [CURRENT_PRICE]
+    for move in moves:
+        prices.append(prices[-1] / move)
+    return prices
+
+
+def regimes(rng):
+    return {
+        'no_history': [],
+        'one_price': [CURRENT_PRICE],
+        'short': walk(rng, 4, 0.5),
+        'calm': walk(rng, 24, 0.2),
+        # Average move far above the 3% cap: the volatility floor wins
+        'volatile': walk(rng, 24, 16.0),
+        # Newest three prices more than 2% above the three before
+        'trending': [3000.0, 2990.0, 2980.0, 2900.0, 2890.0, 2880.0] + walk(rng, 18, 0.2),
+        'zero_price': [3000.0, 0.0, 2990.0, 3010.0, 3000.0, 2995.0, 3005.0],
+    }
+
+
+# Hours from the 1% base through the 3% cap (reached after 13.33h)
+HOURS = [0.0, 0.01, 0.5, 1.0, 2.5, 6.0, 12.0, 13.3, 13.34, 20.0, 72.0]
+# Price moves around every threshold the rules can produce
+MOVES_PCT = [0.0, 0.3, 0.999, 1.0, 1.001, 1.15, 1.9, 2.5, 2.999, 3.0, 3.001, 3.75, 4.0, 9.0, 40.0]
+
+
+def decision_rows(rng):
+    rows = []
+    for decision in ('BUY', 'SELL', 'HOLD'):
+        for hours in HOURS:
+            for move in MOVES_PCT:
+                for sign in (1, -1):
+                    price = CURRENT_PRICE / (1 + sign * move / 100)
+                    timestamp = NOW_MS - int(hours * MS_PER_HOUR)
+                    rows.append((len(rows) + 1, DECISION_CODES[decision], price, timestamp))
+        # Random decisions, plus the same-price skip and a zero price
+        for price in [*rng.uniform(2700, 3300, 40), CURRENT_PRICE, 0.0]:
+            timestamp = NOW_MS - int(rng.uniform(0, 48) * MS_PER_HOUR)
+            rows.append((len(rows) + 1, DECISION_CODES[decision], float(price), timestamp))
+    return rows
+
+
+@pytest.mark.parametrize('regime', list(regimes(np.random.default_rng(0))))
+@pytest.mark.parametrize('seed', range(5))
+def test_score_rows_matches_the_per_row_loop(regime, seed):
+    rng = np.random.default_rng(seed)
+    recent_prices = regimes(rng)[regime]
+    rows = decision_rows(rng)
+    legacy_rows = [(id_, DECISION_NAMES[code], price, to_datetime(ts)) for id_, code, price, ts in rows]
+
+    expected = legacy_score(legacy_rows, CURRENT_PRICE, recent_prices, to_datetime(NOW_MS))
+    actual = score_rows(rows, CURRENT_PRICE, recent_prices, now=NOW_MS)
+    assert actual == expected
+
+
+def test_boundaries_are_exercised():
+    # Guard against the grid above drifting away from the thresholds
+    rng = np.random.default_rng(0)
+    rows = decision_rows(rng)
+    legacy_rows = [(id_, DECISION_NAMES[code], price, to_datetime(ts)) for id_, code, price, ts in rows]
+    for regime, recent_prices in regimes(rng).items():
+        results = legacy_score(legacy_rows, CURRENT_PRICE, recent_prices, to_datetime(NOW_MS))
+        verdicts = {correct for correct, _, _ in results}
+        assert verdicts == {True, False}, regime
+    skipped = sum(1 for row in rows if row[2] == CURRENT_PRICE)
+    assert skipped and len(legacy_score(legacy_rows, CURRENT_PRICE, [], to_datetime(NOW_MS))) == len(rows) - skipped
+
+
+def test_no_rows():
+    assert score_rows([], CURRENT_PRICE, [3000.0, 2990.0]) == []
@@ -0,0 +1,78 @@
+"""Published snapshots: stable ETags, conditional 304s and gzip variants."""
+
+import gzip
+import json
+
+from flask import Request
+from werkzeug.test import EnvironBuilder
+
+from src.web.snapshot import SnapshotPublisher
+
+
+def request(**headers):
+    return Request(EnvironBuilder(path='/api/trading-data', headers=headers).get_environ())
+
+
+def data(price=3000.0):
+    return {'eth_price': price, 'gas_prices': {'low': 10, 'standard': 12}, 'decisions': ['BUY', 'HOLD']}
+
+
+def test_etag_changes_only_when_the_data_does():
+    publisher = SnapshotPublisher(refresh_interval_s=60)
+    assert publisher.current() is None
+    first = publisher.publish(data())
+
+    # Equal data, even as a new object, is the same version
+    again = publisher.publish(data())
+    assert again is first and publisher.current() is first
+
+    changed = publisher.publish(data(3001.0))
+    assert changed.version == first.version + 1
+    assert changed.etag != first.etag
+    assert json.loads(changed.body) == data(3001.0)
+    assert gzip.decompress(changed.gzip_body) == changed.body
+
+    # A restarted process starts counting again, with different ETags
+    restarted = SnapshotPublisher(refresh_interval_s=60).publish(data())
+    assert restarted.version == first.version
+    assert restarted.etag != first.etag
+
+
+def test_if_none_match_gets_a_304():
+    publisher = SnapshotPublisher(refresh_interval_s=60)
+    snapshot = publisher.publish(data())
+
+    response = publisher.response(request())
+    assert response.status_code == 200
+    assert response.get_data() == snapshot.body
+    assert response.get_etag() == (snapshot.etag, False)
+
+    for etag in (snapshot.etag, f"{snapshot.etag}-gzip"):
+        response = publisher.response(request(**{'If-None-Match': f'"{etag}"'}))
+        assert response.status_code == 304
+        assert response.get_data() == b''
+
+    # Unchanged data keeps the 304s coming; new data is sent in full
+    publisher.publish(data())
+    assert publisher.response(request(**{'If-None-Match': f'"{snapshot.etag}"'})).status_code == 304
+    publisher.publish(data(2990.0))
+    response = publisher.response(request(**{'If-None-Match': f'"{snapshot.etag}"'}))
+    assert response.status_code == 200
+    assert json.loads(response.get_data()) == data(2990.0)
+
+
+def test_gzip_variant_and_cache_headers():
+    publisher = SnapshotPublisher(refresh_interval_s=60)
+    snapshot = publisher.publish(data())
+
+    response = publisher.response(request(**{'Accept-Encoding': 'gzip, deflate'}))
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.get_data() == snapshot.gzip_body
+    assert response.get_etag() == (f"{snapshot.etag}-gzip", False)
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    max_age = int(response.headers['Cache-Control'].split('max-age=')[1].split(',')[0])
+    assert 59 <= max_age <= 60
+
+    plain = publisher.response(request(**{'Accept-Encoding': 'gzip;q=0'}))
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.get_data() == snapshot.body
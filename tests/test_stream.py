@@ -0,0 +1,120 @@
+"""StreamHub delta cadence, Last-Event-ID resume and subscriber limit."""
+
+import json
+
+import pytest
+
+from src.web.stream import KEEPALIVE_FRAME, StreamFull, StreamHub
+
+
+def parse(chunk):
+    """``[(id, event, data), ...]`` of the SSE frames in ``chunk``."""
+    events = []
+    for frame in chunk.decode('utf-8').split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in frame.splitlines() if ': ' in line)
+        if 'event' in fields:
+            events.append((fields['id'], fields['event'], json.loads(fields['data'])))
+    return events
+
+
+def state(tick):
+    return {'eth_price': 3000 + tick, 'gas': 12, 'tick': tick}
+
+
+def connect(hub, last_event_id=None):
+    """Subscribe and return ``(stream, frames of the first read)``."""
+    stream = hub.subscribe(last_event_id)
+    assert next(stream).startswith(b"retry: ")
+    return stream, parse(next(stream))
+
+
+def test_deltas_then_a_snapshot_every_n_events():
+    hub = StreamHub(snapshot_every=3)
+    hub.publish(state(0))
+    stream, first = connect(hub)
+    assert [event for _, event, _ in first] == ['snapshot']
+
+    for tick in range(1, 6):
+        hub.publish(state(tick))
+    events = parse(next(stream))
+    assert [event for _, event, _ in events] == ['delta', 'delta', 'snapshot', 'delta', 'delta']
+    # Deltas carry only the changed fields, snapshots everything
+    assert events[0][2] == {'eth_price': 3001, 'tick': 1}
+    assert events[2][2] == state(3)
+    stream.close()
+
+
+def test_unchanged_state_is_not_published():
+    hub = StreamHub()
+    assert hub.publish(state(0)) == 1
+    assert hub.publish(state(0)) is None
+    assert hub.publish(state(1)) == 2
+
+
+def test_resume_replays_exactly_the_missed_events():
+    hub = StreamHub(snapshot_every=100)
+    hub.publish(state(0))
+    stream, first = connect(hub)
+    last_seen = first[-1][0]
+    stream.close()
+
+    for tick in range(1, 4):
+        hub.publish(state(tick))
+    resumed, events = connect(hub, last_seen)
+    assert [(event, data['tick']) for _, event, data in events] == [('delta', 1), ('delta', 2), ('delta', 3)]
+    assert hub.stats['resyncs'] == 0
+    resumed.close()
+
+
+def test_resume_past_the_history_falls_back_to_a_snapshot():
+    hub = StreamHub(history_size=2, snapshot_every=100)
+    hub.publish(state(0))
+    stream, first = connect(hub)
+    last_seen = first[-1][0]
+    stream.close()
+
+    for tick in range(1, 5):
+        hub.publish(state(tick))
+    resumed, events = connect(hub, last_seen)
+    assert [(event, data) for _, event, data in events] == [('snapshot', state(4))]
+    assert hub.stats['resyncs'] == 1
+    resumed.close()
+
+
+@pytest.mark.parametrize('last_event_id', ['ffffffff-1', 'garbage', ''])
+def test_unknown_ids_get_a_snapshot(last_event_id):
+    hub = StreamHub()
+    hub.publish(state(0))
+    hub.publish(state(1))
+    stream, events = connect(hub, last_event_id)
+    assert [(event, data) for _, event, data in events] == [('snapshot', state(1))]
+    stream.close()
+
+
+def test_subscribers_beyond_the_limit_are_rejected():
+    hub = StreamHub(max_subscribers=2)
+    hub.publish(state(0))
+    streams = [connect(hub)[0] for _ in range(2)]
+    assert hub.subscribers == 2
+
+    with pytest.raises(StreamFull):
+        hub.subscribe()
+    assert hub.stats['rejected'] == 1
+
+    # A dropped client frees its slot
+    streams.pop().close()
+    assert hub.subscribers == 1
+    streams.append(connect(hub)[0])
+    for stream in streams:
+        stream.close()
+    assert hub.subscribers == 0
+
+
+def test_idle_stream_sends_keepalives_and_ends_on_close():
+    hub = StreamHub(keepalive_s=0.01)
+    hub.publish(state(0))
+    stream, _ = connect(hub)
+    assert next(stream) == KEEPALIVE_FRAME
+    hub.close()
+    assert list(stream) == []
+    assert hub.subscribers == 0
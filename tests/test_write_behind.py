@@ -0,0 +1,135 @@
+"""WriteBehindQueue flush barrier, drain on close, triggers and bad rows."""
+
+import sqlite3
+import time
+
+import pytest
+
+from src.database.db import TradingDatabase
+from src.database.pool import ConnectionPool
+from src.database.write_behind import WriteBehindQueue
+
+INSERT = "INSERT INTO items (id, value) VALUES (?, ?)"
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'queue.db')
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, value TEXT NOT NULL)")
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def make_queue(db_path):
+    pools, queues = [], []
+
+    def make(**kwargs):
+        pool = ConnectionPool(db_path)
+        pools.append(pool)
+        queues.append(WriteBehindQueue(pool, **kwargs))
+        return queues[-1]
+
+    yield make
+    for writer in queues:
+        writer.close()
+    for pool in pools:
+        pool.close()
+
+
+def stored(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return [row[0] for row in conn.execute("SELECT id FROM items ORDER BY id")]
+    finally:
+        conn.close()
+
+
+def eventually(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_flush_makes_queued_rows_visible(db_path, make_queue):
+    writer = make_queue(batch_size=1000, flush_interval_ms=60_000)
+    for i in range(10):
+        writer.submit(INSERT, (i, f"row {i}"))
+    assert stored(db_path) == []
+    assert writer.pending == 10
+
+    assert writer.flush(timeout=5)
+    assert stored(db_path) == list(range(10))
+    assert writer.pending == 0
+
+
+def test_close_drains_before_stopping(db_path, make_queue):
+    writer = make_queue(batch_size=1000, flush_interval_ms=60_000)
+    for i in range(250):
+        writer.submit(INSERT, (i, "row"))
+    writer.close()
+
+    assert stored(db_path) == list(range(250))
+    assert not writer._thread.is_alive()
+    with pytest.raises(RuntimeError):
+        writer.submit(INSERT, (999, "late"))
+
+
+def test_bad_row_falls_back_to_row_by_row(db_path, make_queue):
+    writer = make_queue(batch_size=1000, flush_interval_ms=60_000)
+    writer.submit(INSERT, (1, "ok"))
+    writer.submit(INSERT, (2, None))    # NOT NULL violation
+    writer.submit(INSERT, (3, "ok"))
+    writer.submit(INSERT, (1, "dup"))   # Primary key violation
+    writer.submit(INSERT, (4, "ok"))
+    assert writer.flush(timeout=5)
+
+    assert stored(db_path) == [1, 3, 4]
+    assert writer.stats['errors'] == 2
+    assert writer.stats['rows'] == 3
+    assert writer.pending == 0
+
+
+def test_full_batch_is_written_without_a_flush(db_path, make_queue):
+    writer = make_queue(batch_size=5, flush_interval_ms=60_000)
+    for i in range(5):
+        writer.submit(INSERT, (i, "row"))
+    # Counted as written only after the batch's stats are updated
+    assert eventually(lambda: writer.pending == 0)
+    assert len(stored(db_path)) == 5
+    assert writer.stats['batches'] == 1
+
+    # A partial batch waits for the interval (here: a minute)
+    for i in range(5, 8):
+        writer.submit(INSERT, (i, "row"))
+    time.sleep(0.3)
+    assert len(stored(db_path)) == 5
+
+
+def test_partial_batch_is_written_after_the_interval(db_path, make_queue):
+    writer = make_queue(batch_size=1000, flush_interval_ms=50)
+    started = time.monotonic()
+    for i in range(3):
+        writer.submit(INSERT, (i, "row"))
+    assert eventually(lambda: writer.pending == 0)
+    assert time.monotonic() - started >= 0.05
+    assert len(stored(db_path)) == 3
+    assert writer.stats['batches'] == 1
+
+
+def test_trading_database_close_persists_queued_writes(tmp_path):
+    path = str(tmp_path / 'trading.db')
+    db = TradingDatabase(path, write_behind=True, write_flush_ms=60_000, maintenance=False)
+    for i in range(20):
+        db.store_ai_decision('gemini', 'BUY', 3000.0 + i, f"0x{i:040x}")
+    db.close()
+
+    conn = sqlite3.connect(path)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM ai_decisions").fetchone()[0] == 20
+    finally:
+        conn.close()